@@ -2,33 +2,98 @@ import sys
 import os
 import os.path
 
-try:
-	import maya.standalone
-	import maya.cmds as mc
-	import maya.mel
-except:
-	print >> sys.stderr, "Please use the 'mayapy' executable included in your installation of Maya to run MsvTranslator.py"
-	exit(1)
+kOutputDirFlag = "-out"
+kOutputDirFlagLong = "-outputDir"
+kOutputTypeFlag = "-typ"
+kOutputTypeFlagLong = "-type"
+kGroupSizeFlag = "-gs"
+kGroupSizeFlagLong = "-groupSize"
+kHeadlessFlag = "-hl"
+kHeadlessFlagLong = "-headless"
+kJobsFlag = "-j"
+kJobsFlagLong = "-jobs"
+kCostModelFlag = "-cm"
+kCostModelFlagLong = "-costModel"
+kResumeFlag = "-rs"
+kResumeFlagLong = "-resume"
+kRetriesFlag = "-rt"
+kRetriesFlagLong = "-retries"
+kProfileFlag = "-prf"
+kProfileFlagLong = "-profile"
+kMemoryReportFlag = "-mr"
+kMemoryReportFlagLong = "-memoryReport"
+# Internal: write one shard, "-shard ids file"
+kShardFlag = "-shard"
+
+# The msvSimImport flags the -headless writer understands. They are
+# spelled out here since MsvSimImportCmd can't be imported without Maya.
+kMasFileFlags = ( "-mas", "-masFile" )
+kSimDirFlags = ( "-sd", "-simDir" )
+kSimTypeFlags = ( "-st", "-simType" )
+kCallsheetFlags = ( "-cal", "-callsheet" )
+kSelectionFlags = ( "-sel", "-selection" )
+kFrameStepFlags = ( "-fs", "-frameStep" )
+kRangeFlags = ( "-r", "-range" )
+kSkinTypeFlags = ( "-skt", "-skinType" )
+kLoadGeometryFlags = ( "-lg", "-loadGeometry" )
+
+# Seconds to wait before running a failed shard again, doubled with each
+# attempt
+kRetryBackoff = 10.0
+# Times a failed shard is run again when -resume is given without
+# -retries. A fresh run reports failures at once, since they are usually
+# deterministic (a bad -simDir, say).
+kResumeRetries = 2
+
+_headless = kHeadlessFlag in sys.argv or kHeadlessFlagLong in sys.argv
+
+if not _headless:
+	try:
+		import maya.standalone
+		import maya.cmds as mc
+		import maya.mel
+	except:
+		print >> sys.stderr, "Please use the 'mayapy' executable included in your installation of Maya to run MsvTranslator.py, or use the -headless flag"
+		exit(1)
 
 try:
 	import ns.py.Timer as Timer
-	import ns.maya.msv.MsvSimImportCmd as MsvSimImportCmd
+	import ns.py.Scheduler as Scheduler
+	import ns.py.Manifest as Manifest
+	import ns.py.Memory as Memory
+	import ns.py.Json as Json
+	import ns.py.Profiler as Profiler
 	import ns.bridge.io.MasReader as MasReader
+	import ns.bridge.io.MaWriter as MaWriter
+	import ns.bridge.data.Scene as Scene
+	import ns.bridge.data.Sim as Sim
+	import ns.bridge.data.Selection as Selection
+	import ns.bridge.data.Partition as Partition
 except:
 	print >> sys.stderr, "Please set your PYTHONPATH to include the MsvTools 'python' directory"
 	exit(1)
 
-kOutputDirFlag = "-out"
-kOutputDirFlagLong = "-outputDir"
-kOutputTypeFlag = "-typ"
-kOutputTypeFlagLong = "-type"
-kGroupSizeFlag = "-gs"
-kGroupSizeFlagLong = "-groupSize"
-
 def parseArgs():
 	flags = ""
 	args = { 'groupSize' : -1,
-			 'outputType' : 'mayaAscii' }
+			 'outputType' : 'mayaAscii',
+			 'headless' : False,
+			 'jobs' : 0,
+			 'shard' : None,
+			 'costModel' : "",
+			 'resume' : False,
+			 'retries' : None,
+			 'profile' : "",
+			 'memoryReport' : "",
+			 'masFile' : "",
+			 'outputDir' : "" }
+	# Values of the flags passed through to msvSimImport, by flag
+	simFlags = {}
+	simFlag = ""
+	# The agents to import are chosen by MsvTranslator, which passes
+	# explicit -range ids to each shard, so user selections are not
+	# passed through
+	passThrough = True
 	argc = len(sys.argv)
 	i = 1
 	while i < argc:
@@ -42,30 +107,200 @@ def parseArgs():
 		elif arg == kOutputTypeFlag or arg == kOutputTypeFlagLong:
 			i += 1
 			args['outputType'] = sys.argv[i]
+		elif arg == kHeadlessFlag or arg == kHeadlessFlagLong:
+			args['headless'] = True
+		elif arg == kJobsFlag or arg == kJobsFlagLong:
+			i += 1
+			args['jobs'] = int(sys.argv[i])
+		elif arg == kCostModelFlag or arg == kCostModelFlagLong:
+			i += 1
+			args['costModel'] = sys.argv[i]
+		elif arg == kResumeFlag or arg == kResumeFlagLong:
+			args['resume'] = True
+		elif arg == kRetriesFlag or arg == kRetriesFlagLong:
+			i += 1
+			args['retries'] = int(sys.argv[i])
+		elif arg == kProfileFlag or arg == kProfileFlagLong:
+			i += 1
+			args['profile'] = sys.argv[i]
+		elif arg == kMemoryReportFlag or arg == kMemoryReportFlagLong:
+			i += 1
+			args['memoryReport'] = sys.argv[i]
+		elif arg == kShardFlag:
+			args['shard'] = ( sys.argv[i+1], sys.argv[i+2] )
+			i += 2
 		elif arg[0] == '-':
-			flags += " %s" % arg
+			simFlag = arg
+			simFlags.setdefault(simFlag, [])
+			passThrough = arg not in kSelectionFlags and arg not in kRangeFlags
+			if passThrough:
+				flags += " %s" % arg
 		else:
-			try:
-				# This will throw an exception if arg is not the
-				# string representation of an int or a float
-				#
-				float(arg)
-				flags += ' %s' % arg
-			except:
-				flags += ' \\"%s\\"' % arg
+			if simFlag:
+				simFlags[simFlag].append(arg)
+			if passThrough:
+				try:
+					# This will throw an exception if arg is not the
+					# string representation of an int or a float
+					#
+					float(arg)
+					flags += ' %s' % arg
+				except:
+					flags += ' \\"%s\\"' % arg
 
 		# The -masFile is passed through to the command, but we
 		# also need it to query the number of agents and correctly
 		# divide up the load
 		#		
-		if (arg == MsvSimImportCmd.kMasFileFlagLong or
-		    arg == MsvSimImportCmd.kMasFileFlag):
+		if arg in kMasFileFlags:
 			args['masFile'] = sys.argv[i+1]
 			
 		i += 1
-		
+	
+	if args['retries'] is None:
+		if args['resume']:
+			args['retries'] = kResumeRetries
+		else:
+			args['retries'] = 0
+	
+	args['simFlags'] = simFlags
 	return (args, flags)
 
+def _flagValues(simFlags, names):
+	values = []
+	for name in names:
+		values.extend(simFlags.get(name, []))
+	return values
+
+def _flagValue(simFlags, names, default):
+	values = _flagValues(simFlags, names)
+	if values:
+		return values[-1]
+	return default
+
+def writeHeadless(args, rangeStr, fileName):
+	'''Write the skeletons and baked animation of the agents in 'rangeStr'
+	   straight to the Maya ASCII file 'fileName', without Maya.'''
+	simFlags = args['simFlags']
+	scene = Scene.Scene()
+	scene.setMas(args['masFile'])
+	Memory.sample("scene")
+	simType = _flagValue(simFlags, kSimTypeFlags, "amc")
+	selections = []
+	if not rangeStr:
+		rangeStr = _flagValue(simFlags, kRangeFlags, "")
+		selections = _flagValues(simFlags, kSelectionFlags)
+	sim = Sim.Sim(scene,
+				  _flagValue(simFlags, kSimDirFlags, ""),
+				  ".%s" % simType.strip("."),
+				  _flagValue(simFlags, kCallsheetFlags, ""),
+				  selections,
+				  rangeStr)
+	Memory.sample("sim")
+	frameStep = int(_flagValue(simFlags, kFrameStepFlags, "1"))
+	
+	fileHandle = open(fileName, "w")
+	try:
+		MaWriter.write(fileHandle, sim.agents(), frameStep, os.path.basename(fileName))
+	finally:
+		fileHandle.close()
+	Memory.sample("write")
+	
+	if args['memoryReport']:
+		Memory.write(shardMemoryReport(fileName), sim.memoryUsage())
+
+def userSelection(args, mas):
+	'''Return the agents chosen with the -selection and -range flags as a
+	   Selection, None if all of the agents should be imported.'''
+	simFlags = args['simFlags']
+	names = _flagValues(simFlags, kSelectionFlags)
+	ranges = _flagValues(simFlags, kRangeFlags)
+	if not names and not ranges:
+		return None
+	selection = Selection.Selection()
+	for name in names:
+		try:
+			selection = selection.union(mas.selectionGroup.selection(name))
+		except KeyError:
+			print >> sys.stderr, "Warning: %s is not a valid selection." % name
+	for rangeStr in ranges:
+		selection.addRanges(rangeStr.split())
+	return selection
+
+def planShards(args, numShards, model):
+	'''Divide the agents into at most 'numShards' Partition.Shards that
+	   should each take about as long to import.'''
+	simFlags = args['simFlags']
+	scene = Scene.Scene()
+	scene.setMas(args['masFile'])
+	simType = ".%s" % _flagValue(simFlags, kSimTypeFlags, "amc").strip(".")
+	entries = Partition.inventory(_flagValue(simFlags, kSimDirFlags, ""),
+								  simType,
+								  _flagValue(simFlags, kCallsheetFlags, ""),
+								  scene.mas().numAgents,
+								  userSelection(args, scene.mas()))
+	agentSpecs = {}
+	for agentSpec in scene.agentSpecs():
+		agentSpecs[agentSpec.agentType] = agentSpec
+	loadGeometry = _flagValue(simFlags, kLoadGeometryFlags, "1").lower() not in ( "0", "false", "off", "no" )
+	return Partition.plan(entries,
+						  agentSpecs,
+						  numShards,
+						  model,
+						  _flagValue(simFlags, kSkinTypeFlags, "smooth"),
+						  loadGeometry)
+
+def planRecords(args, mas, groupSize, model, basename, fileSuffix):
+	'''Return a (name, ids, number of agents, estimated cost, features,
+	   output file) tuple for each shard. The agents are divided into as
+	   many shards as there would be groups of -groupSize agents, but
+	   balanced by their estimated cost rather than by id, so that no one
+	   job holds up the rest.'''
+	planned = []
+	numShards = (mas.numAgents + groupSize - 1) / groupSize
+	selection = userSelection(args, mas)
+	if numShards > 1 or selection is not None:
+		planned = planShards(args, numShards, model)
+		if not planned and selection is not None:
+			# A shard with no ids would import every agent
+			raise Exception("The -selection and -range flags match no agents.")
+	
+	if len(planned) > 1:
+		result = []
+		for i in range(len(planned)):
+			name = "%s_%d" % (basename, i)
+			shardFile = "%s/%s.%s" % (args['outputDir'], name, fileSuffix)
+			print >> sys.stderr, "### %s: %d agents, estimated %f seconds" % (name, len(planned[i].ids), planned[i].cost)
+			result.append((name, planned[i].ranges(), len(planned[i].ids), planned[i].cost, planned[i].features, shardFile))
+		return result
+	
+	shardFile = "%s/%s.%s" % (args['outputDir'], basename, fileSuffix)
+	if planned:
+		return [ (basename, planned[0].ranges(), len(planned[0].ids), planned[0].cost, planned[0].features, shardFile) ]
+	return [ (basename, "", mas.numAgents, 0.0, None, shardFile) ]
+
+def throughputSummary(manifest):
+	'''Return lines reporting how fast each finished shard imported its
+	   agents.'''
+	lines = [ "Throughput:" ]
+	totalAgents = 0
+	totalTime = 0.0
+	for record in manifest.records:
+		if Manifest.kDone != record.status:
+			lines.append("    %s: %s" % (record.name, record.status))
+			continue
+		agents = int(record.params.get("agents", "0"))
+		elapsed = record.elapsed()
+		rate = 0.0
+		if elapsed > 0.0:
+			rate = agents / elapsed
+		lines.append("    %s: %d agents in %.2f seconds, %.2f agents/second, %d attempts" % (record.name, agents, elapsed, rate, record.attempts))
+		totalAgents += agents
+		totalTime += elapsed
+	if totalTime > 0.0:
+		lines.append("    all: %d agents in %.2f job seconds, %.2f agents/second" % (totalAgents, totalTime, totalAgents / totalTime))
+	return lines
+
 def mayaFileSuffix(outputType):
 	if outputType == "mayaAscii":
 		return "ma"
@@ -74,11 +309,92 @@ def mayaFileSuffix(outputType):
 	else:
 		raise Exception("%s is not a valid Maya file type." % outputType)
 
+def shardProfile(fileName):
+	'''Return the base path of the profile of the shard saved to
+	   'fileName'.'''
+	return "%s.profile" % os.path.splitext(fileName)[0]
+
+def shardMemoryReport(fileName):
+	'''Return the memory report of the shard saved to 'fileName'.'''
+	return "%s.memory.json" % os.path.splitext(fileName)[0]
+
+def writeMemoryReport(fileName, manifest):
+	'''Gather the memory reports of the shards into one JSON file, by shard
+	   name.'''
+	reports = []
+	for record in manifest.records:
+		shardReport = shardMemoryReport(record.outputFile)
+		if not os.path.exists(shardReport):
+			continue
+		fileHandle = open(shardReport, "r")
+		try:
+			reports.append("%s:%s" % (Json.toJson(record.name), fileHandle.read().strip()))
+		finally:
+			fileHandle.close()
+	fileHandle = open(fileName, "w")
+	try:
+		fileHandle.write('{"shards":{%s}}\n' % ",\n".join(reports))
+	finally:
+		fileHandle.close()
+
+def shardJob(args, flags, name, ids, fileName, logFile):
+	'''Return the Scheduler.Job 'name' that imports the agents with ids
+	   'ids' and saves them to 'fileName'.'''
+	if args['headless']:
+		# Run this script again to write the one shard
+		command = [ sys.executable, os.path.abspath(__file__) ] + sys.argv[1:]
+		command += [ kShardFlag, ids, fileName ]
+		return Scheduler.Job(name, command, logFile)
+	
+	# Ideally we could do this as a standalone script using
+	# maya.standalone. However, for some reason, when nsImportMsv
+	# is run as part of a standalone script it doesn't work right.
+	# For example, extra anim curves get created for ry and rz
+	# when only rx is keyed, and the keyed values are not correctly
+	# saved out to disk. Running it as part of maya batch, however,
+	# seems to work fine. This may be because nsImportMsv is implemented
+	# using the python interface to MEL as opposed to the API and 
+	# maya.standalone is, perhaps, intended for use with the python
+	# API bindings (although this is pure speculation).
+	#
+	rangeStr = ""
+	if ids:
+		rangeStr = ' -range \\"%s\\"' % ids
+	if args['profile']:
+		rangeStr += ' -profile \\"%s\\"' % shardProfile(fileName)
+	if args['memoryReport']:
+		rangeStr += ' -memoryReport \\"%s\\"' % shardMemoryReport(fileName)
+	mel = 'loadPlugin \\"MsvTools.py\\";'
+	mel += ' msvSimImport%s%s;' % (rangeStr, flags)
+	mel += ' file -rename \\"%s\\";' % fileName
+	mel += ' file -f -uc 0 -type \\"%s\\" -save;' % args['outputType']
+	
+	batchCmd = 'maya -batch -command "%s"' % mel
+	return Scheduler.Job(name, batchCmd, logFile)
+
 def main():
 	Timer.push("MsvTranslator")
 	
 	(args, flags) = parseArgs()
 	
+	if args['shard']:
+		# Worker process started by shardJob()
+		(ids, fileName) = args['shard']
+		if args['profile']:
+			Profiler.enable()
+			Profiler.push("MsvTranslator.shard")
+		if args['memoryReport']:
+			Memory.reset()
+			Memory.enable()
+			Memory.sample("start")
+		try:
+			writeHeadless(args, ids, fileName)
+		finally:
+			if args['profile']:
+				Profiler.pop()
+				Profiler.export(shardProfile(fileName))
+		exit(0)
+	
 	if not args['masFile'] or not args['outputDir']:
 		raise Exception("Both the -masFile and -outputDir flags must be specified.")
 	
@@ -86,69 +402,142 @@ def main():
 	basename = os.path.splitext(os.path.basename(args['masFile']))[0]
 
 	fileSuffix = mayaFileSuffix( args['outputType'] )
+	if args['headless'] and "ma" != fileSuffix:
+		raise Exception("Only mayaAscii files can be written with the -headless flag.")
 	groupSize = args['groupSize']
 	if groupSize < 1:
-		groupSize = mas.numAgents
+		groupSize = max(1, mas.numAgents)
+	
+	model = Partition.CostModel()
+	if args['costModel'] and os.path.isfile(args['costModel']):
+		model.read(args['costModel'])
 	
 	finalLog = "%s/%s.log" % (args['outputDir'], basename)
-	tempLog = "%s/%s.temp.log" % (args['outputDir'], basename)
-	
-	for group in range(1, mas.numAgents+1, groupSize ):
-		currentFile = ""
-		rangeStr = ""
-		if groupSize < mas.numAgents:
-			currentFile = "%s/%s_%d.%s" % (args['outputDir'], basename, group, fileSuffix)
-			if groupSize == 1:
-				rangeStr = ' -range \\"%s\\"' % str(group)
-			else:
-				rangeStr = ' -range \\"%d-%d\\"' % (group, group + groupSize - 1)
+	outputFile = "%s/%s.%s" % (args['outputDir'], basename, fileSuffix)
+	
+	# The manifest records every shard and how it went, so that an
+	# interrupted or partly failed batch can be finished with -resume
+	#
+	manifestFile = "%s/%s.manifest" % (args['outputDir'], basename)
+	manifest = None
+	if args['resume']:
+		if os.path.isfile(manifestFile):
+			manifest = Manifest.read(manifestFile)
+			if manifest.params.get("flags", "") != flags.strip():
+				print >> sys.stderr, "Warning: the flags differ from those in %s, resuming with the new flags." % manifestFile
 		else:
-			currentFile = "%s/%s.%s" % (args['outputDir'], basename, fileSuffix)
-
-		# Ideally we could do this as a standalone script using
-		# maya.standalone. However, for some reason, when nsImportMsv
-		# is run as part of a standalone script it doesn't work right.
-		# For example, extra anim curves get created for ry and rz
-		# when only rx is keyed, and the keyed values are not correctly
-		# saved out to disk. Running it as part of maya batch, however,
-		# seems to work fine. This may be because nsImportMsv is implemented
-		# using the python interface to MEL as opposed to the API and 
-		# maya.standalone is, perhaps, intended for use with the python
-		# API bindings (although this is pure speculation).
-		#
-		
-		mel = 'cmdFileOutput -o \\"%s\\";' % tempLog
-		mel += ' loadPlugin \\"MsvTools.py\\";'
-		mel += ' msvSimImport%s%s;' % (rangeStr, flags)
-		mel += ' file -rename \\"%s\\";' % currentFile
-		mel += ' file -f -uc 0 -type \\"%s\\" -save;' % args['outputType']
-		mel += ' cmdFileOutput -closeAll;'
-	
-		batchCmd = 'maya -batch -command "%s"' % mel
-		print >> sys.stderr, batchCmd
-		os.system(batchCmd)
-		
-		tempLogFile = open( tempLog, "r" )
-		finalLogFile = open( finalLog, "a" )
-		finalLogFile.writelines( tempLogFile.readlines() )
-		finalLogFile.close()
-		tempLogFile.close()
-		
-	if groupSize < mas.numAgents:
-		mel = 'cmdFileOutput -o \\"%s\\";' % tempLog
-		mel += ' msvCombiner( \\"%s\\", \\"%s\\", \\"%s\\", %d, %d );' % (args['outputDir'], basename, args['outputType'], groupSize, mas.numAgents)
-		mel += ' cmdFileOutput -closeAll;'
-		batchCmd = 'maya -batch -command "%s"' % mel
-		print >> sys.stderr, batchCmd
-		os.system(batchCmd)
-		
-		tempLogFile = open( tempLog, "r" )
-		finalLogFile = open( finalLog, "a" )
-		finalLogFile.writelines( tempLogFile.readlines() )
+			print >> sys.stderr, "Warning: %s not found, starting from scratch." % manifestFile
+	
+	# Features of each planned shard by name, to calibrate the cost model
+	features = {}
+	if not manifest:
+		manifest = Manifest.Manifest()
+		manifest.params["flags"] = flags.strip()
+		if args['profile']:
+			Profiler.enable()
+			Profiler.push("MsvTranslator.plan")
+		try:
+			plans = planRecords(args, mas, groupSize, model, basename, fileSuffix)
+		finally:
+			if args['profile']:
+				Profiler.pop()
+		for (name, ids, numAgents, cost, shardFeatures, shardFile) in plans:
+			record = manifest.add(Manifest.Record(name))
+			record.params["ids"] = ids
+			record.params["agents"] = "%d" % numAgents
+			record.params["cost"] = "%f" % cost
+			record.outputFile = shardFile
+			record.logFile = "%s/%s.job.log" % (args['outputDir'], name)
+			if shardFeatures:
+				features[name] = shardFeatures
+	
+	# Each shard is imported and saved by its own job, the jobs run
+	# concurrently
+	#
+	scheduler = Scheduler.Scheduler(args['jobs'])
+	records = {}
+	for record in manifest.records:
+		if args['resume'] and record.complete():
+			print >> sys.stderr, "### %s already done, skipping" % record.name
+			continue
+		record.status = Manifest.kPending
+		job = scheduler.add(shardJob(args, flags, record.name, record.params.get("ids", ""), record.outputFile, record.logFile))
+		records[job] = record
+	Manifest.write(manifestFile, manifest)
+	
+	def finished(job):
+		record = records[job]
+		record.update(job)
+		Manifest.write(manifestFile, manifest)
+		status = "done"
+		if not job.succeeded():
+			status = "FAILED (%d)" % job.returnCode
+		print >> sys.stderr, "### %s %s in %f seconds" % (record.name, status, job.elapsed())
+	
+	print >> sys.stderr, "### Running %d jobs on %d workers" % (len(scheduler.jobs), scheduler.numWorkers)
+	failed = [ records[job] for job in scheduler.run(finished, retries=args['retries'], backoff=kRetryBackoff) ]
+	
+	if args['costModel'] and features:
+		# Refine the cost model with how long the shards really took
+		observations = []
+		for job in scheduler.jobs:
+			if job.succeeded() and records[job].name in features:
+				observations.append((features[records[job].name], job.elapsed()))
+		model.calibrate(observations)
+		model.write(args['costModel'])
+	
+	summary = throughputSummary(manifest)
+	
+	if args['profile']:
+		# Merge the profiles of the shards with the planning done here
+		for record in manifest.records:
+			profile = "%s.prof" % shardProfile(record.outputFile)
+			if os.path.exists(profile):
+				Profiler.load(profile)
+		Profiler.export(args['profile'])
+		summary.append("Profile written to %s.txt" % args['profile'])
+	
+	if args['memoryReport']:
+		writeMemoryReport(args['memoryReport'], manifest)
+		summary.append("Memory report written to %s" % args['memoryReport'])
+	
+	# Gather the job logs, in order, into the final log. The job logs
+	# are kept for the manifest.
+	#
+	finalLogFile = open( finalLog, "w" )
+	try:
+		for record in manifest.records:
+			if not os.path.exists( record.logFile ):
+				continue
+			jobLogFile = open( record.logFile, "r" )
+			try:
+				finalLogFile.write( "### %s\n" % record.name )
+				finalLogFile.writelines( jobLogFile.readlines() )
+			finally:
+				jobLogFile.close()
+		for line in summary:
+			finalLogFile.write( "### %s\n" % line )
+	finally:
 		finalLogFile.close()
-		tempLogFile.close()
-		
-	os.remove( tempLog )
+	
+	incomplete = [ record for record in manifest.records if Manifest.kDone != record.status ]
+	if len(manifest.records) > 1:
+		# Instead of importing every shard into one big scene, the
+		# output scene just references them. It is only written once
+		# every shard has been, so that it never references missing files.
+		#
+		if "ma" != fileSuffix:
+			outputFile = "%s/%s.ma" % (args['outputDir'], basename)
+		if incomplete and os.path.exists(outputFile):
+			# Left over from an earlier run
+			os.remove(outputFile)
+	if len(manifest.records) > 1 and not incomplete:
+		shards = [ (record.name, record.outputFile) for record in manifest.records ]
+		masterFile = open( outputFile, "w" )
+		try:
+			MaWriter.writeReferences( masterFile, shards, args['outputType'], os.path.basename(outputFile) )
+		finally:
+			masterFile.close()
 		
 	Timer.pop()
 		
@@ -156,13 +545,27 @@ def main():
 	print >> sys.stderr, "######################################################################"
 	print >> sys.stderr, "### Done in %f seconds" % Timer.elapsed("MsvTranslator")
 	print >> sys.stderr, "### %s" % args['masFile']
-	print >> sys.stderr, "### converted to"
-	print >> sys.stderr, "### %s/%s.%s" % (args['outputDir'], basename, fileSuffix)
+	if incomplete:
+		print >> sys.stderr, "### was NOT converted to"
+	else:
+		print >> sys.stderr, "### converted to"
+	print >> sys.stderr, "### %s" % outputFile
+	print >> sys.stderr, "###"
+	for line in summary:
+		print >> sys.stderr, "### %s" % line
 	print >> sys.stderr, "###"
+	if failed:
+		print >> sys.stderr, "### %d of %d jobs FAILED:" % (len(failed), len(scheduler.jobs))
+		for record in failed:
+			print >> sys.stderr, "###     %s, see %s" % (record.name, record.logFile)
+		print >> sys.stderr, "### Run again with %s to retry them and write %s." % (kResumeFlagLong, outputFile)
+		print >> sys.stderr, "###"
 	print >> sys.stderr, "### See %s for a log of results." % finalLog
 	print >> sys.stderr, "######################################################################"
 	print >> sys.stderr, ""
 	
+	if failed:
+		exit(1)
 	exit(0)
     
 if __name__ == "__main__":
@@ -36,6 +36,28 @@ import ns.tests.TestMutateTimer as TestMutateTimer
 import ns.tests.TestMutateInput as TestMutateInput
 import ns.tests.TestMutateConnections as TestMutateConnections
 import ns.tests.TestFlipInputs as TestFlipInputs
+import ns.tests.TestCDLReader as TestCDLReader
+import ns.tests.TestAgent as TestAgent
+import ns.tests.TestCallsheetReader as TestCallsheetReader
+import ns.tests.TestSelection as TestSelection
+import ns.tests.TestSimData as TestSimData
+import ns.tests.TestSpatialIndex as TestSpatialIndex
+import ns.tests.TestFrustum as TestFrustum
+import ns.tests.TestLevelOfDetail as TestLevelOfDetail
+import ns.tests.TestVariant as TestVariant
+import ns.tests.TestMayaSkeleton as TestMayaSkeleton
+import ns.tests.TestMayaSkin as TestMayaSkin
+import ns.tests.TestMayaAnimCurves as TestMayaAnimCurves
+import ns.tests.TestSkinChunks as TestSkinChunks
+import ns.tests.TestChunkCache as TestChunkCache
+import ns.tests.TestMayaEdits as TestMayaEdits
+import ns.tests.TestMaWriter as TestMaWriter
+import ns.tests.TestScheduler as TestScheduler
+import ns.tests.TestPartition as TestPartition
+import ns.tests.TestManifest as TestManifest
+import ns.tests.TestProfiler as TestProfiler
+import ns.tests.TestMemory as TestMemory
+import ns.tests.TestSynthetic as TestSynthetic
 
 if __name__ == '__main__':
 	try:
@@ -50,8 +72,29 @@ if __name__ == '__main__':
 				   TestMutateTimer.suite,
 				   TestMutateInput.suite,
 				   TestMutateConnections.suite,
-				   TestFlipInputs.suite ]
-		suites = [ TestFlipInputs.suite ]
+				   TestFlipInputs.suite,
+				   TestCDLReader.suite,
+				   TestAgent.suite,
+				   TestCallsheetReader.suite,
+				   TestSelection.suite,
+				   TestSimData.suite,
+				   TestSpatialIndex.suite,
+				   TestFrustum.suite,
+				   TestLevelOfDetail.suite,
+				   TestVariant.suite,
+				   TestMayaSkeleton.suite,
+				   TestMayaSkin.suite,
+				   TestMayaAnimCurves.suite,
+				   TestSkinChunks.suite,
+				   TestChunkCache.suite,
+				   TestMayaEdits.suite,
+				   TestMaWriter.suite,
+				   TestScheduler.suite,
+				   TestPartition.suite,
+				   TestManifest.suite,
+				   TestProfiler.suite,
+				   TestMemory.suite,
+				   TestSynthetic.suite ]
 		allTests = unittest.TestSuite(suites)
 
 		unittest.TextTestRunner(verbosity=2).run(allTests)
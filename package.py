@@ -19,11 +19,19 @@ _pyFiles = [
 		"ns/py/Errors.py",
 		"ns/py/RollbackImporter.py",
 		"ns/py/Timer.py",
+		"ns/py/Scheduler.py",
+		"ns/py/Manifest.py",
+		"ns/py/Profiler.py",
+		"ns/py/Memory.py",
+		"ns/py/FileUtil.py",
+		"ns/py/Json.py",
 		"ns/maya/Progress.py",
 		"ns/maya/live/MayaServer.py",
 		"ns/bridge/data/Scene.py",
 		"ns/bridge/data/Sim.py",
 		"ns/bridge/data/Agent.py",
+		"ns/bridge/data/AgentRegistry.py",
+		"ns/bridge/data/VariableTable.py",
 		"ns/bridge/data/AgentSpec.py",
 		"ns/bridge/data/Brain.py",
 		"ns/bridge/io/AMCReader.py",
@@ -34,7 +42,9 @@ _pyFiles = [
 		"ns/bridge/data/MasSpec.py",
 		"ns/bridge/io/MasReader.py",
 		"ns/bridge/io/MasWriter.py",
+		"ns/bridge/io/MaWriter.py",
 		"ns/maya/msv/MayaAgent.py",
+		"ns/maya/msv/MayaAnimCurves.py",
 		"ns/maya/msv/MayaFactory.py",
 		"ns/maya/msv/MayaSkin.py",
 		"ns/maya/msv/MayaSceneAgent.py",
@@ -49,7 +59,14 @@ _pyFiles = [
 		"ns/maya/msv/MsvSimLoader.py",
 		"ns/bridge/data/Selection.py",
 		"ns/bridge/data/SimData.py",
+		"ns/bridge/data/SpatialIndex.py",
+		"ns/bridge/data/Frustum.py",
+		"ns/bridge/data/LevelOfDetail.py",
+		"ns/bridge/data/Variant.py",
+		"ns/bridge/data/SkinChunks.py",
+		"ns/bridge/data/Partition.py",
 		"ns/bridge/io/SimReader.py",
+		"ns/bridge/io/ChunkCache.py",
 		"ns/bridge/io/WReader.py",
 		"ns/msv/MsvPlacement.py",
 		"ns/msv/Maya.py",
@@ -65,7 +82,36 @@ _pyFiles = [
 		"ns/tests/TestMutateFuzz.py",
 		"ns/tests/TestMutateTimer.py",
 		"ns/tests/TestMutateNoise.py",
-		"ns/tests/TestMutateInput.py"
+		"ns/tests/TestMutateInput.py",
+		"ns/tests/TestCDLReader.py",
+		"ns/tests/TestAgent.py",
+		"ns/tests/TestCallsheetReader.py",
+		"ns/tests/TestSelection.py",
+		"ns/tests/TestSimData.py",
+		"ns/tests/TestSpatialIndex.py",
+		"ns/tests/TestFrustum.py",
+		"ns/tests/TestLevelOfDetail.py",
+		"ns/tests/TestVariant.py",
+		"ns/tests/TestMayaSkeleton.py",
+		"ns/tests/TestMayaSkin.py",
+		"ns/tests/TestMayaAnimCurves.py",
+		"ns/tests/TestSkinChunks.py",
+		"ns/tests/TestChunkCache.py",
+		"ns/tests/TestMayaEdits.py",
+		"ns/tests/TestMaWriter.py",
+		"ns/tests/TestMaWriter.ma",
+		"ns/tests/TestScheduler.py",
+		"ns/tests/TestPartition.py",
+		"ns/tests/TestManifest.py",
+		"ns/tests/TestProfiler.py",
+		"ns/tests/TestMemory.py",
+		"ns/tests/TestSynthetic.py",
+		"ns/bench/BenchCDLReader.py",
+		"ns/bench/BenchCallsheetReader.py",
+		"ns/bench/BenchMemory.py",
+		"ns/bench/BenchSetup.py",
+		"ns/bench/BenchSkinChunks.py",
+		"ns/bench/Synthetic.py"
 		]
 
 _melFiles = [
@@ -0,0 +1,53 @@
+# The MIT License
+#	
+# Copyright (c) 2008 James Piechota
+#	
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+'''Parse throughput benchmark for the CDLReader. A large synthetic CDL (see
+   Synthetic.cdlText) is built in memory so that the benchmark only measures parsing, not disk
+   access.'''
+
+import sys
+import time
+from StringIO import StringIO
+
+import ns.bridge.io.CDLReader as CDLReader
+import ns.bench.Synthetic as Synthetic
+
+def run(numSegments=2000, numGeometry=2000, numNodes=20000, repeat=3):
+	text = Synthetic.cdlText("synth", numSegments, numGeometry, numNodes)
+	numLines = text.count("\n")
+	tokens = CDLReader.kDefaultTokens + [ "fuzzy" ]
+	
+	best = -1.0
+	for i in range(repeat):
+		start = time.time()
+		CDLReader.read(StringIO(text), tokens)
+		elapsed = time.time() - start
+		if best < 0 or elapsed < best:
+			best = elapsed
+	
+	print "CDLReader: %d lines (%.1f KB) in %.3f s: %.0f lines/s, %.2f MB/s" % (
+		numLines, len(text) / 1024.0, best, numLines / best,
+		len(text) / best / (1024.0 * 1024.0))
+	return best
+
+if __name__ == "__main__":
+	run()
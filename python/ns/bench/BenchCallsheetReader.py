@@ -0,0 +1,59 @@
+# The MIT License
+#	
+# Copyright (c) 2008 James Piechota
+#	
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+'''Throughput benchmark for the CallsheetReader, with and without a
+   selection restricting which agents are loaded.'''
+
+import sys
+import time
+from StringIO import StringIO
+
+import ns.bridge.io.CallsheetReader as CallsheetReader
+import ns.bridge.data.Selection as Selection
+import ns.bench.Synthetic as Synthetic
+
+def _time(text, selectionGroup, repeat):
+	best = -1.0
+	for i in range(repeat):
+		start = time.time()
+		sheet = CallsheetReader.load(StringIO(text), selectionGroup)
+		elapsed = time.time() - start
+		if best < 0 or elapsed < best:
+			best = elapsed
+	return (best, len(sheet))
+
+def run(numAgents=50000, numVariables=8, repeat=3):
+	cdlFiles = [ ("man0", "cdl/man0.cdl"), ("man1", "cdl/man1.cdl") ]
+	text = Synthetic.callsheetText(numAgents, cdlFiles, numVariables)
+	
+	(best, loaded) = _time(text, None, repeat)
+	print "CallsheetReader: %d agents in %.3f s: %.0f agents/s" % (
+		loaded, best, numAgents / best)
+	
+	selectionGroup = Selection.SelectionGroup()
+	selectionGroup.addAnonymousSelection([ "1-%d" % (numAgents / 10) ])
+	(best, loaded) = _time(text, selectionGroup, repeat)
+	print "CallsheetReader: %d of %d agents selected in %.3f s: %.0f lines/s" % (
+		loaded, numAgents, best, numAgents / best)
+
+if __name__ == "__main__":
+	run()
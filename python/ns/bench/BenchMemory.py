@@ -0,0 +1,134 @@
+# The MIT License
+#	
+# Copyright (c) 2008 James Piechota
+#	
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+'''Memory benchmark for the per agent and per brain node data. Reports the
+   number of bytes reachable from each agent (its Agent and SimData, not
+   counting the shared AgentSpec) and from each brain node.'''
+
+import sys
+import gc
+from array import array
+
+import ns.bridge.data.Agent as Agent
+import ns.bridge.data.AgentSpec as AgentSpec
+import ns.bridge.data.SimData as SimData
+import ns.bridge.data.Brain as Brain
+import ns.bench.Synthetic as Synthetic
+
+_kAtomic = (int, long, float, bool, str, unicode, type(None))
+
+def deepSize(obj, seen):
+	'''Return the number of bytes used by obj and everything it references
+	   that is not already in 'seen' (a dictionary of object ids).'''
+	size = 0
+	stack = [ obj ]
+	while stack:
+		obj = stack.pop()
+		if id(obj) in seen:
+			continue
+		seen[id(obj)] = True
+		size += sys.getsizeof(obj)
+		if isinstance(obj, _kAtomic) or isinstance(obj, array):
+			continue
+		if isinstance(obj, dict):
+			stack.extend(obj.keys())
+			stack.extend(obj.values())
+		elif isinstance(obj, (list, tuple, set, frozenset)):
+			stack.extend(obj)
+		else:
+			if hasattr(obj, "__dict__"):
+				stack.append(obj.__dict__)
+			for cls in type(obj).__mro__:
+				for slot in cls.__dict__.get("__slots__", []):
+					if hasattr(obj, slot):
+						stack.append(getattr(obj, slot))
+	return size
+
+def _exclude(*objects):
+	'''Seed a 'seen' dictionary with objects that are shared and should not
+	   be counted: classes, modules and the AgentSpec.'''
+	seen = {}
+	for obj in objects:
+		seen[id(obj)] = True
+	return seen
+
+def _agentSpec(numJoints):
+	agentSpec = AgentSpec.AgentSpec()
+	for name in Synthetic.jointNames(numJoints):
+		joint = AgentSpec.Joint(agentSpec)
+		joint.name = name
+		agentSpec.joints[joint.name] = joint
+	for name in Synthetic.variableNames(2):
+		variable = AgentSpec.Variable()
+		variable.name = name
+		variable.max = 1.0
+		agentSpec.variables[name] = variable
+	return agentSpec
+
+def agentBytes(numAgents=200, numJoints=20, numFrames=48):
+	'''Build agents with numJoints of 6 channel sim data over numFrames and
+	   return the average number of bytes per agent.'''
+	agentSpec = _agentSpec(numJoints)
+	jointNames = Synthetic.jointNames(numJoints)
+	agents = []
+	for i in range(numAgents):
+		agent = Agent.Agent()
+		agent.name = "man_%d" % i
+		agent.id = i
+		agent.agentSpec = agentSpec
+		agentSim = SimData.Agent(agent.name)
+		for frame in range(1, numFrames + 1):
+			for j in range(numJoints):
+				agentSim.addSample(jointNames[j], frame, Synthetic.sample(i, j, frame, 6))
+		agent.setSimData(agentSim)
+		for name in agentSpec.variables.keys():
+			agent.variableValue(name)
+		agents.append(agent)
+	
+	seen = _exclude(agentSpec)
+	for joint in agentSpec.joints.values():
+		seen[id(joint)] = True
+	return deepSize(agents, seen) / float(numAgents)
+
+def nodeBytes(numNodes=10000):
+	'''Build a brain with numNodes nodes of mixed types and return the
+	   average number of bytes per node.'''
+	types = [ Brain.Input, Brain.Output, Brain.Fuzz, Brain.Defuzz, Brain.Rule,
+			  Brain.Or, Brain.Timer, Brain.Noise ]
+	nodes = []
+	for i in range(numNodes):
+		node = types[i % len(types)]()
+		node.id = i
+		node.name = "node%d" % i
+		node.translate = [ i % 100, i / 100 ]
+		if i:
+			node.inputs = [ i - 1 ]
+		nodes.append(node)
+	return deepSize(nodes, _exclude()) / float(numNodes)
+
+def run():
+	gc.collect()
+	print "Memory: %.0f bytes per agent (20 joints, 48 frames)" % agentBytes()
+	print "Memory: %.0f bytes per brain node" % nodeBytes()
+
+if __name__ == "__main__":
+	run()
@@ -0,0 +1,112 @@
+# The MIT License
+#	
+# Copyright (c) 2008 James Piechota
+#	
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+'''End to end benchmark of the readers on a synthetic setup written to disk
+   (see Synthetic.generate): the .mas and .cdl files, the .w weights, the
+   callsheet and the AMC and APF sims, then the whole Scene and Sim load.'''
+
+import sys
+import time
+import shutil
+import tempfile
+
+import ns.bridge.io.MasReader as MasReader
+import ns.bridge.io.CDLReader as CDLReader
+import ns.bridge.io.WReader as WReader
+import ns.bridge.io.CallsheetReader as CallsheetReader
+import ns.bridge.io.SimReader as SimReader
+import ns.bridge.data.SimData as SimData
+import ns.bridge.data.Scene as Scene
+import ns.bridge.data.Sim as Sim
+import ns.bench.Synthetic as Synthetic
+
+def _time(function, args, repeat):
+	best = -1.0
+	for i in range(repeat):
+		start = time.time()
+		result = function(*args)
+		elapsed = time.time() - start
+		if best < 0 or elapsed < best:
+			best = elapsed
+	return (best, result)
+
+def _readWeights(fileName):
+	weights = WReader.WReader()
+	weights.read(fileName)
+	return weights
+
+def _readSim(simDir, simType):
+	simData = SimData.SimData()
+	SimReader.read(simDir, simType, simData)
+	return simData
+
+def _load(setup, simType):
+	scene = Scene.Scene()
+	scene.setMas(setup.masFile)
+	return Sim.Sim(scene, setup.simDir, simType, setup.callsheet)
+
+def run(numAgents=500, numTypes=4, numJoints=30, numFrames=48, gridSize=40,
+		numNodes=2000, repeat=3):
+	directory = tempfile.mkdtemp()
+	try:
+		amc = Synthetic.generate("%s/amc" % directory, simType=".amc",
+								 numAgents=numAgents, numTypes=numTypes,
+								 numJoints=numJoints, numFrames=numFrames,
+								 gridSize=gridSize, numNodes=numNodes)
+		apf = Synthetic.generate("%s/apf" % directory, simType=".apf",
+								 numAgents=numAgents, numTypes=numTypes,
+								 numJoints=numJoints, numFrames=numFrames,
+								 gridSize=gridSize, numNodes=numNodes)
+		(agentType, cdlFile) = amc.cdlFiles[0]
+		cdlFile = "%s/%s" % (amc.directory, cdlFile)
+		weightsFile = "%s/cdl/obj/%s_geo1.w" % (amc.directory, agentType)
+		numSamples = numAgents * numFrames
+		
+		(best, mas) = _time(MasReader.read, (amc.masFile,), repeat)
+		print "MasReader: %d groups in %.3f s" % (len(mas.cdlFiles), best)
+		
+		(best, agentSpec) = _time(CDLReader.read, (cdlFile, CDLReader.kDefaultTokens + [ "fuzzy" ]), repeat)
+		print "CDLReader: %d joints, %d nodes, with weights in %.3f s" % (
+			numJoints, numNodes, best)
+		
+		(best, weights) = _time(_readWeights, (weightsFile,), repeat)
+		print "WReader: %d vertices in %.3f s: %.0f vertices/s" % (
+			amc.numVertices, best, amc.numVertices / best)
+		
+		(best, sheet) = _time(CallsheetReader.load, (amc.callsheet,), repeat)
+		print "CallsheetReader: %d agents in %.3f s: %.0f agents/s" % (
+			len(sheet), best, len(sheet) / best)
+		
+		for setup in (amc, apf):
+			(best, simData) = _time(_readSim, (setup.simDir, setup.simType), repeat)
+			print "SimReader %s: %d agents x %d frames in %.3f s: %.0f agent frames/s" % (
+				setup.simType, numAgents, numFrames, best, numSamples / best)
+		
+		for setup in (amc, apf):
+			(best, sim) = _time(_load, (setup, setup.simType), repeat)
+			print "Scene and Sim %s: %d agents in %.3f s: %.0f agents/s" % (
+				setup.simType, len(sim.agents()), best, len(sim.agents()) / best)
+	finally:
+		shutil.rmtree(directory)
+
+if __name__ == "__main__":
+	run()
@@ -0,0 +1,77 @@
+# The MIT License
+#	
+# Copyright (c) 2008 James Piechota
+#	
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+'''Benchmark of the face to dominant deformer assignment used for chunk
+   skinning, against the original loop over faces, deformers and face
+   vertices.'''
+
+import sys
+import time
+
+import ns.bridge.data.SkinChunks as SkinChunks
+import ns.bench.Synthetic as Synthetic
+
+def _perDeformer(faceCounts, faceVertices, weights, numDeformers):
+	dominant = []
+	position = 0
+	for count in faceCounts:
+		vertices = faceVertices[position:position + count]
+		position += count
+		maxWeight = 0
+		primeDeformer = 0
+		for i in range(numDeformers):
+			weight = 0
+			for vtx in vertices:
+				weight += weights[vtx][i]
+			if weight > maxWeight:
+				maxWeight = weight
+				primeDeformer = i
+		dominant.append(primeDeformer)
+	return dominant
+
+def _sparse(faceCounts, faceVertices, weights, numDeformers):
+	return SkinChunks.dominantDeformers(faceCounts, faceVertices,
+										SkinChunks.sparseWeights(weights))
+
+def _time(function, args, repeat):
+	best = -1.0
+	for i in range(repeat):
+		start = time.time()
+		result = function(*args)
+		elapsed = time.time() - start
+		if best < 0 or elapsed < best:
+			best = elapsed
+	return (best, result)
+
+def run(size=100, numDeformers=60, repeat=3):
+	(points, faceCounts, faceVertices) = Synthetic.grid(size)
+	weights = Synthetic.gridWeights(size, numDeformers)
+	args = (faceCounts, faceVertices, weights, numDeformers)
+	
+	(before, expected) = _time(_perDeformer, args, repeat)
+	(after, dominant) = _time(_sparse, args, repeat)
+	if list(dominant) != expected:
+		print >> sys.stderr, "Error: the assignments differ"
+	print "SkinChunks: %d faces, %d deformers: %.3f s per deformer loop, %.3f s sparse (%.1fx)" % (
+		len(faceCounts), numDeformers, before, after, before / after)
+
+if __name__ == "__main__":
+	run()
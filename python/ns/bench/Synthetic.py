@@ -0,0 +1,404 @@
+# The MIT License
+#	
+# Copyright (c) 2008 James Piechota
+#	
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+'''Generate self consistent synthetic Massive setups: a .mas file with
+   groups, selections and locators, one .cdl file per agent type with its
+   OBJ meshes and .w weights, a callsheet and an AMC or APF sim. Everything
+   is derived from a handful of scale settings and a seed so the readers
+   and the importer can be benchmarked reproducibly without production
+   data. The text generators are also used on their own by the benchmarks.'''
+
+import sys
+import os
+import os.path
+import math
+import random
+from optparse import OptionParser
+
+import ns.py.Errors as Errors
+import ns.bridge.data.Agent as Agent
+
+kRootDof = "tx ty tz rx ry rz"
+kJointDof = "rx ry rz"
+kBaseVariables = [ "height", "shirt" ]
+
+def jointNames(numJoints):
+	return [ "seg%d" % i for i in range(numJoints) ]
+
+def variableNames(numVariables):
+	'''The 'height' and 'shirt' variables used by the scale_var, colour maps
+	   and options, followed by 'numVariables' extra ones.'''
+	return kBaseVariables + [ "var%d" % i for i in range(numVariables) ]
+
+def typeNames(numTypes):
+	return [ "type%d" % i for i in range(numTypes) ]
+
+def typeIds(numAgents, numTypes):
+	'''Agents are split into contiguous blocks of ids, one per agent type,
+	   as a Massive generator would place them. Returns a list with the
+	   (first, last) ids of each type, empty types have last < first.'''
+	ranges = []
+	for i in range(numTypes):
+		ranges.append((i * numAgents / numTypes + 1, (i + 1) * numAgents / numTypes))
+	return ranges
+
+def grid(size):
+	'''A size x size grid of quads in the XZ plane.
+	   Returns (points, faceCounts, faceVertices).'''
+	row = size + 1
+	points = []
+	for z in range(row):
+		for x in range(row):
+			points.append((float(x) / size - 0.5, 0.0, float(z) / size - 0.5))
+	faceCounts = []
+	faceVertices = []
+	for z in range(size):
+		for x in range(size):
+			faceCounts.append(4)
+			faceVertices.extend([ z * row + x, z * row + x + 1,
+								  (z + 1) * row + x + 1, (z + 1) * row + x ])
+	return (points, faceCounts, faceVertices)
+
+def gridWeights(size, numDeformers, influences=4):
+	'''Dense weights for the vertices of grid(size): each vertex is
+	   influenced by 'influences' deformers in bands across the grid.'''
+	row = size + 1
+	influences = min(influences, numDeformers)
+	weights = []
+	for z in range(row):
+		band = (z * numDeformers) / row
+		for x in range(row):
+			vertex = [ 0.0 ] * numDeformers
+			for k in range(influences):
+				vertex[(band + k) % numDeformers] = 1.0 / (k + 1)
+			weights.append(vertex)
+	return weights
+
+def objText(size):
+	(points, faceCounts, faceVertices) = grid(size)
+	lines = [ "# synthetic obj" ]
+	for point in points:
+		lines.append("v %f %f %f" % point)
+	position = 0
+	for count in faceCounts:
+		lines.append("f " + " ".join([ str(vtx + 1) for vtx in faceVertices[position:position + count] ]))
+		position += count
+	lines.append("")
+	return "\n".join(lines)
+
+def weightsText(size, deformers, influences=4):
+	'''The .w file for grid(size) skinned to the 'deformers' joint names.'''
+	lines = [ "# synthetic weights" ]
+	for i in range(len(deformers)):
+		lines.append("deformer %d %s" % (i, deformers[i]))
+	weights = gridWeights(size, len(deformers), influences)
+	for vtx in range(len(weights)):
+		tokens = [ "%d:" % vtx ]
+		vertex = weights[vtx]
+		total = sum(vertex)
+		for i in range(len(vertex)):
+			if vertex[i]:
+				tokens.append("%d %f" % (i, vertex[i] / total))
+		lines.append(" ".join(tokens))
+	lines.append("")
+	return "\n".join(lines)
+
+def cdlText(agentType, numJoints, numGeometry, numNodes, numVariables=0,
+			geometryFiles=None):
+	'''Build the text of a CDL file with 'numJoints' segments, 'numGeometry'
+	   geometry nodes (each with a material) switched by a 'shirt' option,
+	   and a brain of 'numNodes' fuzzy rule and or nodes. geometryFiles is a
+	   list of (objFile, weightsFile) pairs, one per geometry node. If it
+	   isn't given the geometry nodes reference files that don't exist.'''
+	lines = [ "# synthetic cdl", "object %s" % agentType, "angles degrees" ]
+	lines.append("variable height 1.0 [0.8 1.2]")
+	lines.append("variable shirt 0.0 [0.0 %d.0]" % max(numGeometry - 1, 0))
+	for name in variableNames(numVariables)[len(kBaseVariables):]:
+		lines.append("variable %s 0.5 [0.0 1.0]" % name)
+	lines.append("scale_var height")
+	for i in range(numJoints):
+		lines.append("segment seg%d" % i)
+		if i:
+			lines.append("    parent seg%d" % ((i - 1) / 2))
+			lines.append("    translate 0.0 0.3 0.0")
+			lines.append("    dof %s" % kJointDof)
+		else:
+			lines.append("    translate 0.0 1.0 0.0")
+			lines.append("    dof %s" % kRootDof)
+		lines.append("    order tx ty tz rx ry rz")
+		lines.append("    primitive tube")
+		lines.append("    radius 0.1")
+		lines.append("    length 0.3")
+		lines.append("    axis Y")
+		lines.append("    centre 0.0 0.15 0.0")
+		lines.append("    density 1.0")
+		lines.append("    translate 10 %d" % i)
+	for i in range(1, numGeometry + 1):
+		lines.append("material mat%d" % i)
+		lines.append("    id %d" % i)
+		lines.append("    colour_map maps/mat%d_'shirt'.tif rgb" % i)
+		lines.append("    ambient 0.1 0.1 0.1 hsv")
+		lines.append("    diffuse 0.5 0.5 0.5 hsv")
+		lines.append("    specular 0.2 0.2 0.2 hsv")
+		lines.append("    roughness 0.1")
+	for i in range(1, numGeometry + 1):
+		lines.append("geometry geo%d" % i)
+		if geometryFiles:
+			(objFile, weightsFile) = geometryFiles[i - 1]
+			lines.append("    file %s" % objFile)
+			lines.append("    weights_file %s" % weightsFile)
+		else:
+			lines.append("    file obj/geo%d.obj" % i)
+		lines.append("    id %d" % i)
+		lines.append("    material %d" % i)
+		lines.append("    translate 20 %d" % i)
+	if numGeometry > 1:
+		lines.append("option shirt")
+		lines.append("    var shirt")
+		lines.append("    inputs " + " ".join([ "geo%d" % i for i in range(1, numGeometry + 1) ]))
+	for i in range(1, numNodes + 1):
+		if i % 2:
+			lines.append("fuzzy rule")
+		else:
+			lines.append("fuzzy or")
+		lines.append("    id        %d" % i)
+		lines.append("    name      node%d" % i)
+		lines.append("    translate %d %d" % (i % 100, i / 100))
+		lines.append("    weight  1.000000")
+		if i > 2:
+			lines.append("    2 inputs %d %d" % (i - 1, i / 2))
+		elif i > 1:
+			lines.append("    1 input %d" % (i - 1))
+	lines.append("")
+	return "\n".join(lines)
+
+def placement(id, rng):
+	'''A 4x4 placement matrix (row major) on a grid of agents with a
+	   random heading.'''
+	angle = rng.uniform(0.0, 2.0 * math.pi)
+	c = math.cos(angle)
+	s = math.sin(angle)
+	return [ c, 0.0, -s, 0.0,
+			 0.0, 1.0, 0.0, 0.0,
+			 s, 0.0, c, 0.0,
+			 (id % 100) * 2.0, 0.0, (id / 100) * 2.0, 1.0 ]
+
+def callsheetText(numAgents, cdlFiles, numVariables=0, seed=0):
+	'''Build the text of a callsheet for agents 1 to numAgents spread over
+	   the agent types in cdlFiles, a list of (agentType, cdlFile) pairs.
+	   Each agent sets every variable.'''
+	rng = random.Random(seed)
+	names = variableNames(numVariables)
+	ranges = typeIds(numAgents, len(cdlFiles))
+	lines = []
+	for i in range(len(cdlFiles)):
+		(agentType, cdlFile) = cdlFiles[i]
+		(first, last) = ranges[i]
+		for id in range(first, last + 1):
+			tokens = [ "%d" % id, "%s.%d" % (agentType, id) ]
+			tokens.extend([ "%f" % value for value in placement(id, rng) ])
+			tokens.extend([ "cdl", cdlFile ])
+			for name in names:
+				tokens.append("%s %f" % (name, rng.random()))
+			lines.append(" ".join(tokens))
+	lines.append("")
+	return "\n".join(lines)
+
+def masText(cdlFiles, numAgents):
+	'''Build the text of a .mas file with one group, generator, selection
+	   and locator per (agentType, cdlFile) pair in cdlFiles.'''
+	ranges = typeIds(numAgents, len(cdlFiles))
+	lines = [ "# synthetic mas", "Place" ]
+	for i in range(len(cdlFiles)):
+		(agentType, cdlFile) = cdlFiles[i]
+		(first, last) = ranges[i]
+		lines.append("group %d %s" % (i + 1, agentType))
+		lines.append("    colour 0.5 0.5 0.5")
+		lines.append("    cdl %s" % cdlFile)
+		lines.append("    flags 0")
+		lines.append("generator")
+		lines.append("    number %d" % (last - first + 1))
+		lines.append("end generator")
+		if last >= first:
+			lines.append("selection %s" % agentType)
+			lines.append("    %d-%d" % (first, last))
+			lines.append("end selection")
+		lines.append("lock %d [%f 0 0] [%f 0 0] [0 1 0] [0 0 0] 1 1 0 0" % (i + 1, i * 10.0, i * 10.0))
+	lines.append("End place")
+	lines.append("")
+	return "\n".join(lines)
+
+def sample(id, joint, frame, numChannels):
+	'''The sim data of a joint on one frame. A smooth function of the frame
+	   so that the sims look like motion rather than noise.'''
+	phase = frame * 0.1 + id * 0.37 + joint * 0.5
+	return [ 30.0 * math.sin(phase + channel) for channel in range(numChannels) ]
+
+def _jointLines(id, numJoints, frame, lines):
+	for joint in range(numJoints):
+		if joint:
+			numChannels = 3
+		else:
+			numChannels = 6
+		values = sample(id, joint, frame, numChannels)
+		lines.append("seg%d " % joint + " ".join([ "%.4f" % value for value in values ]))
+
+def amcText(id, numJoints, numFrames):
+	'''The AMC sim of agent 'id' over frames 1 to numFrames.'''
+	lines = [ ":FULLY-SPECIFIED", ":DEGREES" ]
+	for frame in range(1, numFrames + 1):
+		lines.append("%d" % frame)
+		_jointLines(id, numJoints, frame, lines)
+	lines.append("")
+	return "\n".join(lines)
+
+def apfText(frame, agents, numJoints):
+	'''One frame of APF sim for 'agents', a list of (agentType, id) pairs.'''
+	lines = []
+	for (agentType, id) in agents:
+		lines.append("BEGIN %s" % Agent.formatAgentName(agentType, str(id)))
+		_jointLines(id, numJoints, frame, lines)
+	lines.append("")
+	return "\n".join(lines)
+
+def _write(fileName, text):
+	directory = os.path.dirname(fileName)
+	if directory and not os.path.isdir(directory):
+		os.makedirs(directory)
+	fileHandle = open(fileName, "w")
+	try:
+		fileHandle.write(text)
+	finally:
+		fileHandle.close()
+
+class Setup:
+	'''Paths and settings of a generated setup. cdlFiles is a list of
+	   (agentType, cdlFile) pairs with paths relative to the .mas file.'''
+	def __init__(self, directory, name):
+		self.directory = directory
+		self.masFile = os.path.join(directory, "%s.mas" % name)
+		self.callsheet = os.path.join(directory, "%s.callsheet" % name)
+		self.simDir = os.path.join(directory, "sim")
+		self.simType = ""
+		self.cdlFiles = []
+		self.numAgents = 0
+		self.numJoints = 0
+		self.numFrames = 0
+		self.numVertices = 0
+	
+	def agentTypes(self):
+		return [ agentType for (agentType, cdlFile) in self.cdlFiles ]
+	
+	def agents(self):
+		'''(agentType, id) of every agent in the setup.'''
+		agents = []
+		ranges = typeIds(self.numAgents, len(self.cdlFiles))
+		for i in range(len(self.cdlFiles)):
+			(first, last) = ranges[i]
+			agents.extend([ (self.cdlFiles[i][0], id) for id in range(first, last + 1) ])
+		return agents
+
+def generate(directory, name="synthetic", simType=".amc", numAgents=100,
+			 numTypes=2, numJoints=20, numFrames=48, gridSize=10,
+			 numGeometry=2, influences=4, numNodes=100, numVariables=2,
+			 seed=0):
+	'''Write a synthetic setup to 'directory' and return its Setup. Each
+	   agent type gets 'numGeometry' grid meshes of gridSize x gridSize
+	   quads skinned to its 'numJoints' joints with up to 'influences'
+	   deformers per vertex, and a brain of 'numNodes' nodes. The sim covers
+	   'numAgents' agents over 'numFrames' frames and is written as one .amc
+	   file per agent or one .apf file per frame depending on simType. An
+	   empty simType skips the sim.'''
+	setup = Setup(directory, name)
+	setup.simType = simType
+	setup.numAgents = numAgents
+	setup.numJoints = numJoints
+	setup.numFrames = numFrames
+	setup.numVertices = (gridSize + 1) * (gridSize + 1)
+	
+	joints = jointNames(numJoints)
+	obj = objText(gridSize)
+	weights = weightsText(gridSize, joints, influences)
+	for agentType in typeNames(numTypes):
+		cdlFile = "cdl/%s.cdl" % agentType
+		geometryFiles = []
+		for i in range(1, numGeometry + 1):
+			objFile = "obj/%s_geo%d.obj" % (agentType, i)
+			weightsFile = "obj/%s_geo%d.w" % (agentType, i)
+			# Geometry paths in a CDL are relative to the CDL file
+			#
+			_write(os.path.join(directory, "cdl", objFile), obj)
+			_write(os.path.join(directory, "cdl", weightsFile), weights)
+			geometryFiles.append((objFile, weightsFile))
+		_write(os.path.join(directory, cdlFile),
+			   cdlText(agentType, numJoints, numGeometry, numNodes, numVariables, geometryFiles))
+		setup.cdlFiles.append((agentType, cdlFile))
+	
+	_write(setup.masFile, masText(setup.cdlFiles, numAgents))
+	_write(setup.callsheet, callsheetText(numAgents, setup.cdlFiles, numVariables, seed))
+	
+	if ".amc" == simType:
+		for (agentType, id) in setup.agents():
+			_write(os.path.join(setup.simDir, "%s.%d.amc" % (agentType, id)),
+				   amcText(id, numJoints, numFrames))
+	elif ".apf" == simType:
+		agents = setup.agents()
+		for frame in range(1, numFrames + 1):
+			_write(os.path.join(setup.simDir, "%s.%04d.apf" % (name, frame)),
+				   apfText(frame, agents, numJoints))
+	elif simType:
+		raise Errors.BadArgumentError("Unknown sim type: %s" % simType)
+	elif not os.path.isdir(setup.simDir):
+		os.makedirs(setup.simDir)
+	return setup
+
+def main(argv):
+	parser = OptionParser(usage="%prog [options] directory")
+	parser.add_option("-n", "--name", default="synthetic")
+	parser.add_option("-s", "--simType", default="amc", help="amc, apf or none")
+	parser.add_option("-a", "--agents", type="int", default=100)
+	parser.add_option("-t", "--types", type="int", default=2)
+	parser.add_option("-j", "--joints", type="int", default=20)
+	parser.add_option("-f", "--frames", type="int", default=48)
+	parser.add_option("-g", "--gridSize", type="int", default=10)
+	parser.add_option("-m", "--geometry", type="int", default=2)
+	parser.add_option("-i", "--influences", type="int", default=4)
+	parser.add_option("-b", "--nodes", type="int", default=100)
+	parser.add_option("-v", "--variables", type="int", default=2)
+	parser.add_option("-r", "--seed", type="int", default=0)
+	(options, args) = parser.parse_args(argv)
+	if len(args) != 1:
+		parser.error("a directory is required")
+	
+	simType = ""
+	if options.simType != "none":
+		simType = ".%s" % options.simType
+	setup = generate(args[0], options.name, simType, options.agents,
+					 options.types, options.joints, options.frames,
+					 options.gridSize, options.geometry, options.influences,
+					 options.nodes, options.variables, options.seed)
+	print "Wrote %s: %d agents of %d types, %d joints, %d vertices per mesh, %d frames" % (
+		setup.masFile, setup.numAgents, len(setup.cdlFiles), setup.numJoints,
+		setup.numVertices, setup.numFrames)
+
+if __name__ == "__main__":
+	main(sys.argv[1:])
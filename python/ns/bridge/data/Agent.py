@@ -21,11 +21,11 @@
 # THE SOFTWARE.
 
 import sys
-import random
 import re
 import os.path
 
 import ns.bridge.data.SimData as SimData
+import ns.bridge.data.VariableTable as VariableTable
 
 def formatAgentName(name, id=""):
 	'''Convenience function to make sure all of the agent
@@ -35,10 +35,23 @@ def formatAgentName(name, id=""):
 	agentName = name
 	if id:
 		agentName = "%s_%s" % (name, id)
-	agentName = re.sub('\.', '_', agentName)
+	agentName = agentName.replace('.', '_')
 	return agentName
 
-class Agent:
+def evalExpressions(agentSpec, agents):
+	'''Evaluate every expression variable of 'agentSpec' for all of
+	   'agents', in dependency order so that each expression's inputs have
+	   already been computed by the time it is evaluated. Values that are
+	   already fixed (e.g. by a callsheet) are left alone. See also
+	   VariableTable.fill().'''
+	for name in agentSpec.expressionOrder():
+		for agent in agents:
+			agent.variableValue( name )
+
+class Agent(object):
+	__slots__ = [ "_instanced", "name", "id", "agentSpec", "variableValues",
+				  "placement", "_simData", "_variableTable", "_row" ]
+	
 	def __init__(self, instanced=True):
 		self._instanced = instanced
 		self.reset()
@@ -53,6 +66,8 @@ class Agent:
 						   0.0, 0.0, 1.0, 0.0,
 						   0.0, 0.0, 0.0, 1.0 ]
  		self._simData = SimData.Agent("")
+ 		self._variableTable = None
+ 		self._row = -1
 
 	def joint(self, jointName):
 		return self.agentSpec.joints[jointName]
@@ -60,15 +75,41 @@ class Agent:
 	def joints(self):
 		return self.agentSpec.joints.values()
 
+	def isInstanced(self):
+		return self._instanced
+
+	def variableTable(self):
+		'''Return the VariableTable holding this agent's variable values.
+		   Agents that were not attached to a shared table get one of their
+		   own.'''
+		if not self._variableTable:
+			self.setVariableTable( VariableTable.VariableTable(self.agentSpec, instanced=self._instanced) )
+		return self._variableTable
+
+	def setVariableTable(self, table):
+		'''Store this agent's variable values in 'table'. Values already
+		   fixed for variables the AgentSpec defines are moved into the
+		   table, the rest stay in variableValues.'''
+		self._variableTable = table
+		self._row = table.addAgent(self.id)
+		for name in self.variableValues.keys():
+			if name in self.agentSpec.variables:
+				table.setValue(name, self._row, self.variableValues.pop(name))
+
+	def setVariableValue(self, variableName, value):
+		'''Fix the value of a variable, e.g. to the one from a callsheet.'''
+		if self.agentSpec and variableName in self.agentSpec.variables:
+			self.variableTable().setValue(variableName, self._row, value)
+		else:
+			self.variableValues[variableName] = value
+
 	def simData(self):
 		return self._simData
 	
 	def setSimData(self, simData):
 		self._simData = simData
 		self._simData.prune( self.agentSpec.joints.keys() )
-		for jointSim in self._simData.joints():
-			joint = self.joint( jointSim.name() )
-			jointSim.setOrderDOF( joint.order, joint.dof )
+		self._simData.setChannelLayout( self.agentSpec.channelLayout() )
 
 
 	def replaceEmbeddedVariables( self, s ):
@@ -86,15 +127,13 @@ class Agent:
 		'''Evaluates a variable's expression.
 		   This is different from replacing embedded variables like
 		   those found in texture paths. Expressions don't delimit
-		   variable names with quotes so we have to search the expression
-		   for every possible variable'''
-		expr = rawExpression
-		for var in self.agentSpec.variables.keys():
-			matches = re.search( var, expr )
-			if matches:
-				value = self.variableValue(matches.group(0))
-				expr = re.sub(var, `value`, expr)
-		return float(eval(expr))
+		   variable names with quotes so the expression is compiled (once
+		   per AgentSpec) to find the variables it refers to.'''
+		expression = self.agentSpec.expression( rawExpression )
+		values = {}
+		for name in expression.dependencies:
+			values[name] = self.variableValue( name )
+		return expression.evaluate( values )
 				
 	
 	def variableValue( self, variableName, asInt=False, forceDefault=False ):
@@ -103,50 +142,18 @@ class Agent:
 		   value. If no fixed value exists, either evaluate the variable's
 		   expression or return a random number within its range. Finally
 		   if variation has been disabled for this variable, return its
-		   default value.'''
-		   
+		   default value. The value is computed and stored by the agent's
+		   VariableTable (see VariableTable.value()) so repeated queries
+		   return the same value.'''
 		try:
-			# Variable has been fixed by a sim or computed earlier
+			# Value fixed on the agent for a variable the table doesn't hold
 			#
 			value = self.variableValues[variableName]
-		except:
-			# In calculating the value we have a few options:
-			# 1. This variable doesn't actually exist, assign 0
-			# 2. 'forceDefault' is true, assign the variable's default
-			# 3. Variable has an expression and 'forceDefault' is false, evaluate it
-			# 3. No expression and 'forceDefault' is false
-			#	 a. agent is instanced, assign a random value
-			#		Note: this shouldn't happen if a callsheet was provided
-			#	 b. agent is not-instanced, assign the variable's default
-			variable = None
-			try:
-				variable = self.agentSpec.variables[variableName]
-				useDefault = False
-				if forceDefault:
-					useDefault = True
-				elif variable.expression:
-					value = self.evalExpression( variable.expression )
-				elif self._instanced:
-					value = random.uniform( variable.min, variable.max )
-				else:
-					useDefault = True
-			except:
-				# Probably couldn't find a variable. In any case,
-				# use the default value.
-				useDefault = True
-				
-			if useDefault:
-				if variable:
-					# Default value will be used if we're not instanced
-					value = variable.default
-				else:
-					value = 0.0
-					
-			# Store the computed variable value so that repeated
-			# queries of the same variable will return the same
-			# value
-			#
-			self.variableValues[variableName] = value
+		except KeyError:
+			if self.agentSpec:
+				value = self.variableTable().value( variableName, self._row, forceDefault )
+			else:
+				value = 0.0
 			
 		# Round to an integer if needed
 		#
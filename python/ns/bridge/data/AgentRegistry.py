@@ -0,0 +1,86 @@
+# The MIT License
+#	
+# Copyright (c) 2008 James Piechota
+#	
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+'''Agent identity shared by the readers, Sim and SimData. Each agent name is
+   registered once and mapped to a dense integer index along with its agent
+   type and id, so that per-sample lookups are a single dictionary access
+   and per-agent data can be stored in arrays indexed by agent.'''
+
+import sys
+from array import array
+
+def parseName(name):
+	'''Split a Massive agent name, usually agentType_id, into its agent type
+	   and id. The id is -1 if the name doesn't end in one.'''
+	tokens = name.split("_")
+	try:
+		id = int(tokens[-1])
+	except ValueError:
+		id = -1
+	return (tokens[0], id)
+
+class AgentRegistry:
+	def __init__(self):
+		self._indices = {}
+		self.names = []
+		self.types = []
+		self.ids = array('l')
+	
+	def __len__(self):
+		return len(self.names)
+	
+	def __contains__(self, name):
+		return name in self._indices
+	
+	def register(self, name, id=None, agentType=None):
+		'''Return the index of agent 'name', adding it to the registry if
+		   needed. Its agent type and id are parsed from the name unless
+		   they are given.'''
+		try:
+			return self._indices[name]
+		except KeyError:
+			(parsedType, parsedId) = parseName(name)
+			if agentType is None:
+				agentType = parsedType
+			if id is None:
+				id = parsedId
+			index = len(self.names)
+			name = intern(name)
+			self._indices[name] = index
+			self.names.append(name)
+			self.types.append(intern(agentType))
+			self.ids.append(id)
+			return index
+	
+	def index(self, name):
+		'''Return the index of agent 'name'. Raises a KeyError if it hasn't
+		   been registered.'''
+		return self._indices[name]
+	
+	def name(self, index):
+		return self.names[index]
+	
+	def agentType(self, index):
+		return self.types[index]
+	
+	def id(self, index):
+		return self.ids[index]
@@ -24,6 +24,8 @@ import sys
 import re
 import os.path
 
+import ns.py.Errors as Errors
+import ns.py.Memory as Memory
 import ns.bridge.io.WReader as WReader
 import ns.bridge.data.Brain as Brain
 
@@ -97,6 +99,14 @@ class GeoDB:
 	def geometryById( self, id ):
 		return self._byId[id]
 	
+	def geometries( self ):
+		return [ geometry for geometry in self._byId if geometry ]
+	
+	def items( self ):
+		'''Return the top level geometries and options, leaving out the
+		   geometries that are inputs of an option.'''
+		return self._optioned.values()
+	
 	def addGeometry(self, geometry):
  		numGeo = len(self._byId)
  		if geometry.id >= numGeo:
@@ -229,8 +239,11 @@ class Disc(Primitive):
 		self.radius = 1.0
 		self.length = 1.0
 
-class Joint:
+class Joint(object):
 	'''Imported'''
+	__slots__ = [ "name", "parent", "dof", "primitive", "order", "actionOffset",
+				  "translate", "transform", "scaleVar", "agentSpec", "leftovers" ]
+	
  	def __init__(self, agentSpec):
  		self.name = ""
  		self.parent = ""
@@ -244,6 +257,57 @@ class Joint:
  		self.agentSpec = agentSpec
  		self.leftovers = ""
 
+# Channel indices are the same for every joint with the same order and dof,
+# so they are computed once and shared.
+_kChannelIndices = {}
+
+def channelIndices(order, dof):
+	'''Return a dictionary mapping the names of the channels present in
+	   simmed joint data to their index in each sample, for a joint with the
+	   given channel order and degrees of freedom. The dictionary is shared
+	   and must not be modified.'''
+	key = (tuple(order), tuple(dof))
+	try:
+		return _kChannelIndices[key]
+	except KeyError:
+		indices = {}
+		i = 0
+		for channel in range(len(order)):
+			if not dof[channel]:
+				continue
+			indices[enum2Channel[order[channel]]] = i
+			i += 1
+		_kChannelIndices[key] = indices
+		return indices
+
+class ChannelLayout:
+	'''Layout of the simmed channels of all the joints of an AgentSpec,
+	   computed once and referenced by the SimData of every agent of that
+	   type. 'slots' lists a (joint name, channel enum) pair for every
+	   channel of every joint, joint by joint, and 'offsets' maps a joint
+	   name to the index of its first slot.'''
+	def __init__(self, joints):
+		self.slots = []
+		self.offsets = {}
+		self._indices = {}
+		names = joints.keys()
+		names.sort()
+		for name in names:
+			joint = joints[name]
+			self.offsets[name] = len(self.slots)
+			indices = channelIndices(joint.order, joint.dof)
+			self._indices[name] = indices
+			for channel in range(len(joint.order)):
+				if joint.dof[channel]:
+					self.slots.append((name, joint.order[channel]))
+	
+	def __len__(self):
+		return len(self.slots)
+	
+	def channelIndices(self, jointName):
+		'''Return the channel name to sample index map of 'jointName'.'''
+		return self._indices[jointName]
+
 class Variable:
 	def __init__(self):
 		self.name = ""
@@ -252,6 +316,28 @@ class Variable:
 		self.default = 0.0
 		self.expression = ""
 
+_kIdentifierRE = re.compile(r"\b[A-Za-z_]\w*")
+
+class Expression:
+	'''A variable expression compiled once per AgentSpec. 'dependencies'
+	   lists, in order of appearance, the variables the expression refers to.
+	   Evaluating it only needs their values.'''
+	def __init__(self, source, variableNames):
+		self.source = source
+		self.dependencies = []
+		for name in _kIdentifierRE.findall(source):
+			if name in variableNames and name not in self.dependencies:
+				self.dependencies.append(name)
+		try:
+			self._code = compile(source.strip(), "<expression>", "eval")
+		except SyntaxError:
+			raise Errors.BadArgumentError("Invalid variable expression '%s'." % source)
+
+	def evaluate(self, values):
+		'''Evaluate the expression. 'values' maps each of the dependencies
+		   to its value.'''
+		return float(eval(self._code, {}, values))
+
 # Node definition
 class AgentSpec:
 	def __init__(self):
@@ -278,6 +364,9 @@ class AgentSpec:
 		
 		# private
 		self._rootPath = ""
+		# map expression source to its compiled Expression
+		self._expressions = {}
+		self._channelLayout = None
 	
 	def setCdlFile(self, cdlFile):
 		self.cdlFile = cdlFile
@@ -286,10 +375,73 @@ class AgentSpec:
 	def setBindPose(self, agentSim):
 		self.bindPoseData = agentSim
 		self.bindPoseData.prune( self.joints.keys() )
-		for jointSim in self.bindPoseData.joints():
-			joint = self.joints[ jointSim.name() ]
-			jointSim.setOrderDOF( joint.order, joint.dof )
+		self.bindPoseData.setChannelLayout( self.channelLayout() )
 			
 	def rootPath(self):
 		return self._rootPath
+	
+	def memoryUsage(self):
+		'''Estimated bytes held by the skeleton, bind pose, actions and skin
+		   weights of this agent type. Materials, variables and the brain
+		   are small and not counted.'''
+		total = Memory.sizeOf(self) + Memory.sizeOf(self.jointData) + Memory.sizeOf(self.joints)
+		for joint in self.jointData:
+			total += Memory.sizeOf(joint) + Memory.sizeOf(joint.translate) + Memory.sizeOf(joint.transform)
+		if self.bindPoseData:
+			total += self.bindPoseData.memoryUsage()
+		for action in self.actions.values():
+			total += Memory.sizeOf(action.curves)
+			for curve in action.curves.values():
+				total += Memory.sizeOf(curve.points)
+				for point in curve.points:
+					total += Memory.sizeOf(point) + len(point) * Memory.sizeOf(0.0)
+		for geometry in self.geoDB.geometries():
+			if geometry.weightsData:
+				total += geometry.weightsData.memoryUsage()
+		return total
+
+	def rootJoint(self):
+		'''Return the root joint, the first segment in the CDL file, or None
+		   if there are no joints.'''
+		if self.jointData:
+			return self.jointData[0]
+		return None
+
+	def channelLayout(self):
+		'''Return the ChannelLayout shared by all agents of this type.'''
+		if self._channelLayout is None:
+			self._channelLayout = ChannelLayout(self.joints)
+		return self._channelLayout
+
+	def expression(self, source):
+		'''Return the compiled Expression for 'source'. Expressions are
+		   only compiled the first time they're asked for.'''
+		try:
+			return self._expressions[source]
+		except KeyError:
+			expression = Expression(source, self.variables)
+			self._expressions[source] = expression
+			return expression
+
+	def expressionOrder(self):
+		'''Return the names of the variables that have expressions, sorted
+		   so that each one comes after any expression variables it
+		   depends on.'''
+		order = []
+		visited = {}
+		for name in sorted(self.variables.keys()):
+			self._visitExpression(name, visited, order)
+		return order
+
+	def _visitExpression(self, name, visited, order):
+		variable = self.variables[name]
+		if not variable.expression or visited.get(name) == 2:
+			return
+		if visited.get(name) == 1:
+			raise Errors.BadArgumentError("Variable '%s' has a circular expression." % name)
+		visited[name] = 1
+		for dependency in self.expression(variable.expression).dependencies:
+			self._visitExpression(dependency, visited, order)
+		visited[name] = 2
+		order.append(name)
    
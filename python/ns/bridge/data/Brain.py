@@ -27,105 +27,102 @@ def formatFloat(flt):
 	# can't strip both at once otherwise '0.000' becomes '' and we want '0'
 	return str(flt).rstrip('0').rstrip('.')
 
+# Bits of Node._set. Each records that the corresponding attribute has been
+# assigned, and so should be written out by dump().
+kIdSet = 1 << 0
+kNameSet = 1 << 1
+kTranslateSet = 1 << 2
+kInputsSet = 1 << 3
+kAltInputsSet = 1 << 4
+kParentSet = 1 << 5
+kChannelSet = 1 << 6
+kIntegrateSet = 1 << 7
+kRangeSet = 1 << 8
+kOutputSet = 1 << 9
+kDefuzzSet = 1 << 10
+kDelaySet = 1 << 11
+kRateSet = 1 << 12
+kInferenceSet = 1 << 13
+kInterpolationSet = 1 << 14
+kWeightSet = 1 << 15
+kTypeSet = 1 << 16
+kSeedSet = 1 << 17
+kTriggerSet = 1 << 18
+kChildSet = 1 << 19
+
+def _flagged(slot, flag):
+	'''Return a property that stores its value in 'slot' and records
+	   in the node's _set bitmask that it has been assigned.'''
+	def get(self):
+		return getattr(self, slot)
+	def set(self, val):
+		setattr(self, slot, val)
+		self._set |= flag
+	return property(get, set)
+
 class Node(object):
+	# Nodes are created per brain node and per evolved agent, so they use
+	# __slots__ rather than an instance dictionary.
+	__slots__ = [ "_id", "_name", "_translate", "_inputs", "_altInputs",
+				  "_parent", "_set", "numOutputs" ]
+	
 	def __init__(self):
+		self._set = 0
 		self._id = 0
-		self._idSet = False
 		self._name = ""
-		self._nameSet = False
 		self._translate = []
-		self._translateSet = False
 		self._inputs = []
-		self._inputsSet = False
 		self._altInputs = []
-		self._altInputsSet = False
 		self._parent = 0
-		self._parentSet = False
 
 		# Incremented by connect, decremented by disconnect
 		# Initialized by calling Brain.countOutputConnections
-		self._numOutputs = 0
+		self.numOutputs = 0
 
-	def _setId(self, val):
-		self._id = val
-		self._idSet = True
-	def _getId(self): return self._id
-	id = property(_getId, _setId)
-	
-	def _setName(self, val):
-		self._name = val
-		self._nameSet = True
-	def _getName(self): return self._name
-	name = property(_getName, _setName)
-	
-	def _setTranslate(self, val):
-		self._translate = val
-		self._translateSet = True
-	def _getTranslate(self): return self._translate
-	translate = property(_getTranslate, _setTranslate)
-	
-	def _setInputs(self, val):
-		self._inputs = val
-		self._inputsSet = True
-	def _getInputs(self): return self._inputs
-	inputs = property(_getInputs, _setInputs)
-	
-	def _setAltInputs(self, val):
-		self._altInputs = val
-		self._altInputsSet = True
-	def _getAltInputs(self): return self._altInputs
-	altInputs = property(_getAltInputs, _setAltInputs)
-	
-	def _setParent(self, val):
-		self._parent = val
-		self._parentSet = True
-	def _getParent(self): return self._parent
-	parent = property(_getParent, _setParent)
+	id = _flagged("_id", kIdSet)
+	name = _flagged("_name", kNameSet)
+	translate = _flagged("_translate", kTranslateSet)
+	inputs = _flagged("_inputs", kInputsSet)
+	altInputs = _flagged("_altInputs", kAltInputsSet)
+	parent = _flagged("_parent", kParentSet)
 	
-	def _setNumOutputs(self, val): self._numOutputs = val
-	def _getNumOutputs(self): return self._numOutputs
-	numOutputs = property(_getNumOutputs, _setNumOutputs)
+	def isSet(self, flag):
+		'''True if the attribute corresponding to 'flag' (e.g. kIdSet) has
+		   been assigned.'''
+		return bool(self._set & flag)
 	
 	def connect(self, node):
-		self._numOutputs += 1
+		self.numOutputs += 1
 		  	
 	def disconnect(self, node):
-		self._numOutputs -= 1
-
-	def load(self, fileHandle):
-		line = ""
-		for line in fileHandle:
-			tokens = line.strip().split()
-			if not line[0].isspace():
-				break
+		self.numOutputs -= 1
+
+	def load(self, block):
+		'''Load the node from the tokenized lines of its block in the .cdl
+		   file. Lines are dispatched on their first token, anything not
+		   common to all nodes is handed to _parseTokens.'''
+		for tokens in block:
 			if tokens:
-				if tokens[0] == "id":
-					self.id = int(tokens[1])
-				elif tokens[0] == "name":
-					self.name = " ".join(tokens[1:])
-				elif tokens[0] == "translate":
-					self.translate = [ int(tokens[1]), int(tokens[2]) ]	
-				elif tokens[0] == "parent":
-					self.parent = int(tokens[1])	
+				handler = _kNodeHandlers.get(tokens[0])
+				if handler:
+					handler(self, tokens)
 				elif len(tokens) > 2 and (tokens[1] == "inputs" or tokens[1] == "input"):
 					self.inputs = [ int(input) for input in tokens[2:] ]	
 				elif len(tokens) > 3 and tokens[1] == "alt" and (tokens[2] == "inputs" or tokens[2] == "input"):
 					self.altInputs = [ int(input) for input in tokens[3:] ]
 				else:
 					self._parseTokens(tokens)
-			
-		return line
 	
 	def _dumpHeader(self, fileHandle):
-		if self._idSet:
+		if self._set & kIdSet:
 			fileHandle.write("    id        %d\n" % self.id)
-		if self._nameSet:
+		if self._set & kNameSet:
 			fileHandle.write("    name      %s\n" % self.name)
-		if self._translateSet:
+		if self._set & kTranslateSet:
 			fileHandle.write("    translate %d %d\n" % (self.translate[0], self.translate[1]))
 		
 	def _dumpFooter(self, fileHandle):
-		if self._inputsSet:
+		if self._set & kInputsSet:
 			if len(self.inputs) == 1:
 				fileHandle.write("    %d input" % len(self.inputs))
 			else:
@@ -133,7 +130,7 @@ class Node(object):
 			for input in self.inputs:
 				fileHandle.write(" %d" % input)
 			fileHandle.write("\n")
-		if self._altInputsSet:
+		if self._set & kAltInputsSet:
 			if len(self.altInputs) == 1:
 				fileHandle.write("    %d alt input" % len(self.altInputs))
 			else:
@@ -141,48 +138,43 @@ class Node(object):
 			for input in self.altInputs:
 				fileHandle.write(" %d" % input)
 			fileHandle.write("\n")
-		if self._parentSet:
+		if self._set & kParentSet:
 			fileHandle.write("    parent %d\n" % self.parent)
 
+def _loadId(node, tokens):
+	node.id = int(tokens[1])
+
+def _loadName(node, tokens):
+	node.name = " ".join(tokens[1:])
+
+def _loadTranslate(node, tokens):
+	node.translate = [ int(tokens[1]), int(tokens[2]) ]
+
+def _loadParent(node, tokens):
+	node.parent = int(tokens[1])
+
+_kNodeHandlers = { "id" : _loadId,
+				   "name" : _loadName,
+				   "translate" : _loadTranslate,
+				   "parent" : _loadParent }
+
 class Input(Node):
 	kIntegrateValues = ["position", "speed"]
 	
+	__slots__ = [ "_channel", "_integrate", "_range", "_output" ]
+	
 	def __init__(self):
 		super(Input, self).__init__()
 		self._channel = ""
-		self._channelSet = False
 		self._integrate = ""
-		self._integrateSet = False
 		self._range = []
-		self._rangeSet = False
 		self._output = 0
-		self._outputSet = False
 		
-	def _setChannel(self, val):
-		self._channel = val
-		self._channelSet = True
-	def _getChannel(self): return self._channel
-	channel = property(_getChannel, _setChannel)
-
-	def _setIntegrate(self, val):
-		self._integrate = val
-		self._integrateSet = True
-	def _getIntegrate(self): return self._integrate
-	integrate = property(_getIntegrate, _setIntegrate)
-
-	def _setRange(self, val):
-		self._range = val
-		self._rangeSet = True
-	def _getRange(self): return self._range
-	range = property(_getRange, _setRange)
-
-	def _setOutput(self, val):
-		self._output = val
-		self._outputSet = True
-	def _getOutput(self): return self._output
-	output = property(_getOutput, _setOutput)
+	channel = _flagged("_channel", kChannelSet)
+	integrate = _flagged("_integrate", kIntegrateSet)
+	range = _flagged("_range", kRangeSet)
+	output = _flagged("_output", kOutputSet)
 
-		
 	def _parseTokens(self, tokens):
 		if tokens[0] == "channel":
 			if len(tokens) > 1:
@@ -197,13 +189,13 @@ class Input(Node):
 	def dump(self, fileHandle):
 		fileHandle.write("fuzzy input\n")
 		self._dumpHeader(fileHandle)
-		if self._channelSet:
+		if self._set & kChannelSet:
 			fileHandle.write("    channel %s\n" % self.channel)
-		if self._outputSet:
+		if self._set & kOutputSet:
 			fileHandle.write("    output  %f\n" % self.output)
-		if self._integrateSet:
+		if self._set & kIntegrateSet:
 			fileHandle.write("    integrate %s\n" % self.integrate)
-		if self._rangeSet:
+		if self._set & kRangeSet:
 			fileHandle.write("    range %f %f\n" % (self.range[0], self.range[1]))
 		self._dumpFooter(fileHandle)
 		
@@ -211,72 +203,27 @@ class Output(Node):
 	kIntegrateValues = ["position", "speed"]
 	kDefuzzValues = ["COM", "MOM", "BLEND"]
 	
+	__slots__ = [ "_channel", "_defuzz", "_integrate", "_range", "_delay", "_rate", "_output", "manual" ]
+	
 	def __init__(self):
 		super(Output, self).__init__()
 		self._channel = ""
-		self._channelSet = False
 		self._defuzz = ""
-		self._defuzzSet = False
 		self._integrate = ""
-		self._integrateSet = False
 		self._range = []
-		self._rangeSet = False
 		self._delay = 0.0
-		self._delaySet = False
 		self._rate = 0.0
-		self._rateSet = False
 		self._output = 0.0
-		self._outputSet = False
-		self._manual = False
+		self.manual = False
 		
-	def _setChannel(self, val):
-		self._channel = val
-		self._channelSet = True
-	def _getChannel(self): return self._channel
-	channel = property(_getChannel, _setChannel)
-	
-	def _setDefuzz(self, val):
-		self._defuzz = val
-		self._defuzzSet = True
-	def _getDefuzz(self): return self._defuzz
-	defuzz = property(_getDefuzz, _setDefuzz)
-	
-	def _setIntegrate(self, val):
-		self._integrate = val
-		self._integrateSet = True
-	def _getIntegrate(self): return self._integrate
-	integrate = property(_getIntegrate, _setIntegrate)
-	
-	def _setRange(self, val):
-		self._range = val
-		self._rangeSet = True
-	def _getRange(self): return self._range
-	range = property(_getRange, _setRange)
-	
-	def _setDelay(self, val):
-		self._delay = val
-		self._delaySet = True
-	def _getDelay(self): return self._delay
-	delay = property(_getDelay, _setDelay)
-	
-	def _setRate(self, val):
-		self._rate = val
-		self._rateSet = True
-	def _getRate(self): return self._rate
-	rate = property(_getRate, _setRate)
-	
-	def _setOutput(self, val):
-		self._output = val
-		self._outputSet = True
-	def _getOutput(self): return self._output
-	output = property(_getOutput, _setOutput)
-	
-	def _setManual(self, val):
-		self._manual = val
-	def _getManual(self): return self._manual
-	manual = property(_getManual, _setManual)
+	channel = _flagged("_channel", kChannelSet)
+	defuzz = _flagged("_defuzz", kDefuzzSet)
+	integrate = _flagged("_integrate", kIntegrateSet)
+	range = _flagged("_range", kRangeSet)
+	delay = _flagged("_delay", kDelaySet)
+	rate = _flagged("_rate", kRateSet)
+	output = _flagged("_output", kOutputSet)
 
-		
 	def _parseTokens(self, tokens):
 		'''	If Manual is enabled the output value is stored in the 'output'
 			token.'''
@@ -301,21 +248,21 @@ class Output(Node):
 	def dump(self, fileHandle):
 		fileHandle.write("fuzzy output\n")
 		self._dumpHeader(fileHandle)
-		if self._channelSet:
+		if self._set & kChannelSet:
 			fileHandle.write("    channel %s\n" % self.channel)
-		if self._outputSet:
+		if self._set & kOutputSet:
 			fileHandle.write("    output  %f\n" % self.output)
-		if self._manual:
+		if self.manual:
 			fileHandle.write("    manual\n")
-		if self._defuzzSet:
+		if self._set & kDefuzzSet:
 			fileHandle.write("    defuzz  %s\n" % self.defuzz)
-		if self._integrateSet:
+		if self._set & kIntegrateSet:
 			fileHandle.write("    integrate %s\n" % self.integrate)
-		if self._rangeSet:
+		if self._set & kRangeSet:
 			fileHandle.write("    range %f %f\n" % (self.range[0], self.range[1]))
-		if self._delaySet:
+		if self._set & kDelaySet:
 			fileHandle.write("    delay %f\n" % self.delay)
-		if self._rateSet:
+		if self._set & kRateSet:
 			fileHandle.write("    rate %f\n" % self.rate)
 		self._dumpFooter(fileHandle)
 				
@@ -328,37 +275,17 @@ class Fuzz(Node):
 					 's':2,
 					 'singleton':1}
 	
+	__slots__ = [ "_inference", "inferencePoints", "_interpolation", "wrap" ]
+	
 	def __init__(self):
 		super(Fuzz, self).__init__()
 		self._inference = ""
-		self._inferenceSet = False
-		self._inferencePoints = []
+		self.inferencePoints = []
 		self._interpolation = ""
-		self._interpolationSet = False
-		self._wrap = False
-
-	def _setInference(self, val):
-		self._inference = val
-		self._inferenceSet = True
-	def _getInference(self): return self._inference
-	inference = property(_getInference, _setInference)
-
-	def _setInferencePoints(self, val):
-		self._inferencePoints = val
-	def _getInferencePoints(self): return self._inferencePoints
-	inferencePoints = property(_getInferencePoints, _setInferencePoints)
-
-	def _setInterpolation(self, val):
-		self._interpolation = val
-		self._interpolationSet = True
-	def _getInterpolation(self): return self._interpolation
-	interpolation = property(_getInterpolation, _setInterpolation)
-
-	def _setWrap(self, val):
-		self._wrap = val
-	def _getWrap(self): return self._wrap
-	wrap = property(_getWrap, _setWrap)
+		self.wrap = False
 
+	inference = _flagged("_inference", kInferenceSet)
+	interpolation = _flagged("_interpolation", kInterpolationSet)
 
 	def _parseTokens(self, tokens):
 		if tokens[0] == "wrap":
@@ -372,14 +299,14 @@ class Fuzz(Node):
 	def dump(self, fileHandle):
 		fileHandle.write("fuzzy fuzz\n")
 		self._dumpHeader(fileHandle)
-		if self._inferenceSet:
+		if self._set & kInferenceSet:
 			fileHandle.write("    %s inference" % self.inference)
 			for point in self.inferencePoints:
 				fileHandle.write(" %f" % point)
 			fileHandle.write("\n")
-		if self._interpolationSet:
+		if self._set & kInterpolationSet:
 			fileHandle.write("    %s interpolation\n" % self.interpolation)
-		if self._wrap:
+		if self.wrap:
 			fileHandle.write("    wrap\n")
 		self._dumpFooter(fileHandle)
 		
@@ -387,24 +314,15 @@ class Fuzz(Node):
 class Rule(Node):
 	kTypeValues = ["min", "prod"]
 	
+	__slots__ = [ "_weight", "_type" ]
+	
 	def __init__(self):
 		super(Rule, self).__init__()
 		self._weight = 0.0
-		self._weightSet = False
 		self._type = "min"
-		self._typeSet = False
 
-	def _setWeight(self, val):
-		self._weight = val
-		self._weightSet = True
-	def _getWeight(self): return self._weight
-	weight = property(_getWeight, _setWeight)
-	
-	def _setType(self, val):
-		self._type = val
-		self._typeSet = True
-	def _getType(self): return self._type
-	type = property(_getType, _setType)
+	weight = _flagged("_weight", kWeightSet)
+	type = _flagged("_type", kTypeSet)
 	
 	def _parseTokens(self, tokens):
 		if tokens[0] == "weight":
@@ -415,33 +333,24 @@ class Rule(Node):
 	def dump(self, fileHandle):
 		fileHandle.write("fuzzy rule\n")
 		self._dumpHeader(fileHandle)
-		if self._weightSet:
+		if self._set & kWeightSet:
 			fileHandle.write("    weight  %f\n" % self.weight)
-		if self._typeSet:
+		if self._set & kTypeSet:
 			fileHandle.write("    and     %s\n" % self.type)
 		self._dumpFooter(fileHandle)
 
 class Or(Node):
 	kTypeValues = ["max", "sum"]
 	
+	__slots__ = [ "_weight", "_type" ]
+	
 	def __init__(self):
 		super(Or, self).__init__()
 		self._weight = 0.0
-		self._weightSet = False
 		self._type = "max"
-		self._typeSet = False
 
-	def _setWeight(self, val):
-		self._weight = val
-		self._weightSet = True
-	def _getWeight(self): return self._weight
-	weight = property(_getWeight, _setWeight)
-	
-	def _setType(self, val):
-		self._type = val
-		self._typeSet = True
-	def _getType(self): return self._type
-	type = property(_getType, _setType)
+	weight = _flagged("_weight", kWeightSet)
+	type = _flagged("_type", kTypeSet)
 		
 	def _parseTokens(self, tokens):
 		if tokens[0] == "weight":
@@ -452,29 +361,21 @@ class Or(Node):
 	def dump(self, fileHandle):
 		fileHandle.write("fuzzy or\n")
 		self._dumpHeader(fileHandle)
-		if self._weightSet:
+		if self._set & kWeightSet:
 			fileHandle.write("    weight  %f\n" % self.weight)
-		if self._typeSet:
+		if self._set & kTypeSet:
 			fileHandle.write("    or %s\n" % self.type)
 		self._dumpFooter(fileHandle)
 		
 class Defuzz(Node):
+	__slots__ = [ "_defuzz", "isElse" ]
+	
 	def __init__(self):
 		super(Defuzz, self).__init__()
 		self._defuzz = 0.0
-		self._defuzzSet = False
-		self._isElse = False
-
-	def _setDefuzz(self, val):
-		self._defuzz = val
-		self._defuzzSet = True
-	def _getDefuzz(self): return self._defuzz
-	defuzz = property(_getDefuzz, _setDefuzz)
-	
-	def _setIsElse(self, val):
-		self._isElse = val
-	def _getIsElse(self): return self._isElse
-	isElse = property(_getIsElse, _setIsElse)
+		self.isElse = False
+
+	defuzz = _flagged("_defuzz", kDefuzzSet)
 
 	def _parseTokens(self, tokens):
 		if tokens[0] == "defuzz":
@@ -485,39 +386,24 @@ class Defuzz(Node):
 	def dump(self, fileHandle):
 		fileHandle.write("fuzzy defuzz\n")
 		self._dumpHeader(fileHandle)
-		if self._defuzzSet:
+		if self._set & kDefuzzSet:
 			fileHandle.write("    defuzz  %f\n" % self.defuzz)
-		if self._isElse:
+		if self.isElse:
 			fileHandle.write("    else\n")
 		self._dumpFooter(fileHandle)
 
 class Noise(Node):
+	__slots__ = [ "_rate", "_seed", "_output" ]
+	
 	def __init__(self):
 		super(Noise, self).__init__()
 		self._rate = 0
-		self._rateSet = False
 		self._seed = 0
-		self._seedSet = False
 		self._output = 0.0
-		self._outputSet = False
 
-	def _setRate(self, val):
-		self._rate = val
-		self._rateSet = True
-	def _getRate(self): return self._rate
-	rate = property(_getRate, _setRate)
-	
-	def _setSeed(self, val):
-		self._seed = val
-		self._seedSet = True
-	def _getSeed(self): return self._seed
-	seed = property(_getSeed, _setSeed)
-
-	def _setOutput(self, val):
-		self._output = val
-		self._outputSet = True
-	def _getOutput(self): return self._output
-	output = property(_getOutput, _setOutput)
+	rate = _flagged("_rate", kRateSet)
+	seed = _flagged("_seed", kSeedSet)
+	output = _flagged("_output", kOutputSet)
 	
 	def _parseTokens(self, tokens):
 		'''If Manual is checked, the noise value is written as 'output'.'''
@@ -531,50 +417,30 @@ class Noise(Node):
 	def dump(self, fileHandle):
 		fileHandle.write("fuzzy noise\n")
 		self._dumpHeader(fileHandle)
-		if self._rateSet:
+		if self._set & kRateSet:
 			fileHandle.write("    rate    %s\n" % formatFloat(self.rate))
-		if self._seedSet:
+		if self._set & kSeedSet:
 			fileHandle.write("    seed    %d\n" % self.seed)
-		if self._outputSet:
+		if self._set & kOutputSet:
 			fileHandle.write("    output  %s\n" % formatFloat(self.output))
 		self._dumpFooter(fileHandle)
 				
 class Timer(Node):
 	kTriggerValues = ["if_stopped", "always"]
 	
+	__slots__ = [ "_rate", "_trigger", "_range", "endless" ]
+	
 	def __init__(self):
 		super(Timer, self).__init__()
 		self._rate = 0
-		self._rateSet = False
 		self._trigger = ""
-		self._triggerSet= False
 		self._range = [0.0, 1.0]
-		self._rangeSet = False
-		self._endless = False
-
-	def _setRate(self, val):
-		self._rate = val
-		self._rateSet = True
-	def _getRate(self): return self._rate
-	rate = property(_getRate, _setRate)
-	
-	def _setTrigger(self, val):
-		self._trigger = val
-		self._triggerSet = True
-	def _getTrigger(self): return self._trigger
-	trigger = property(_getTrigger, _setTrigger)
-	
-	def _setRange(self, val):
-		self._range = val
-		self._rangeSet = True
-	def _getRange(self): return self._range
-	range = property(_getRange, _setRange)
-	
-	def _setEndless(self, val):
-		self._endless = val
-	def _getEndless(self): return self._endless
-	endless = property(_getEndless, _setEndless)
-	
+		self.endless = False
+
+	rate = _flagged("_rate", kRateSet)
+	trigger = _flagged("_trigger", kTriggerSet)
+	range = _flagged("_range", kRangeSet)
+
 	def _parseTokens(self, tokens):
 		if tokens[0] == "rate":
 			self.rate = float(tokens[1])	
@@ -588,27 +454,24 @@ class Timer(Node):
 	def dump(self, fileHandle):
 		fileHandle.write("fuzzy timer\n")
 		self._dumpHeader(fileHandle)
-		if self._rateSet:
+		if self._set & kRateSet:
 			fileHandle.write("    rate    %s\n" % formatFloat(self.rate))
-		if self._triggerSet:
+		if self._set & kTriggerSet:
 			fileHandle.write("    trigger %s\n" % self.trigger)
-		if self._rangeSet:
+		if self._set & kRangeSet:
 			fileHandle.write("    range %s %s\n" % (formatFloat(self.range[0]), formatFloat(self.range[1])))
-		if self._endless:
+		if self.endless:
 			fileHandle.write("    endless\n")
 		self._dumpFooter(fileHandle)
 
 class Macro(Node):
+	__slots__ = [ "_child" ]
+	
 	def __init__(self):
 		super(Macro, self).__init__()
 		self._child = 0
-		self._childSet = False
 		
-	def _setChild(self, val):
-		self._child = val
-		self._childSet = True
-	def _getChild(self): return self._child
-	child = property(_getChild, _setChild)
+	child = _flagged("_child", kChildSet)
 		
 	def _parseTokens(self, tokens):
 		if tokens[0] == "child":
@@ -617,12 +480,14 @@ class Macro(Node):
 	def dump(self, fileHandle):
 		fileHandle.write("fuzzy macro\n")
 		self._dumpHeader(fileHandle)
-		if self._childSet:
+		if self._set & kChildSet:
 			fileHandle.write("    child %d\n" % self.child)
 		self._dumpFooter(fileHandle)
 
 
 class Comment(Node):
+	__slots__ = []
+	
 	def __init__(self):
 		super(Comment, self).__init__()
 
@@ -631,6 +496,17 @@ class Comment(Node):
 		self._dumpHeader(fileHandle)
 		self._dumpFooter(fileHandle)
 		
+kNodeTypes = { "input" : Input,
+			   "output" : Output,
+			   "fuzz" : Fuzz,
+			   "defuzz" : Defuzz,
+			   "rule" : Rule,
+			   "or" : Or,
+			   "timer" : Timer,
+			   "noise" : Noise,
+			   "macro" : Macro,
+			   "comment" : Comment }
+
 class Brain:
 	def __init__(self):
 		# list of nodes indexed by id
@@ -656,34 +532,16 @@ class Brain:
 				return node
 		raise Error("No node named %s" % name)
 		
-	def loadNode(self, fileHandle, tokens):
-		if "input" == tokens[1]:
-			node = Input()
-		elif "output" == tokens[1]:
-			node = Output()
-		elif "fuzz" == tokens[1]:
-			node = Fuzz()
-		elif "defuzz" == tokens[1]:
-			node = Defuzz()
-		elif "rule" == tokens[1]:
-			node = Rule()
-		elif "or" == tokens[1]:
-			node = Or()
-		elif "timer" == tokens[1]:
-			node = Timer()
-		elif "noise" == tokens[1]:
-			node = Noise()
-		elif "macro" == tokens[1]:
-			node = Macro()
-		elif "comment" == tokens[1]:
-			node = Comment()
-		else:
+	def loadNode(self, tokens, block):
+		'''Create a node of the type named by tokens[1] and load it from
+		   block: the tokenized lines that follow the 'fuzzy' line.'''
+		try:
+			node = kNodeTypes[tokens[1]]()
+		except KeyError:
 			raise Exception("Unknown fuzzy node type '%s'." % tokens[1])
 		
-		line = node.load(fileHandle)
+		node.load(block)
 		self.addNode(node)
-		
-		return line
 	
 	def countOutputConnections(self):
 		for node in self._ordered:
@@ -0,0 +1,161 @@
+# The MIT License
+#	
+# Copyright (c) 2008 James Piechota
+#	
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+'''Camera frustum culling. Finds the agents whose root comes within a
+   camera's view on any frame of a range, so that only those need to be
+   imported. Runs without Maya; the Maya layer only has to describe the
+   camera.'''
+
+import sys
+import math
+
+import ns.py.Errors as Errors
+import ns.bridge.data.Selection as Selection
+import ns.bridge.data.SpatialIndex as SpatialIndex
+
+class Camera:
+	'''A perspective camera looking down its local -Z axis with +Y up, like
+	   a Maya camera. worldMatrix is 16 floats with the translation in the
+	   last row. horizontalFov is in degrees and aspect is width / height.
+	   An animated camera can also give a world matrix per frame in
+	   'matrices'; frames missing from it use worldMatrix.'''
+	def __init__(self, worldMatrix, horizontalFov, aspect, near, far, matrices=None):
+		if near <= 0.0 or far <= near:
+			raise Errors.BadArgumentError("Camera clipping planes must satisfy 0 < near < far.")
+		self.worldMatrix = list(worldMatrix)
+		self.horizontalFov = horizontalFov
+		self.aspect = aspect
+		self.near = near
+		self.far = far
+		if matrices:
+			self.matrices = matrices
+		else:
+			self.matrices = {}
+	
+	def isAnimated(self):
+		return bool(self.matrices)
+	
+	def matrix(self, frame):
+		return self.matrices.get(frame, self.worldMatrix)
+
+def _normalize(v):
+	length = math.sqrt(v[0] * v[0] + v[1] * v[1] + v[2] * v[2])
+	return (v[0] / length, v[1] / length, v[2] / length)
+
+class Frustum:
+	'''The six planes bounding a camera's view, in world space, with normals
+	   pointing inwards. Each plane is pushed outwards by 'padding' so that
+	   agents whose root is just outside the view, but whose body may not
+	   be, are kept.'''
+	def __init__(self, camera, worldMatrix=None, padding=0.0):
+		if worldMatrix is None:
+			worldMatrix = camera.worldMatrix
+		m = worldMatrix
+		xAxis = _normalize(m[0:3])
+		yAxis = _normalize(m[4:7])
+		zAxis = _normalize(m[8:11])
+		position = m[12:15]
+		
+		tanH = math.tan(math.radians(camera.horizontalFov) / 2.0)
+		tanV = tanH / camera.aspect
+		# (normal, distance) in camera space, inside where n.p + d >= 0
+		local = [ ((0.0, 0.0, -1.0), -camera.near),
+				  ((0.0, 0.0, 1.0), camera.far),
+				  ((1.0, 0.0, -tanH), 0.0),
+				  ((-1.0, 0.0, -tanH), 0.0),
+				  ((0.0, 1.0, -tanV), 0.0),
+				  ((0.0, -1.0, -tanV), 0.0) ]
+		self.planes = []
+		for (normal, distance) in local:
+			scale = math.sqrt(normal[0] ** 2 + normal[1] ** 2 + normal[2] ** 2)
+			n = [ (normal[0] * xAxis[i] + normal[1] * yAxis[i] + normal[2] * zAxis[i]) / scale
+				  for i in range(3) ]
+			d = distance / scale - (n[0] * position[0] + n[1] * position[1] + n[2] * position[2])
+			self.planes.append((n, d + padding))
+	
+	def containsPoint(self, point):
+		for (n, d) in self.planes:
+			if n[0] * point[0] + n[1] * point[1] + n[2] * point[2] + d < 0.0:
+				return False
+		return True
+	
+	def intersectsBox(self, low, high):
+		'''False if the box is entirely outside one of the planes. Boxes
+		   near the frustum's corners may be reported as intersecting when
+		   they don't, which only means an agent too many is kept.'''
+		for (n, d) in self.planes:
+			# The box corner furthest along the plane normal
+			distance = d
+			for i in range(3):
+				if n[i] >= 0.0:
+					distance += n[i] * high[i]
+				else:
+					distance += n[i] * low[i]
+			if distance < 0.0:
+				return False
+		return True
+	
+	def containsBox(self, low, high):
+		'''True if the box is entirely inside the frustum.'''
+		for (n, d) in self.planes:
+			distance = d
+			for i in range(3):
+				if n[i] >= 0.0:
+					distance += n[i] * low[i]
+				else:
+					distance += n[i] * high[i]
+			if distance < 0.0:
+				return False
+		return True
+
+def cull(agents, camera, startFrame, endFrame, padding=0.0):
+	'''Return the ids of the agents whose root, padded by 'padding', is in
+	   the camera's view on any frame from startFrame to endFrame inclusive.
+	   For a static camera the box swept by each agent is tested first so
+	   that agents entirely outside or inside the view don't need to be
+	   tested frame by frame.'''
+	frames = range(startFrame, endFrame + 1)
+	if camera.isAnimated():
+		frustums = [ Frustum(camera, camera.matrix(frame), padding) for frame in frames ]
+	else:
+		frustum = Frustum(camera, padding=padding)
+		frustums = [ frustum ] * len(frames)
+	
+	visible = []
+	for agent in agents:
+		if not camera.isAnimated():
+			(low, high) = SpatialIndex.sweptBounds(agent, startFrame, endFrame)
+			if not frustum.intersectsBox(low, high):
+				continue
+			if frustum.containsBox(low, high):
+				visible.append(agent.id)
+				continue
+		for i in range(len(frames)):
+			if frustums[i].containsPoint(SpatialIndex.rootPosition(agent, frames[i])):
+				visible.append(agent.id)
+				break
+	visible.sort()
+	return visible
+
+def selection(agents, camera, startFrame, endFrame, padding=0.0):
+	'''Selection of the agents cull() keeps.'''
+	return Selection.fromIds(cull(agents, camera, startFrame, endFrame, padding))
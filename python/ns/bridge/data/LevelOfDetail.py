@@ -0,0 +1,91 @@
+# The MIT License
+#	
+# Copyright (c) 2008 James Piechota
+#	
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+'''Level of detail planning. Agents near the camera are built with full
+   smooth skinned geometry and agents further away with progressively
+   cheaper representations. The planner only decides each agent's tier,
+   the Maya layer builds it.'''
+
+import sys
+import math
+
+import ns.py.Errors as Errors
+import ns.bridge.data.SpatialIndex as SpatialIndex
+
+class eTier:
+	'''full:		smooth skinned geometry
+	   chunks:		geometry split into chunks instanced onto the joints
+	   segments:	segment primitives only
+	   proxy:		a locator following the root joint'''
+	full, chunks, segments, proxy = range(4)
+
+kTierNames = [ "full", "chunks", "segments", "proxy" ]
+
+class Planner:
+	'''Assign a tier to each agent based on the closest its root comes to
+	   the camera over a frame range. 'distances' holds the furthest
+	   distance at which each of the full, chunks and segments tiers is
+	   used, in increasing order. Agents further away than the last one are
+	   proxies, so with fewer distances the tiers in between are skipped.'''
+	def __init__(self, camera, distances):
+		if not distances or len(distances) > eTier.proxy:
+			raise Errors.BadArgumentError("Between 1 and %d level of detail distances are needed." % eTier.proxy)
+		for i in range(1, len(distances)):
+			if distances[i] < distances[i - 1]:
+				raise Errors.BadArgumentError("Level of detail distances must be in increasing order.")
+		self.camera = camera
+		self.distances = list(distances)
+	
+	def tier(self, distance):
+		'''Tier for an agent 'distance' from the camera.'''
+		for i in range(len(self.distances)):
+			if distance <= self.distances[i]:
+				return i
+		return eTier.proxy
+	
+	def distance(self, agent, startFrame, endFrame):
+		'''Closest the Agent's root comes to the camera from startFrame to
+		   endFrame inclusive.'''
+		closest2 = None
+		for frame in range(startFrame, endFrame + 1):
+			eye = self.camera.matrix(frame)[12:15]
+			position = SpatialIndex.rootPosition(agent, frame)
+			d2 = ((position[0] - eye[0]) ** 2 +
+				  (position[1] - eye[1]) ** 2 +
+				  (position[2] - eye[2]) ** 2)
+			if closest2 is None or d2 < closest2:
+				closest2 = d2
+		return math.sqrt(closest2)
+	
+	def plan(self, agents, startFrame, endFrame):
+		'''Return a dictionary mapping each Agent's id to its tier.'''
+		tiers = {}
+		for agent in agents:
+			tiers[agent.id] = self.tier(self.distance(agent, startFrame, endFrame))
+		return tiers
+
+def counts(tiers):
+	'''Number of agents planned at each tier.'''
+	result = [ 0 ] * len(kTierNames)
+	for tier in tiers.values():
+		result[tier] += 1
+	return result
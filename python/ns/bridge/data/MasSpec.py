@@ -35,7 +35,9 @@ class Group:
 		self.id = id
 		self.name = name
 		
-class Locator:
+class Locator(object):
+	__slots__ = [ "group", "position" ]
+	
 	def __init__(self, groupId, position):
 		self.group = groupId
 		self.position = tuple(position)
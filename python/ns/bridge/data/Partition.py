@@ -0,0 +1,336 @@
+# The MIT License
+#	
+# Copyright (c) 2008 James Piechota
+#	
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+'''Divide the agents of a sim into shards of roughly equal import cost.
+   Each agent's cost is estimated from the features of its agent type and
+   the size of its sim data by a CostModel, and the agents are handed out
+   longest first to the least loaded shard.'''
+
+import sys
+import os
+import os.path
+import heapq
+
+import ns.py.Errors as Errors
+import ns.bridge.data.Agent as Agent
+import ns.bridge.data.AgentRegistry as AgentRegistry
+import ns.bridge.data.AgentSpec as AgentSpec
+import ns.bridge.data.Selection as Selection
+import ns.bridge.io.CallsheetReader as CallsheetReader
+
+# Seconds per unit of each feature, measured on skeleton plus smooth
+# skinned imports. CostModel.calibrate() refines them from real timings.
+# "shards" is the fixed cost of starting the process that imports a shard,
+# it has no effect on how agents are divided.
+kDefaultCoefficients = { "agents" : 0.05,
+						 "joints" : 0.01,
+						 "geometry" : 0.02,
+						 "vertices" : 0.00002,
+						 "weights" : 0.000001,
+						 "chunkedVertices" : 0.0001,
+						 "simBytes" : 0.0000001,
+						 "shards" : 5.0 }
+kFeatures = kDefaultCoefficients.keys()
+kFeatures.sort()
+
+class InventoryEntry:
+	'''An agent found in the sim: its id, agent type, and the number of
+	   bytes of sim data it has.'''
+	def __init__(self, id, agentType, simBytes):
+		self.id = id
+		self.agentType = agentType
+		self.simBytes = simBytes
+
+def inventory(simDir, simType, callsheet="", numAgents=0, selection=None):
+	'''List the agents of a sim without reading any sim data. Agents are
+	   taken from the callsheet if there is one, otherwise from the .amc
+	   file names, otherwise they are assumed to be ids 1 to numAgents of
+	   an unknown type. Only agents in 'selection', a Selection, are listed
+	   if it is given. APF files hold every agent so their bytes are
+	   shared out evenly.'''
+	simFiles = []
+	if simDir and os.path.isdir(simDir):
+		simFiles = [ os.path.join(simDir, file) for file in os.listdir(simDir)
+					 if os.path.splitext(file)[1] == simType ]
+	
+	entries = {}
+	if callsheet:
+		sheet = CallsheetReader.load(callsheet)
+		for i in range(len(sheet)):
+			(agentType, id) = AgentRegistry.parseName(sheet.names[i])
+			entries[sheet.ids[i]] = InventoryEntry(sheet.ids[i], agentType, 0)
+	
+	if ".amc" == simType:
+		for simFile in simFiles:
+			# agentType.#.amc
+			tokens = os.path.basename(simFile).split(".")
+			(agentType, id) = AgentRegistry.parseName(Agent.formatAgentName(tokens[0], tokens[1]))
+			try:
+				entry = entries[id]
+			except KeyError:
+				if callsheet:
+					# Not on the callsheet, won't be imported
+					continue
+				entry = InventoryEntry(id, agentType, 0)
+				entries[id] = entry
+			entry.simBytes = os.path.getsize(simFile)
+	
+	if not entries:
+		for id in range(1, numAgents + 1):
+			entries[id] = InventoryEntry(id, "", 0)
+	
+	if selection is not None:
+		for id in entries.keys():
+			if not selection.contains(id):
+				del entries[id]
+	
+	if ".apf" == simType and entries:
+		totalBytes = 0
+		for simFile in simFiles:
+			totalBytes += os.path.getsize(simFile)
+		for entry in entries.values():
+			entry.simBytes = totalBytes / len(entries)
+	
+	ids = entries.keys()
+	ids.sort()
+	return [ entries[id] for id in ids ]
+
+# Vertex counts of OBJ files, by path
+_vertexCounts = {}
+
+def vertexCount(objFile):
+	'''Return the number of vertices in an OBJ file, 0 if it can't be
+	   read.'''
+	try:
+		return _vertexCounts[objFile]
+	except KeyError:
+		pass
+	count = 0
+	try:
+		fileHandle = open(objFile, "r")
+	except IOError:
+		return 0
+	try:
+		for line in fileHandle:
+			if line.startswith("v "):
+				count += 1
+	finally:
+		fileHandle.close()
+	_vertexCounts[objFile] = count
+	return count
+
+def _geometryFeatures(geometry, features, skinType):
+	if geometry.weights():
+		vertices = len(geometry.weights())
+	else:
+		vertices = vertexCount(geometry.file)
+	features["geometry"] += 1
+	features["vertices"] += vertices
+	if geometry.attach or not geometry.weights():
+		return
+	if "smooth" == skinType:
+		features["weights"] += vertices * len(geometry.deformers())
+	else:
+		features["chunkedVertices"] += vertices
+
+def typeFeatures(agentSpec, skinType="smooth", loadGeometry=True):
+	'''Return the features of one agent of type 'agentSpec', minus its sim
+	   data. Geometry picked by an option counts as the average of the
+	   option's inputs.'''
+	features = dict.fromkeys(kFeatures, 0.0)
+	features["agents"] = 1.0
+	features["joints"] = float(len([ joint for joint in agentSpec.jointData if joint ]))
+	if not loadGeometry:
+		return features
+	for item in agentSpec.geoDB.items():
+		if isinstance(item, AgentSpec.Option):
+			inputs = [ input for input in item.inputs if isinstance(input, AgentSpec.Geometry) ]
+			if not inputs:
+				continue
+			optionFeatures = dict.fromkeys(kFeatures, 0.0)
+			for input in inputs:
+				_geometryFeatures(input, optionFeatures, skinType)
+			for name in kFeatures:
+				features[name] += optionFeatures[name] / len(inputs)
+		else:
+			_geometryFeatures(item, features, skinType)
+	return features
+
+def _solve(a, b):
+	'''Solve the square linear system a.x = b by Gaussian elimination with
+	   partial pivoting. 'a' and 'b' are modified.'''
+	n = len(b)
+	for column in range(n):
+		pivot = column
+		for row in range(column + 1, n):
+			if abs(a[row][column]) > abs(a[pivot][column]):
+				pivot = row
+		if not a[pivot][column]:
+			raise Errors.BadArgumentError("Singular system")
+		a[column], a[pivot] = a[pivot], a[column]
+		b[column], b[pivot] = b[pivot], b[column]
+		for row in range(column + 1, n):
+			factor = a[row][column] / a[column][column]
+			for k in range(column, n):
+				a[row][k] -= factor * a[column][k]
+			b[row] -= factor * b[column]
+	x = [ 0.0 ] * n
+	for row in range(n - 1, -1, -1):
+		total = b[row]
+		for k in range(row + 1, n):
+			total -= a[row][k] * x[k]
+		x[row] = total / a[row][row]
+	return x
+
+class CostModel:
+	'''Estimates import time in seconds as a weighted sum of features.'''
+	def __init__(self, coefficients=None):
+		self.coefficients = dict(kDefaultCoefficients)
+		if coefficients:
+			self.coefficients.update(coefficients)
+	
+	def cost(self, features):
+		total = 0.0
+		for (name, value) in features.items():
+			total += self.coefficients.get(name, 0.0) * value
+		return total
+	
+	def calibrate(self, observations, stiffness=0.01):
+		'''Fit the coefficients to 'observations', a list of (features,
+		   seconds) pairs such as the summed features and run time of each
+		   shard of a previous import. The fit is pulled towards the current
+		   coefficients, by 'stiffness', so that a handful of observations
+		   can't produce wild values. Coefficients are kept non-negative.'''
+		if not observations:
+			return
+		# Work with features scaled to [0, 1] so that the pull towards
+		# the current coefficients weighs every feature equally
+		scales = []
+		for name in kFeatures:
+			scale = max([ features.get(name, 0.0) for (features, seconds) in observations ])
+			if scale <= 0.0:
+				scale = 1.0
+			scales.append(scale)
+		n = len(kFeatures)
+		a = [ [ 0.0 ] * n for i in range(n) ]
+		b = [ 0.0 ] * n
+		for (features, seconds) in observations:
+			row = [ features.get(kFeatures[i], 0.0) / scales[i] for i in range(n) ]
+			for i in range(n):
+				for j in range(n):
+					a[i][j] += row[i] * row[j]
+				b[i] += row[i] * seconds
+		for i in range(n):
+			a[i][i] += stiffness
+			b[i] += stiffness * self.coefficients[kFeatures[i]] * scales[i]
+		solution = _solve(a, b)
+		for i in range(n):
+			self.coefficients[kFeatures[i]] = max(0.0, solution[i] / scales[i])
+	
+	def read(self, fileName):
+		'''Read "feature coefficient" lines written by write().'''
+		fileHandle = open(fileName, "r")
+		try:
+			for line in fileHandle:
+				tokens = line.split()
+				if 2 == len(tokens) and tokens[0] in self.coefficients:
+					self.coefficients[tokens[0]] = float(tokens[1])
+		finally:
+			fileHandle.close()
+	
+	def write(self, fileName):
+		fileHandle = open(fileName, "w")
+		try:
+			for name in kFeatures:
+				fileHandle.write("%s %r\n" % (name, self.coefficients[name]))
+		finally:
+			fileHandle.close()
+
+def lpt(costs, numShards):
+	'''Longest processing time first: hand out the (id, cost) pairs, most
+	   expensive first, each to the currently least loaded shard. Return
+	   a (load, ids) pair per shard, with sorted ids.'''
+	if numShards < 1:
+		raise Errors.BadArgumentError("At least one shard is needed")
+	order = [ (-cost, id) for (id, cost) in costs ]
+	order.sort()
+	heap = [ (0.0, i) for i in range(numShards) ]
+	shards = [ [] for i in range(numShards) ]
+	loads = [ 0.0 ] * numShards
+	for (negativeCost, id) in order:
+		(load, i) = heapq.heappop(heap)
+		shards[i].append(id)
+		loads[i] = load - negativeCost
+		heapq.heappush(heap, (loads[i], i))
+	result = []
+	for i in range(numShards):
+		shards[i].sort()
+		result.append((loads[i], shards[i]))
+	return result
+
+class Shard:
+	'''Agents to import together: their ids, the sum of their features and
+	   the estimated cost.'''
+	def __init__(self, ids, features, cost):
+		self.ids = ids
+		self.features = features
+		self.cost = cost
+	
+	def ranges(self):
+		'''The ids as a -range string, e.g. "1-4 9 12-13".'''
+		return " ".join(Selection.fromIds(self.ids).ranges())
+
+def plan(entries, agentSpecs, numShards, model=None, skinType="smooth", loadGeometry=True):
+	'''Divide the InventoryEntries into at most 'numShards' Shards of
+	   balanced cost. 'agentSpecs' maps agent types to AgentSpecs; agents
+	   of unknown types are costed as the average known type. No entries
+	   means no Shards.'''
+	if not entries:
+		return []
+	if not model:
+		model = CostModel()
+	featuresByType = {}
+	for (agentType, agentSpec) in agentSpecs.items():
+		featuresByType[agentType] = typeFeatures(agentSpec, skinType, loadGeometry)
+	average = dict.fromkeys(kFeatures, 0.0)
+	for features in featuresByType.values():
+		for name in kFeatures:
+			average[name] += features[name] / len(featuresByType)
+	average["agents"] = 1.0
+	
+	agentFeatures = {}
+	costs = []
+	for entry in entries:
+		features = dict(featuresByType.get(entry.agentType, average))
+		features["simBytes"] = float(entry.simBytes)
+		agentFeatures[entry.id] = features
+		costs.append((entry.id, model.cost(features)))
+	
+	shards = []
+	for (load, ids) in lpt(costs, max(1, min(numShards, len(costs)))):
+		features = dict.fromkeys(kFeatures, 0.0)
+		features["shards"] = 1.0
+		for id in ids:
+			for name in kFeatures:
+				features[name] += agentFeatures[id][name]
+		shards.append(Shard(ids, features, load))
+	return shards
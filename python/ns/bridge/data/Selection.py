@@ -24,18 +24,36 @@
    agents will be imported.'''
 
 import sys
+from bisect import bisect_left, bisect_right
 
-class Selection:
-	def __init__(self):
-		self._ids = set()
+class Selection(object):
+	'''A set of agent ids stored as sorted, non-overlapping and
+	   non-adjacent inclusive intervals, so that large ranges like
+	   '1-2000000' cost two ints rather than millions.'''
+	__slots__ = [ "_starts", "_ends" ]
+	
+	def __init__(self, ranges=[]):
+		self._starts = []
+		self._ends = []
+		if ranges:
+			self.addRanges(ranges)
 
 	def __repr__(self):
-		return `self._ids`
+		return " ".join(self.ranges())
+	
+	def __len__(self):
+		'''Number of ids in the selection.'''
+		count = 0
+		for i in range(len(self._starts)):
+			count += self._ends[i] - self._starts[i] + 1
+		return count
 	
 	def addRanges( self, ranges ):
+		'''Add ids given as Massive range tokens: either a single id or an
+		   inclusive 'start-end' range.'''
 		for r in ranges:
 			try:
-				ids = [ int(r) ]
+				start = end = int(r)
 			except:
 				tokens = r.split("-")
 				if len(tokens) != 2:
@@ -43,19 +61,93 @@ class Selection:
 					continue
 				try:
 					start = int(tokens[0])
-					end = int(tokens[1])+1
+					end = int(tokens[1])
 				except:
 					print >> sys.stderr, "Selection range '%s' not understood. Ignoring." % r
 					continue					
-				ids = range( start, end )
-			self._ids.update(ids)
+			self.addInterval( start, end )
+	
+	def addInterval( self, start, end ):
+		'''Add the ids from start to end, inclusive, merging with any
+		   intervals they overlap or touch.'''
+		if end < start:
+			return
+		# Intervals i to j-1 overlap or are adjacent to [start, end]
+		i = bisect_left(self._ends, start - 1)
+		j = bisect_right(self._starts, end + 1)
+		if i < j:
+			start = min(start, self._starts[i])
+			end = max(end, self._ends[j - 1])
+		self._starts[i:j] = [ start ]
+		self._ends[i:j] = [ end ]
+	
+	def intervals( self ):
+		'''Return the selection as a sorted list of (start, end) tuples,
+		   both inclusive.'''
+		return zip(self._starts, self._ends)
+	
+	def ranges( self ):
+		'''Return the selection as Massive range tokens.'''
+		ranges = []
+		for (start, end) in self.intervals():
+			if start == end:
+				ranges.append("%d" % start)
+			else:
+				ranges.append("%d-%d" % (start, end))
+		return ranges
 	
 	def contains( self, id ):
-		return id in self._ids
-			
+		i = bisect_right(self._starts, id) - 1
+		return i >= 0 and id <= self._ends[i]
+	
+	def union( self, other ):
+		'''Return a new Selection with the ids in either selection.'''
+		result = Selection()
+		intervals = self.intervals() + other.intervals()
+		intervals.sort()
+		for (start, end) in intervals:
+			if result._ends and start <= result._ends[-1] + 1:
+				result._ends[-1] = max(end, result._ends[-1])
+			else:
+				result._starts.append(start)
+				result._ends.append(end)
+		return result
+	
+	def intersection( self, other ):
+		'''Return a new Selection with the ids in both selections.'''
+		result = Selection()
+		a = self.intervals()
+		b = other.intervals()
+		i = j = 0
+		while i < len(a) and j < len(b):
+			start = max(a[i][0], b[j][0])
+			end = min(a[i][1], b[j][1])
+			if start <= end:
+				result._starts.append(start)
+				result._ends.append(end)
+			if a[i][1] < b[j][1]:
+				i += 1
+			else:
+				j += 1
+		return result
+
+def fromIds(ids):
+	'''Build a Selection from a sequence of agent ids.'''
+	ids = list(ids)
+	ids.sort()
+	selection = Selection()
+	for id in ids:
+		selection.addInterval(id, id)
+	return selection
+
 class SelectionGroup:
+	'''Named selections. Membership is tested against the union of all the
+	   selections, which is compiled into a single interval index the
+	   first time it is needed. Selections should not be modified after
+	   they have been added to a group.'''
 	def __init__(self):
 		self._selections = {}
+		self._index = None
 	
 	def __repr__(self):
 		s = ""
@@ -65,6 +157,7 @@ class SelectionGroup:
 
 	def addSelection(self, name, selection):
 		self._selections[name] = selection
+		self._index = None
 		
 	def addAnonymousSelection(self, ranges):
 		'''Convenience method for adding ranges directly to a SelectionGroup'''
@@ -75,6 +168,7 @@ class SelectionGroup:
 			sel = Selection()
 			self._selections["__anonymous__"] = sel
 		sel.addRanges(ranges)
+		self._index = None
 		
 	def selection( self, name ):
 		return self._selections[name]
@@ -82,10 +176,16 @@ class SelectionGroup:
 	def selectionNames( self ):
 		return self._selections.keys()
 	
+	def index( self ):
+		'''Return the union of all the selections as a single Selection.'''
+		if self._index is None:
+			index = Selection()
+			for selection in self._selections.values():
+				index = index.union( selection )
+			self._index = index
+		return self._index
+	
 	def contains( self, id ):
 		if not self._selections:
 			return True
-		for selection in self._selections.values():
-			if selection.contains( id ):
-				return True
-		return False
+		return self.index().contains( id )
@@ -25,10 +25,13 @@ import sys
 import ns.bridge.io.CallsheetReader as CallsheetReader
 import ns.bridge.data.Selection as Selection
 import ns.bridge.data.Agent as Agent
+import ns.bridge.data.AgentRegistry as AgentRegistry
+import ns.bridge.data.VariableTable as VariableTable
 import ns.bridge.data.SimData as SimData
 import ns.bridge.io.SimReader as SimReader
 import ns.py as npy
 import ns.py.Errors
+import ns.py.Profiler as Profiler
 
 class Sim:
 	'''Load files and collect data related to a Massive simulation.
@@ -41,11 +44,90 @@ class Sim:
 		self.callsheet = callsheet
 		self.range = range
 		self._selectionGroup = self._initSelection(selectionNames, range)
-		self._agents = {}
+		self._registry = AgentRegistry.AgentRegistry()
+		# Indexed by registry index, None for agents that haven't been
+		# built
+		self._agents = []
+		self._variableTables = {}
 		self._load()
 
 	def agents( self ):
-		return self._agents.values()
+		return [ agent for agent in self._agents if agent ]
+
+	def registry( self ):
+		return self._registry
+
+	def selectionGroup( self ):
+		return self._selectionGroup
+
+	def variableTable( self, agentSpec ):
+		'''Return the VariableTable holding the variable values of all the
+		   agents using 'agentSpec'.'''
+		try:
+			return self._variableTables[agentSpec]
+		except KeyError:
+			table = VariableTable.VariableTable(agentSpec)
+			self._variableTables[agentSpec] = table
+			return table
+
+	def frameRange( self ):
+		'''Return the first and last frames of sim data over all agents,
+		   or None if no sim data was loaded.'''
+		startFrame = endFrame = None
+		for agent in self.agents():
+			simData = agent.simData()
+			if -sys.maxint == simData.startFrame:
+				continue
+			if startFrame is None or simData.startFrame < startFrame:
+				startFrame = simData.startFrame
+			if endFrame is None or simData.endFrame > endFrame:
+				endFrame = simData.endFrame
+		if startFrame is None:
+			return None
+		return (startFrame, endFrame)
+
+	def memoryUsage( self ):
+		'''Return a summary, for Memory.write(), of the estimated bytes
+		   held by the sim data of the agents, by each AgentSpec (including
+		   its weights) and by each weights table.'''
+		agents = self.agents()
+		simBytes = 0
+		counts = {}
+		for agent in agents:
+			simBytes += agent.simData().memoryUsage()
+			counts[agent.agentSpec] = counts.get(agent.agentSpec, 0) + 1
+		bytesPerAgent = 0
+		if agents:
+			bytesPerAgent = simBytes / len(agents)
+		
+		agentSpecs = []
+		weights = []
+		for agentSpec in self.scene.agentSpecs():
+			agentSpecs.append({ "agentType" : agentSpec.agentType,
+								"cdlFile" : agentSpec.cdlFile,
+								"agents" : counts.get(agentSpec, 0),
+								"bytes" : agentSpec.memoryUsage() })
+			for geometry in agentSpec.geoDB.geometries():
+				if geometry.weightsData:
+					weights.append({ "file" : geometry.weightsData.name(),
+									 "vertices" : len(geometry.weights()),
+									 "deformers" : len(geometry.deformers()),
+									 "bytes" : geometry.weightsData.memoryUsage() })
+		
+		return { "simData" : { "agents" : len(agents),
+							   "bytes" : simBytes,
+							   "bytesPerAgent" : bytesPerAgent },
+				 "agentSpecs" : agentSpecs,
+				 "weights" : weights }
+
+	def keepAgents( self, ids ):
+		'''Drop every agent whose id is not in 'ids', for example the agents
+		   culled by Frustum.cull().'''
+		keep = dict.fromkeys(ids)
+		for i in range(len(self._agents)):
+			agent = self._agents[i]
+			if agent and agent.id not in keep:
+				self._agents[i] = None
 
 	def agent(self, agentName, id, agentSpec):
 		'''If the given agent already exists, return it. Otherwise guess
@@ -59,35 +141,27 @@ class Sim:
 			#
 			return None
 		
-		try:
-			agent = self._agents[agentName]
-		except:
+		index = self._registry.register(agentName, id)
+		if index >= len(self._agents):
+			self._agents.extend( [ None ] * (index - len(self._agents) + 1) )
+		agent = self._agents[index]
+		if not agent:
 			# agentName does not already exist (probably no callsheet was
 			# provided) - build one *if* the agentType is defined. The
 			# agentType should have already been defined if a CDL file
 			# was specified in the MAS file for the agentType.
 			#
 			if not agentSpec:
-				agentSpec = self.scene.agentSpec(self._agentType(agentName))
+				agentSpec = self.scene.agentSpec(self._registry.agentType(index))
 			
 			agent = Agent.Agent()
-			agent.name = agentName
+			agent.name = self._registry.name(index)
 			agent.id = id
 			agent.agentSpec = agentSpec
-			self._agents[agentName] = agent
+			agent.setVariableTable( self.variableTable(agentSpec) )
+			self._agents[index] = agent
 		return agent
 	
-	def _agentType(self, agentName):
-		'''If this agent exists, query its agentType, otherwise try to 
-		   guess its agentType by parsing its name. Massive agents are usually
-		   named like: agentType_id'''
-		agentType = ""
-		try:
-			agentType = self._agents[agentName].agentType
-		except:
-			agentType = agentName.split("_")[0]
-		return agentType
-	
 	def _initSelection(self, selectionNames, range):
 		'''Only agents in the _selectionGroup will be created and simmed. The
 		   user can set the _selectionGroup by manually listing the selections
@@ -111,6 +185,7 @@ class Sim:
 		
 		return selectionGroup
 		
+	@Profiler.profiled("Sim.load")
 	def _load(self):
 		'''Build agents and load their sim data. If a callsheet was given it
 		   will fix the variable values for all agent instances. Otherwise the
@@ -122,12 +197,14 @@ class Sim:
 			CallsheetReader.read(self.callsheet, self)
 			
 		if self.simDir:
-			self._simData = SimData.SimData(self._selectionGroup)
+			self._simData = SimData.SimData(self._selectionGroup, self._registry)
 			SimReader.read(self.simDir, self.simType, self._simData)
 			for agentSim in self._simData.agents():
 				try:
-					agent = self._agents[agentSim.name()]
-				except KeyError:
+					agent = self._agents[agentSim.index()]
+				except IndexError:
+					agent = None
+				if not agent:
 					raise npy.Errors.UnitializedError("Agent %s does not exist. Perhaps the callsheet does not match the sim directory?" % agentSim.name())
 				agent.setSimData(agentSim)
 
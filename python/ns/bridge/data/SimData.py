@@ -21,11 +21,17 @@
 # THE SOFTWARE.
 
 import sys
+from array import array
 
 import ns
 import ns.py as nsp
 import ns.py.Errors
+import ns.py.Memory as Memory
 import ns.bridge.data.AgentSpec as AgentSpec
+import ns.bridge.data.AgentRegistry as AgentRegistry
+
+# Placeholder for agents that haven't been looked up yet
+_kUnresolved = object()
 
 class SimData:
 	'''Simmed animation data for a bunch of agents. The animation data only
@@ -36,44 +42,76 @@ class SimData:
 	   may only have access to the simulation .amc/.apf files and not the
 	   .cdl files needed to define a full agent instance. 
 	   This data structure resembles that of the Sim class:
-	   a map of agents, each of which storing a map of joints.'''
-	def __init__(self, selectionGroup=None):
-		self._agents = {}
+	   a list of agents indexed by their AgentRegistry index, each of which
+	   storing a map of joints.'''
+	def __init__(self, selectionGroup=None, registry=None):
+		if registry is None:
+			registry = AgentRegistry.AgentRegistry()
+		self._registry = registry
+		# Indexed by registry index. None if the agent was filtered out
+		# by the selection group, _kUnresolved if it hasn't been seen yet.
+		self._agents = []
 		self._selectionGroup = selectionGroup
+	
+	def registry(self):
+		return self._registry
 		
 	def agent(self, name):
 		'''Return the sim data for agent 'name'. A new SimData.Agent object will
 		   be created if necessary. If a selection group was provided when
 		   initializing the SimData, check that the specified agent is in the
 		   selection.'''
-		if self._selectionGroup:
-			id = int(name.split("_")[-1])
-			if not self._selectionGroup.contains( id ):
+		return self.agentByIndex( self._registry.register(name) )
+	
+	def agentByIndex(self, index):
+		'''Same as agent() but takes the agent's registry index. The
+		   selection is only checked the first time an agent is seen.'''
+		try:
+			a = self._agents[index]
+		except IndexError:
+			self._agents.extend( [ _kUnresolved ] * (index - len(self._agents) + 1) )
+			a = _kUnresolved
+		if a is _kUnresolved:
+			if self._selectionGroup and not self._selectionGroup.contains( self._registry.id(index) ):
 				# Filter out non-selected agents
 				#
-				return None
-		
-		a = None
-		try:
-			a = self._agents[name]
-		except:
-			a = Agent(name)
-			self._agents[name] = a
+				a = None
+			else:
+				a = Agent(self._registry.name(index), index)
+			self._agents[index] = a
 		return a
 	
 	def agents(self):
-		return self._agents.values()
+		return [ a for a in self._agents if a and a is not _kUnresolved ]
+	
+	def memoryUsage(self):
+		'''Estimated bytes held by the sim data of all the agents, not
+		   counting the registry.'''
+		total = Memory.sizeOf(self._agents)
+		for agent in self.agents():
+			total += agent.memoryUsage()
+		return total
 	   
-class Agent:
-	def __init__(self, name):
+class Agent(object):
+	__slots__ = [ "_name", "_index", "_joints", "_channelLayout",
+				  "startFrame", "endFrame" ]
+	
+	def __init__(self, name, index=-1):
 		self._name = name
+		self._index = index
 		self._joints = {}
+		self._channelLayout = None
 		self.startFrame = -sys.maxint
 		self.endFrame = -sys.maxint
 	
 	def name(self):
 		return self._name
 	
+	def index(self):
+		'''Index of the agent in the AgentRegistry, -1 if it isn't
+		   registered.'''
+		return self._index
+	
 	def joints(self):
 		return self._joints.values()
 	
@@ -94,6 +132,24 @@ class Agent:
 			self._joints[jointName] = j
 		j.addSample(frame, data)
 		
+	def setChannelLayout(self, layout):
+		'''Point each joint at its channel indices in the AgentSpec's shared
+		   ChannelLayout.'''
+		self._channelLayout = layout
+		for joint in self._joints.values():
+			joint.setChannelIndices( layout.channelIndices(joint.name()) )
+	
+	def channelLayout(self):
+		return self._channelLayout
+		
+	def memoryUsage(self):
+		'''Estimated bytes held by the agent and its joints. The shared
+		   ChannelLayout is not counted.'''
+		total = Memory.sizeOf(self) + Memory.sizeOf(self._name) + Memory.sizeOf(self._joints)
+		for joint in self._joints.values():
+			total += joint.memoryUsage()
+		return total
+		
 	def prune(self, jointNames):
 		'''Delete any joints not listed in jointNames'''
 		s = frozenset(jointNames)
@@ -101,16 +157,22 @@ class Agent:
 			if not j in s:
 				del self._joints[j]
 	
-class Joint:
+# Channel indices of joints that haven't been given any
+_kNoChannels = {}
+
+class Joint(object):
+	__slots__ = [ "_channels", "_startFrame", "_numFrames", "_numChannels",
+				  "_name", "_order" ]
+	
 	def __init__(self, name, startFrame):
-		# Each entry in _channels will contain a list of values for that
+		# Each entry in _channels will contain an array of values for that
 		# channel, one value per frame
 		self._channels = []
 		self._startFrame = startFrame
 		self._numFrames = 0
 		self._numChannels = 0
 		self._name = name
-		self._order = {}
+		self._order = _kNoChannels
 		
 	def name(self):
 		return self._name
@@ -127,15 +189,22 @@ class Joint:
 	def channelNames(self):
 		return self._order.keys()
 	
+	def memoryUsage(self):
+		'''Estimated bytes held by the joint and its samples. The channel
+		   indices are shared and not counted.'''
+		total = Memory.sizeOf(self) + Memory.sizeOf(self._name) + Memory.sizeOf(self._channels)
+		for channel in self._channels:
+			total += Memory.sizeOf(channel)
+		return total
+	
 	def setOrderDOF(self, order, dof):
 		'''Map channel names to the indices in the _channels array.'''
-		i = 0
-		for channel in range(len(order)):
-			if not dof[channel]:
-				continue
-			channelName = AgentSpec.enum2Channel[order[channel]]
-			self._order[channelName] = i
-			i += 1
+		self._order = AgentSpec.channelIndices(order, dof)
+	
+	def setChannelIndices(self, indices):
+		'''Use a shared channel name to index map, see
+		   AgentSpec.ChannelLayout.'''
+		self._order = indices
 		
 	def sample(self, channelName, frame):
 		'''Return the sample value for 'channelName' at frame 'frame'. If we
@@ -164,7 +233,7 @@ class Joint:
 			# Joint.
 			self._numChannels = len(data)
 			for i in range(self._numChannels):
-				self._channels.append([])
+				self._channels.append(array('d'))
 		elif len(data) != self._numChannels:
 			raise nsp.Errors.BadArgumentError("Wrong number of sim data channels.")
 		
@@ -176,8 +245,9 @@ class Joint:
 				for channel in self._channels:
 					channel.append( 0.0 )
 			else:
+				padding = array('d', [ 0.0 ]) * extraFrames
 				for channel in self._channels:
-					channel.extend( [ 0.0 ] * extraFrames )
+					channel.extend( padding )
 			self._numFrames = frame + 1
 		
 		# Add the sample to each channel
@@ -0,0 +1,110 @@
+# The MIT License
+#	
+# Copyright (c) 2008 James Piechota
+#	
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+'''Chunk skinning analysis. A mesh is cut into one chunk per deformer,
+   each chunk made of the faces that deformer influences most. Faces come
+   as the flat per-face vertex counts and vertex indices MFnMesh returns,
+   weights as sparse rows, so the work is proportional to the number of
+   non-zero weights rather than to faces times deformers.'''
+
+import sys
+from array import array
+
+def sparseWeights(weights):
+	'''Convert dense per-vertex weights (a list of per-deformer weight lists,
+	   as read from a .w file) into compressed rows: vertex v's non-zero
+	   weights are influences[offsets[v]:offsets[v+1]] and the matching
+	   entries of 'values'. Returns (offsets, influences, values).'''
+	offsets = array('l', [ 0 ])
+	influences = array('l')
+	values = array('d')
+	for vertex in weights:
+		row = [ (i, vertex[i]) for i in range(len(vertex)) if vertex[i] ]
+		influences.extend([ i for (i, value) in row ])
+		values.extend([ value for (i, value) in row ])
+		offsets.append(len(influences))
+	return (offsets, influences, values)
+
+def dominantDeformers(faceCounts, faceVertices, sparse):
+	'''Return, for each face, the index of the deformer with the largest
+	   sum of weights over the face's vertices. Ties go to the lowest index
+	   and a face no deformer influences goes to deformer 0. 'faceCounts'
+	   is the number of vertices of each face and 'faceVertices' their
+	   indices, face after face. 'sparse' comes from sparseWeights().'''
+	(offsets, influences, values) = sparse
+	numVertices = len(offsets) - 1
+	# (influence, weight) pairs of each vertex
+	rows = [ zip(influences[offsets[v]:offsets[v + 1]], values[offsets[v]:offsets[v + 1]])
+			 for v in range(numVertices) ]
+	dominant = array('l', [ 0 ] * len(faceCounts))
+	
+	position = 0
+	face = 0
+	for count in faceCounts:
+		totals = {}
+		for vertex in faceVertices[position:position + count]:
+			if vertex < numVertices:
+				for (i, weight) in rows[vertex]:
+					totals[i] = totals.get(i, 0.0) + weight
+		position += count
+		
+		best = 0
+		bestWeight = 0.0
+		for (i, weight) in totals.items():
+			if weight > bestWeight or (weight == bestWeight and i < best):
+				best = i
+				bestWeight = weight
+		dominant[face] = best
+		face += 1
+	return dominant
+
+def faceGroups(dominant, numDeformers):
+	'''Split the faces by dominant deformer: entry i lists the faces
+	   assigned to deformer i, in increasing order.'''
+	groups = [ [] for i in range(numDeformers) ]
+	for face in range(len(dominant)):
+		groups[dominant[face]].append(face)
+	return groups
+
+def ranges(indices):
+	'''Collapse sorted indices into inclusive (first, last) runs, to name
+	   components as e.g. f[10:250] instead of one by one.'''
+	runs = []
+	for index in indices:
+		if runs and index == runs[-1][1] + 1:
+			runs[-1][1] = index
+		else:
+			runs.append([ index, index ])
+	return [ (first, last) for (first, last) in runs ]
+
+def gaps(indices, count):
+	'''Inclusive (first, last) runs of the indices from 0 to count - 1
+	   that are not in the sorted 'indices'.'''
+	runs = []
+	next = 0
+	for (first, last) in ranges(indices):
+		if first > next:
+			runs.append((next, first - 1))
+		next = last + 1
+	if next < count:
+		runs.append((next, count - 1))
+	return runs
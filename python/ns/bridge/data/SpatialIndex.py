@@ -0,0 +1,235 @@
+# The MIT License
+#	
+# Copyright (c) 2008 James Piechota
+#	
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+'''Spatial queries over agent positions: which agents are inside a region,
+   or nearest to a point, at a given frame or over a range of frames.
+   
+   Positions come from the root joint channels of an agent's sim data when
+   it has a sample for the frame, and otherwise from the translation of its
+   callsheet placement matrix. Agents can also be indexed by the bounding
+   box swept by their root over a frame range.'''
+
+import sys
+import math
+from array import array
+
+import ns.bridge.data.Selection as Selection
+
+def placementPosition(placement):
+	'''Translation of a placement matrix, stored as 16 floats with the
+	   translation in the last row.'''
+	return (placement[12], placement[13], placement[14])
+
+def rootPosition(agent, frame):
+	'''Return the world position of an Agent's root at 'frame'. Falls back
+	   on the callsheet placement if there is no sim data for that frame.'''
+	root = agent.agentSpec.rootJoint()
+	if root:
+		try:
+			jointSim = agent.simData().joint(root.name)
+		except KeyError:
+			jointSim = None
+		if jointSim and jointSim.startFrame() <= frame < jointSim.startFrame() + jointSim.numFrames():
+			return (jointSim.sample("tx", frame),
+					jointSim.sample("ty", frame),
+					jointSim.sample("tz", frame))
+	return placementPosition(agent.placement)
+
+def sweptBounds(agent, startFrame, endFrame):
+	'''Return the (low, high) corners of the box containing the Agent's root
+	   position on every frame from startFrame to endFrame, inclusive.'''
+	low = list(rootPosition(agent, startFrame))
+	high = list(low)
+	for frame in range(startFrame + 1, endFrame + 1):
+		position = rootPosition(agent, frame)
+		for axis in range(3):
+			if position[axis] < low[axis]:
+				low[axis] = position[axis]
+			elif position[axis] > high[axis]:
+				high[axis] = position[axis]
+	return (tuple(low), tuple(high))
+
+def _boxDistance2(point, box, i):
+	'''Squared distance from 'point' to the box of item 'i'.'''
+	d2 = 0.0
+	for axis in range(3):
+		low = box[6 * i + axis]
+		high = box[6 * i + 3 + axis]
+		if point[axis] < low:
+			d2 += (low - point[axis]) ** 2
+		elif point[axis] > high:
+			d2 += (point[axis] - high) ** 2
+	return d2
+
+class SpatialIndex:
+	'''Uniform grid on the ground (XZ) plane over agent positions or
+	   bounding boxes. Each agent is stored in every cell its box overlaps.
+	   Queries return agent ids.'''
+	def __init__(self, cellSize=10.0):
+		self.cellSize = float(cellSize)
+		self.ids = array('l')
+		# low x, y, z then high x, y, z for each agent
+		self._boxes = array('d')
+		# map (column, row) to the list of agent indices overlapping it
+		self._cells = {}
+		self._extent = None
+	
+	def __len__(self):
+		return len(self.ids)
+	
+	def _cell(self, x, z):
+		return (int(math.floor(x / self.cellSize)), int(math.floor(z / self.cellSize)))
+	
+	def add(self, id, low, high=None):
+		'''Add agent 'id' at position 'low', or with the bounding box from
+		   'low' to 'high'.'''
+		if high is None:
+			high = low
+		i = len(self.ids)
+		self.ids.append(id)
+		self._boxes.extend(low)
+		self._boxes.extend(high)
+		(c0, r0) = self._cell(low[0], low[2])
+		(c1, r1) = self._cell(high[0], high[2])
+		for c in range(c0, c1 + 1):
+			for r in range(r0, r1 + 1):
+				try:
+					self._cells[(c, r)].append(i)
+				except KeyError:
+					self._cells[(c, r)] = [ i ]
+		if self._extent:
+			self._extent = (min(c0, self._extent[0]), min(r0, self._extent[1]),
+							max(c1, self._extent[2]), max(r1, self._extent[3]))
+		else:
+			self._extent = (c0, r0, c1, r1)
+	
+	def _candidates(self, c0, r0, c1, r1):
+		'''Indices of the agents in the cells from (c0, r0) to (c1, r1).'''
+		found = {}
+		cells = self._cells
+		for c in range(c0, c1 + 1):
+			for r in range(r0, r1 + 1):
+				for i in cells.get((c, r), ()):
+					found[i] = True
+		return found.keys()
+	
+	def _overlapping(self, low, high):
+		'''Indices of the agents in the cells overlapping the box from 'low'
+		   to 'high'.'''
+		if not self._extent:
+			return []
+		(c0, r0) = self._cell(low[0], low[2])
+		(c1, r1) = self._cell(high[0], high[2])
+		return self._candidates(max(c0, self._extent[0]), max(r0, self._extent[1]),
+								min(c1, self._extent[2]), min(r1, self._extent[3]))
+	
+	def inBox(self, low, high):
+		'''Return the ids of the agents whose box intersects the box from
+		   'low' to 'high'.'''
+		boxes = self._boxes
+		ids = []
+		for i in self._overlapping(low, high):
+			for axis in range(3):
+				if boxes[6 * i + 3 + axis] < low[axis] or boxes[6 * i + axis] > high[axis]:
+					break
+			else:
+				ids.append(self.ids[i])
+		ids.sort()
+		return ids
+	
+	def inRadius(self, centre, radius):
+		'''Return the ids of the agents within 'radius' of 'centre'.'''
+		low = [ centre[axis] - radius for axis in range(3) ]
+		high = [ centre[axis] + radius for axis in range(3) ]
+		radius2 = radius * radius
+		ids = [ self.ids[i] for i in self._overlapping(low, high)
+				if _boxDistance2(centre, self._boxes, i) <= radius2 ]
+		ids.sort()
+		return ids
+	
+	def nearest(self, point, count=1):
+		'''Return the ids of the 'count' agents nearest to 'point', closest
+		   first. Searches rings of cells outwards from the point's cell until
+		   no unvisited cell can hold anything closer.'''
+		if not self._extent:
+			return []
+		(c, r) = self._cell(point[0], point[2])
+		(c0, r0, c1, r1) = self._extent
+		maxRing = max(c - c0, c1 - c, r - r0, r1 - r, 0)
+		visited = {}
+		best = []
+		ring = 0
+		while ring <= maxRing:
+			for cell in _ringCells(c, r, ring):
+				for i in self._cells.get(cell, ()):
+					if not i in visited:
+						visited[i] = True
+						best.append((_boxDistance2(point, self._boxes, i), self.ids[i]))
+			best.sort()
+			del best[count:]
+			# Anything in a cell outside this ring is at least ring cells away
+			if len(best) == count and best[-1][0] <= (ring * self.cellSize) ** 2:
+				break
+			ring += 1
+		return [ id for (d2, id) in best ]
+
+def _ringCells(c, r, ring):
+	'''Cells at a Chebyshev distance of exactly 'ring' from cell (c, r).'''
+	if not ring:
+		return [ (c, r) ]
+	cells = []
+	for i in range(-ring, ring + 1):
+		cells.append((c + i, r - ring))
+		cells.append((c + i, r + ring))
+	for i in range(-ring + 1, ring):
+		cells.append((c - ring, r + i))
+		cells.append((c + ring, r + i))
+	return cells
+
+def fromCallsheet(callsheet, cellSize=10.0):
+	'''Index the placement positions of a CallsheetReader.Callsheet.'''
+	index = SpatialIndex(cellSize)
+	placements = callsheet.placements
+	for row in range(len(callsheet)):
+		index.add(callsheet.ids[row], placements[16 * row + 12:16 * row + 15])
+	return index
+
+def fromAgents(agents, frame, cellSize=10.0):
+	'''Index the root positions of 'agents' at 'frame'.'''
+	index = SpatialIndex(cellSize)
+	for agent in agents:
+		index.add(agent.id, rootPosition(agent, frame))
+	return index
+
+def fromSweptBounds(agents, startFrame, endFrame, cellSize=10.0):
+	'''Index the boxes swept by the roots of 'agents' from startFrame to
+	   endFrame.'''
+	index = SpatialIndex(cellSize)
+	for agent in agents:
+		(low, high) = sweptBounds(agent, startFrame, endFrame)
+		index.add(agent.id, low, high)
+	return index
+
+def selection(ids):
+	'''Selection of the agents returned by a query, ready to be added to a
+	   SelectionGroup.'''
+	return Selection.fromIds(ids)
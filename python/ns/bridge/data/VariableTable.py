@@ -0,0 +1,240 @@
+# The MIT License
+#	
+# Copyright (c) 2008 James Piechota
+#	
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import sys
+import zlib
+from array import array
+
+def randomValue(seed, id, salt):
+	'''Return a reproducible pseudo random number in [0, 1) that only
+	   depends on 'seed', the agent 'id' and 'salt'. Unlike random.uniform()
+	   the value doesn't depend on the order agents or variables are
+	   queried in.'''
+	x = (seed * 0x9E3779B1 + id * 0x85EBCA77 + salt) & 0xffffffff
+	x ^= x >> 16
+	x = (x * 0x7feb352d) & 0xffffffff
+	x ^= x >> 15
+	x = (x * 0x846ca68b) & 0xffffffff
+	x ^= x >> 16
+	return x / 4294967296.0
+
+def variableSalt(variableName):
+	'''Stable per-variable salt for randomValue().'''
+	return zlib.crc32(variableName) & 0xffffffff
+
+class VariableTable:
+	'''Variable values of all the agents of one AgentSpec, stored as one
+	   column per variable with a row per agent.
+	   
+	   Values that have not been fixed (e.g. by a callsheet) are filled in
+	   lazily, or for a whole column at once, following the same rules as
+	   Agent.variableValue(): expression variables are evaluated,
+	   other variables get a random value within their range if the agents
+	   are instanced and their default value otherwise.'''
+	def __init__(self, agentSpec, seed=0, instanced=True):
+		self.agentSpec = agentSpec
+		self.seed = seed
+		self.instanced = instanced
+		self.ids = array('l')
+		self._rows = {}
+		# map variable name to an array('d') of values
+		self._columns = {}
+		# map variable name to an array('B'), 1 where the value is known
+		self._known = {}
+		
+	def __len__(self):
+		return len(self.ids)
+	
+	def addAgent(self, id):
+		'''Add a row for agent 'id' and return its index. Adding an agent
+		   that is already in the table returns its existing row.'''
+		try:
+			return self._rows[id]
+		except KeyError:
+			row = len(self.ids)
+			self.ids.append(id)
+			self._rows[id] = row
+			for name in self._columns.keys():
+				self._columns[name].append(0.0)
+				self._known[name].append(0)
+			return row
+	
+	def row(self, id):
+		return self._rows[id]
+	
+	def _column(self, name):
+		try:
+			return (self._columns[name], self._known[name])
+		except KeyError:
+			if not name in self.agentSpec.variables:
+				raise KeyError(name)
+			values = array('d', [0.0]) * len(self.ids)
+			known = array('B', [0]) * len(self.ids)
+			self._columns[name] = values
+			self._known[name] = known
+			return (values, known)
+	
+	def setValue(self, name, row, value):
+		'''Fix the value of a variable for one agent.'''
+		(values, known) = self._column(name)
+		values[row] = value
+		known[row] = 1
+	
+	def isKnown(self, name, row):
+		try:
+			return bool(self._known[name][row])
+		except KeyError:
+			return False
+	
+	def value(self, name, row, forceDefault=False):
+		'''Return the value of variable 'name' for the agent in 'row',
+		   computing and storing it if it isn't known yet. Variables the
+		   AgentSpec doesn't define have a value of 0.'''
+		try:
+			(values, known) = self._column(name)
+		except KeyError:
+			return 0.0
+		if known[row]:
+			return values[row]
+		
+		variable = self.agentSpec.variables[name]
+		try:
+			if forceDefault:
+				value = variable.default
+			elif variable.expression:
+				value = self._evaluate(variable.expression, row)
+			elif self.instanced:
+				value = self._random(variable, self.ids[row])
+			else:
+				value = variable.default
+		except Exception:
+			# Same as Agent.variableValue() used to do with bad
+			# expressions: fall back on the default value.
+			value = variable.default
+		values[row] = value
+		known[row] = 1
+		return value
+	
+	def _evaluate(self, source, row):
+		expression = self.agentSpec.expression(source)
+		inputs = {}
+		for dependency in expression.dependencies:
+			inputs[dependency] = self.value(dependency, row)
+		return expression.evaluate(inputs)
+	
+	def _random(self, variable, id):
+		salt = variableSalt(variable.name)
+		return variable.min + (variable.max - variable.min) * randomValue(self.seed, id, salt)
+	
+	def fill(self):
+		'''Compute every value that isn't known yet. Plain variables are
+		   filled a column at a time, then expression variables are
+		   evaluated in dependency order.'''
+		names = self.agentSpec.variables.keys()
+		names.sort()
+		for name in names:
+			variable = self.agentSpec.variables[name]
+			if not variable.expression:
+				self._fillColumn(variable)
+		for name in self.agentSpec.expressionOrder():
+			variable = self.agentSpec.variables[name]
+			(values, known) = self._column(name)
+			expression = self.agentSpec.expression(variable.expression)
+			inputs = [ self._columns[dependency] for dependency in expression.dependencies ]
+			for row in range(len(self.ids)):
+				if not known[row]:
+					env = {}
+					for i in range(len(inputs)):
+						env[expression.dependencies[i]] = inputs[i][row]
+					try:
+						values[row] = expression.evaluate(env)
+					except Exception:
+						values[row] = variable.default
+					known[row] = 1
+	
+	def _fillColumn(self, variable):
+		(values, known) = self._column(variable.name)
+		if self.instanced:
+			seed = self.seed
+			salt = variableSalt(variable.name)
+			low = variable.min
+			span = variable.max - variable.min
+			ids = self.ids
+			for row in range(len(ids)):
+				if not known[row]:
+					values[row] = low + span * randomValue(seed, ids[row], salt)
+		else:
+			default = variable.default
+			for row in range(len(self.ids)):
+				if not known[row]:
+					values[row] = default
+		known[:] = array('B', [1]) * len(known)
+	
+	def column(self, name):
+		'''Return the values of 'name' for every agent, in row order.'''
+		(values, known) = self._column(name)
+		if 0 in known:
+			for row in range(len(self.ids)):
+				if not known[row]:
+					self.value(name, row)
+		return values
+	
+	def select(self, name, test):
+		'''Return the ids of the agents whose value of 'name' passes 'test'.'''
+		values = self.column(name)
+		ids = self.ids
+		return [ ids[row] for row in range(len(ids)) if test(values[row]) ]
+	
+	def group(self, names, asInt=True):
+		'''Group the agents by their values of the variables in 'names'.
+		   Returns a dictionary mapping each tuple of values to the list of
+		   ids of the agents that share it. Agents that resolve the same
+		   materials, geometry options or texture paths will fall in the
+		   same group.'''
+		columns = [ self.column(name) for name in names ]
+		groups = {}
+		ids = self.ids
+		for row in range(len(ids)):
+			if asInt:
+				key = tuple([ int(round(column[row])) for column in columns ])
+			else:
+				key = tuple([ column[row] for column in columns ])
+			try:
+				groups[key].append(ids[row])
+			except KeyError:
+				groups[key] = [ ids[row] ]
+		return groups
+
+def buildTables(agents, seed=0):
+	'''Build a VariableTable for each AgentSpec used by 'agents' and attach
+	   the agents to them. Variable values already fixed on the agents are
+	   moved into the tables. Returns a dictionary mapping AgentSpec to
+	   table.'''
+	tables = {}
+	for agent in agents:
+		try:
+			table = tables[agent.agentSpec]
+		except KeyError:
+			table = VariableTable(agent.agentSpec, seed, agent.isInstanced())
+			tables[agent.agentSpec] = table
+		agent.setVariableTable(table)
+	return tables
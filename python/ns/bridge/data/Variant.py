@@ -0,0 +1,109 @@
+# The MIT License
+#	
+# Copyright (c) 2008 James Piechota
+#	
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+'''Variant signatures. Agents of the same type that select the same
+   geometry, resolve to the same textures and material parameters and have
+   the same scales look identical once built, so the Maya layer can build
+   masters and materials once per group of such agents. Computing the
+   signatures needs no Maya.'''
+
+import sys
+
+import ns.bridge.data.AgentSpec as AgentSpec
+
+def _materialVariables(material):
+	'''Names of the variables a Material's parameters can depend on.'''
+	names = []
+	for colorVar in [ material.specularVar, material.ambientVar, material.diffuseVar ]:
+		names.extend([ name for name in colorVar if name ])
+	if material.roughnessVar:
+		names.append(material.roughnessVar)
+	return names
+
+def signature(agent):
+	'''Return a hashable tuple describing everything about an Agent that
+	   decides how it looks once built: its agent type, the geometry chosen
+	   by option nodes, the resolved color map and variable material
+	   parameters of that geometry, and the agent and joint scales.
+	   Material parameters are resolved with their default values, the way
+	   MayaMaterial resolves them.'''
+	agentSpec = agent.agentSpec
+	geometry = []
+	materials = []
+	for geo in AgentSpec.GeoIter(agentSpec.geoDB, agent):
+		if not geo:
+			continue
+		colorMap = ""
+		try:
+			material = agentSpec.materialData[geo.material]
+		except IndexError:
+			material = None
+		if material:
+			colorMap = agent.replaceEmbeddedVariables(material.rawColorMap)
+			materials.append(tuple([ agent.variableValue(name, forceDefault=True)
+									 for name in _materialVariables(material) ]))
+		geometry.append((geo.id, geo.material, colorMap))
+	
+	scales = []
+	if agentSpec.scaleVar:
+		scales.append(agent.variableValue(agentSpec.scaleVar))
+	for joint in agentSpec.jointData:
+		if joint and joint.scaleVar:
+			scales.append(agent.variableValue(joint.scaleVar))
+	
+	return (agentSpec.agentType, tuple(geometry), tuple(materials), tuple(scales))
+
+class Cluster:
+	'''Agents that share a variant signature. 'shared' is free for the
+	   build phase to store whatever it resolves once for the first agent
+	   and reuses for the rest.'''
+	def __init__(self, signature):
+		self.signature = signature
+		self.agents = []
+		self.shared = {}
+	
+	def __len__(self):
+		return len(self.agents)
+	
+	def agentType(self):
+		return self.signature[0]
+
+def cluster(agents):
+	'''Group Agents by signature. The clusters are returned ordered by agent
+	   type, then largest first, so that every master an agent type needs
+	   is built by its most common variant and reused by the others. Agents
+	   keep their relative order within a cluster.'''
+	clusters = {}
+	order = []
+	for agent in agents:
+		key = signature(agent)
+		try:
+			clusters[key].agents.append(agent)
+		except KeyError:
+			variant = Cluster(key)
+			variant.agents.append(agent)
+			clusters[key] = variant
+			order.append(variant)
+	
+	decorated = [ (order[i].agentType(), -len(order[i]), i, order[i]) for i in range(len(order)) ]
+	decorated.sort()
+	return [ item[-1] for item in decorated ]
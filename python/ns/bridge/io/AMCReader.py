@@ -25,9 +25,11 @@
 import sys
 import os.path
 
+import ns.py.Profiler as Profiler
 import ns.bridge.data.Agent as Agent
 import ns.bridge.data.SimData as SimData
 
+@Profiler.profiled("AMCReader.read")
 def read(amcFile, simData=None):
 	'''Load animation data from a .amc file and adds it to an SimData.Agent.
 	   The name of the SimData.Agent is gotten from the .amc file name.
@@ -25,6 +25,8 @@
 import sys
 import os.path
 
+import ns.py.Profiler as Profiler
+
 class APFReader:
 	def __init__(self, fullName):
 		'''Initialize the APF reader by parsing the file name. APF sim files
@@ -33,6 +35,7 @@ class APFReader:
 		self.frame = int(tokens[1])
 		self.fullName = fullName
 
+	@Profiler.profiled("APFReader.read")
 	def read(self, simData):
 		'''Load animation data from an APF file. Adds a single frame's
 		   worth of animation data to each agent'''
@@ -21,8 +21,10 @@
 # THE SOFTWARE.
 
 import sys
+import gc
 import os.path
 
+import ns.py.Profiler as Profiler
 import ns.bridge.io.AMCReader as AMCReader
 import ns.bridge.io.WReader as WReader
 import ns.bridge.data.AgentSpec as AgentSpec
@@ -39,221 +41,265 @@ def _resolvePath( rootPath, path ):
 		resolved = "%s/%s" % (rootPath, resolved)
 	return resolved
 
-def _handleGeometry(fileHandle, tokens, agentSpec):
+class _Records:
+	'''The tokenized contents of a .cdl file. The file is read in one go and
+	   every line is split exactly once into an (indented, tokens, line)
+	   record. Handlers walk the records through a shared cursor rather than
+	   pulling lines from the file handle.'''
+	def __init__(self, fileHandle, agentSpec):
+		self.records = [ (line[0].isspace(), line.split(), line) for line in fileHandle.read().splitlines(True) ]
+		self.index = 0
+		self.agentSpec = agentSpec
+		
+	def next(self):
+		'''Return the next record regardless of its indentation.'''
+		record = self.records[self.index]
+		self.index += 1
+		return record
+	
+	def block(self):
+		'''Yield each indented record following the current one. Stops,
+		   without consuming it, at the first record that is not indented.'''
+		records = self.records
+		numRecords = len(records)
+		while self.index < numRecords:
+			record = records[self.index]
+			if not record[0]:
+				return
+			self.index += 1
+			yield record
+	
+	def blockTokens(self):
+		'''Like block() but only yields the tokens.'''
+		records = self.records
+		numRecords = len(records)
+		while self.index < numRecords:
+			record = records[self.index]
+			if not record[0]:
+				return
+			self.index += 1
+			yield record[1]
+
+def _dispatchBlock(records, target, handlers, default):
+	'''Hand each line of the current block to the handler registered for its
+	   first token. Lines with no registered handler go to 'default'.'''
+	for (indented, tokens, line) in records.block():
+		if tokens:
+			handlers.get(tokens[0], default)(records, target, tokens, line)
+
+def _addLeftovers(records, target, tokens, line):
+	target.leftovers += line
+
+def _ignore(records, target, tokens, line):
+	pass
+
+#==============================================================================
+# geometry
+#==============================================================================
+#file filename			The .obj file referenced by this geometry node.
+#flip_normals			Specifies whether normals should be flipped.
+#id n					Specifies the node's id number.
+#material n				The id of the material node assigned to this geometry node.
+#rotate x y z			Rotations applied to this geometry in Massive.
+#scale x y z			Scale transformations applied to this geometry in Massive.
+#translate x y z		Translation applied to this geometry in Massive.
+#translate x y			Specifies the location of the current node's icon in the icon work area.
+#weights_file filename	the .w file storing the skinning weights
+def _geometryFile(records, geometry, tokens, line):
+	geometry.file = _resolvePath( records.agentSpec.rootPath(), tokens[1] )
+
+def _geometryId(records, geometry, tokens, line):
+	geometry.id = int(tokens[1])
+
+def _geometryWeightsFile(records, geometry, tokens, line):
+	geometry.weightsData = WReader.WReader()
+	geometry.weightsData.read( _resolvePath( records.agentSpec.rootPath(), tokens[1] ) )
+
+def _geometryMaterial(records, geometry, tokens, line):
+	geometry.material = int(tokens[1])
+
+def _geometryAttach(records, geometry, tokens, line):
+	geometry.attach = tokens[1]
+
+_kGeometryHandlers = { "file" : _geometryFile,
+					   "id" : _geometryId,
+					   "weights_file" : _geometryWeightsFile,
+					   "material" : _geometryMaterial,
+					   "attach" : _geometryAttach }
+
+def _handleGeometry(records, tokens, agentSpec):
 	'''Handle one piece of geometry'''
 	
 	geometry = AgentSpec.Geometry()
 	if len(tokens) > 1:
 		geometry.name = tokens[1]
-	#file filename			The .obj file referenced by this geometry node.
-	#flip_normals			Specifies whether normals should be flipped.
-	#id n					Specifies the node's id number.
-	#material n				The id of the material node assigned to this geometry node.
-	#rotate x y z			Rotations applied to this geometry in Massive.
-	#scale x y z			Scale transformations applied to this geometry in Massive.
-	#translate x y z		Translation applied to this geometry in Massive.
-	#translate x y			Specifies the location of the current node's icon in the icon work area.
-	#weights_file filename	the .w file storing the skinning weights
-	
-	tokens = []
-	for line in fileHandle:
-		tokens = line.strip().split()
-		if not line[0].isspace():
-			break
-		if tokens:
-			if tokens[0] == "file":
-				geometry.file = _resolvePath( agentSpec.rootPath(), tokens[1] )
-			elif tokens[0] == "id":
-				geometry.id = int(tokens[1])
-			elif tokens[0] == "weights_file":
-				geometry.weightsData = WReader.WReader()
-				geometry.weightsData.read( _resolvePath( agentSpec.rootPath(), tokens[1] ) )
-			elif tokens[0] == "material":
-				geometry.material = int(tokens[1])
-			elif tokens[0] == "attach":
-				geometry.attach = tokens[1]
-			else:
-				geometry.leftovers += line
+	_dispatchBlock(records, geometry, _kGeometryHandlers, _addLeftovers)
 	
 	agentSpec.geoDB.addGeometry(geometry)
-	
-	return line
 
-def _handleCloth(fileHandle, tokens, agentSpec):
+#==============================================================================
+# cloth
+#==============================================================================
+#collide_ks value  		Specifies collision force.
+#collisions type 		Specifies type of collisions: terrain, skeleton, geometry. More than one may be specified.
+#drag value 			Specifies drag.
+#geo filename 			The .obj file referenced by this cloth node, if any.
+#grid x-res y-res x y	If cloth object is a grid, specifies x-resolution, y-resolution, x-size and y-size.
+#id n 					Specifies the node's id number.
+#kb value 				Specifies bend resistance.
+#ks value 				Specifies stretch resistance.
+#material n 			The id of the material node assigned to this cloth node.
+#rotate x y z 			Rotations applied to this cloth object.
+#scale x y z 			Scale transformations applied to this cloth object.
+#steps n 				Specifies number of steps for cloth dynamics.
+#thickness value 		Specifies cloth thickness.
+#translate x y z 		Translation applied to this cloth object.
+#translate x y 			Specifies the location of the current node's icon in the icon work area.		
+def _clothGeo(records, geometry, tokens, line):
+	# The geo tag may be empty if this cloth node represents
+	# an empty entry in an option node
+	if len(tokens) > 1:
+		geometry.file = _resolvePath( records.agentSpec.rootPath(), tokens[1] )
+
+_kClothHandlers = { "geo" : _clothGeo,
+					"id" : _geometryId,
+					"material" : _geometryMaterial }
+
+def _handleCloth(records, tokens, agentSpec):
 	'''Handle one piece of cloth. Since cloth isn't handled yet, treat it
 	   as geometry.'''
 	
 	geometry = AgentSpec.Geometry()
 	if len(tokens) > 1:
 		geometry.name = tokens[1]
-	#collide_ks value  		Specifies collision force.
-	#collisions type 		Specifies type of collisions: terrain, skeleton, geometry. More than one may be specified.
-	#drag value 			Specifies drag.
-	#geo filename 			The .obj file referenced by this cloth node, if any.
-	#grid x-res y-res x y	If cloth object is a grid, specifies x-resolution, y-resolution, x-size and y-size.
-	#id n 					Specifies the node's id number.
-	#kb value 				Specifies bend resistance.
-	#ks value 				Specifies stretch resistance.
-	#material n 			The id of the material node assigned to this cloth node.
-	#rotate x y z 			Rotations applied to this cloth object.
-	#scale x y z 			Scale transformations applied to this cloth object.
-	#steps n 				Specifies number of steps for cloth dynamics.
-	#thickness value 		Specifies cloth thickness.
-	#translate x y z 		Translation applied to this cloth object.
-	#translate x y 			Specifies the location of the current node's icon in the icon work area.		
-
-	tokens = []
-	for line in fileHandle:
-		tokens = line.strip().split()
-		if not line[0].isspace():
-			break
-		if tokens:
-			if tokens[0] == "geo" and len(tokens) > 1:
-				# The geo tag may be empty if this cloth node represents
-				# an empty entry in an option node
-				geometry.file = _resolvePath(agentSpec.rootPath(), tokens[1])
-			elif tokens[0] == "id":
-				geometry.id = int(tokens[1])
-			elif tokens[0] == "material":
-				geometry.material = int(tokens[1])
-			else:
-				geometry.leftovers = ""
+	_dispatchBlock(records, geometry, _kClothHandlers, _ignore)
 	
 	agentSpec.geoDB.addGeometry(geometry)
-	
-	return line
 
-def _handleMaterial(fileHandle, tokens, agentSpec):
+#==============================================================================
+# material
+#==============================================================================
+#ambient value1 value2 value3 colourspace
+#	Specifies the OpenGL ambient value of the material. Example:
+#		ambient 0.5 0.5 0.7 hsv
+#colour_map filename type
+#	Specifies the OpenGL ambient value of the material. Example:
+#		colour_map /massive/agent1/maps/map1.tif rgb
+#diffuse value1 value2 value3 colourspace
+#	Specifies the OpenGL diffuse value of the material. Example:
+#		diffuse 0.5 0.5 0.7 hsv
+#id n	
+#	Specifies the node's id number.
+#rman_displacement shader name1 [value1] name2 [value2]...
+#	Specifies RenderMan displacement shader assigned to this material and
+#	its specified parameter values.
+#rman_surface shader name1 [value1] name2 [value2]...
+#	Specifies RenderMan surface shader assigned to this material and its
+#	specified parameter values.
+#specular value1 value2 value3 colourspace
+#	Specifies the OpenGL specular value of the material. Example:
+#		specular 0.5 0.5 0.7 hsv
+#translate x y
+#	Specifies the location of the current node's icon in the icon work
+#	area.
+def _materialColourMap(records, material, tokens, line):
+	material.rawColorMap = _resolvePath( records.agentSpec.rootPath(), tokens[1] )
+
+def _materialId(records, material, tokens, line):
+	material.id = int(tokens[1])
+
+def _materialColor(attr):
+	'''Build a handler for one of the ambient, diffuse or specular colors.'''
+	varAttr = "%sVar" % attr
+	spaceAttr = "%sSpace" % attr
+	def handler(records, material, tokens, line):
+		color = getattr(material, attr)
+		colorVar = getattr(material, varAttr)
+		for i in range(1,4):
+			# color component is either a float value or a
+			# variable/expression
+			try:
+				color[i-1] = float(tokens[i])
+			except:
+				colorVar[i-1] = tokens[i]
+		if len(tokens) > 4:
+			setattr(material, spaceAttr, tokens[4])
+	return handler
+
+def _materialRoughness(records, material, tokens, line):
+	# roughness is either a float value or a
+	# variable/expression
+	try:
+		material.roughness = float(tokens[1])
+	except:
+		material.roughnessVar = tokens[1]
+
+_kMaterialHandlers = { "colour_map" : _materialColourMap,
+					   "id" : _materialId,
+					   "ambient" : _materialColor("ambient"),
+					   "diffuse" : _materialColor("diffuse"),
+					   "specular" : _materialColor("specular"),
+					   "roughness" : _materialRoughness }
+
+def _handleMaterial(records, tokens, agentSpec):
 	'''Handle one material'''
 	
 	material = AgentSpec.Material()
 	if len(tokens) > 1:
 		material.name = tokens[1]
-	#ambient value1 value2 value3 colourspace
-	#	Specifies the OpenGL ambient value of the material. Example:
-	#		ambient 0.5 0.5 0.7 hsv
-	#colour_map filename type
-	#	Specifies the OpenGL ambient value of the material. Example:
-	#		colour_map /massive/agent1/maps/map1.tif rgb
-	#diffuse value1 value2 value3 colourspace
-	#	Specifies the OpenGL diffuse value of the material. Example:
-	#		diffuse 0.5 0.5 0.7 hsv
-	#id n	
-	#	Specifies the node's id number.
-	#rman_displacement shader name1 [value1] name2 [value2]...
-	#	Specifies RenderMan displacement shader assigned to this material and
-	#	its specified parameter values.
-	#rman_surface shader name1 [value1] name2 [value2]...
-	#	Specifies RenderMan surface shader assigned to this material and its
-	#	specified parameter values.
-	#specular value1 value2 value3 colourspace
-	#	Specifies the OpenGL specular value of the material. Example:
-	#		specular 0.5 0.5 0.7 hsv
-	#translate x y
-	#	Specifies the location of the current node's icon in the icon work
-	#	area.
-	
-	tokens = []
-	for line in fileHandle:
-		tokens = line.strip().split()
-		if not line[0].isspace():
-			break
-		if tokens:
-			if tokens[0] == "colour_map":
-				material.rawColorMap = _resolvePath( agentSpec.rootPath(), tokens[1] )
-			elif tokens[0] == "id":
-				material.id = int(tokens[1])
-			elif tokens[0] == "ambient":
-				for i in range(1,4):
-					# color component is either a float value or a
-					# variable/expression
-					try:
-						material.ambient[i-1] = float(tokens[i])
-					except:
-						material.ambientVar[i-1] = tokens[i]
-				if len(tokens) > 4:
-					material.ambientSpace = tokens[4]
-			elif tokens[0] == "diffuse":
-				for i in range(1,4):
-					# color component is either a float value or a
-					# variable/expression
-					try:
-						material.diffuse[i-1] = float(tokens[i])
-					except:
-						material.diffuseVar[i-1] = tokens[i]
-				if len(tokens) > 4:
-					material.diffuseSpace = tokens[4]
-			elif tokens[0] == "specular":
-				for i in range(1,4):
-					# color component is either a float value or a
-					# variable/expression
-					try:
-						material.specular[i-1] = float(tokens[i])
-					except:
-						material.specularVar[i-1] = tokens[i]
-				if len(tokens) > 4:
-					material.specularSpace = tokens[4]
-			elif tokens[0] == "roughness":
-					# roughness is either a float value or a
-					# variable/expression
-					try:
-						material.roughness = float(tokens[1])
-					except:
-						material.roughnessVar = tokens[1]
-			else:
-				material.leftovers += line
+	_dispatchBlock(records, material, _kMaterialHandlers, _addLeftovers)
 		
 	numMaterials = len(agentSpec.materialData)
 	if material.id >= numMaterials:
 		agentSpec.materialData.extend([ None ] * (material.id - numMaterials + 1))
 	
 	agentSpec.materialData[material.id] = material
-	
-	return line
-	
-def _handleOption(fileHandle, tokens, agentSpec):
+
+#==============================================================================
+# option
+#==============================================================================
+# attach n1 n2 n3...
+#	Specifies id numbers of segment nodes this option node is bound to.
+# inputs n1 n2 n3...
+#	Specifies id numbers of geometry or cloth nodes attached to this
+#	option node.
+# translate x y
+#	Specifies the location of the current node's icon in the icon work
+#	area.
+# var name
+#	Specifies name of agent variable driving this option node.		
+def _optionVar(records, option, tokens, line):
+	option.var = tokens[1]
+
+# TODO: I think inputs and geo are mutually exclusive.
+#		I should confirm and make sure that if both appear it
+#		is handled correctly.
+def _optionInputs(records, option, tokens, line):
+	for input in tokens[1:]:
+		option.inputs.append(records.agentSpec.geoDB.geometryByName(input))
+
+def _optionGeo(records, option, tokens, line):
+	for input in tokens[1:]:
+		option.inputs.append(records.agentSpec.geoDB.geometryById(int(input)))
+
+_kOptionHandlers = { "var" : _optionVar,
+					 "inputs" : _optionInputs,
+					 "geo" : _optionGeo }
+
+def _handleOption(records, tokens, agentSpec):
 	'''Handle one option node'''
 	
 	option = AgentSpec.Option()
 	if len(tokens) > 1:
 		option.name = "_".join(tokens[1:])
-	# attach n1 n2 n3...
-	#	Specifies id numbers of segment nodes this option node is bound to.
-	# inputs n1 n2 n3...
-	#	Specifies id numbers of geometry or cloth nodes attached to this
-	#	option node.
-	# translate x y
-	#	Specifies the location of the current node's icon in the icon work
-	#	area.
-	# var name
-	#	Specifies name of agent variable driving this option node.		
-	tokens = []
-	for line in fileHandle:
-		tokens = line.strip().split()
-		if not line[0].isspace():
-			break
-		if tokens:
-			if tokens[0] == "translate":
-				pass
-			elif tokens[0] == "var":
-				option.var = tokens[1]
-			# TODO: I think inputs and geo are mutually exclusive.
-			#		I should confirm and make sure that if both appear it
-			#		is handled correctly.
-			elif tokens[0] == "inputs":
-				for input in tokens[1:]:
-					option.inputs.append(agentSpec.geoDB.geometryByName(input))
-			elif tokens[0] == "geo":
-					for input in tokens[1:]:
-						option.inputs.append(agentSpec.geoDB.geometryById(int(input)))
-			else:
-				option.leftovers += ""
+	_dispatchBlock(records, option, _kOptionHandlers, _ignore)
 		
 	agentSpec.geoDB.addOption( option )
-	
-	return line
-		
-def _handleVariable(fileHandle, tokens, agentSpec):
+
+#==============================================================================
+# variable
+#==============================================================================
+def _handleVariable(records, tokens, agentSpec):
 	'''Handle a variable Spec'''
 	
 	# name default_value [min_value max_value] expression
@@ -266,151 +312,186 @@ def _handleVariable(fileHandle, tokens, agentSpec):
 		variable.expression = tokens[5]
 	
 	agentSpec.variables[variable.name] = variable
-	return fileHandle.next()
 
-def _handleSegment(fileHandle, tokens, agentSpec):
+#==============================================================================
+# segment
+#==============================================================================
+class _Segment:
+	'''Segment data that is collected while parsing and only applied to the
+	   joint once the segment's primitive type is known.'''
+	def __init__(self, joint):
+		self.joint = joint
+		#axis A 	 Specify the major axis for a tube primitive.
+		self.axis = [ False, True, False ]
+		#bone_rotate x y z 	Specify the tube primitive rotation with respect to segment space.
+		self.boneRotate = [ 0.0, 0.0, 0.0 ]
+		#centre x y z 	Offset the primitive by x y z in segment space.
+		self.centre = []
+		#length l 	Specifies the length of a tube or line primitive.
+		self.length = 1.0
+		#primitive type 	Specifies the type of segment: box, tube, sphere, line, billboard.
+		self.primitive = ""
+		#radius r 	Specifies the radius of a tube or sphere primitive.
+		self.radius = 1.0
+		#rotate x y z 	Specifies a rotation of segment rest space. Rotates x about the X axis, y about the Y axis and z about the Z axis. The units depend on the arguement given in the angles statement.
+		self.rotate = []
+		#scale x y z 	Specifies a scale of segment rest space.
+		self.scale = [ 1.0, 1.0, 1.0 ]
+		#size x y z 	Specifies the size of a box or billboard primitive.
+		self.size = [ 1.0, 1.0, 1.0 ]
+		#translate x y 	Specifies the location of the current node's icon in the icon work area.
+		self.iconTranslate = [ 0, 0 ]
+
+#density value 	Density of the segment. (Mass is derived from this value.)
+#include filename 	Specifies the inclusion of the cdl file called filename.
+#limits dof min max 	Sets the limits for the degree of freedom `dof'. One or more degrees of freedom may follow a single limits statment, one to a line.
+#segment name
+#standin name 	Standins are like segments but can be rendered in place of an entire object. They are selected for rendering by comparing the distance from the camera with the threshold value.
+#
+#example :
+#
+#standin WHITE
+#  primitive billboard
+#  size 0.9000 1.7000 0.0000
+#  centre 0.0000 -0.3000 0.0000
+#  threshold 0.000
+#standin WHITE2
+#  parent WHITE
+#  primitive line
+#  length 1.7000
+#  axis Y
+#  centre 0.00000 -0.3000 0.0000
+#  threshold 10.0000
+#threshold d 	Specifies the threshold distance for a standin.
+def _segmentAxis(records, segment, tokens, line):
+	segment.axis = [ ("X" == tokens[1]), ("Y" == tokens[1]), ("Z" == tokens[1]) ]
+
+def _segmentBoneRotate(records, segment, tokens, line):
+	segment.boneRotate = (float(tokens[1]), float(tokens[2]), float(tokens[3]))
+
+def _segmentCentre(records, segment, tokens, line):
+	segment.centre = [ float(tokens[1]), float(tokens[2]), float(tokens[3]) ]
+
+def _segmentLength(records, segment, tokens, line):
+	segment.length = tokens[1]
+
+#order a b c d e f 	Specifies the order of transformations. a b c d e f can each be any of: tx ty tz rx ry rz.
+def _segmentOrder(records, segment, tokens, line):
+	# THEORY: maya and massive's rotation orders are reversed, if massive
+	# says xyz, we have to use zyx in Maya
+	translateOrder = []
+	rotateOrder = []
+	for i in range( 1, len(tokens) ):
+		enum = AgentSpec.channel2Enum[tokens[i]]
+		if AgentSpec.isRotateEnum( enum ):
+			rotateOrder.append( enum )
+		else:
+			translateOrder.append( enum )
+	segment.joint.order = translateOrder
+	segment.joint.order.extend( rotateOrder )
+
+#parent name 	Attaches the current segment to the named segment.
+def _segmentParent(records, segment, tokens, line):
+	segment.joint.parent = tokens[1]
+
+def _segmentPrimitive(records, segment, tokens, line):
+	segment.primitive = tokens[1]
+
+def _segmentRadius(records, segment, tokens, line):
+	segment.radius = tokens[1]
+
+def _segmentRotate(records, segment, tokens, line):
+	segment.rotate = [ float(tokens[1]), float(tokens[2]), float(tokens[3]) ]
+
+def _segmentScale(records, segment, tokens, line):
+	segment.scale = [ float(tokens[1]), float(tokens[2]), float(tokens[3]) ]
+
+def _segmentSize(records, segment, tokens, line):
+	segment.size = [ float(tokens[1]), float(tokens[2]), float(tokens[3]) ]
+
+#translate x y z 	Specifies a translation of segment rest space.
+def _segmentTranslate(records, segment, tokens, line):
+	if len(tokens) == 3:
+		segment.iconTranslate = [ float(tokens[1]), float(tokens[2]) ]
+	else:
+		segment.joint.translate = (float(tokens[1]), float(tokens[2]), float(tokens[3]))
+
+#transform 	m00 m01 m02 m03
+#m10 m11 m12 m13
+#m20 m21 m22 m23
+#m30 m31 m32 m33
+#Loads the matrix m into the segment rest matrix. Ignores any previous transformations to the rest matrix.
+def _segmentTransform(records, segment, tokens, line):
+	# The matrix is stored on the next 4 lines, cast them to 
+	# float, and append them to the transform list
+	#
+	for i in range(4):
+		segment.joint.transform.extend([ float(tok) for tok in records.next()[1] ])
+
+# dof rx ry rz tx ty tz Degrees of freedom limited to specified channels
+def _segmentDof(records, segment, tokens, line):
+	# Since dof was specified only the named channels are free
+	#
+	segment.joint.dof = [ False ] * 6
+	for channel in tokens[1:]:
+		segment.joint.dof[AgentSpec.channel2Enum[channel]] = True
+
+def _segmentScaleVar(records, segment, tokens, line):
+	segment.joint.scaleVar = tokens[1]	
+
+# bind_pose x y z Offset to be applied when keying actions
+def _segmentBindPose(records, segment, tokens, line):
+	# It seems like these values have to be subtracted from the
+	# bind pose before the action is applied
+	segment.joint.actionOffset = [ -float(tokens[1]), -float(tokens[2]), -float(tokens[3]) ]
+
+def _segmentLeftovers(records, segment, tokens, line):
+	segment.joint.leftovers += line
+
+_kSegmentHandlers = { "axis" : _segmentAxis,
+					  "bone_rotate" : _segmentBoneRotate,
+					  "centre" : _segmentCentre,
+					  "length" : _segmentLength,
+					  "order" : _segmentOrder,
+					  "parent" : _segmentParent,
+					  "primitive" : _segmentPrimitive,
+					  "radius" : _segmentRadius,
+					  "rotate" : _segmentRotate,
+					  "scale" : _segmentScale,
+					  "size" : _segmentSize,
+					  "translate" : _segmentTranslate,
+					  "transform" : _segmentTransform,
+					  "dof" : _segmentDof,
+					  "scale_var" : _segmentScaleVar,
+					  "bind_pose" : _segmentBindPose }
+
+def _handleSegment(records, tokens, agentSpec):
 	'''Handle one segment'''
 	
 	joint = AgentSpec.Joint(agentSpec)
 	if len(tokens) > 1:
 		joint.name = tokens[1]
-	
-	#axis A 	 Specify the major axis for a tube primitive.
-	axis = [ False, True, False ]
-	#bone_rotate x y z 	Specify the tube primitive rotation with respect to segment space.
-	bone_rotate = [ 0.0, 0.0, 0.0 ]
-	#centre x y z 	Offset the primitive by x y z in segment space.
-	centre = []
-	#density value 	Density of the segment. (Mass is derived from this value.)
-	#include filename 	Specifies the inclusion of the cdl file called filename.
-	#length l 	Specifies the length of a tube or line primitive.
-	length = 1.0
-	#limits dof min max 	Sets the limits for the degree of freedom `dof'. One or more degrees of freedom may follow a single limits statment, one to a line.
-	#order a b c d e f 	Specifies the order of transformations. a b c d e f can each be any of: tx ty tz rx ry rz.
-	#rotateOrder = "xyz"
-	#translateOrder = "xyz"
-	#parent name 	Attaches the current segment to the named segment.
-	#primitive type 	Specifies the type of segment: box, tube, sphere, line, billboard.
-	primitive = ""
-	#radius r 	Specifies the radius of a tube or sphere primitive.
-	radius = 1.0
-	#rotate x y z 	Specifies a rotation of segment rest space. Rotates x about the X axis, y about the Y axis and z about the Z axis. The units depend on the arguement given in the angles statement.
-	rotate = []
-	#scale x y z 	Specifies a scale of segment rest space.
-	scale = [ 1.0, 1.0, 1.0 ]
-	#segment name
-	#size x y z 	Specifies the size of a box or billboard primitive.
-	size = [ 1.0, 1.0, 1.0 ]
-	#standin name 	Standins are like segments but can be rendered in place of an entire object. They are selected for rendering by comparing the distance from the camera with the threshold value.
-	#
-	#example :
-	#
-	#standin WHITE
-	#  primitive billboard
-	#  size 0.9000 1.7000 0.0000
-	#  centre 0.0000 -0.3000 0.0000
-	#  threshold 0.000
-	#standin WHITE2
-	#  parent WHITE
-	#  primitive line
-	#  length 1.7000
-	#  axis Y
-	#  centre 0.00000 -0.3000 0.0000
-	#  threshold 10.0000
-	#threshold d 	Specifies the threshold distance for a standin.
-	#transform 	m00 m01 m02 m03
-	#m10 m11 m12 m13
-	#m20 m21 m22 m23
-	#m30 m31 m32 m33
-	#Loads the matrix m into the segment rest matrix. Ignores any previous transformations to the rest matrix.
-	#translate x y z 	Specifies a translation of segment rest space.
-	iconTranslate = [ 0, 0 ]
-	# bind_pose x y z Offset to be applied when keying actions
-	# dof rx ry rz tx ty tz Degrees of freedom limited to specified channels
-	
-	tokens = []
-	for line in fileHandle:
-		tokens = line.strip().split()
-		if not line[0].isspace():
-			break
-		if tokens:
-			if tokens[0] == "axis":
-				axis = [ ("X" == tokens[1]), ("Y" == tokens[1]), ("Z" == tokens[1]) ]
-			elif tokens[0] == "bone_rotate":
-				bone_rotate = (float(tokens[1]), float(tokens[2]), float(tokens[3]))
-			elif tokens[0] == "centre":
-				centre = [ float(tokens[1]), float(tokens[2]), float(tokens[3]) ]
-			elif tokens[0] == "length":
-				length = tokens[1]
-			elif tokens[0] == "order":
-				# THEORY: maya and massive's rotation orders are reversed, if massive
-				# says xyz, we have to use zyx in Maya
-				translateOrder = []
-				rotateOrder = []
-				for i in range( 1, len(tokens) ):
-					enum = AgentSpec.channel2Enum[tokens[i]]
-					if AgentSpec.isRotateEnum( enum ):
-						rotateOrder.append( enum )
-					else:
-						translateOrder.append( enum )
-				joint.order = translateOrder
-				joint.order.extend( rotateOrder )
-			elif tokens[0] == "parent":
-				joint.parent = tokens[1]
-			elif tokens[0] == "primitive":
-				primitive = tokens[1]
-			elif tokens[0] == "radius":
-				radius = tokens[1]
-			elif tokens[0] == "rotate":
-				rotate = [ float(tokens[1]), float(tokens[2]), float(tokens[3]) ]
-			elif tokens[0] == "scale":
-				scale = [ float(tokens[1]), float(tokens[2]), float(tokens[3]) ]
-			elif tokens[0] == "size":
-				size = [ float(tokens[1]), float(tokens[2]), float(tokens[3]) ]
-			elif tokens[0] == "translate":
-				if len(tokens) == 3:
-					iconTranslate = [ float(tokens[1]), float(tokens[2]) ]
-				else:
-					joint.translate = (float(tokens[1]), float(tokens[2]), float(tokens[3]))
-			elif tokens[0] == "transform":
-				# Read the next 4 lines, tokenize them, cast them to 
-				# float, and append them to the transform list
-				#
-				for i in range(4):
-					joint.transform.extend([ float(tok) for tok in fileHandle.next().strip().split() ])
-			elif tokens[0] == "dof":
-				# Since dof was specified only the named channels are free
-				#
-				joint.dof = [ False ] * 6
-				for channel in tokens[1:]:
-					joint.dof[AgentSpec.channel2Enum[channel]] = True
-			elif tokens[0] == "scale_var":
-				joint.scaleVar = tokens[1]	
-			elif tokens[0] == "bind_pose":
-				# It seems like these values have to be subtracted from the
-				# bind pose before the action is applied
-				joint.actionOffset = [ -float(tokens[1]), -float(tokens[2]), -float(tokens[3]) ]
-			else:
-				joint.leftovers += line
+	segment = _Segment(joint)
+	_dispatchBlock(records, segment, _kSegmentHandlers, _segmentLeftovers)
 			
-	if "box" == primitive:
+	if "box" == segment.primitive:
 		joint.primitive = AgentSpec.Box(joint)
-		joint.primitive.size = size
-	elif "tube" == primitive:
+		joint.primitive.size = segment.size
+	elif "tube" == segment.primitive:
 		joint.primitive = AgentSpec.Tube(joint)
-		joint.primitive.rotate = bone_rotate
-		joint.primitive.radius = radius
-		joint.primitive.length = length
-	elif "sphere" == primitive:
+		joint.primitive.rotate = segment.boneRotate
+		joint.primitive.radius = segment.radius
+		joint.primitive.length = segment.length
+	elif "sphere" == segment.primitive:
 		joint.primitive = AgentSpec.Sphere(joint)
-		joint.primitive.radius = radius
-	elif "disc" == primitive:
+		joint.primitive.radius = segment.radius
+	elif "disc" == segment.primitive:
 		joint.primitive = AgentSpec.Disc(joint)
-		joint.primitive.radius = radius
-		joint.primitive.length = length
+		joint.primitive.radius = segment.radius
+		joint.primitive.length = segment.length
 				
-	joint.primitive.axis = axis
-	joint.primitive.centre = centre
+	joint.primitive.axis = segment.axis
+	joint.primitive.centre = segment.centre
 	
 	# Maps the Massive joint name to the joint object (for example
 	# so that the AMCReader can get the degrees of freedom of a given
@@ -422,121 +503,100 @@ def _handleSegment(fileHandle, tokens, agentSpec):
 	# representation
 	#
 	agentSpec.jointData.append( joint )
-	
-	return line
 
-def _handleCurve(fileHandle, tokens, action):
+#==============================================================================
+# action
+#==============================================================================
+def _actionCurve(records, action, tokens, line):
 	'''Read one anim curve.'''
 		
-	tokens = fileHandle.next().strip().split()
+	tokens = records.next()[1]
 	assert "channel" == tokens[0]
 	channel = tokens[1]
 
-	tokens = fileHandle.next().strip().split()
+	tokens = records.next()[1]
 	assert "type" == tokens[0]
 	type = tokens[1]
 
-	tokens = fileHandle.next().strip().split()
+	tokens = records.next()[1]
 	assert "points" == tokens[1]
 	numPoints = int(tokens[0])
 	
 	curve = AgentSpec.Curve(channel, type, numPoints)
 	
 	for i in range(numPoints):
-		tokens = fileHandle.next().strip().split()
+		tokens = records.next()[1]
 		curve.points[i] = (float(tokens[0]), float(tokens[1]))
 		
 	action.addCurve( curve )
 
+_kActionHandlers = { "curve" : _actionCurve }
 	
-def _handleAction(fileHandle, tokens, agentSpec):
+def _handleAction(records, tokens, agentSpec):
 	'''Reads an embedded ASCII action.'''
 	
 	action = AgentSpec.Action()
 	if len(tokens) > 1:
 		action.name = tokens[1]
-		
-	for line in fileHandle:
-		tokens = line.strip().split()
-		if not line[0].isspace():
-			break
-		if tokens:
-			if tokens[0] == "curve":
-				_handleCurve(fileHandle, tokens, action)
-			else:
-				action.leftovers += line
+	_dispatchBlock(records, action, _kActionHandlers, _addLeftovers)
 	
 	agentSpec.actions[action.name] = action
-	
-	return line
 
-def _handleLeftovers(fileHandle, token, inLine, agentSpec, tokensSet):
+#==============================================================================
+# top level
+#==============================================================================
+def _handleScaleVar(records, tokens, agentSpec):
+	agentSpec.scaleVar = tokens[1]
+
+def _handleObject(records, tokens, agentSpec):
+	agentSpec.agentType = tokens[1]
+
+def _handleBindPose(records, tokens, agentSpec):
+	agentSpec.bindPoseFile = tokens[1]
+
+def _handleFuzzy(records, tokens, agentSpec):
+	agentSpec.brain.loadNode(tokens, records.blockTokens())
+
+_kHandlers = { "variable" : _handleVariable,
+			   "scale_var" : _handleScaleVar,
+			   "segment" : _handleSegment,
+			   "material" : _handleMaterial,
+			   "cloth" : _handleCloth,
+			   "geometry" : _handleGeometry,
+			   "option" : _handleOption,
+			   "object" : _handleObject,
+			   "action" : _handleAction,
+			   "bind_pose" : _handleBindPose,
+			   "fuzzy" : _handleFuzzy }
+
+def _handleLeftovers(records, token, inLine, agentSpec, tokensSet):
 	'''	Default handling routine - just adds the .cdl file text to
 		appropriate entry of the leftovers dictionary.'''
 	
-	leftovers = inLine
-	
-	line = ""	
-	for line in fileHandle:
-		
-		if not line[0].isspace():
-			# end of this block
-			break
-		
-		tokens = line.strip().split()
+	leftovers = [ inLine ]
+	for (indented, tokens, line) in records.block():
 		if tokens and tokens[0] in tokensSet:
 			# sometimes handled tokens are indented (e.g. variable, dynamics)
-			# not sure why
+			# not sure why. Leave the line for the top level to handle.
+			records.index -= 1
 			break
-		leftovers += line
+		leftovers.append(line)
 	
 	try:
-		agentSpec.leftovers[token] += leftovers
+		agentSpec.leftovers[token] += "".join(leftovers)
 	except:
-		agentSpec.leftovers[token] = leftovers
-	
-	return line
-
-def _handleToken(fileHandle, tokens, agentSpec):
-	''' Hand written handling routines. Check the first token to see how it
-		should be handled.'''
-	line = ""
-	if tokens[0] == "variable":
-		line = _handleVariable(fileHandle, tokens, agentSpec)
-	elif tokens[0] == "scale_var":
-		agentSpec.scaleVar = tokens[1]
-		line = fileHandle.next()
-	elif tokens[0] == "segment" :
-		line = _handleSegment(fileHandle, tokens, agentSpec)
-	elif tokens[0] == "material":
-		line = _handleMaterial(fileHandle, tokens, agentSpec)
-	elif tokens[0] == "cloth":
-		line = _handleCloth(fileHandle, tokens, agentSpec)
-	elif tokens[0] == "geometry":
-		line = _handleGeometry(fileHandle, tokens, agentSpec)
-	elif tokens[0] == "option":
-		line = _handleOption(fileHandle, tokens, agentSpec)
-	elif tokens[0] == "object":
-		agentSpec.agentType = tokens[1]
-		line = fileHandle.next()
-	elif tokens[0] == "action":
-		line = _handleAction(fileHandle, tokens, agentSpec)
-	elif tokens[0] == "bind_pose":
-		agentSpec.bindPoseFile = tokens[1]
-		line = fileHandle.next()
-	elif tokens[0] == "fuzzy":
-		line = agentSpec.brain.loadNode(fileHandle, tokens)
-	else:
-		raise Exception("Don't know how to handle token '%s'." % tokens[0])
-	
-	return line
+		agentSpec.leftovers[token] = "".join(leftovers)
 			
-def _process(fileHandle, line, agentSpec, tokensSet):
-	tokens = line.strip().split()
-	while tokens:
-		if (tokens[0] == "#"):
-			# Skip comments.
-			break
+def _process(records, agentSpec, tokensSet):
+	'''Walk the top level records. Each block is handed off to the handler
+	   registered for its first token, or stored as leftovers if the token
+	   is not in tokensSet.'''
+	numRecords = len(records.records)
+	while records.index < numRecords:
+		(indented, tokens, line) = records.next()
+		if not tokens or tokens[0] == "#":
+			# Skip blank lines and comments.
+			continue
 		
 		# Keep track of the cdl file structure
 		if (not agentSpec.cdlStructure or
@@ -544,20 +604,21 @@ def _process(fileHandle, line, agentSpec, tokensSet):
 			agentSpec.cdlStructure.append(tokens[0])
 		
 		if tokens[0] in tokensSet:
-			line = _handleToken(fileHandle, tokens, agentSpec)
+			try:
+				handler = _kHandlers[tokens[0]]
+			except KeyError:
+				raise Exception("Don't know how to handle token '%s'." % tokens[0])
+			handler(records, tokens, agentSpec)
 		else:
-			line = _handleLeftovers(fileHandle, tokens[0], line, agentSpec, tokensSet)
-		
-		tokens = line.strip().split()
-	
+			_handleLeftovers(records, tokens[0], line, agentSpec, tokensSet)
 	
+@Profiler.profiled("CDLReader.read")
 def read(cdlFile, handledTokens=kDefaultTokens):
 	'''	handledTokens: a list containing the tokens that should be parsed out
 		and handled. Any tokens not in this list will be stuffed into the
 		AgentSpec leftovers attribute.'''
 	
 	agentSpec = AgentSpec.AgentSpec()
-	rootPath = ""
 	if isinstance(cdlFile, basestring):
 		agentSpec.setCdlFile(cdlFile)
 		fileHandle = open(cdlFile, "r")
@@ -566,22 +627,31 @@ def read(cdlFile, handledTokens=kDefaultTokens):
 	
 	tokensSet = frozenset(handledTokens)
 	
+	# Parsing creates a lot of small, acyclic objects (the records and the
+	# AgentSpec data) which makes the cyclic garbage collector repeatedly
+	# walk an ever growing heap. Hold it off until we're done.
+	#
+	gcEnabled = gc.isenabled()
+	gc.disable()
 	try:
 		try:
-			for line in fileHandle:
-				_process(fileHandle, line, agentSpec, tokensSet)
-				
+			try:
+				records = _Records(fileHandle, agentSpec)
+			finally:
+			 	if fileHandle != cdlFile:
+			 		# I opened fileHandle so I have to close it
+			 		fileHandle.close()
+			 		
+			_process(records, agentSpec, tokensSet)
+			del records
+					
 			if agentSpec.bindPoseFile:
 				agentSpec.setBindPose(AMCReader.read(_resolvePath(agentSpec.rootPath(), agentSpec.bindPoseFile)))
-				
-		finally:
-		 	if fileHandle != cdlFile:
-		 		# I opened fileHandle so I have to close it
-		 		fileHandle.close()	
-	except Exception, e:
-		print >> sys.stderr, "Error reading CDL file: %s" % e
-		raise
+		except Exception, e:
+			print >> sys.stderr, "Error reading CDL file: %s" % e
+			raise
+	finally:
+		if gcEnabled:
+			gc.enable()
 	
 	return agentSpec
-
-
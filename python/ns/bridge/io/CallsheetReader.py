@@ -21,49 +21,148 @@
 # THE SOFTWARE.
 
 import sys
+from array import array
 
+import ns.py.Profiler as Profiler
 import ns.bridge.data.AgentSpec as AgentSpec
 import ns.bridge.data.Agent as Agent
 
-def read(callsheet, sim):
-	'''Load the simmed values of agent variables'''
- 
- 	if isinstance(callsheet, basestring):
+class Callsheet:
+	'''Callsheet contents stored by column. Row 'i' describes the agent
+	   ids[i]: its name, the index of its CDL file in cdlFiles, and its
+	   placement matrix at placements[16*i:16*i+16]. Variable values are
+	   kept in sparse columns: variables maps a variable name to a
+	   (rows, values) pair of arrays.'''
+	def __init__(self):
+		self.ids = array('l')
+		self.names = []
+		self.cdls = array('l')
+		self.cdlFiles = []
+		self.placements = array('d')
+		self.variables = {}
+	
+	def __len__(self):
+		return len(self.ids)
+	
+	def placement(self, row):
+		'''Return the placement matrix of 'row' as a list of 16 floats.'''
+		return self.placements[16 * row:16 * row + 16].tolist()
+	
+@Profiler.profiled("CallsheetReader.load")
+def load(callsheet, selectionGroup=None):
+	'''Read a callsheet into a Callsheet. If a selectionGroup is given, lines
+	   for agents it doesn't contain are skipped before anything but their
+	   id has been parsed. Does not need a Scene or Sim, so can be used by
+	   tools that only care about placements.'''
+	
+	if isinstance(callsheet, basestring):
 		fileHandle = open(callsheet, "r")
 	else:
 		fileHandle = callsheet
- 	
- 	try:
- 		try:
+	
+	result = Callsheet()
+	# Columns are collected in lists, which grow faster than arrays, and
+	# converted once the whole file has been read. Variable values are
+	# collected per layout (the sequence of variable names on a line), which
+	# is usually the same for every agent of a type, and only split into
+	# per-variable columns at the end.
+	ids = []
+	names = []
+	cdls = []
+	placements = []
+	layouts = {}
+	cdlIndices = {}
+	try:
+		try:
 			for line in fileHandle:
-				tokens = line.strip().split()
-		 		if tokens:
-		 			# 0   :	id
-		 			# 1   :	name
-		 			# 2-17:	placement matrix
-		 			# 18  : keyword "cdl"
-		 			# 19  : cdl file path
-		 			# 20-?: variable names and values
-		 			id = int(tokens[0])
-		 			agentName = Agent.formatAgentName(tokens[1])
-		 			agentSpec = sim.scene.agentSpec(sim.scene.resolvePath(tokens[19]))
-		 					 			
-			 		agent = sim.agent(agentName, id, agentSpec)
-			 		
-					if not agent:
+				# 0   :	id
+				# 1   :	name
+				# 2-17:	placement matrix
+				# 18  : keyword "cdl"
+				# 19  : cdl file path
+				# 20-?: variable names and values
+				if selectionGroup:
+					head = line.split(None, 1)
+					if not head or not selectionGroup.contains(int(head[0])):
 						# Agent is not in one of the chosen "selections"
 						#
 						continue
-					 			
-		 			agent.placement = [ float(token) for token in tokens[2:18] ]
-		 			for i in range(20, len(tokens), 2 ):
-		 				agent.variableValues[tokens[i]] = float(tokens[i+1])
+				tokens = line.split()
+				if not tokens:
+					continue
+				
+				row = len(ids)
+				ids.append(int(tokens[0]))
+				names.append(Agent.formatAgentName(tokens[1]))
+				placements.extend(map(float, tokens[2:18]))
+				
+				cdlFile = tokens[19]
+				try:
+					cdls.append(cdlIndices[cdlFile])
+				except KeyError:
+					cdlIndices[cdlFile] = len(result.cdlFiles)
+					cdls.append(len(result.cdlFiles))
+					result.cdlFiles.append(cdlFile)
+				
+				layout = tuple(tokens[20::2])
+				try:
+					(rows, values) = layouts[layout]
+				except KeyError:
+					(rows, values) = ([], [])
+					layouts[layout] = (rows, values)
+				rows.append(row)
+				values.extend(map(float, tokens[21::2]))
 		finally:
 			if fileHandle != callsheet:
-		 		fileHandle.close()
+				fileHandle.close()
 	except:
- 		print >> sys.stderr, "Error reading callsheet."
- 		raise
-
+		print >> sys.stderr, "Error reading callsheet."
+		raise
+	
+	result.ids = array('l', ids)
+	result.names = names
+	result.cdls = array('l', cdls)
+	result.placements = array('d', placements)
+	for (layout, (rows, values)) in layouts.items():
+		for i in range(len(layout)):
+			try:
+				(columnRows, columnValues) = result.variables[layout[i]]
+			except KeyError:
+				(columnRows, columnValues) = (array('l'), array('d'))
+				result.variables[layout[i]] = (columnRows, columnValues)
+			columnRows.extend(rows)
+			columnValues.extend(values[i::len(layout)])
+	for (columnRows, columnValues) in result.variables.values():
+		if len(layouts) > 1:
+			# Several layouts were merged, restore row order
+			#
+			order = range(len(columnRows))
+			order.sort(key=columnRows.__getitem__)
+			columnRows[:] = array('l', [ columnRows[i] for i in order ])
+			columnValues[:] = array('d', [ columnValues[i] for i in order ])
+	return result
 
-        
+@Profiler.profiled("CallsheetReader.read")
+def read(callsheet, sim):
+	'''Load the simmed values of agent variables'''
+	
+	sheet = load(callsheet, sim.selectionGroup())
+	
+	# Resolve each CDL file once, not once per agent
+	#
+	agentSpecs = [ sim.scene.agentSpec(sim.scene.resolvePath(cdlFile)) for cdlFile in sheet.cdlFiles ]
+	
+	agents = []
+	for row in range(len(sheet)):
+		agent = sim.agent(sheet.names[row], sheet.ids[row], agentSpecs[sheet.cdls[row]])
+		if agent:
+			agent.placement = sheet.placement(row)
+		agents.append(agent)
+	
+	for (name, (rows, values)) in sheet.variables.items():
+		for i in range(len(rows)):
+			agent = agents[rows[i]]
+			if agent:
+				agent.setVariableValue(name, values[i])
+	
+	return sheet
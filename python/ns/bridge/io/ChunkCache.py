@@ -0,0 +1,135 @@
+# The MIT License
+#	
+# Copyright (c) 2008 James Piechota
+#	
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+'''On-disk cache of chunk skinning face groups. Dividing a mesh into
+   chunks only depends on the mesh, its weights and its deformers, so the
+   result is stored under a key made from the OBJ and .w file contents
+   and the deformer list, and repeat imports skip the analysis.'''
+
+import sys
+import os
+import os.path
+import tempfile
+
+import ns.py.FileUtil as FileUtil
+import ns.bridge.data.SkinChunks as SkinChunks
+
+kDefaultDir = os.path.join(tempfile.gettempdir(), "msvChunkCache")
+
+# Content hashes already computed this session: path to a (modification
+# time, size, hash) tuple. Files edited since are hashed again.
+_hashes = {}
+
+def contentHash(path):
+	'''Return the hex md5 of the contents of file 'path', or "" if it
+	   can't be read.'''
+	try:
+		info = os.stat(path)
+	except OSError:
+		return ""
+	stamp = (info.st_mtime, info.st_size)
+	try:
+		(mtime, size, hexDigest) = _hashes[path]
+		if (mtime, size) == stamp:
+			return hexDigest
+	except KeyError:
+		pass
+	hexDigest = FileUtil.contentHash(path)
+	if hexDigest:
+		_hashes[path] = stamp + (hexDigest,)
+	return hexDigest
+
+def key(objFile, weightsFile, deformers):
+	'''Return the cache key of the chunks of 'objFile' weighted by
+	   'weightsFile' to 'deformers', or "" if either file can't be read.'''
+	objHash = contentHash(objFile)
+	weightsHash = contentHash(weightsFile)
+	if not objHash or not weightsHash:
+		return ""
+	digest = FileUtil.md5()
+	digest.update("%s %s\n" % (objHash, weightsHash))
+	digest.update("\n".join(deformers))
+	return digest.hexdigest()
+
+class ChunkCache:
+	'''Face groups stored one file per key in 'directory'. Each line of a
+	   file holds a deformer index followed by its faces as ranges, e.g.
+	   "3 0-10 14 20-25".'''
+	def __init__(self, directory=kDefaultDir):
+		self.directory = directory
+	
+	def _path(self, key):
+		return os.path.join(self.directory, "%s.chunks" % key)
+	
+	def load(self, key, numDeformers):
+		'''Return the face groups stored under 'key', or None if there are
+		   none or they don't match 'numDeformers'.'''
+		if not key:
+			return None
+		try:
+			fileHandle = open(self._path(key), "r")
+		except IOError:
+			return None
+		try:
+			try:
+				faceGroups = [ [] for i in range(numDeformers) ]
+				for line in fileHandle:
+					tokens = line.split()
+					if not tokens:
+						continue
+					faces = faceGroups[int(tokens[0])]
+					for token in tokens[1:]:
+						bounds = token.split("-")
+						faces.extend(range(int(bounds[0]), int(bounds[-1]) + 1))
+				return faceGroups
+			except (ValueError, IndexError):
+				print >> sys.stderr, "Warning: ignoring corrupt chunk cache file %s" % self._path(key)
+				return None
+		finally:
+			fileHandle.close()
+	
+	def save(self, key, faceGroups):
+		'''Store 'faceGroups' under 'key'. Failing to write the cache is
+		   not an error, the chunks just get computed again next time.'''
+		if not key:
+			return
+		lines = []
+		for i in range(len(faceGroups)):
+			if not faceGroups[i]:
+				continue
+			tokens = [ "%d" % i ]
+			for (first, last) in SkinChunks.ranges(faceGroups[i]):
+				if first == last:
+					tokens.append("%d" % first)
+				else:
+					tokens.append("%d-%d" % (first, last))
+			lines.append(" ".join(tokens))
+		lines.append("")
+		
+		path = self._path(key)
+		try:
+			if not os.path.isdir(self.directory):
+				os.makedirs(self.directory)
+			# A concurrent import never reads a partial file
+			FileUtil.atomicWrite(path, "\n".join(lines))
+		except (IOError, OSError), e:
+			print >> sys.stderr, "Warning: could not write chunk cache file %s: %s" % (path, e)
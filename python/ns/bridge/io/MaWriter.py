@@ -0,0 +1,282 @@
+# The MIT License
+#	
+# Copyright (c) 2008 James Piechota
+#	
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+'''Write agent skeletons and their baked sim animation straight to a Maya
+   ASCII file, without Maya. The nodes and msv* attributes match the ones
+   msvSimImport creates with "-loadGeometry false -animType curves".'''
+
+import sys
+import math
+
+import ns.py.Profiler as Profiler
+import ns.bridge.data.AgentSpec as AgentSpec
+
+kRotateOrder2Enum = dict([['xyz', 0], ['yzx', 1], ['zxy', 2], ['xzy', 3], ['yxz', 4], ['zyx', 5]])
+kChannel2Attr = { "tx" : "translateX", "ty" : "translateY", "tz" : "translateZ",
+				  "rx" : "rotateX", "ry" : "rotateY", "rz" : "rotateZ" }
+# Key/value pairs written per line of a ktv array
+kKeysPerLine = 8
+
+def _quote(s):
+	'''Return 's' as a quoted MEL string.'''
+	s = s.replace("\\", "\\\\").replace('"', '\\"')
+	s = s.replace("\n", "\\n").replace("\t", "\\t")
+	return '"%s"' % s
+
+def _float(value):
+	if not value:
+		# No "-0"
+		value = 0.0
+	return "%.10g" % value
+
+def _bool(value):
+	if value:
+		return "yes"
+	return "no"
+
+def rotateOrder(joint):
+	'''Return the Maya rotateOrder enum of an AgentSpec.Joint.'''
+	order = ""
+	for channel in joint.order:
+		if AgentSpec.kRX == channel:
+			order += "x"
+		elif AgentSpec.kRY == channel:
+			order += "y"
+		elif AgentSpec.kRZ == channel:
+			order += "z"
+	return kRotateOrder2Enum[order]
+
+def jointOrient(transform):
+	'''Return the xyz euler rotation, in degrees, of the row major 4x4
+	   'transform' matrix. Freezing a joint's rotation moves it into the
+	   joint orient.'''
+	rows = [ transform[0:3], transform[4:7], transform[8:11] ]
+	# Remove any scale
+	for i in range(3):
+		length = math.sqrt(rows[i][0] ** 2 + rows[i][1] ** 2 + rows[i][2] ** 2)
+		if length:
+			rows[i] = [ value / length for value in rows[i] ]
+	y = math.asin(max(-1.0, min(1.0, -rows[0][2])))
+	x = math.atan2(rows[1][2], rows[2][2])
+	z = math.atan2(rows[0][1], rows[0][0])
+	return [ math.degrees(x), math.degrees(y), math.degrees(z) ]
+
+def translate(joint, scale=1.0):
+	'''Return the frozen translation of an AgentSpec.Joint: its translate
+	   plus that of its rest transform, scaled by the agent's scale.'''
+	translation = [ 0.0, 0.0, 0.0 ]
+	if joint.translate:
+		translation = list(joint.translate)
+	if joint.transform:
+		for i in range(3):
+			translation[i] += joint.transform[12 + i]
+	return [ value * scale for value in translation ]
+
+class Writer:
+	'''Writes agents to an open Maya ASCII file. Node names and paths are
+	   tracked so every curve gets a unique name and connects to the right
+	   joint.'''
+	def __init__(self, fileHandle, frameStep=1):
+		self._fileHandle = fileHandle
+		self._frameStep = frameStep
+		self._curveNames = {}
+	
+	def writeHeader(self, name="", references=[], referenceType="mayaAscii"):
+		'''Write the file header. 'references' lists a (namespace, file)
+		   pair for every file to reference.'''
+		write = self._fileHandle.write
+		write("//Maya ASCII 8.5 scene\n")
+		if name:
+			write("//Name: %s\n" % name)
+		for (namespace, file) in references:
+			write('file -rdi 1 -ns %s -rfn %s -typ %s %s;\n' % (_quote(namespace), _quote("%sRN" % namespace),
+																  _quote(referenceType), _quote(file)))
+		for (namespace, file) in references:
+			write('file -r -ns %s -dr 1 -rfn %s -typ %s %s;\n' % (_quote(namespace), _quote("%sRN" % namespace),
+																	_quote(referenceType), _quote(file)))
+		write('requires maya "8.5";\n')
+		write("currentUnit -l centimeter -a degree -t film;\n")
+		write('fileInfo "application" "MsvTools";\n')
+		for (namespace, file) in references:
+			self._createNode("reference", "%sRN" % namespace)
+			self._setAttr("ed", '-type "dataReferenceEdits" %s' % _quote("%sRN" % namespace))
+	
+	def writeAgent(self, agent):
+		'''Write the agent group, skeleton group, joints and anim curves of
+		   an Agent with an AgentSpec and SimData.'''
+		agentSpec = agent.agentSpec
+		scale = 1.0
+		if agentSpec.scaleVar:
+			scale = agent.variableValue(agentSpec.scaleVar)
+		
+		agentGroup = "|%s" % agent.name
+		self._createNode("transform", agent.name)
+		self._writeAgentAttrs(agentSpec)
+		skelGroup = "%s|%s" % (agentGroup, agent.name)
+		self._createNode("transform", agent.name, agentGroup)
+		
+		paths = {}
+		for joint in agentSpec.jointData:
+			if not joint:
+				# some ids may not be used (e.g. 0)
+				continue
+			parent = skelGroup
+			if joint.parent:
+				parent = paths[joint.parent]
+			paths[joint.name] = "%s|%s" % (parent, joint.name)
+			self._writeJoint(agent, joint, parent, scale)
+		
+		self._writeSim(agent, paths, scale)
+	
+	def _createNode(self, type, name, parent=""):
+		if parent:
+			self._fileHandle.write("createNode %s -n %s -p %s;\n" % (type, _quote(name), _quote(parent)))
+		else:
+			self._fileHandle.write("createNode %s -n %s;\n" % (type, _quote(name)))
+	
+	def _addAttr(self, name, flags):
+		self._fileHandle.write('\taddAttr -ci true -sn "%s" -ln "%s" %s;\n' % (name, name, flags))
+	
+	def _setAttr(self, attr, value):
+		self._fileHandle.write('\tsetAttr ".%s" %s;\n' % (attr, value))
+	
+	def _setString(self, attr, value):
+		self._setAttr(attr, '-type "string" %s' % _quote(value))
+	
+	def _setDouble3(self, attr, values):
+		self._setAttr(attr, '-type "double3" %s' % " ".join([ _float(value) for value in values ]))
+	
+	def _writeAgentAttrs(self, agentSpec):
+		for (attr, value) in [ ("msvCdlFile", agentSpec.cdlFile),
+							   ("msvBindPoseFile", agentSpec.bindPoseFile),
+							   ("msvAgentType", agentSpec.agentType),
+							   ("msvScaleVar", agentSpec.scaleVar) ]:
+			self._addAttr(attr, '-dt "string"')
+			self._setString(attr, value)
+		keys = agentSpec.leftovers.keys()
+		keys.sort()
+		for key in keys:
+			attr = "msv%sLeftovers" % key
+			self._addAttr(attr, '-dt "string"')
+			self._setString(attr, agentSpec.leftovers[key])
+		self._addAttr("msvCdlStructure", '-dt "string"')
+		self._setString("msvCdlStructure", " ".join(agentSpec.cdlStructure))
+		
+		self._addAttr("msvVariables", '-m -nc 5 -at "compound"')
+		self._addAttr("msvVarName", '-dt "string" -p "msvVariables"')
+		self._addAttr("msvVarDefault", '-at "float" -p "msvVariables"')
+		self._addAttr("msvVarMin", '-at "float" -p "msvVariables"')
+		self._addAttr("msvVarMax", '-at "float" -p "msvVariables"')
+		self._addAttr("msvVarExpression", '-dt "string" -p "msvVariables"')
+		names = agentSpec.variables.keys()
+		names.sort()
+		for i in range(len(names)):
+			variable = agentSpec.variables[names[i]]
+			element = "msvVariables[%d]" % i
+			self._setString("%s.msvVarName" % element, variable.name)
+			self._setAttr("%s.msvVarDefault" % element, _float(variable.default))
+			self._setAttr("%s.msvVarMin" % element, _float(variable.min))
+			self._setAttr("%s.msvVarMax" % element, _float(variable.max))
+			self._setString("%s.msvVarExpression" % element, variable.expression)
+	
+	def _writeJoint(self, agent, joint, parent, scale):
+		self._createNode("joint", joint.name, parent)
+		self._addAttr("msvDOF", '-m -at "bool"')
+		self._addAttr("msvLeftovers", '-dt "string"')
+		self._setDouble3("t", translate(joint, scale))
+		if joint.transform:
+			self._setDouble3("jo", jointOrient(joint.transform))
+		if joint.scaleVar:
+			value = agent.variableValue(joint.scaleVar)
+			self._setDouble3("s", [ value, value, value ])
+		self._setAttr("ro", "%d" % rotateOrder(joint))
+		self._fileHandle.write('\tsetAttr -s %d ".msvDOF[0:%d]" %s;\n' % (len(joint.dof),
+																		  len(joint.dof) - 1,
+																		  " ".join([ _bool(dof) for dof in joint.dof ])))
+		self._setString("msvLeftovers", joint.leftovers)
+	
+	def _writeSim(self, agent, paths, scale):
+		'''Write a linear anim curve for every free channel the agent's
+		   SimData has samples for. Translations are relative to the joint's
+		   frozen translate, like those created by MayaSimAgent.'''
+		jointSims = [ (jointSim.name(), jointSim) for jointSim in agent.simData().joints() ]
+		jointSims.sort()
+		for (jointName, jointSim) in jointSims:
+			if jointName not in paths:
+				continue
+			joint = agent.agentSpec.joints[jointName]
+			offsets = translate(joint, scale) + [ 0.0, 0.0, 0.0 ]
+			channels = [ AgentSpec.channel2Enum[name] for name in jointSim.channelNames() ]
+			channels.sort()
+			times = range(jointSim.startFrame(),
+						  jointSim.startFrame() + jointSim.numFrames(),
+						  self._frameStep)
+			for channel in channels:
+				if not joint.dof[channel]:
+					continue
+				channelName = AgentSpec.enum2Channel[channel]
+				values = [ offsets[channel] + jointSim.sample(channelName, frame) for frame in times ]
+				self._writeCurve(agent.name, paths[jointName], channelName, times, values)
+	
+	def _curveName(self, agentName, jointPath, channelName):
+		name = "%s_%s_%s" % (agentName, jointPath.split("|")[-1], kChannel2Attr[channelName])
+		# Joint names are only unique within a skeleton, keep the curve
+		# names unique within the file
+		count = self._curveNames.get(name, 0)
+		self._curveNames[name] = count + 1
+		if count:
+			name = "%s%d" % (name, count)
+		return name
+	
+	def _writeCurve(self, agentName, jointPath, channelName, times, values):
+		write = self._fileHandle.write
+		curveType = "animCurveTL"
+		if AgentSpec.isRotateEnum(AgentSpec.channel2Enum[channelName]):
+			curveType = "animCurveTA"
+		name = self._curveName(agentName, jointPath, channelName)
+		self._createNode(curveType, name)
+		# Linear tangents
+		self._setAttr("tan", "2")
+		self._setAttr("wgt", "no")
+		if times:
+			write('\tsetAttr -s %d ".ktv[0:%d]" ' % (len(times), len(times) - 1))
+			for i in range(len(times)):
+				if i and not i % kKeysPerLine:
+					write("\n\t\t")
+				write(" %s %s" % (_float(times[i]), _float(values[i])))
+			write(";\n")
+		write('connectAttr "%s.o" "%s.%s";\n' % (name, jointPath, channelName))
+
+@Profiler.profiled("MaWriter.write")
+def write(fileHandle, agents, frameStep=1, name=""):
+	'''Write the skeletons and baked sim animation of 'agents' as a Maya
+	   ASCII scene.'''
+	writer = Writer(fileHandle, frameStep)
+	writer.writeHeader(name)
+	for agent in agents:
+		writer.writeAgent(agent)
+
+def writeReferences(fileHandle, references, referenceType="mayaAscii", name=""):
+	'''Write a scene that only references other scenes. 'references'
+	   lists a (namespace, file) pair for each one.'''
+	writer = Writer(fileHandle)
+	writer.writeHeader(name, references, referenceType)
@@ -23,6 +23,7 @@
 import sys
 import os.path
 
+import ns.py.Profiler as Profiler
 import ns.bridge.data.MasSpec as MasSpec
 import ns.bridge.data.Selection as Selection
 
@@ -122,6 +123,7 @@ def _handlePlace( fileHandle, tokens, mas ):
 				pass
 	return []
 
+@Profiler.profiled("MasReader.read")
 def read(masFile):
 	'''Load information about the Massive setup'''
  
@@ -23,6 +23,7 @@
 import sys
 import os.path
 
+import ns.py.Profiler as Profiler
 import ns.bridge.io.AMCReader as AMCReader
 import ns.bridge.io.APFReader as APFReader
 
@@ -44,6 +45,7 @@ def _readAMCSim( simFiles, simData ):
 	for simFile in simFiles:
 		AMCReader.read( simFile, simData )
 
+@Profiler.profiled("SimReader.read")
 def read(simDir, simType, simData):
 	'''Load sim files from a sim directory'''
 	
@@ -23,6 +23,9 @@
 import sys
 import os.path
 
+import ns.py.Memory as Memory
+import ns.py.Profiler as Profiler
+
 # Node definition
 class WReader:
 	def __init__(self):
@@ -34,7 +37,20 @@ class WReader:
 		
 	def name(self):
 		return self._fullName
+	
+	def memoryUsage(self):
+		'''Estimated bytes held by the weights table. Zero weights are
+		   shared ints, every other weight is a float of its own.'''
+		total = Memory.sizeOf(self.weights) + Memory.sizeOf(self.deformers)
+		for deformer in self.deformers:
+			total += Memory.sizeOf(deformer)
+		floatBytes = Memory.sizeOf(0.0)
+		for influences in self.weights:
+			total += Memory.sizeOf(influences)
+			total += floatBytes * (len(influences) - influences.count(0))
+		return total
 		
+	@Profiler.profiled("WReader.read")
  	def read( self, fullName ):
  		'''Load skin weights from a Massive .w (weights) file'''
  		
@@ -29,8 +29,10 @@ from maya.OpenMaya import *
 import maya.cmds as mc
 import maya.mel as mel
 
+import ns.py.Profiler as Profiler
 import ns.bridge.data.AgentSpec as AgentSpec
 import ns.bridge.data.Agent as Agent
+import ns.bridge.data.LevelOfDetail as LevelOfDetail
 import ns.maya.msv.MayaSkin as MayaSkin
 import ns.maya.msv.MayaUtil as MayaUtil
 
@@ -46,6 +48,27 @@ class Options:
 		self.skinType = MayaSkin.eSkinType.smooth
 		self.instancePrimitives = True
 		self.materialType = "blinn"
+		# Build only the root joint and a locator under it
+		self.proxy = False
+
+def tierOptions( options, tier ):
+	'''Return a copy of 'options' for building an agent at the given
+	   LevelOfDetail tier. Tiers only ever build less than 'options' asks
+	   for: the full tier keeps them as they are. Material options are
+	   kept.'''
+	tierOptions = Options()
+	tierOptions.__dict__.update( options.__dict__ )
+	if LevelOfDetail.eTier.chunks == tier:
+		tierOptions.skinType = MayaSkin.eSkinType.instance
+	elif LevelOfDetail.eTier.segments == tier:
+		# Primitives stand in for geometry, if there was any to build
+		tierOptions.loadPrimitives = options.loadGeometry or options.loadPrimitives
+		tierOptions.loadGeometry = False
+	elif LevelOfDetail.eTier.proxy == tier:
+		tierOptions.loadGeometry = False
+		tierOptions.loadPrimitives = False
+		tierOptions.proxy = True
+	return tierOptions
 
 class MayaMaterial:
 	def __init__(self,
@@ -149,6 +172,7 @@ class MayaGeometry:
 		self.mayaAgent = mayaAgent
 		self.geometry = geometry
 		self.skin = None
+		self.shadingGroup = ""
 	
 	def name( self ):
 		return self.skin.groupName
@@ -180,6 +204,11 @@ class MayaGeometry:
 	def file( self ):
 		return self.geometry.file
 	
+	def weightsFile( self ):
+		if self.geometry.weightsData:
+			return self.geometry.weightsData.name()
+		return ""
+	
 	def build(self, skinType, loadMaterials, materialType):
 		if not self.geometry.file:
 			# it is perfectly legal to have non-geometry:
@@ -210,17 +239,18 @@ class MayaGeometry:
 								   self.mayaAgent.mayaJoint(self.geometry.attach).name )
 				[name] = mc.ls( name, long=True )
 				self.setName( name )
+			# The shading group is assigned by MayaAgent.assignShading
+			# once the geometry has been skinned and has its final name
+			#
 			if loadMaterials:
 				material = self.mayaAgent.material(self.geometry.material, materialType)
-				mc.sets(self.name(),
-						edit=True,
-						forceElement=material.sgName)
+				self.shadingGroup = material.sgName
 			elif MayaSkin.eSkinType.instance == skinType:
 				# When using chunk skinning with instances the newly
 				# instanced chunks won't have any shading connections,
-				# assign some now
+				# assign some
 				#
-				mc.sets( self.name(), edit=True, forceElement="initialShadingGroup" )
+				self.shadingGroup = "initialShadingGroup"
 			self.mayaAgent.registerGeometry(self, skinType)
 
 	def dump(self):
@@ -500,10 +530,12 @@ def showLayers():
 
 # Node definition
 class MayaAgent:
-	def __init__(self, agent, mayaFactory):
+	def __init__(self, agent, mayaFactory, variant=None):
 		self.reset()
 		self._agent = agent
 		self._factory = mayaFactory
+		# Variant.Cluster of agents that look the same as this one
+		self._variant = variant
 	
 	def reset(self):
 		self._factory = None
@@ -548,6 +580,10 @@ class MayaAgent:
 		   create materials for geometry that is actually used.'''
 		if id >= len(self.materialData):
 			self.materialData.extend( [None] * ((id + 1) - len(self.materialData)) )
+		if not self.materialData[id] and self._variant:
+			# Another agent of the same variant may have resolved it already
+			#
+			self.materialData[id] = self._variant.shared.get( ("material", id, materialType) )
 		if not self.materialData[id]:
 			mayaMaterial = MayaMaterial(self,
 										self._factory,
@@ -555,6 +591,8 @@ class MayaAgent:
 										materialType)
 			self.materialData[id] = mayaMaterial
 			mayaMaterial.build()
+			if self._variant:
+				self._variant.shared[("material", id, materialType)] = mayaMaterial
 
 		return self.materialData[id]
 	
@@ -593,16 +631,31 @@ class MayaAgent:
 		[self.rootJoint.name] = mc.listRelatives( self.skelGroup, children=True, fullPath=True )
 
 	def setupDisplayLayers( self ):
+		# The layer edits are queued by the factory and made for all
+		# agents at once
+		#
 		if self.rootJoint:
-			mc.editDisplayLayerMembers( getSkeletonLayer(), self.rootJoint.name )
+			self._factory.addToLayer( self.rootJoint.name, getSkeletonLayer )
 		for geometry in self.geometryData:
 			chunks = geometry.chunkNames()
 			if chunks:
-				mc.editDisplayLayerMembers( getGeometryLayer(), chunks )
+				self._factory.addToLayer( chunks, getGeometryLayer )
 			else:
-				mc.editDisplayLayerMembers( getGeometryLayer(), geometry.name() )
+				self._factory.addToLayer( geometry.name(), getGeometryLayer )
 		for primitive in self.primitiveData:
-			mc.editDisplayLayerMembers( getPrimitiveLayer(), primitive.name )
+			self._factory.addToLayer( primitive.name, getPrimitiveLayer )
+	
+	def assignShading( self ):
+		'''Queue the shading group assignments of the geometry. Chunk
+		   skinned geometry only exists as its chunks once bound.'''
+		for geometry in self.geometryData:
+			if not geometry.shadingGroup:
+				continue
+			chunks = geometry.chunkNames()
+			if chunks:
+				self._factory.assignShadingGroup( chunks, geometry.shadingGroup )
+			else:
+				self._factory.assignShadingGroup( geometry.name(), geometry.shadingGroup )
 
 	def _scaleJoints(self):
 		for mayaJoint in self.mayaJoints.values():
@@ -623,20 +676,59 @@ class MayaAgent:
 		for mayaJoint in self.mayaJoints.values():
 			mayaJoint.setChannelOffsets()
 
-	def _buildSkeleton(self):
+	@Profiler.profiled("MayaAgent.buildSkeleton")
+	def _buildSkeleton(self, rootOnly=False):
+		'''Build the agent's joints. The first agent of each type builds
+		   them one by one and leaves a master copy with the factory, the
+		   following agents just duplicate that master.'''
+		master = None
+		if not rootOnly:
+			master = self._factory.skeletonMaster(self.agentType())
+		if master:
+			self._duplicateSkeleton(master)
+			return
+		
 		for joint in self.agentSpec().jointData:
 			if not joint:
 				# some ids may not be used (e.g. 0)
 				continue
+			if rootOnly and joint.parent:
+				continue
 			
 			mayaJoint = MayaJoint(self, joint, self._factory)
 			self.mayaJoints[joint.name] = mayaJoint
 			mayaJoint.build()
+		
+		if not rootOnly:
+			self._factory.addSkeletonMaster(self)
+	
+	def _duplicateSkeleton(self, master):
+		[root] = mc.duplicate( master.root, returnRootsOnly=True )
+		
+		mayaJoints = []
+		for (jointName, path, channelOffsets) in master.joints:
+			mayaJoint = MayaJoint(self, self.agentSpec().joints[jointName], self._factory)
+			mayaJoint.name = path
+			mayaJoint.channelOffsets = list(channelOffsets)
+			self.mayaJoints[jointName] = mayaJoint
+			if path:
+				mayaJoints.append(mayaJoint)
+			else:
+				mayaJoint.name = root
+				self.registerRootJoint( mayaJoint )
+		
+		# The rest of the skeleton came along with the root, joint paths
+		# are relative to it
+		#
+		for mayaJoint in mayaJoints:
+			mayaJoint.name = self.rootJoint.name + mayaJoint.name
 			
+	@Profiler.profiled("MayaAgent.buildPrimitives")
 	def _buildPrimitives(self, instance):
 		for mayaJoint in self.mayaJoints.values():
 			mayaJoint.buildPrimitive(instance)
 					
+	@Profiler.profiled("MayaAgent.buildGeometry")
 	def _buildGeometry(self, skinType, loadMaterials, materialType):
 		for geometry in AgentSpec.GeoIter( self.agentSpec().geoDB, self ):
 			if not geometry:
@@ -645,6 +737,11 @@ class MayaAgent:
 			mayaGeometry = MayaGeometry(self, geometry)
 			mayaGeometry.build(skinType, loadMaterials, materialType)
 
+	def _buildProxy(self):
+		[ locator ] = mc.spaceLocator( name=(self.name() + "Proxy") )
+		mc.parent( locator, self.rootJoint.name, relative=True )
+
+	@Profiler.profiled("MayaAgent.setBindPose")
 	def _setBindPose( self ):
 		# The bind pose is stored in frame 1
 		if not self.agentSpec().bindPoseData:
@@ -692,8 +789,9 @@ class MayaAgent:
 			wim = mc.getAttr( "%s.worldInverseMatrix[0]" % deformers[i] )
 			MayaUtil.setMatrixAttr( "%s.bindPreMatrix[%d]" % (cluster, i), wim )
 		
-		self._factory.setClusterWeights( geometry, cluster )
+		self._factory.setClusterWeights( geometry, cluster, shape )
 		
+	@Profiler.profiled("MayaAgent.bindSkin")
 	def _bindSkin(self, skinType):
 		for mayaGeometry in self.geometryData:
 			if not mayaGeometry:
@@ -714,8 +812,11 @@ class MayaAgent:
 			elif mayaGeometry.skin.bindChunks(self):
 				mc.delete(mayaGeometry.name())		
 		
+	@Profiler.profiled("MayaAgent.build")
 	def build(self, options):
-		self._buildSkeleton()
+		self._buildSkeleton(options.proxy)
+		if options.proxy:
+			self._buildProxy()
 		
 		if options.loadGeometry:
 			self._buildGeometry(options.skinType,
@@ -734,6 +835,7 @@ class MayaAgent:
 		if options.loadGeometry:
 			self._setBindPose()
 			self._bindSkin(options.skinType)
+			self.assignShading()
 		
 		# Has to happen after skin is bound
 		self._scaleJoints()
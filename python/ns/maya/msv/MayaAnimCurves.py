@@ -0,0 +1,97 @@
+# The MIT License
+#	
+# Copyright (c) 2008 James Piechota
+#	
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import sys
+import math
+from array import array
+
+from maya.OpenMaya import *
+import maya.OpenMayaAnim as OpenMayaAnim
+
+import ns.py as npy
+import ns.py.Errors
+
+class CurveBuilder:
+	'''Builds linear anim curves straight from arrays of times and values.
+	   Channels are queued with add() and every queued curve is created,
+	   keyed and connected by build(): the curves are created through a
+	   single MDGModifier and each gets all of its keys in one addKeys()
+	   call. Values are given in UI units, like the sim data, and
+	   converted to the internal units the API expects: degrees to radians
+	   for angular channels and the current linear unit to centimetres for
+	   the others.'''
+	def __init__(self):
+		# (node, attribute, times, values) with the values already in
+		# internal units
+		self.channels = []
+	
+	def add(self, node, attribute, times, values, angular=False):
+		if len(times) != len(values):
+			raise npy.Errors.BadArgumentError("%s.%s has %d times but %d values" % (node, attribute, len(times), len(values)))
+		if angular:
+			values = array('d', [ math.radians(value) for value in values ])
+		else:
+			# Linear units only differ by a scale
+			scale = MDistance.uiToInternal(1.0)
+			values = array('d', [ value * scale for value in values ])
+		self.channels.append((node, attribute, tuple(times), values))
+	
+	def __len__(self):
+		return len(self.channels)
+	
+	def _timeArray(self, times, cache):
+		'''MTimeArray for 'times', shared by every curve keyed on the same
+		   frames.'''
+		try:
+			return cache[times]
+		except KeyError:
+			timeArray = MTimeArray(len(times), MTime())
+			for i in range(len(times)):
+				timeArray.set(MTime(times[i], MTime.uiUnit()), i)
+			cache[times] = timeArray
+			return timeArray
+	
+	def build(self):
+		'''Create every queued curve and return their names.'''
+		modifier = MDGModifier()
+		selList = MSelectionList()
+		timeArrays = {}
+		curves = []
+		for (node, attribute, times, values) in self.channels:
+			selList.clear()
+			selList.add("%s.%s" % (node, attribute))
+			plug = MPlug()
+			selList.getPlug(0, plug)
+			
+			fnCurve = OpenMayaAnim.MFnAnimCurve()
+			fnCurve.create(plug, modifier)
+			valueArray = MDoubleArray(len(values), 0.0)
+			for i in range(len(values)):
+				valueArray.set(values[i], i)
+			fnCurve.addKeys(self._timeArray(times, timeArrays), valueArray,
+							OpenMayaAnim.MFnAnimCurve.kTangentLinear,
+							OpenMayaAnim.MFnAnimCurve.kTangentLinear)
+			curves.append(fnCurve.setName("%s_%s" % (node.split("|")[-1], attribute)))
+		# Connects every curve to its plug
+		modifier.doIt()
+		self.channels = []
+		return curves
@@ -26,23 +26,77 @@ from copy import deepcopy
 import maya.cmds as mc
 import maya.mel
 from maya.OpenMaya import *
+import maya.OpenMayaAnim as OpenMayaAnim
 
 import ns.py as npy
 import ns.py.Errors
+import ns.py.Profiler as Profiler
 
 import ns.maya.msv as nmsv
 import ns.bridge.data.AgentSpec as AgentSpec
+import ns.bridge.io.ChunkCache as ChunkCache
 import ns.maya.msv.MayaAgent as MayaAgent
 import ns.maya.msv.MayaSkin as MayaSkin
 import ns.maya.msv.MayaUtil as MayaUtil
 
+class SkeletonMaster:
+	'''An unanimated copy of an agent type's skeleton. 'joints' lists a
+	   (joint name, path relative to the root, channel offsets) tuple for
+	   every joint.'''
+	def __init__(self, root, joints):
+		self.root = root
+		self.joints = joints
+
+class EditQueue:
+	'''Scene edits of one kind grouped by their target - a shading group,
+	   set or display layer - so that they can be made with one command
+	   per target instead of one per edit.'''
+	def __init__(self):
+		self.targets = []
+		self.members = {}
+		self.edits = 0
+	
+	def __len__(self):
+		return self.edits
+	
+	def add(self, target, nodes):
+		if isinstance(nodes, basestring):
+			nodes = [ nodes ]
+		if not nodes:
+			return
+		if target not in self.members:
+			self.targets.append(target)
+			self.members[target] = []
+		self.members[target].extend(nodes)
+		self.edits += 1
+	
+	def flush(self, edit):
+		'''Call edit(target, nodes) once per target, in the order the
+		   targets were first queued. Return the number of calls.'''
+		targets = self.targets
+		members = self.members
+		self.targets = []
+		self.members = {}
+		self.edits = 0
+		for target in targets:
+			edit(target, members[target])
+		return len(targets)
+
 class MayaFactory:
 	def __init__(self):
 		self.geoMasters = {}
-		self.clusterCache = {}
+		self.skeletonMasters = {}
+		self.weightsCache = {}
 		self.primitiveCache = {}
 		self.materialCache = {}
+		self.chunkCache = None
+		# Number of Maya commands saved by queuing scene edits
+		self.editsSaved = 0
+		self._shadingEdits = EditQueue()
+		self._setEdits = EditQueue()
+		self._layerEdits = EditQueue()
 		self._geoMastersGroup = ""
+		self._skeletonMastersGroup = ""
 		self._primitiveCacheGroup = ""
 		self._primitivesInstanced = False
 	
@@ -52,6 +106,13 @@ class MayaFactory:
 			self._geoMastersGroup = '|%s' % self._geoMastersGroup
 		return self._geoMastersGroup
 	
+	def _getSkeletonMastersGroup(self):
+		if not self._skeletonMastersGroup:
+			self._skeletonMastersGroup = mc.group(empty=True, name="skeletonMasters")
+			self._skeletonMastersGroup = '|%s' % self._skeletonMastersGroup
+			mc.setAttr( "%s.visibility" % self._skeletonMastersGroup, False )
+		return self._skeletonMastersGroup
+	
 	def _getPrimitiveCacheGroup( self ):		
 		if not self._primitiveCacheGroup:
 			self._primitiveCacheGroup = mc.group(empty=True, name="msvPrimitives")
@@ -103,9 +164,44 @@ class MayaFactory:
 		return agentsSet
 	
 	def addAgent(self, mayaAgent):
-		agentsSet = self.getAgentsSet(True)
-		mc.sets(mayaAgent.agentGroup(), add=agentsSet)
+		self.addToSet(mayaAgent.agentGroup(), self.getAgentsSet(True))
+	
+	def assignShadingGroup(self, nodes, shadingGroup):
+		'''Queue the assignment of 'nodes' to 'shadingGroup' until the
+		   edits are flushed. 'nodes' must keep their names until then.'''
+		self._shadingEdits.add(shadingGroup, nodes)
+	
+	def addToSet(self, nodes, set):
+		'''Queue the addition of 'nodes' to 'set'.'''
+		self._setEdits.add(set, nodes)
+	
+	def addToLayer(self, nodes, getLayer):
+		'''Queue the addition of 'nodes' to a display layer. 'getLayer'
+		   returns the layer and is only called, to look up or create the
+		   layer, when the edits are flushed.'''
+		self._layerEdits.add(getLayer, nodes)
 	
+	@Profiler.profiled("MayaFactory.flushEdits")
+	def flushEdits(self):
+		'''Make all of the queued scene edits, with one command per
+		   shading group, set and display layer.'''
+		queued = len(self._shadingEdits) + len(self._setEdits) + len(self._layerEdits)
+		commands = 0
+		commands += self._shadingEdits.flush(self._forceElement)
+		commands += self._setEdits.flush(self._addToSet)
+		commands += self._layerEdits.flush(self._addToLayer)
+		self.editsSaved += queued - commands
+	
+	def _forceElement(self, shadingGroup, nodes):
+		mc.sets(nodes, edit=True, forceElement=shadingGroup)
+	
+	def _addToSet(self, set, nodes):
+		mc.sets(nodes, add=set)
+	
+	def _addToLayer(self, getLayer, nodes):
+		mc.editDisplayLayerMembers(getLayer(), nodes)
+	
+	@Profiler.profiled("MayaFactory.importObj")
 	def importObj(self, file, groupName):
 		'''Import and prep an obj file. This is used to import the terrain
 		   object as well as the agent geometry objects.'''
@@ -117,6 +213,7 @@ class MayaFactory:
 		[newGroup] = mc.ls(importedNodes, long=True, assemblies=True)
 		return newGroup
 	
+	@Profiler.profiled("MayaFactory.importGeometry")
 	def importGeometry(self, mayaGeometry, groupName, skinType):
 		'''Build Maya geometry either by importing it from disk, or copying
 		   an already imported geometry "master".'''
@@ -147,7 +244,13 @@ class MayaFactory:
 			if ( not mayaGeometry.attached() and
 				 MayaSkin.eSkinType.smooth != skinType ):
 				# chunked skinning is needed so break up the geometry
-				skin.createChunks(mayaGeometry.weights(), mayaGeometry.deformers())
+				chunkKey = ""
+				if self.chunkCache:
+					chunkKey = ChunkCache.key(mayaGeometry.file(),
+											  mayaGeometry.weightsFile(),
+											  mayaGeometry.deformers())
+				skin.createChunks(mayaGeometry.weights(), mayaGeometry.deformers(),
+								  self.chunkCache, chunkKey)
 
 			self.geoMasters[key] = skin
 			self.importGeometry(mayaGeometry, groupName, skinType)
@@ -187,6 +290,27 @@ class MayaFactory:
 
 		mayaPrimitive.name = mc.rename( primitive, mayaPrimitive.baseName )
 	
+	def addSkeletonMaster(self, mayaAgent):
+		'''Keep a copy of the skeleton just built for 'mayaAgent' so that
+		   the other agents of its type can duplicate it instead of building
+		   their own joint by joint. Must be called before anything that
+		   differs between agents (scale, bind pose, animation) is applied
+		   to the skeleton.'''
+		root = mayaAgent.rootJoint.name
+		[master] = mc.duplicate( root, returnRootsOnly=True )
+		[master] = mc.parent( master, self._getSkeletonMastersGroup(), relative=True )
+		[master] = mc.ls( master, long=True )
+		joints = []
+		for (jointName, mayaJoint) in mayaAgent.mayaJoints.items():
+			joints.append( (jointName, mayaJoint.name[len(root):], list(mayaJoint.channelOffsets)) )
+		self.skeletonMasters[mayaAgent.agentType()] = SkeletonMaster(master, joints)
+	
+	def skeletonMaster(self, agentType):
+		'''Return the SkeletonMaster of 'agentType' or None if it hasn't
+		   been built yet.'''
+		return self.skeletonMasters.get(agentType)
+	
+	@Profiler.profiled("MayaFactory.buildMaterial")
 	def buildMaterial(self, mayaMaterial):
 		key = ""
 		if mayaMaterial.colorMap:
@@ -280,26 +404,26 @@ class MayaFactory:
 		
 		return sg
 
-	def setClusterWeights( self, geometry, cluster ):
-		# TODO: optimize the setAttrs so that the wl.w[x] attrs remain sparse
+	def packedWeights( self, geometry ):
+		'''Return the MayaSkin.PackedWeights of 'geometry', packing them
+		   the first time its weights file is used.'''
+		key = geometry.file()
+		try:
+			return self.weightsCache[key]
+		except KeyError:
+			packed = MayaSkin.PackedWeights( geometry.weights() )
+			self.weightsCache[key] = packed
+			return packed
+	
+	def setClusterWeights( self, geometry, cluster, shape ):
+		'''Set all of the weights of skinCluster 'cluster', deforming
+		   'shape', in one API call.'''
 		mc.setAttr("%s.nw" % cluster, 0)
-		clusterKey = geometry.file()
-		if clusterKey in self.clusterCache:
-			cachedCluster = self.clusterCache[clusterKey]
-			mc.connectAttr( "%s.wl" % cachedCluster, "%s.wl" % cluster )
-			mc.disconnectAttr( "%s.wl" % cachedCluster, "%s.wl" % cluster )
-		else:
-			weights = geometry.weights()
-			numVerts = len(weights)
-			for vtx in range(numVerts):
-				attr = "%s.wl[%d].w" % (cluster, vtx)
-				MayaUtil.setMultiAttr( attr, weights[vtx] )
-			cachedCluster = mc.createNode("skinCluster")
-			mc.connectAttr( "%s.wl" % cluster, "%s.wl" % cachedCluster )
-			mc.disconnectAttr( "%s.wl" % cluster, "%s.wl" % cachedCluster )
-			self.clusterCache[clusterKey] = cachedCluster
+		fnCluster = OpenMayaAnim.MFnSkinCluster( MayaUtil.dependNodeFromName(cluster) )
+		self.packedWeights( geometry ).apply( fnCluster, MayaUtil.dagPathFromName(shape) )
 		mc.setAttr("%s.nw" % cluster, 1)
 		
+	@Profiler.profiled("MayaFactory.cleanup")
 	def cleanup(self):
 		'''Called at the end of an import to cleanup any temporary Maya nodes
 		   created by the factory, and perform any postponed operations.'''
@@ -309,14 +433,15 @@ class MayaFactory:
 			#
 			masters = mc.listRelatives(self._getPrimitiveCacheGroup(), allDescendents=True)
 			primitives = mc.ls( masters, allPaths=True, type="shape")
-			mc.sets( primitives, edit=True, forceElement="initialShadingGroup" )
+			self.assignShadingGroup( primitives, "initialShadingGroup" )
 		else:
 			mc.delete(self._getPrimitiveCacheGroup())
+		self.flushEdits()
 
 		# Clean up any "cache" nodes - nodes which were created only to
 		# speed up the creation of other nodes by providing a source
 		# to copy from
 		#
 		mc.delete(self._getGeoMastersGroup())
-		for cluster in self.clusterCache.values():
-			mc.delete(cluster)
+		if self._skeletonMastersGroup:
+			mc.delete(self._skeletonMastersGroup)
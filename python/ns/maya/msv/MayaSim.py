@@ -25,26 +25,49 @@ import sys
 import maya.mel
 import maya.cmds as mc
 
+import ns.py.Memory as Memory
+import ns.py.Profiler as Profiler
+import ns.bridge.data.Variant as Variant
 import ns.maya.msv.MayaFactory as MayaFactory
 import ns.maya.msv.MayaAgent as MayaAgent
 import ns.maya.msv.MayaSimAgent as MayaSimAgent
+import ns.maya.msv.MayaSkin as MayaSkin
 
 class MayaSim:
-	def __init__(self):
+	def __init__(self, chunkCache=None):
+		'''Chunk skinned geometry is looked up in, and added to, the
+		   optional ChunkCache 'chunkCache'.'''
 		self._factory = MayaFactory.MayaFactory()
+		self._factory.chunkCache = chunkCache
+		self.editsSaved = 0
 	
+	@Profiler.profiled("MayaSim.build")
 	def build(self, sim, animType, frameStep, cacheGeometry, cacheDir,
-			  deleteSkeleton, agentOptions):
+			  deleteSkeleton, agentOptions, tiers=None):
+		'''Build every agent in 'sim'. If 'tiers' maps an agent's id to a
+		   LevelOfDetail tier the agent is built with the options for that
+		   tier instead of 'agentOptions'. Agents are built one variant
+		   cluster after another so that identical agents share their
+		   resolved materials.'''
 		if sim.scene.mas().terrainFile:
 			self._factory.importObj(sim.scene.mas().terrainFile, "terrain")
 			
 		mayaAgents = []
+		cachedAgents = []
 		startFrame = -sys.maxint
 		endFrame = -sys.maxint
 		
-		for agent in sim.agents():
-			mayaAgent = MayaSimAgent.MayaSimAgent(agent, self._factory, sim)
-			mayaAgent.build(agentOptions, animType, frameStep)
+		agents = []
+		for variant in Variant.cluster(sim.agents()):
+			agents.extend([ (agent, variant) for agent in variant.agents ])
+		
+		for (agent, variant) in agents:
+			options = agentOptions
+			if tiers and agent.id in tiers:
+				options = MayaAgent.tierOptions(agentOptions, tiers[agent.id])
+			mayaAgent = MayaSimAgent.MayaSimAgent(agent, self._factory, sim, variant)
+			mayaAgent.build(options, animType, frameStep)
+			Memory.sample("build %s" % mayaAgent.name())
 			
 			# Presumably every agent will be simmed over the same frame
 			# range - however since the frame ranges could conceivably
@@ -58,54 +81,70 @@ class MayaSim:
 					endFrame = mayaAgent.simData().endFrame
 			
 			mayaAgents.append(mayaAgent)
+			# Only smooth skinned geometry can be cached
+			if options.loadGeometry and MayaSkin.eSkinType.smooth == options.skinType:
+				cachedAgents.append(mayaAgent)
 
+		# Make the shading and layer assignments queued while building,
+		# before caching can delete any of the nodes involved
+		#
+		self._factory.flushEdits()
+		Memory.sample("flushEdits")
+		
 		if cacheGeometry:
-			# Create geometry caches for each agent.
-			#
-			meshes = []
-			for mayaAgent in mayaAgents:
-				meshes.extend( [ geometry.shapeName() for geometry in mayaAgent.geometryData ] )
-			cacheFileName = "%s_%s" % (sim.scene.baseName(), sim.range)
-			
-			mc.cacheFile( directory=cacheDir,
-						  singleCache=True,
-						  doubleToFloat=True,
-						  format="OneFilePerFrame",
-						  simulationRate=1,
-						  sampleMultiplier=1,
-						  fileName=cacheFileName,
-						  startTime=startFrame,
-						  endTime=endFrame,
-						  points=meshes )
-			
-			# There's a bug in maya where cacheFile will sometimes write a
-			# partial path into the cache instead of the full path. To makes
-			# sure the attachFile works, we have to query the actual channel
-			# names
-			cacheFileFullName = "%s/%s.xml" % (cacheDir, cacheFileName)
-			meshes = mc.cacheFile(query=True, fileName=cacheFileFullName, channelName=True)
-			
-			switches = [ maya.mel.eval( 'createHistorySwitch( "%s", false )' % mesh ) for mesh in meshes ]
-			switchAttrs = [ ( "%s.inp[0]" % switch ) for switch in switches ]
-			mc.cacheFile(attachFile=True,
-						 fileName=cacheFileName,
-						 directory=cacheDir,
-						 channelName=meshes,
-						 inAttr=switchAttrs)
-			for switch in switches:
-				mc.setAttr("%s.playFromCache" % switch, True)
-	
-			if deleteSkeleton:
-				# After creating a geometry cache the skeleton, anim curves, and
-				# skin clusters are no longer needed to playback the sim. To save
-				# memory the user can choose to delete them.
-				#
-				for mayaAgent in mayaAgents:
-					mayaAgent.deleteSkeleton()
+			self._cacheGeometry(sim, cachedAgents, cacheDir, startFrame, endFrame, deleteSkeleton)
+			Memory.sample("cacheGeometry")
 
 		self._factory.cleanup()
+		Memory.sample("cleanup")
+		self.editsSaved = self._factory.editsSaved
 		
 		# The layers are off by default to speed up load, turn them on
 		# now.
 		#	
 		MayaAgent.showLayers()
+	
+	@Profiler.profiled("MayaSim.cacheGeometry")
+	def _cacheGeometry(self, sim, cachedAgents, cacheDir, startFrame, endFrame, deleteSkeleton):
+		# Create geometry caches for each agent.
+		#
+		meshes = []
+		for mayaAgent in cachedAgents:
+			meshes.extend( [ geometry.shapeName() for geometry in mayaAgent.geometryData ] )
+		cacheFileName = "%s_%s" % (sim.scene.baseName(), sim.range)
+		
+		mc.cacheFile( directory=cacheDir,
+					  singleCache=True,
+					  doubleToFloat=True,
+					  format="OneFilePerFrame",
+					  simulationRate=1,
+					  sampleMultiplier=1,
+					  fileName=cacheFileName,
+					  startTime=startFrame,
+					  endTime=endFrame,
+					  points=meshes )
+		
+		# There's a bug in maya where cacheFile will sometimes write a
+		# partial path into the cache instead of the full path. To makes
+		# sure the attachFile works, we have to query the actual channel
+		# names
+		cacheFileFullName = "%s/%s.xml" % (cacheDir, cacheFileName)
+		meshes = mc.cacheFile(query=True, fileName=cacheFileFullName, channelName=True)
+		
+		switches = [ maya.mel.eval( 'createHistorySwitch( "%s", false )' % mesh ) for mesh in meshes ]
+		switchAttrs = [ ( "%s.inp[0]" % switch ) for switch in switches ]
+		mc.cacheFile(attachFile=True,
+					 fileName=cacheFileName,
+					 directory=cacheDir,
+					 channelName=meshes,
+					 inAttr=switchAttrs)
+		for switch in switches:
+			mc.setAttr("%s.playFromCache" % switch, True)
+
+		if deleteSkeleton:
+			# After creating a geometry cache the skeleton, anim curves, and
+			# skin clusters are no longer needed to playback the sim. To save
+			# memory the user can choose to delete them.
+			#
+			for mayaAgent in cachedAgents:
+				mayaAgent.deleteSkeleton()
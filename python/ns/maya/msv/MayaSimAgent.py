@@ -29,22 +29,25 @@ from maya.OpenMaya import *
 import maya.cmds as mc
 import maya.mel as mel
 
+import ns.py.Profiler as Profiler
 import ns.bridge.data.AgentSpec as AgentSpec
 
 import ns.maya.msv.MayaAgent as MayaAgent
+import ns.maya.msv.MayaAnimCurves as MayaAnimCurves
 import ns.maya.msv.MayaUtil as MayaUtil
 
 class eAnimType:
 	curves, loader = range(2)
 
 class MayaSimAgent(MayaAgent.MayaAgent):
-	def __init__(self, agent, mayaFactory, sim):
-		MayaAgent.MayaAgent.__init__(self, agent, mayaFactory)
+	def __init__(self, agent, mayaFactory, sim, variant=None):
+		MayaAgent.MayaAgent.__init__(self, agent, mayaFactory, variant)
 		self._sim = sim
 			
 	def simData( self ):
 		return self._agent.simData()
 			
+	@Profiler.profiled("MayaSimAgent.loadSim")
 	def _loadSim(self, animType, frameStep):
 		'''Load the simulation data for this MayaAgent. It will either be
 		   loaded as anim curves or through the msvSimLoader node.'''
@@ -53,27 +56,27 @@ class MayaSimAgent(MayaAgent.MayaAgent):
 			# Create Anim Curves
 			#==================================================================
 			simData = self.simData()
+			curves = MayaAnimCurves.CurveBuilder()
 	
 			for jointSim in simData.joints():
-		 		mayaJoint = self.mayaJoint(jointSim.name())
+				if jointSim.name() not in self.mayaJoints:
+					# Proxies only have a root joint
+					continue
+				mayaJoint = self.mayaJoint(jointSim.name())
 	
-		 		for channelName in jointSim.channelNames():
-		 			channelEnum = AgentSpec.channel2Enum[channelName]
-		 			if mayaJoint.isChannelFree( channelEnum ):
+				for channelName in jointSim.channelNames():
+					channelEnum = AgentSpec.channel2Enum[channelName]
+					if mayaJoint.isChannelFree( channelEnum ):
 						times = range(jointSim.startFrame(),
 									  jointSim.startFrame() + jointSim.numFrames(),
 									  frameStep )
-		  				mc.setKeyframe(mayaJoint.name, attribute=channelName,
-									   inTangentType="linear", outTangentType="linear",
-									   time=times, value=0.0 )
-		  				channelAttr = "%s.%s" % (mayaJoint.name, channelName)
-		 				[ animCurve ] = mc.listConnections(channelAttr,
-														   source=True)
-		 				
-		 				offset = mayaJoint.channelOffsets[channelEnum]
-		 				channels = [ offset + jointSim.sample(channelName, i) for i in times ]
-		 				
-		 				MayaUtil.setMultiAttr( "%s.ktv" % animCurve, channels, "kv" )
+						offset = mayaJoint.channelOffsets[channelEnum]
+						values = [ offset + jointSim.sample(channelName, i) for i in times ]
+						curves.add( mayaJoint.name, channelName, times, values,
+									AgentSpec.isRotateEnum(channelEnum) )
+			
+			# All of the agent's curves are created together
+			curves.build()
 		else:
 			#==================================================================
 			# Create msvSimLoader Nodes
@@ -24,16 +24,84 @@ import sys
 import random
 import re
 import os.path
+from array import array
 
 from maya.OpenMaya import *
 import maya.cmds as mc
 import maya.mel as mel
 
+import ns.bridge.data.SkinChunks as SkinChunks
 import ns.maya.msv.MayaUtil as MayaUtil
 	
 class eSkinType:
 	smooth, duplicate, instance = range(3)
 
+def _array(intArray):
+	'''Copy an MIntArray into a Python array.'''
+	return array('l', [ intArray[i] for i in range(intArray.length()) ])
+
+class PackedWeights:
+	'''The skin weights of a mesh laid out for a single
+	   MFnSkinCluster.setWeights() call. 'influences' lists the deformer
+	   indices with a non-zero weight on at least one vertex, and 'values'
+	   holds every vertex's weight for each of those influences, vertex by
+	   vertex. Influences no vertex uses are left out so the cluster stays
+	   sparse. Packing is done once per weights file, the Maya arrays are
+	   built on first use and shared by every cluster.'''
+	def __init__(self, weights):
+		self.numVertices = len(weights)
+		used = {}
+		for vertex in weights:
+			for i in range(len(vertex)):
+				if vertex[i]:
+					used[i] = True
+		self.influences = used.keys()
+		self.influences.sort()
+		self.values = array('d')
+		for vertex in weights:
+			for i in self.influences:
+				if i < len(vertex):
+					self.values.append(vertex[i])
+				else:
+					self.values.append(0.0)
+		self._components = None
+		self._influenceArray = None
+		self._valueArray = None
+	
+	def weight(self, vertex, influence):
+		'''Weight of 'influence' on 'vertex', 0 for unused influences.'''
+		try:
+			i = self.influences.index(influence)
+		except ValueError:
+			return 0.0
+		return self.values[vertex * len(self.influences) + i]
+	
+	def _buildArrays(self):
+		fnComponent = MFnSingleIndexedComponent()
+		self._components = fnComponent.create(MFn.kMeshVertComponent)
+		fnComponent.setCompleteData(self.numVertices)
+		self._influenceArray = MIntArray(len(self.influences), 0)
+		for i in range(len(self.influences)):
+			self._influenceArray.set(self.influences[i], i)
+		self._valueArray = MDoubleArray(len(self.values), 0.0)
+		for i in range(len(self.values)):
+			self._valueArray.set(self.values[i], i)
+	
+	def apply(self, fnSkinCluster, shapePath):
+		'''Write every weight to the skin cluster attached to the function
+		   set 'fnSkinCluster', deforming the mesh at the MDagPath
+		   'shapePath'.'''
+		if not self.influences:
+			return
+		if self._valueArray is None:
+			self._buildArrays()
+		# setWeights() takes physical influence indices. Deformer i is
+		# connected to matrix[i] for every i, so they match the logical
+		# indices used here.
+		#
+		fnSkinCluster.setWeights(shapePath, self._components,
+								 self._influenceArray, self._valueArray, False)
+
 class MayaSkin:
 	def __init__(self, group, name, skinType, parent=""):
 		self.groupName = group
@@ -107,9 +175,11 @@ class MayaSkin:
 		
 		return copy	
 	
-	def createChunks(self, weights, deformers):
+	def createChunks(self, weights, deformers, cache=None, key=""):
 		'''Divide up the geometry into "chunks" where a chunk is the group of
-		   vertices most strongly influenced by a given deformer.'''
+		   vertices most strongly influenced by a given deformer. When a
+		   ChunkCache is given the face groups are looked up under 'key'
+		   first, and stored there once computed.'''
 		if not weights:
 			return
 		
@@ -117,57 +187,45 @@ class MayaSkin:
 									 type='shape',
 									 fullPath=True,
 									 allDescendents=True)
-		faceGroups = [None] * len(deformers)
-		numVerts = len(weights)
-		dpMesh = MayaUtil.dagPathFromName(shape)
+		if cache:
+			faceGroups = cache.load(key, len(deformers))
+			if faceGroups is not None:
+				self.buildChunks(shape, faceGroups, deformers)
+				return
 		
+		dpMesh = MayaUtil.dagPathFromName(shape)
 		fMesh = MFnMesh(dpMesh)
-		numFaces = fMesh.numPolygons()
-		itFace = MItMeshPolygon(dpMesh)
-		# For each vertex figure out which deformer influences
-		# it the most. Associate the vertex's neighboring faces with
-		# that deformer.
-		#
-		while not itFace.isDone():
-			face = itFace.index()
-			vertices = MIntArray()
-			itFace.getVertices(vertices)
-
-			maxWeight = 0
-			primeDeformer = 0
-
-			for i in range(len(deformers)):	
-				weight = 0
-				for j in range(vertices.length()):
-					vtx = vertices[j]
-					weight += weights[vtx][i]
-				if weight > maxWeight:
-					maxWeight = weight
-					primeDeformer = i
-			
-			# Associate all unassigned neighboring faces with
-			# that deformer
-			#
-			if not faceGroups[primeDeformer]:
-				faceGroups[primeDeformer] = []
-			faceGroups[primeDeformer].append( face )
-			itFace.next()
+		faceCounts = MIntArray()
+		faceVertices = MIntArray()
+		fMesh.getVertices(faceCounts, faceVertices)
+		faceCounts = _array(faceCounts)
+		faceVertices = _array(faceVertices)
 		
-		# We now have a series of face groups each one associated
-		# with a deformer. Chop up the original shape into these
-		# face groups by duplicating the original object and removing
-		# 
-		groupPrefix = len(self.groupName)
+		# Associate each face with the deformer that influences its
+		# vertices the most
+		#
+		dominant = SkinChunks.dominantDeformers(faceCounts, faceVertices,
+												SkinChunks.sparseWeights(weights))
+		faceGroups = SkinChunks.faceGroups(dominant, len(deformers))
+		if cache:
+			cache.save(key, faceGroups)
+		self.buildChunks(shape, faceGroups, deformers)
+	
+	def buildChunks(self, shape, faceGroups, deformers):
+		'''Chop up 'shape' into one chunk per deformer: a duplicate of
+		   the shape with every face not in the deformer's face group
+		   removed. Unused deformers get no chunk.'''
+		numFaces = 0
+		for faceGroup in faceGroups:
+			numFaces += len(faceGroup)
 		for i in range(len(faceGroups)):
 			if not faceGroups[i]:
 				continue
 			[ newShape ] = mc.duplicate(shape)
 			[ newShape ] = mc.ls(newShape, long=True)
 			if len(faceGroups[i]) < numFaces:
-				faceGroup = [ "%s.f[%d]" % (newShape, face) for face in faceGroups[i] ]
-				mc.select( "%s.f[*]" % newShape, replace=True)
-				mc.select( faceGroup, deselect=True )
-				mc.delete()
+				mc.delete([ "%s.f[%d:%d]" % (newShape, first, last)
+							for (first, last) in SkinChunks.gaps(faceGroups[i], numFaces) ])
 			self._addChunk(deformers[i], newShape)	
 		mc.delete(mc.listRelatives( shape, parent=True, fullPath=True ))
 	
@@ -24,6 +24,11 @@ from maya.OpenMaya import *
 import maya.cmds as mc
 import maya.mel as mel
 
+import ns.py as npy
+import ns.py.Errors
+
+import ns.bridge.data.Frustum as Frustum
+
 def getDescendentShapes( name ):
 	descendents = mc.listRelatives( name, allDescendents=True, fullPath=True )
 	shapes = []
@@ -41,6 +46,16 @@ def dagPathFromName(name):
 	selList.getDagPath( 0, dagPath )
 	return dagPath
 
+def dependNodeFromName(name):
+	'''Return an MObject for the dependency node called name.'''
+	selList = MSelectionList()
+	MGlobal.getSelectionListByName( name, selList )
+	if selList.isEmpty():
+		raise npy.Errors.BadArgumentError("%s not found" % name)
+	node = MObject()
+	selList.getDependNode( 0, node )
+	return node
+
 def setMultiAttr( multiAttr, values, childAttr="", type="" ):
 	# Python allows a maximum of 255 arguments to a function/method call
 	# so the maximum number of values we can process in a single setAttr
@@ -90,3 +105,22 @@ def hsvToRgb( hsv ):
 def rgbToHsv( rgb ):
 	return mel.eval( 'rgb_to_hsv <<%f, %f, %f>>' % (rgb[0], rgb[1], rgb[2]) )
 
+def camera( name, startFrame, endFrame ):
+	'''Return a Frustum.Camera describing the Maya camera 'name'. If the
+	   camera moves between startFrame and endFrame its world matrix is
+	   recorded on every frame.'''
+	fov = mc.camera( name, query=True, horizontalFieldOfView=True )
+	aspect = mc.camera( name, query=True, aspectRatio=True )
+	near = mc.camera( name, query=True, nearClipPlane=True )
+	far = mc.camera( name, query=True, farClipPlane=True )
+	
+	matrices = {}
+	for frame in range( startFrame, endFrame + 1 ):
+		matrices[frame] = mc.getAttr( "%s.worldMatrix" % name, time=frame )
+	worldMatrix = matrices[startFrame]
+	for matrix in matrices.values():
+		if matrix != worldMatrix:
+			break
+	else:
+		matrices = {}
+	return Frustum.Camera( worldMatrix, fov, aspect, near, far, matrices )
@@ -29,6 +29,8 @@ import maya.cmds as mc
 
 import ns.py
 import ns.py.Errors
+import ns.py.Memory as Memory
+import ns.py.Profiler as Profiler
 
 import ns.maya.msv
 import ns.bridge.io.MasReader as MasReader
@@ -38,6 +40,10 @@ import ns.maya.msv.MayaSkin as MayaSkin
 import ns.maya.msv.MayaSim as MayaSim
 import ns.maya.msv.MayaAgent as MayaAgent
 import ns.maya.msv.MayaSimAgent as MayaSimAgent
+import ns.maya.msv.MayaUtil as MayaUtil
+import ns.bridge.data.Frustum as Frustum
+import ns.bridge.data.LevelOfDetail as LevelOfDetail
+import ns.bridge.io.ChunkCache as ChunkCache
 
 kName = "msvSimImport"
 
@@ -75,6 +81,20 @@ kRangeFlag = "-r"
 kRangeFlagLong = "-range"
 kAnimTypeFlag = "-at"
 kAnimTypeFlagLong = "-animType"
+kCameraFlag = "-cam"
+kCameraFlagLong = "-camera"
+kCullPaddingFlag = "-cp"
+kCullPaddingFlagLong = "-cullPadding"
+kCullRangeFlag = "-cr"
+kCullRangeFlagLong = "-cullRange"
+kLodDistancesFlag = "-lod"
+kLodDistancesFlagLong = "-lodDistances"
+kChunkCacheDirFlag = "-ccd"
+kChunkCacheDirFlagLong = "-chunkCacheDir"
+kProfileFlag = "-prf"
+kProfileFlagLong = "-profile"
+kMemoryReportFlag = "-mr"
+kMemoryReportFlagLong = "-memoryReport"
 	
 class MsvSimImportCmd( OpenMayaMPx.MPxCommand ):
 	def __init__(self):
@@ -190,6 +210,47 @@ class MsvSimImportCmd( OpenMayaMPx.MPxCommand ):
 				raise ns.py.Errors.BadArgumentError( 'Please choose either "curves" or "loader" as the animType' )
 		else:
 			options[kAnimTypeFlag] = MayaSimAgent.eAnimType.curves
+			
+		if argData.isFlagSet( kCameraFlag ):
+			options[kCameraFlag] = argData.flagArgumentString( kCameraFlag, 0 )
+		else:
+			options[kCameraFlag] = ""
+			
+		if argData.isFlagSet( kCullPaddingFlag ):
+			options[kCullPaddingFlag] = argData.flagArgumentDouble( kCullPaddingFlag, 0 )
+		else:
+			options[kCullPaddingFlag] = 0.0
+			
+		if argData.isFlagSet( kCullRangeFlag ):
+			options[kCullRangeFlag] = ( argData.flagArgumentInt( kCullRangeFlag, 0 ),
+										argData.flagArgumentInt( kCullRangeFlag, 1 ) )
+		else:
+			options[kCullRangeFlag] = None
+			
+		if argData.isFlagSet( kLodDistancesFlag ):
+			try:
+				options[kLodDistancesFlag] = [ float(token) for token in argData.flagArgumentString( kLodDistancesFlag, 0 ).split() ]
+			except ValueError:
+				raise ns.py.Errors.BadArgumentError( 'The lodDistances must be a list of numbers, e.g. "20 60 150"' )
+			if not options[kCameraFlag]:
+				raise ns.py.Errors.BadArgumentError( 'The %s/%s flag is required to plan levels of detail' % (kCameraFlagLong, kCameraFlag) )
+		else:
+			options[kLodDistancesFlag] = []
+			
+		if argData.isFlagSet( kChunkCacheDirFlag ):
+			options[kChunkCacheDirFlag] = argData.flagArgumentString( kChunkCacheDirFlag, 0 )
+		else:
+			options[kChunkCacheDirFlag] = ChunkCache.kDefaultDir
+		
+		if argData.isFlagSet( kProfileFlag ):
+			options[kProfileFlag] = argData.flagArgumentString( kProfileFlag, 0 )
+		else:
+			options[kProfileFlag] = ""
+		
+		if argData.isFlagSet( kMemoryReportFlag ):
+			options[kMemoryReportFlag] = argData.flagArgumentString( kMemoryReportFlag, 0 )
+		else:
+			options[kMemoryReportFlag] = ""
 					
 		if ( options[kMaterialTypeFlag] != "blinn" and
 		     options[kMaterialTypeFlag] != "lambert" ):
@@ -230,6 +291,21 @@ class MsvSimImportCmd( OpenMayaMPx.MPxCommand ):
 			options = self._parseArgs( argData )
 			
 			undoQueue = mc.undoInfo( query=True, state=True )
+			
+			# -profile times the phases of the import and writes the
+			# results to <profile>.txt, .json and .prof
+			if options[kProfileFlag]:
+				Profiler.reset()
+				Profiler.enable()
+				Profiler.push( kName )
+			
+			# -memoryReport samples the memory used after each phase of the
+			# import and writes it, with estimates of the memory held by
+			# the sim data, agent types and weights, to a JSON file
+			if options[kMemoryReportFlag]:
+				Memory.reset()
+				Memory.enable()
+				Memory.sample( "start" )
 	
 			try:
 				try:
@@ -237,6 +313,7 @@ class MsvSimImportCmd( OpenMayaMPx.MPxCommand ):
 					
 					scene = Scene.Scene()
 					scene.setMas(options[kMasFileFlag])
+					Memory.sample( "scene" )
 					
 					sim = Sim.Sim(scene,
 								  options[kSimDirFlag],
@@ -244,6 +321,17 @@ class MsvSimImportCmd( OpenMayaMPx.MPxCommand ):
 								  options[kCallsheetFlag],
 								  options[kSelectionFlag],
 								  options[kRangeFlag])
+					Memory.sample( "sim" )
+					
+					tiers = None
+					if options[kCameraFlag]:
+						(camera, startFrame, endFrame) = self._camera(sim, options)
+						visible = Frustum.cull( sim.agents(), camera, startFrame, endFrame,
+												options[kCullPaddingFlag] )
+						sim.keepAgents( visible )
+						if options[kLodDistancesFlag]:
+							planner = LevelOfDetail.Planner( camera, options[kLodDistancesFlag] )
+							tiers = planner.plan( sim.agents(), startFrame, endFrame )
 				
 					agentOptions = MayaAgent.Options()
 					agentOptions.loadGeometry = options[kLoadGeometryFlag]
@@ -253,14 +341,25 @@ class MsvSimImportCmd( OpenMayaMPx.MPxCommand ):
 					agentOptions.instancePrimitives = options[kInstanceSegmentsFlag]
 					agentOptions.materialType = options[kMaterialTypeFlag]
 						
-					mayaSim = MayaSim.MayaSim()
+					# An empty -chunkCacheDir turns the chunk cache off
+					chunkCache = None
+					if options[kChunkCacheDirFlag]:
+						chunkCache = ChunkCache.ChunkCache( options[kChunkCacheDirFlag] )
+						
+					mayaSim = MayaSim.MayaSim( chunkCache )
 					mayaSim.build(sim,
 								  options[kAnimTypeFlag],
 								  options[kFrameStepFlag],
 								  options[kCacheGeometryFlag],
 								  options[kCacheDirFlag],
 								  options[kDeleteSkeletonFlag],
-								  agentOptions)
+								  agentOptions,
+								  tiers)
+					if mayaSim.editsSaved:
+						self.displayInfo( "Queued scene edits saved %d commands" % mayaSim.editsSaved )
+					if options[kMemoryReportFlag]:
+						Memory.write( options[kMemoryReportFlag], sim.memoryUsage() )
+						self.displayInfo( "Memory report written to %s" % options[kMemoryReportFlag] )
 					del mayaSim
 					del sim
 					del scene
@@ -268,11 +367,28 @@ class MsvSimImportCmd( OpenMayaMPx.MPxCommand ):
 					gc.collect()
 				finally:
 					mc.undoInfo( state=undoQueue )
+					if options[kProfileFlag]:
+						Profiler.pop()
+						Profiler.disable()
+						Profiler.export( options[kProfileFlag] )
+						self.displayInfo( "Profile written to %s.txt" % options[kProfileFlag] )
+					Memory.disable()
 			except ns.py.Errors.AbortError:
 				self.displayError("Import cancelled by user")
 			except:
 				raise
 
+	def _camera( self, sim, options ):
+		'''Return the -camera and the frame range it is used over: the
+		   -cullRange, or the whole sim if no range was given.'''
+		frameRange = options[kCullRangeFlag]
+		if not frameRange:
+			frameRange = sim.frameRange()
+		if not frameRange:
+			frameRange = ( int(mc.playbackOptions( query=True, minTime=True )),
+						   int(mc.playbackOptions( query=True, maxTime=True )) )
+		camera = MayaUtil.camera( options[kCameraFlag], frameRange[0], frameRange[1] )
+		return (camera, frameRange[0], frameRange[1])
 		
 def creator():
 	return OpenMayaMPx.asMPxPtr( MsvSimImportCmd() )
@@ -296,6 +412,13 @@ def syntaxCreator():
 	syntax.addFlag( kCacheDirFlag, kCacheDirFlagLong, OpenMaya.MSyntax.kString )
 	syntax.addFlag( kRangeFlag, kRangeFlagLong, OpenMaya.MSyntax.kString )
 	syntax.addFlag( kAnimTypeFlag, kAnimTypeFlagLong, OpenMaya.MSyntax.kString )
+	syntax.addFlag( kCameraFlag, kCameraFlagLong, OpenMaya.MSyntax.kString )
+	syntax.addFlag( kCullPaddingFlag, kCullPaddingFlagLong, OpenMaya.MSyntax.kDouble )
+	syntax.addFlag( kCullRangeFlag, kCullRangeFlagLong, OpenMaya.MSyntax.kLong, OpenMaya.MSyntax.kLong )
+	syntax.addFlag( kLodDistancesFlag, kLodDistancesFlagLong, OpenMaya.MSyntax.kString )
+	syntax.addFlag( kChunkCacheDirFlag, kChunkCacheDirFlagLong, OpenMaya.MSyntax.kString )
+	syntax.addFlag( kProfileFlag, kProfileFlagLong, OpenMaya.MSyntax.kString )
+	syntax.addFlag( kMemoryReportFlag, kMemoryReportFlagLong, OpenMaya.MSyntax.kString )
 	
 	syntax.makeFlagMultiUse( kSelectionFlag )
 	
@@ -0,0 +1,68 @@
+# The MIT License
+#	
+# Copyright (c) 2008 James Piechota
+#	
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+'''File helpers shared by the caches and records written to disk.'''
+
+import os
+import os.path
+try:
+	import hashlib
+	md5 = hashlib.md5
+except ImportError:
+	import md5 as _md5Module
+	md5 = _md5Module.new
+
+def contentHash(path):
+	'''Return the hex md5 of the contents of file 'path', or "" if it
+	   can't be read.'''
+	digest = md5()
+	try:
+		fileHandle = open(path, "rb")
+	except IOError:
+		return ""
+	try:
+		block = fileHandle.read(1 << 20)
+		while block:
+			digest.update(block)
+			block = fileHandle.read(1 << 20)
+	finally:
+		fileHandle.close()
+	return digest.hexdigest()
+
+def atomicWrite(fileName, text):
+	'''Write 'text' to 'fileName' through a temporary file that is then
+	   renamed, so that readers, even in other processes, never see a
+	   partial file.'''
+	temporary = "%s.%d.tmp" % (fileName, os.getpid())
+	fileHandle = open(temporary, "w")
+	try:
+		try:
+			fileHandle.write(text)
+		finally:
+			fileHandle.close()
+	except:
+		os.remove(temporary)
+		raise
+	# rename() doesn't replace an existing file on Windows
+	if os.path.exists(fileName):
+		os.remove(fileName)
+	os.rename(temporary, fileName)
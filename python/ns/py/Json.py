@@ -0,0 +1,55 @@
+# The MIT License
+#	
+# Copyright (c) 2008 James Piechota
+#	
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+'''Minimal JSON writer for the reports and traces the tools produce.'''
+
+def toJson(value):
+	'''Return 'value', made of dicts, sequences, strings, numbers, bools
+	   and None, as JSON. Infinite and NaN floats, which JSON can't
+	   represent, are written as null.'''
+	if value is None:
+		return "null"
+	elif value is True:
+		return "true"
+	elif value is False:
+		return "false"
+	elif isinstance(value, (int, long)):
+		return "%d" % value
+	elif isinstance(value, float):
+		if value * 0.0 != 0.0:
+			# inf or nan
+			return "null"
+		return "%r" % value
+	elif isinstance(value, basestring):
+		escaped = []
+		for c in value.replace("\\", "\\\\").replace('"', '\\"'):
+			if ord(c) < 32:
+				escaped.append("\\u%04x" % ord(c))
+			else:
+				escaped.append(c)
+		return '"%s"' % "".join(escaped)
+	elif isinstance(value, dict):
+		keys = value.keys()
+		keys.sort()
+		return "{%s}" % ",".join([ "%s:%s" % (toJson(str(key)), toJson(value[key])) for key in keys ])
+	else:
+		return "[%s]" % ",".join([ toJson(item) for item in value ])
@@ -0,0 +1,159 @@
+# The MIT License
+#	
+# Copyright (c) 2008 James Piechota
+#	
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+'''A record on disk of the jobs that make up a batch: what each job does,
+   whether it finished, and what it produced. It is rewritten as each
+   job finishes, so an interrupted batch can be resumed.'''
+
+import sys
+import os
+import os.path
+
+import ns.py.Errors as Errors
+import ns.py.FileUtil as FileUtil
+
+kPending = "pending"
+kDone = "done"
+kFailed = "failed"
+
+class Record:
+	'''One job. 'params' holds whatever the job needs to be run again, as
+	   strings.'''
+	def __init__(self, name):
+		self.name = name
+		self.params = {}
+		self.outputFile = ""
+		self.logFile = ""
+		self.status = kPending
+		self.attempts = 0
+		self.startTime = 0.0
+		self.endTime = 0.0
+		self.hash = ""
+	
+	def elapsed(self):
+		return self.endTime - self.startTime
+	
+	def update(self, job):
+		'''Copy the outcome of the Scheduler.Job that ran this record.'''
+		self.attempts += job.attempts
+		self.startTime = job.startTime
+		self.endTime = job.endTime
+		if job.succeeded():
+			self.status = kDone
+			self.hash = FileUtil.contentHash(self.outputFile)
+		else:
+			self.status = kFailed
+			self.hash = ""
+	
+	def complete(self):
+		'''True if the job finished and its output hasn't changed since.'''
+		return (kDone == self.status and
+				os.path.isfile(self.outputFile) and
+				FileUtil.contentHash(self.outputFile) == self.hash)
+
+class Manifest:
+	'''Records in the order they were added, and 'params' for the batch as
+	   a whole.'''
+	def __init__(self):
+		self.params = {}
+		self.records = []
+	
+	def add(self, record):
+		self.records.append(record)
+		return record
+	
+	def record(self, name):
+		for record in self.records:
+			if record.name == name:
+				return record
+		raise KeyError(name)
+
+def _writeParams(lines, params, indent):
+	keys = params.keys()
+	keys.sort()
+	for key in keys:
+		lines.append("%sparam %s %s" % (indent, key, params[key]))
+
+def write(fileName, manifest):
+	'''Write 'manifest' to 'fileName', replacing it only once the new
+	   contents are complete.'''
+	lines = []
+	_writeParams(lines, manifest.params, "")
+	for record in manifest.records:
+		lines.append("job %s" % record.name)
+		_writeParams(lines, record.params, "\t")
+		lines.append("\toutput %s" % record.outputFile)
+		lines.append("\tlog %s" % record.logFile)
+		lines.append("\tstatus %s" % record.status)
+		lines.append("\tattempts %d" % record.attempts)
+		lines.append("\tstart %r" % record.startTime)
+		lines.append("\tend %r" % record.endTime)
+		lines.append("\thash %s" % record.hash)
+	lines.append("")
+	FileUtil.atomicWrite(fileName, "\n".join(lines))
+
+def read(fileName):
+	'''Read a Manifest written by write().'''
+	manifest = Manifest()
+	record = None
+	fileHandle = open(fileName, "r")
+	try:
+		lineNumber = 0
+		for line in fileHandle:
+			lineNumber += 1
+			line = line.rstrip("\r\n")
+			tokens = line.strip().split(" ", 1)
+			if not tokens[0]:
+				continue
+			if 1 == len(tokens):
+				tokens.append("")
+			(keyword, value) = tokens
+			try:
+				if "param" == keyword:
+					(key, value) = (value.split(" ", 1) + [ "" ])[:2]
+					if line[0].isspace() and record:
+						record.params[key] = value
+					else:
+						manifest.params[key] = value
+				elif "job" == keyword:
+					record = manifest.add(Record(value))
+				elif not record:
+					raise ValueError("%s outside of a job" % keyword)
+				elif "output" == keyword:
+					record.outputFile = value
+				elif "log" == keyword:
+					record.logFile = value
+				elif "status" == keyword:
+					record.status = value
+				elif "attempts" == keyword:
+					record.attempts = int(value)
+				elif "start" == keyword:
+					record.startTime = float(value)
+				elif "end" == keyword:
+					record.endTime = float(value)
+				elif "hash" == keyword:
+					record.hash = value
+			except ValueError, e:
+				raise Errors.BadArgumentError("%s line %d: %s" % (fileName, lineNumber, e))
+	finally:
+		fileHandle.close()
+	return manifest
@@ -0,0 +1,151 @@
+# The MIT License
+#	
+# Copyright (c) 2008 James Piechota
+#	
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+'''Where an import's memory goes. sample() records the resident set size
+   of the process at the end of each phase of the import, and sizeOf()
+   helps the memoryUsage() methods of the big data structures estimate
+   the bytes they hold. write() puts both in a JSON report that farm
+   tools can use to size jobs.
+
+   Sampling is off until enable() is called.'''
+
+import sys
+import os
+import time
+import struct
+from array import array
+
+import ns.py.Json as Json
+
+kPointerBytes = struct.calcsize("P")
+
+_enabled = False
+_startTime = time.time()
+# (phase, seconds since reset(), rss in bytes)
+_samples = []
+
+def enable():
+	global _enabled
+	_enabled = True
+
+def disable():
+	global _enabled
+	_enabled = False
+
+def enabled():
+	return _enabled
+
+def reset():
+	global _startTime
+	_startTime = time.time()
+	del _samples[:]
+
+def _procStatus(field):
+	'''Return a "kB" field of /proc/self/status in bytes, 0 if there's no
+	   such file or field.'''
+	try:
+		fileHandle = open("/proc/self/status", "r")
+	except IOError:
+		return 0
+	try:
+		for line in fileHandle:
+			if line.startswith(field + ":"):
+				return int(line.split()[1]) * 1024
+	finally:
+		fileHandle.close()
+	return 0
+
+def _maxRss():
+	try:
+		import resource
+	except ImportError:
+		return 0
+	maxRss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	if "darwin" == sys.platform:
+		# Bytes on OS X, kilobytes elsewhere
+		return maxRss
+	return maxRss * 1024
+
+def rss():
+	'''Return the resident set size of this process in bytes. Where it
+	   can't be read, e.g. on OS X, the peak is returned instead, and
+	   where neither can, 0.'''
+	current = _procStatus("VmRSS")
+	if current:
+		return current
+	return _maxRss()
+
+def peakRss():
+	'''Return the largest the resident set size of this process has been,
+	   in bytes, or 0 if it isn't known.'''
+	peak = _procStatus("VmHWM")
+	if peak:
+		return peak
+	return _maxRss()
+
+def sample(phase):
+	'''Record the resident set size at the end of 'phase'.'''
+	if not _enabled:
+		return
+	_samples.append((phase, time.time() - _startTime, rss()))
+
+def samples():
+	return list(_samples)
+
+def sizeOf(obj):
+	'''Return the bytes used by 'obj' itself, not counting the objects it
+	   refers to, except for the items of arrays and the characters of
+	   strings. Estimated on Pythons without sys.getsizeof.'''
+	try:
+		return sys.getsizeof(obj)
+	except AttributeError:
+		pass
+	header = 2 * kPointerBytes
+	if isinstance(obj, array):
+		return header + 4 * kPointerBytes + obj.itemsize * len(obj)
+	elif isinstance(obj, basestring):
+		return header + 3 * kPointerBytes + len(obj)
+	elif isinstance(obj, (list, tuple)):
+		return header + 3 * kPointerBytes + kPointerBytes * len(obj)
+	elif isinstance(obj, dict):
+		# Tables are kept at most 2/3 full, 3 words per entry
+		return header + 4 * kPointerBytes + 3 * kPointerBytes * max(8, len(obj) * 3 / 2)
+	return header + kPointerBytes
+
+def report(structures={}):
+	'''Return the report as a dict: the samples, the peak, and
+	   'structures', the memoryUsage() summaries of the data.'''
+	return { "pid" : os.getpid(),
+			 "platform" : sys.platform,
+			 "peakRss" : peakRss(),
+			 "samples" : [ { "phase" : phase, "time" : seconds, "rss" : bytes }
+						   for (phase, seconds, bytes) in _samples ],
+			 "structures" : structures }
+
+def write(fileName, structures={}):
+	'''Write report() to 'fileName' as JSON.'''
+	fileHandle = open(fileName, "w")
+	try:
+		fileHandle.write(Json.toJson(report(structures)))
+		fileHandle.write("\n")
+	finally:
+		fileHandle.close()
@@ -0,0 +1,282 @@
+# The MIT License
+#	
+# Copyright (c) 2008 James Piechota
+#	
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+'''Hierarchical profiler. Code marks the scopes it wants timed with
+   push()/pop(), the profiled() decorator, or a Scope in a with statement.
+   For every path of nested scopes the profiler counts the calls and the
+   inclusive and exclusive time. Each thread has its own stack of scopes.
+   Profiles saved by other processes can be loaded to merge them, and
+   results exported as a text report or Chrome trace-event JSON, viewable
+   in chrome://tracing.
+
+   Profiling is off until enable() is called, when push()/pop() and
+   profiled functions cost little more than a function call.'''
+
+import sys
+import os
+import time
+import thread
+import threading
+
+import ns.py.Errors as Errors
+import ns.py.Json as Json
+
+# Trace events are dropped past this many, the statistics are still kept
+kMaxEvents = 1000000
+
+class Stat:
+	'''Calls to one path of scopes, and the seconds spent in them with and
+	   without their child scopes.'''
+	def __init__(self, count=0, inclusive=0.0, exclusive=0.0):
+		self.count = count
+		self.inclusive = inclusive
+		self.exclusive = exclusive
+	
+	def add(self, other):
+		self.count += other.count
+		self.inclusive += other.inclusive
+		self.exclusive += other.exclusive
+
+_enabled = False
+_lock = threading.Lock()
+_local = threading.local()
+# Stat by tuple of scope names, outermost first
+_stats = {}
+# (name, pid, thread id, start, duration) of every popped scope
+_events = []
+
+def enable():
+	global _enabled
+	_enabled = True
+
+def disable():
+	global _enabled
+	_enabled = False
+
+def enabled():
+	return _enabled
+
+def reset():
+	'''Forget everything profiled so far.'''
+	_lock.acquire()
+	try:
+		_stats.clear()
+		del _events[:]
+	finally:
+		_lock.release()
+	_local.stack = []
+
+def _stack():
+	try:
+		return _local.stack
+	except AttributeError:
+		_local.stack = []
+		return _local.stack
+
+def push(name):
+	'''Start timing scope 'name', nested in the current scope.'''
+	if not _enabled:
+		return
+	stack = _stack()
+	if stack:
+		path = stack[-1][0] + (name,)
+	else:
+		path = (name,)
+	# [ path, start time, time spent in child scopes ]
+	stack.append([ path, time.time(), 0.0 ])
+
+def pop():
+	'''Stop timing the current scope.'''
+	stack = _stack()
+	if not stack:
+		return
+	(path, start, children) = stack.pop()
+	elapsed = time.time() - start
+	if stack:
+		stack[-1][2] += elapsed
+	_lock.acquire()
+	try:
+		try:
+			stat = _stats[path]
+		except KeyError:
+			stat = Stat()
+			_stats[path] = stat
+		stat.count += 1
+		stat.inclusive += elapsed
+		stat.exclusive += elapsed - children
+		if len(_events) < kMaxEvents:
+			_events.append((path[-1], os.getpid(), thread.get_ident(), start, elapsed))
+	finally:
+		_lock.release()
+
+class Scope:
+	'''Times the block of a with statement.'''
+	def __init__(self, name):
+		self.name = name
+	
+	def __enter__(self):
+		push(self.name)
+		return self
+	
+	def __exit__(self, type, value, traceback):
+		pop()
+		return False
+
+def profiled(name=""):
+	'''Decorator that times every call of a function as scope 'name', by
+	   default the function's name.'''
+	def decorate(function):
+		scope = name or function.__name__
+		def profiledFunction(*args, **kwargs):
+			if not _enabled:
+				return function(*args, **kwargs)
+			push(scope)
+			try:
+				return function(*args, **kwargs)
+			finally:
+				pop()
+		profiledFunction.__name__ = function.__name__
+		profiledFunction.__doc__ = function.__doc__
+		return profiledFunction
+	return decorate
+
+def stats():
+	'''Return a copy of the Stats by path.'''
+	_lock.acquire()
+	try:
+		result = {}
+		for (path, stat) in _stats.items():
+			result[path] = Stat(stat.count, stat.inclusive, stat.exclusive)
+		return result
+	finally:
+		_lock.release()
+
+def save(fileName):
+	'''Write everything profiled so far to 'fileName', to be merged by
+	   load().'''
+	_lock.acquire()
+	try:
+		fileHandle = open(fileName, "w")
+		try:
+			for (path, stat) in _stats.items():
+				fileHandle.write("stat\t%d\t%r\t%r\t%s\n" % (stat.count, stat.inclusive, stat.exclusive, "\t".join(path)))
+			for (name, pid, tid, start, duration) in _events:
+				fileHandle.write("event\t%d\t%d\t%r\t%r\t%s\n" % (pid, tid, start, duration, name))
+		finally:
+			fileHandle.close()
+	finally:
+		_lock.release()
+
+def load(fileName):
+	'''Merge the profile saved to 'fileName', usually by another process,
+	   into this one.'''
+	fileHandle = open(fileName, "r")
+	try:
+		lines = fileHandle.readlines()
+	finally:
+		fileHandle.close()
+	_lock.acquire()
+	try:
+		for i in range(len(lines)):
+			tokens = lines[i].rstrip("\r\n").split("\t")
+			try:
+				if "stat" == tokens[0] and len(tokens) > 4:
+					stat = Stat(int(tokens[1]), float(tokens[2]), float(tokens[3]))
+					path = tuple(tokens[4:])
+					try:
+						_stats[path].add(stat)
+					except KeyError:
+						_stats[path] = stat
+				elif "event" == tokens[0] and 6 == len(tokens):
+					if len(_events) < kMaxEvents:
+						_events.append((tokens[5], int(tokens[1]), int(tokens[2]), float(tokens[3]), float(tokens[4])))
+				elif tokens[0]:
+					raise ValueError("unknown record %s" % tokens[0])
+			except ValueError, e:
+				raise Errors.BadArgumentError("%s line %d: %s" % (fileName, i + 1, e))
+	finally:
+		_lock.release()
+
+def writeChromeTrace(fileHandle):
+	'''Write the profiled scopes as Chrome trace-event JSON, times in
+	   microseconds from the first scope.'''
+	_lock.acquire()
+	try:
+		events = list(_events)
+	finally:
+		_lock.release()
+	events.sort(lambda a, b: cmp(a[3], b[3]))
+	origin = 0.0
+	if events:
+		origin = events[0][3]
+	fileHandle.write('{"traceEvents":[\n')
+	lines = []
+	for (name, pid, tid, start, duration) in events:
+		lines.append('{"name":%s,"cat":"msv","ph":"X","ts":%d,"dur":%d,"pid":%d,"tid":%d}' %
+					 (Json.toJson(name), int((start - origin) * 1e6), int(duration * 1e6), pid, tid))
+	fileHandle.write(",\n".join(lines))
+	fileHandle.write('\n],"displayTimeUnit":"ms"}\n')
+
+def report():
+	'''Return a text report: the tree of scopes, each with its calls and
+	   inclusive and exclusive seconds, slowest first; then the scopes by
+	   exclusive time regardless of where they were called from.'''
+	allStats = stats()
+	children = {}
+	for path in allStats.keys():
+		children.setdefault(path[:-1], []).append(path)
+	
+	lines = [ "%12s %12s %10s  %s" % ("Inclusive", "Exclusive", "Calls", "Scope") ]
+	def walk(parent, depth):
+		paths = children.get(parent, [])
+		paths.sort(lambda a, b: cmp(allStats[b].inclusive, allStats[a].inclusive))
+		for path in paths:
+			stat = allStats[path]
+			lines.append("%12.4f %12.4f %10d  %s%s" % (stat.inclusive, stat.exclusive, stat.count, "  " * depth, path[-1]))
+			walk(path, depth + 1)
+	walk((), 0)
+	
+	byName = {}
+	for (path, stat) in allStats.items():
+		byName.setdefault(path[-1], Stat()).add(Stat(stat.count, 0.0, stat.exclusive))
+	names = byName.keys()
+	names.sort(lambda a, b: cmp(byName[b].exclusive, byName[a].exclusive))
+	lines.append("")
+	lines.append("%12s %12s %10s  %s" % ("", "Exclusive", "Calls", "Scope"))
+	for name in names:
+		lines.append("%12s %12.4f %10d  %s" % ("", byName[name].exclusive, byName[name].count, name))
+	return "\n".join(lines) + "\n"
+
+def export(basePath):
+	'''Save the profile to basePath.prof, the report to basePath.txt and
+	   the trace to basePath.json.'''
+	save("%s.prof" % basePath)
+	fileHandle = open("%s.txt" % basePath, "w")
+	try:
+		fileHandle.write(report())
+	finally:
+		fileHandle.close()
+	fileHandle = open("%s.json" % basePath, "w")
+	try:
+		writeChromeTrace(fileHandle)
+	finally:
+		fileHandle.close()
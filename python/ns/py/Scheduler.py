@@ -0,0 +1,149 @@
+# The MIT License
+#	
+# Copyright (c) 2008 James Piechota
+#	
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+'''Run commands as separate processes, a fixed number at a time.'''
+
+import sys
+import os
+import time
+import subprocess
+
+def cpuCount():
+	'''Return the number of processors, or 1 if it can't be found.'''
+	try:
+		count = os.sysconf("SC_NPROCESSORS_ONLN")
+		if count > 0:
+			return count
+	except (AttributeError, ValueError, OSError):
+		pass
+	try:
+		return max(1, int(os.environ["NUMBER_OF_PROCESSORS"]))
+	except (KeyError, ValueError):
+		return 1
+
+class Job:
+	'''A command to run in its own process. 'command' is either a list of
+	   arguments or a string run through the shell. The command's output
+	   goes to 'logFile', if given.'''
+	def __init__(self, name, command, logFile=""):
+		self.name = name
+		self.command = command
+		self.logFile = logFile
+		self.returnCode = None
+		self.attempts = 0
+		self.startTime = 0.0
+		self.endTime = 0.0
+		# Earliest time the job may be started again after a failure
+		self.retryTime = 0.0
+		self._process = None
+		self._log = None
+	
+	def succeeded(self):
+		return 0 == self.returnCode
+	
+	def elapsed(self):
+		return self.endTime - self.startTime
+	
+	def start(self):
+		self.attempts += 1
+		self.returnCode = None
+		output = None
+		if self.logFile:
+			if 1 == self.attempts:
+				self._log = open(self.logFile, "w")
+			else:
+				# Keep the output of the failed attempts
+				self._log = open(self.logFile, "a")
+				self._log.write("### Attempt %d\n" % self.attempts)
+				self._log.flush()
+			output = self._log
+		self.startTime = time.time()
+		try:
+			self._process = subprocess.Popen(self.command,
+											 shell=isinstance(self.command, basestring),
+											 stdout=output,
+											 stderr=subprocess.STDOUT)
+		except OSError, e:
+			print >> sys.stderr, "Error: could not run %s: %s" % (self.name, e)
+			self._finish(-1)
+	
+	def poll(self):
+		'''Return True once the job has finished.'''
+		if self.returnCode is not None:
+			return True
+		returnCode = self._process.poll()
+		if returnCode is None:
+			return False
+		self._finish(returnCode)
+		return True
+	
+	def _finish(self, returnCode):
+		self.returnCode = returnCode
+		self.endTime = time.time()
+		self._process = None
+		if self._log:
+			self._log.close()
+			self._log = None
+
+class Scheduler:
+	'''Runs Jobs, at most 'numWorkers' at once and in the order they were
+	   added. By default there is one worker per processor.'''
+	def __init__(self, numWorkers=0):
+		if numWorkers < 1:
+			numWorkers = cpuCount()
+		self.numWorkers = numWorkers
+		self.jobs = []
+	
+	def add(self, job):
+		self.jobs.append(job)
+		return job
+	
+	def run(self, finished=None, interval=0.1, retries=0, backoff=1.0):
+		'''Run every job and return the ones that failed. A failed job is
+		   run again up to 'retries' times, after waiting 'backoff' seconds,
+		   doubled with every attempt. 'finished' is called with each job
+		   once it has succeeded or run out of retries.'''
+		pending = list(self.jobs)
+		running = []
+		while pending or running:
+			now = time.time()
+			for job in pending[:]:
+				if len(running) >= self.numWorkers:
+					break
+				if job.retryTime > now:
+					continue
+				pending.remove(job)
+				job.start()
+				running.append(job)
+			for job in running[:]:
+				if job.poll():
+					running.remove(job)
+					if not job.succeeded() and job.attempts <= retries:
+						delay = backoff * (2 ** (job.attempts - 1))
+						print >> sys.stderr, "### %s failed (%d), retrying in %g seconds" % (job.name, job.returnCode, delay)
+						job.retryTime = time.time() + delay
+						pending.append(job)
+					elif finished:
+						finished(job)
+			if running or pending:
+				time.sleep(interval)
+		return [ job for job in self.jobs if not job.succeeded() ]
@@ -0,0 +1,128 @@
+# The MIT License
+#	
+# Copyright (c) 2008 James Piechota
+#	
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import sys
+import os
+import unittest
+
+import ns.py.Errors as Errors
+import ns.bridge.data.Agent as Agent
+import ns.bridge.data.AgentSpec as AgentSpec
+import ns.bridge.data.VariableTable as VariableTable
+
+def _variable(name, default, min, max, expression=""):
+	variable = AgentSpec.Variable()
+	variable.name = name
+	variable.default = default
+	variable.min = min
+	variable.max = max
+	variable.expression = expression
+	return variable
+
+class TestAgent(unittest.TestCase):
+	'''Variable values and compiled variable expressions.'''
+	def setUp(self):
+		self.agentSpec = AgentSpec.AgentSpec()
+		for variable in [ _variable("height", 1.0, 0.8, 1.2),
+						  _variable("h", 2.0, 2.0, 2.0),
+						  _variable("leg_length", 0.5, 0.4, 0.6, "height*0.5"),
+						  _variable("stride", 1.0, 0.0, 2.0, "leg_length*2+h") ]:
+			self.agentSpec.variables[variable.name] = variable
+
+	def tearDown(self):
+		pass
+
+	def _agent(self, id, height):
+		agent = Agent.Agent()
+		agent.id = id
+		agent.agentSpec = self.agentSpec
+		agent.variableValues["height"] = height
+		return agent
+
+	def testDependencies(self):
+		'''	Only whole variable names are dependencies.'''
+		expression = self.agentSpec.expression("height*0.5")
+		self.assertEqual(["height"], expression.dependencies)
+		expression = self.agentSpec.expression("leg_length*2+h")
+		self.assertEqual(["leg_length", "h"], expression.dependencies)
+		self.failUnless(expression is self.agentSpec.expression("leg_length*2+h"))
+
+	def testExpressionOrder(self):
+		'''	Expression variables come after the variables they use.'''
+		self.assertEqual(["leg_length", "stride"], self.agentSpec.expressionOrder())
+
+	def testCircularExpression(self):
+		self.agentSpec.variables["height"].expression = "stride"
+		self.assertRaises(Errors.BadArgumentError, self.agentSpec.expressionOrder)
+
+	def testVariableValue(self):
+		agent = self._agent(1, 1.1)
+		self.assertAlmostEqual(0.55, agent.variableValue("leg_length"))
+		self.assertAlmostEqual(3.1, agent.variableValue("stride"))
+		self.assertEqual(3, agent.variableValue("stride", asInt=True))
+		self.assertAlmostEqual(0.0, agent.variableValue("missing"))
+
+	def testEvalExpressions(self):
+		'''	Evaluate all expressions for many agents at once.'''
+		agents = [ self._agent(i, 1.0 + i * 0.01) for i in range(10) ]
+		agents[3].variableValues["stride"] = 7.0
+		Agent.evalExpressions(self.agentSpec, agents)
+		for agent in agents:
+			self.assertAlmostEqual(agent.variableValue("height") * 0.5,
+								   agent.variableValue("leg_length"))
+		self.assertAlmostEqual(1.0 + 2.0, agents[0].variableValue("stride"))
+		self.assertAlmostEqual(7.0, agents[3].variableValue("stride"))
+
+	def testRandomValues(self):
+		'''	Random values are reproducible and keyed by agent id.'''
+		self.agentSpec.variables["stride"].expression = ""
+		a = Agent.Agent()
+		a.id = 12
+		a.agentSpec = self.agentSpec
+		b = Agent.Agent()
+		b.id = 12
+		b.agentSpec = self.agentSpec
+		b.variableValue("height")
+		self.assertEqual(a.variableValue("stride"), b.variableValue("stride"))
+		value = a.variableValue("stride")
+		self.failUnless(0.0 <= value <= 2.0)
+		c = Agent.Agent(instanced=False)
+		c.id = 12
+		c.agentSpec = self.agentSpec
+		self.assertAlmostEqual(1.0, c.variableValue("stride"))
+
+	def testVariableTable(self):
+		agents = [ self._agent(i, 0.8 + (i % 3) * 0.2) for i in range(9) ]
+		tables = VariableTable.buildTables(agents, seed=5)
+		table = tables[self.agentSpec]
+		self.assertEqual(9, len(table))
+		self.assertEqual({}, agents[0].variableValues)
+		table.fill()
+		self.assertAlmostEqual(0.5, agents[4].variableValue("leg_length"))
+		self.assertEqual([2, 5, 8], table.select("height", lambda h: h > 1.1))
+		self.assertEqual([2, 5, 8], table.select("leg_length", lambda l: l > 0.55))
+		groups = table.group(["height", "h"])
+		self.assertEqual([(1, 2)], groups.keys())
+		groups = table.group(["height"], asInt=False)
+		self.assertEqual([0, 3, 6], groups[(0.8,)])
+		
+suite = unittest.TestLoader().loadTestsFromTestCase(TestAgent)
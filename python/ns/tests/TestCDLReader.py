@@ -0,0 +1,259 @@
+# The MIT License
+#	
+# Copyright (c) 2008 James Piechota
+#	
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import sys
+import os
+import unittest
+from StringIO import StringIO
+
+import ns.bridge.io.CDLReader as CDLReader
+import ns.bridge.data.AgentSpec as AgentSpec
+import ns.bridge.data.Brain as Brain
+
+kCdl = '''# cdl test agent
+object man
+angles degrees
+variable height 1.0 [0.8 1.2]
+variable leg_length 0.5 [0.4 0.6] height*0.5
+scale_var height
+dynamics
+    gravity 9.8
+        variable mass 70.0 [50.0 90.0]
+segment pelvis
+    translate 0.0 1.0 0.0
+    order tx ty tz rz rx ry
+    primitive tube
+    radius 0.2
+    length 0.4
+    axis X
+    bone_rotate 0.0 90.0 0.0
+    centre 0.0 0.1 0.0
+    density 1.0
+    translate 10 20
+segment thigh
+    parent pelvis
+    primitive box
+    size 0.1 0.2 0.3
+    centre 0.0 -0.2 0.0
+    dof rx ry
+    scale_var leg_length
+    bind_pose 1.0 2.0 3.0
+    transform
+        1.0 0.0 0.0 0.0
+        0.0 1.0 0.0 0.0
+        0.0 0.0 1.0 0.0
+        0.0 -0.5 0.0 1.0
+    limits rx -90 90
+material skin
+    id 1
+    colour_map maps/skin_'shirt_map'.tif rgb
+    ambient 0.1 0.2 0.3 rgb
+    diffuse 0.5 dvar 0.7
+    specular 0.9 0.8 0.7 hsv
+    roughness rvar
+    rman_surface plastic
+geometry body
+    file obj/body.obj
+    id 1
+    material 1
+    rotate 0 0 0
+geometry head
+    file /abs/obj/head.obj
+    id 2
+    material 1
+    attach pelvis
+cloth cape
+    geo obj/cape.obj
+    id 3
+    material 1
+    ks 0.5
+option hats
+    var height
+    inputs body head
+    translate 5 5
+action walk
+    curve
+        channel pelvis:rx
+        type linear
+        3 points
+        0.0 1.0
+        0.5 2.0
+        1.0 3.0
+    curve
+        channel ty
+        type linear
+        2 points
+        0.0 0.0
+        1.0 0.5
+    rate 1.0
+fuzzy input
+    id        1
+    name      ground
+    translate 10 20
+    channel ground.dist
+    range 0.000000 1.000000
+fuzzy output
+    id        2
+    name      walk
+    channel walk
+    manual
+    output  0.500000
+    defuzz  COM
+    1 input 1
+    1 alt input 1
+units metric
+'''
+
+class TestCDLReader(unittest.TestCase):
+	
+	def setUp(self):
+		self.agentSpec = CDLReader.read(StringIO(kCdl))
+		
+	def tearDown(self):
+		pass
+	
+	def testStructure(self):
+		'''	Top level tokens should be recorded in the order they appear.'''
+		self.assertEqual(["object", "angles", "variable", "scale_var",
+						  "dynamics", "variable", "segment", "material",
+						  "geometry", "cloth", "option", "action", "fuzzy",
+						  "units"],
+						 self.agentSpec.cdlStructure)
+		self.assertEqual("man", self.agentSpec.agentType)
+		self.assertEqual("height", self.agentSpec.scaleVar)
+		
+	def testLeftovers(self):
+		'''	Unhandled blocks should be stored verbatim.'''
+		self.assertEqual("angles degrees\n", self.agentSpec.leftovers["angles"])
+		self.assertEqual("dynamics\n    gravity 9.8\n",
+						 self.agentSpec.leftovers["dynamics"])
+		self.assertEqual("units metric\n", self.agentSpec.leftovers["units"])
+
+	def testVariables(self):
+		'''	Variables, including ones nested in unhandled blocks.'''
+		variables = self.agentSpec.variables
+		self.assertEqual(["height", "leg_length", "mass"], sorted(variables.keys()))
+		self.assertAlmostEqual(0.5, variables["leg_length"].default)
+		self.assertAlmostEqual(0.4, variables["leg_length"].min)
+		self.assertAlmostEqual(0.6, variables["leg_length"].max)
+		self.assertEqual("height*0.5", variables["leg_length"].expression)
+		self.assertEqual("", variables["mass"].expression)
+	
+	def testSegments(self):
+		'''	Segments, their primitives, and their channel layout.'''
+		self.assertEqual(["pelvis", "thigh"],
+						 [ joint.name for joint in self.agentSpec.jointData ])
+		pelvis = self.agentSpec.joints["pelvis"]
+		self.assertEqual("", pelvis.parent)
+		self.assertEqual((0.0, 1.0, 0.0), pelvis.translate)
+		self.assertEqual([AgentSpec.kTX, AgentSpec.kTY, AgentSpec.kTZ,
+						  AgentSpec.kRZ, AgentSpec.kRX, AgentSpec.kRY],
+						 pelvis.order)
+		self.assertEqual([ True ] * 6, pelvis.dof)
+		self.failUnless(isinstance(pelvis.primitive, AgentSpec.Tube))
+		self.assertEqual("0.2", pelvis.primitive.radius)
+		self.assertEqual("0.4", pelvis.primitive.length)
+		self.assertEqual([ True, False, False ], pelvis.primitive.axis)
+		self.assertEqual((0.0, 90.0, 0.0), pelvis.primitive.rotate)
+		self.assertEqual([ 0.0, 0.1, 0.0 ], pelvis.primitive.centre)
+		self.assertEqual("    density 1.0\n", pelvis.leftovers)
+		
+		thigh = self.agentSpec.joints["thigh"]
+		self.assertEqual("pelvis", thigh.parent)
+		self.failUnless(isinstance(thigh.primitive, AgentSpec.Box))
+		self.assertEqual([ 0.1, 0.2, 0.3 ], thigh.primitive.size)
+		self.assertEqual([ False, False, False, True, True, False ], thigh.dof)
+		self.assertEqual("leg_length", thigh.scaleVar)
+		self.assertEqual([ -1.0, -2.0, -3.0 ], thigh.actionOffset)
+		self.assertEqual(16, len(thigh.transform))
+		self.assertAlmostEqual(-0.5, thigh.transform[13])
+		self.assertEqual("    limits rx -90 90\n", thigh.leftovers)
+
+	def testMaterials(self):
+		material = self.agentSpec.materialData[1]
+		self.assertEqual("skin", material.name)
+		self.assertEqual("maps/skin_'shirt_map'.tif", material.rawColorMap)
+		self.assertEqual([ 0.1, 0.2, 0.3 ], material.ambient)
+		self.assertEqual("rgb", material.ambientSpace)
+		self.assertEqual([ 0.5, 0.0, 0.7 ], material.diffuse)
+		self.assertEqual([ "", "dvar", "" ], material.diffuseVar)
+		self.assertEqual("hsv", material.diffuseSpace)
+		self.assertEqual("rvar", material.roughnessVar)
+		self.assertEqual("    rman_surface plastic\n", material.leftovers)
+		
+	def testGeometry(self):
+		'''	Geometry, cloth and option nodes.'''
+		geoDB = self.agentSpec.geoDB
+		body = geoDB.geometryByName("body")
+		self.assertEqual("obj/body.obj", body.file)
+		self.assertEqual(1, body.id)
+		self.assertEqual("    rotate 0 0 0\n", body.leftovers)
+		head = geoDB.geometryById(2)
+		self.assertEqual("pelvis", head.attach)
+		cape = geoDB.geometryByName("cape")
+		self.assertEqual("obj/cape.obj", cape.file)
+		self.assertEqual(3, cape.id)
+		items = dict([ (item.name, item) for item in geoDB.items() ])
+		self.assertEqual(["cape", "hats"], sorted(items.keys()))
+		hats = items["hats"]
+		self.assertEqual("height", hats.var)
+		self.assertEqual([ body, head ], hats.inputs)
+		
+	def testActions(self):
+		action = self.agentSpec.actions["walk"]
+		self.assertEqual(3, action.maxPoints)
+		self.assertEqual([" ty", "pelvis rx"], sorted(action.curves.keys()))
+		self.assertEqual([ (0.0, 1.0), (0.5, 2.0), (1.0, 3.0) ],
+						 action.curves["pelvis rx"].points)
+		self.assertEqual("    rate 1.0\n", action.leftovers)
+		
+	def testBrain(self):
+		'''	Fuzzy nodes are only handled when explicitly asked for.'''
+		self.failIf(self.agentSpec.brain.nodes())
+		self.failUnless(self.agentSpec.leftovers["fuzzy"].startswith("fuzzy input\n"))
+		
+		agentSpec = CDLReader.read(StringIO(kCdl), ["fuzzy"])
+		nodes = agentSpec.brain.nodes()
+		self.assertEqual(2, len(nodes))
+		self.failUnless(isinstance(nodes[0], Brain.Input))
+		self.assertEqual("ground", nodes[0].name)
+		self.assertEqual([ 10, 20 ], nodes[0].translate)
+		self.assertEqual("ground.dist", nodes[0].channel)
+		self.assertEqual([ 0.0, 1.0 ], nodes[0].range)
+		self.failUnless(isinstance(nodes[1], Brain.Output))
+		self.failUnless(nodes[1].manual)
+		self.assertEqual("COM", nodes[1].defuzz)
+		self.assertEqual([ 1 ], nodes[1].inputs)
+		self.assertEqual([ 1 ], nodes[1].altInputs)
+		
+	def testEvolveTokens(self):
+		'''	Only the evolve tokens are parsed, everything else is stored as
+			leftovers.'''
+		agentSpec = CDLReader.read(StringIO(kCdl), CDLReader.kEvolveTokens)
+		self.assertEqual(2, len(agentSpec.brain.nodes()))
+		self.assertEqual(3, len(agentSpec.variables))
+		self.assertEqual(1, len(agentSpec.actions))
+		self.failIf(agentSpec.jointData)
+		self.failUnless(agentSpec.leftovers["segment"].startswith("segment pelvis\n"))
+		self.failUnless(agentSpec.leftovers["geometry"].endswith("    attach pelvis\n"))
+
+suite = unittest.TestLoader().loadTestsFromTestCase(TestCDLReader)
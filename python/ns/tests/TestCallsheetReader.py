@@ -0,0 +1,108 @@
+# The MIT License
+#	
+# Copyright (c) 2008 James Piechota
+#	
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import sys
+import os
+import unittest
+from StringIO import StringIO
+
+import ns.bridge.io.CallsheetReader as CallsheetReader
+import ns.bridge.data.AgentSpec as AgentSpec
+import ns.bridge.data.Selection as Selection
+import ns.bridge.data.Sim as Sim
+
+kCallsheet = '''1 man.1 1 0 0 0 0 1 0 0 0 0 1 0 10 0 5 1 cdl man.cdl height 1.1 shirt 2
+2 man.2 1 0 0 0 0 1 0 0 0 0 1 0 20 0 5 1 cdl man.cdl height 0.9
+7 woman.7 1 0 0 0 0 1 0 0 0 0 1 0 30 0 5 1 cdl woman.cdl
+
+9 man.9 1 0 0 0 0 1 0 0 0 0 1 0 40 0 5 1 cdl man.cdl shirt 1 other 4
+'''
+
+class _Scene:
+	'''Minimal stand-in for Scene that counts CDL lookups.'''
+	def __init__(self):
+		self.lookups = []
+		self._agentSpecs = {}
+		
+	def resolvePath(self, path):
+		return "/root/%s" % path
+	
+	def agentSpec(self, path):
+		self.lookups.append(path)
+		try:
+			return self._agentSpecs[path]
+		except KeyError:
+			agentSpec = AgentSpec.AgentSpec()
+			for name in [ "height", "shirt" ]:
+				variable = AgentSpec.Variable()
+				variable.name = name
+				variable.default = 1.0
+				agentSpec.variables[name] = variable
+			self._agentSpecs[path] = agentSpec
+			return agentSpec
+
+class TestCallsheetReader(unittest.TestCase):
+	'''Bulk callsheet loading.'''
+	def setUp(self):
+		pass
+	
+	def tearDown(self):
+		pass
+	
+	def testLoad(self):
+		'''	Placements and variables are stored by column.'''
+		sheet = CallsheetReader.load(StringIO(kCallsheet))
+		self.assertEqual(4, len(sheet))
+		self.assertEqual([1, 2, 7, 9], sheet.ids.tolist())
+		self.assertEqual(["man_1", "man_2", "woman_7", "man_9"], sheet.names)
+		self.assertEqual(["man.cdl", "woman.cdl"], sheet.cdlFiles)
+		self.assertEqual([0, 0, 1, 0], sheet.cdls.tolist())
+		self.assertEqual(4 * 16, len(sheet.placements))
+		self.assertEqual([30.0, 0.0, 5.0, 1.0], sheet.placement(2)[12:])
+		(rows, values) = sheet.variables["shirt"]
+		self.assertEqual([0, 3], rows.tolist())
+		self.assertEqual([2.0, 1.0], values.tolist())
+	
+	def testSelection(self):
+		'''	Agents outside the selection are skipped.'''
+		selectionGroup = Selection.SelectionGroup()
+		selectionGroup.addAnonymousSelection(["2-7"])
+		sheet = CallsheetReader.load(StringIO(kCallsheet), selectionGroup)
+		self.assertEqual([2, 7], sheet.ids.tolist())
+		self.assertEqual(["height"], sheet.variables.keys())
+		self.assertEqual([20.0, 0.0, 5.0, 1.0], sheet.placement(0)[12:])
+
+	def testRead(self):
+		'''	Load the callsheet into a Sim.'''
+		scene = _Scene()
+		sim = Sim.Sim(scene, "", "", StringIO(kCallsheet), range="1-8")
+		self.assertEqual(["/root/man.cdl", "/root/woman.cdl"], scene.lookups)
+		agents = dict([ (agent.id, agent) for agent in sim.agents() ])
+		self.assertEqual([1, 2, 7], sorted(agents.keys()))
+		self.assertAlmostEqual(1.1, agents[1].variableValue("height"))
+		self.assertEqual(2, agents[1].variableValue("shirt", asInt=True))
+		self.assertEqual([10.0, 0.0, 5.0, 1.0], agents[1].placement[12:])
+		table = sim.variableTable(agents[1].agentSpec)
+		self.assertEqual([1, 2], table.ids.tolist())
+		self.assertEqual([1.1, 0.9], table.column("height").tolist())
+		
+suite = unittest.TestLoader().loadTestsFromTestCase(TestCallsheetReader)
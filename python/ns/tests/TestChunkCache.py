@@ -0,0 +1,89 @@
+# The MIT License
+#	
+# Copyright (c) 2008 James Piechota
+#	
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import sys
+import os
+import os.path
+import shutil
+import tempfile
+import unittest
+
+import ns.bridge.io.ChunkCache as ChunkCache
+
+class TestChunkCache(unittest.TestCase):
+	'''Storing chunk face groups on disk between imports.'''
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.objFile = self._write("mesh.obj", "v 0 0 0\nv 1 0 0\nv 0 1 0\nf 1 2 3\n")
+		self.weightsFile = self._write("mesh.w", "0 0:1.0\n1 1:1.0\n2 1:1.0\n")
+		
+	def tearDown(self):
+		shutil.rmtree(self.directory)
+	
+	def _write(self, name, contents):
+		path = os.path.join(self.directory, name)
+		fileHandle = open(path, "w")
+		try:
+			fileHandle.write(contents)
+		finally:
+			fileHandle.close()
+		return path
+	
+	def testRoundTrip(self):
+		'''	Face groups read back as they were saved.'''
+		cache = ChunkCache.ChunkCache(os.path.join(self.directory, "cache"))
+		key = ChunkCache.key(self.objFile, self.weightsFile, [ "root", "spine" ])
+		faceGroups = [ [ 0, 1, 2, 7 ], [], [ 3, 4, 5, 6, 8 ] ]
+		self.assertEqual(None, cache.load(key, 3))
+		cache.save(key, faceGroups)
+		self.assertEqual(faceGroups, cache.load(key, 3))
+	
+	def testKey(self):
+		'''	The key changes with file contents and deformers.'''
+		key = ChunkCache.key(self.objFile, self.weightsFile, [ "root", "spine" ])
+		self.assertEqual(key, ChunkCache.key(self.objFile, self.weightsFile, [ "root", "spine" ]))
+		self.assertNotEqual(key, ChunkCache.key(self.objFile, self.weightsFile, [ "spine", "root" ]))
+		
+		# An edit that keeps the size, made later in the same session
+		modified = os.stat(self.weightsFile).st_mtime + 10
+		self._write("mesh.w", "0 0:1.0\n1 1:1.0\n2 0:1.0\n")
+		os.utime(self.weightsFile, (modified, modified))
+		self.assertNotEqual(key, ChunkCache.key(self.objFile, self.weightsFile, [ "root", "spine" ]))
+	
+	def testMissingFile(self):
+		'''	Files that can't be read give no key, and no caching.'''
+		key = ChunkCache.key(os.path.join(self.directory, "missing.obj"), self.weightsFile, [ "root" ])
+		self.assertEqual("", key)
+		cache = ChunkCache.ChunkCache(os.path.join(self.directory, "cache"))
+		cache.save(key, [ [ 0 ] ])
+		self.assertEqual(None, cache.load(key, 1))
+		self.failIf(os.path.exists(os.path.join(self.directory, "cache")))
+	
+	def testMismatch(self):
+		'''	Corrupt or mismatched cache files are ignored.'''
+		cache = ChunkCache.ChunkCache(self.directory)
+		cache.save("mismatch", [ [ 0 ], [], [], [ 1 ] ])
+		self.assertEqual(None, cache.load("mismatch", 2))
+		self._write("corrupt.chunks", "0 1-x\n")
+		self.assertEqual(None, cache.load("corrupt", 2))
+		
+suite = unittest.TestLoader().loadTestsFromTestCase(TestChunkCache)
@@ -0,0 +1,125 @@
+# The MIT License
+#	
+# Copyright (c) 2008 James Piechota
+#	
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import sys
+import os
+import unittest
+
+import ns.py.Errors as Errors
+import ns.tests.TestUtil as TestUtil
+import ns.bridge.data.Frustum as Frustum
+
+kIdentity = [ 1.0, 0.0, 0.0, 0.0,
+			  0.0, 1.0, 0.0, 0.0,
+			  0.0, 0.0, 1.0, 0.0,
+			  0.0, 0.0, 0.0, 1.0 ]
+
+def _matrix(tx, ty, tz):
+	'''Unrotated world matrix translated by (tx, ty, tz).'''
+	matrix = list(kIdentity)
+	matrix[12:15] = [ tx, ty, tz ]
+	return matrix
+
+class TestFrustum(unittest.TestCase):
+	'''Camera frustum tests and culling of agents.'''
+	def setUp(self):
+		# 90 degree horizontal and vertical view down -Z from the origin
+		self.camera = Frustum.Camera(kIdentity, 90.0, 1.0, 1.0, 100.0)
+
+		self.agentSpec = TestUtil.rootAgentSpec()
+	
+	def tearDown(self):
+		pass
+	
+	def _agent(self, id, path):
+		return TestUtil.rootPathAgent(self.agentSpec, id, path)
+	
+	def testPoints(self):
+		frustum = Frustum.Frustum(self.camera)
+		self.failUnless(frustum.containsPoint((0.0, 0.0, -10.0)))
+		self.failUnless(frustum.containsPoint((9.0, -9.0, -10.0)))
+		self.failIf(frustum.containsPoint((11.0, 0.0, -10.0)))
+		self.failIf(frustum.containsPoint((0.0, 0.0, 10.0)))
+		self.failIf(frustum.containsPoint((0.0, 0.0, -0.5)))
+		self.failIf(frustum.containsPoint((0.0, 0.0, -101.0)))
+	
+	def testPadding(self):
+		'''	Padding pushes every plane outwards.'''
+		frustum = Frustum.Frustum(self.camera, padding=1.0)
+		self.failUnless(frustum.containsPoint((11.0, 0.0, -10.0)))
+		self.failUnless(frustum.containsPoint((0.0, 0.0, -100.9)))
+		self.failIf(frustum.containsPoint((12.0, 0.0, -10.0)))
+	
+	def testTransform(self):
+		'''	The camera's world matrix moves and turns the frustum.'''
+		# Turned 90 degrees about Y, so looking down -X, from (5, 0, 0)
+		matrix = [ 0.0, 0.0, -1.0, 0.0,
+				   0.0, 1.0, 0.0, 0.0,
+				   1.0, 0.0, 0.0, 0.0,
+				   5.0, 0.0, 0.0, 1.0 ]
+		frustum = Frustum.Frustum(Frustum.Camera(matrix, 90.0, 2.0, 1.0, 100.0))
+		self.failUnless(frustum.containsPoint((-5.0, 0.0, 0.0)))
+		self.failUnless(frustum.containsPoint((-5.0, 0.0, 9.0)))
+		# The aspect ratio narrows the vertical view
+		self.failIf(frustum.containsPoint((-5.0, 9.0, 0.0)))
+		self.failIf(frustum.containsPoint((10.0, 0.0, 0.0)))
+	
+	def testBoxes(self):
+		frustum = Frustum.Frustum(self.camera)
+		self.failUnless(frustum.intersectsBox((-1.0, -1.0, -20.0), (1.0, 1.0, -10.0)))
+		self.failUnless(frustum.containsBox((-1.0, -1.0, -20.0), (1.0, 1.0, -10.0)))
+		# Crosses the view from left to right
+		self.failUnless(frustum.intersectsBox((-50.0, 0.0, -10.0), (50.0, 0.0, -10.0)))
+		self.failIf(frustum.containsBox((-50.0, 0.0, -10.0), (50.0, 0.0, -10.0)))
+		self.failIf(frustum.intersectsBox((-5.0, 0.0, 1.0), (5.0, 0.0, 10.0)))
+	
+	def testCull(self):
+		agents = [ self._agent(1, [ (0.0, 0.0, -10.0) ] * 3),
+				   # Behind the camera throughout
+				   self._agent(2, [ (0.0, 0.0, 10.0) ] * 3),
+				   # Walks into view on the last frame
+				   self._agent(3, [ (30.0, 0.0, -10.0), (20.0, 0.0, -10.0), (5.0, 0.0, -10.0) ]),
+				   # Passes by the corner of the view, never inside it
+				   self._agent(4, [ (20.0, 0.0, -2.0), (20.0, 0.0, -5.0), (3.0, 0.0, 5.0) ]),
+				   # Just outside the view on every frame
+				   self._agent(5, [ (11.0, 0.0, -10.0) ] * 3) ]
+		self.assertEqual([1, 3], Frustum.cull(agents, self.camera, 1, 3))
+		self.assertEqual([1], Frustum.cull(agents, self.camera, 1, 2))
+		self.assertEqual([1, 3, 5], Frustum.cull(agents, self.camera, 1, 3, padding=2.0))
+		selection = Frustum.selection(agents, self.camera, 1, 3)
+		self.failUnless(selection.contains(3))
+		self.failIf(selection.contains(2))
+	
+	def testAnimatedCamera(self):
+		'''	A moving camera is tested against each frame's position.'''
+		agents = [ self._agent(1, [ (0.0, 0.0, -10.0) ] * 3),
+				   self._agent(2, [ (0.0, 0.0, -210.0) ] * 3) ]
+		matrices = { 1: _matrix(0.0, 0.0, 500.0),
+					 2: _matrix(0.0, 0.0, 500.0),
+					 3: _matrix(0.0, 0.0, -150.0) }
+		camera = Frustum.Camera(kIdentity, 90.0, 1.0, 1.0, 100.0, matrices)
+		self.assertEqual([2], Frustum.cull(agents, camera, 1, 3))
+		self.assertEqual([], Frustum.cull(agents, camera, 1, 2))
+	
+	def testBadClipping(self):
+		self.assertRaises(Errors.BadArgumentError, Frustum.Camera, kIdentity, 90.0, 1.0, 10.0, 5.0)
+		
+suite = unittest.TestLoader().loadTestsFromTestCase(TestFrustum)
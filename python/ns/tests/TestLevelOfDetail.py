@@ -0,0 +1,91 @@
+# The MIT License
+#	
+# Copyright (c) 2008 James Piechota
+#	
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import sys
+import os
+import unittest
+
+import ns.py.Errors as Errors
+import ns.tests.TestUtil as TestUtil
+import ns.bridge.data.Frustum as Frustum
+import ns.bridge.data.LevelOfDetail as LevelOfDetail
+
+kIdentity = [ 1.0, 0.0, 0.0, 0.0,
+			  0.0, 1.0, 0.0, 0.0,
+			  0.0, 0.0, 1.0, 0.0,
+			  0.0, 0.0, 0.0, 1.0 ]
+
+class TestLevelOfDetail(unittest.TestCase):
+	'''Assigning level of detail tiers by distance to the camera.'''
+	def setUp(self):
+		self.camera = Frustum.Camera(kIdentity, 54.0, 1.5, 0.1, 10000.0)
+		self.planner = LevelOfDetail.Planner(self.camera, [ 20.0, 60.0, 150.0 ])
+
+		self.agentSpec = TestUtil.rootAgentSpec()
+	
+	def tearDown(self):
+		pass
+	
+	def _agent(self, id, path):
+		return TestUtil.rootPathAgent(self.agentSpec, id, path)
+	
+	def testTier(self):
+		eTier = LevelOfDetail.eTier
+		self.assertEqual(eTier.full, self.planner.tier(0.0))
+		self.assertEqual(eTier.full, self.planner.tier(20.0))
+		self.assertEqual(eTier.chunks, self.planner.tier(20.5))
+		self.assertEqual(eTier.segments, self.planner.tier(100.0))
+		self.assertEqual(eTier.proxy, self.planner.tier(200.0))
+	
+	def testSkippedTiers(self):
+		'''	With fewer distances far agents go straight to proxies.'''
+		planner = LevelOfDetail.Planner(self.camera, [ 20.0 ])
+		self.assertEqual(LevelOfDetail.eTier.full, planner.tier(10.0))
+		self.assertEqual(LevelOfDetail.eTier.proxy, planner.tier(30.0))
+	
+	def testPlan(self):
+		'''	Agents are planned at the closest they come to the camera.'''
+		agents = [ self._agent(1, [ (0.0, 0.0, -10.0) ] * 3),
+				   self._agent(2, [ (0.0, 0.0, -300.0), (0.0, 0.0, -40.0), (0.0, 0.0, -300.0) ]),
+				   self._agent(3, [ (80.0, 0.0, -80.0) ] * 3),
+				   self._agent(4, [ (0.0, 0.0, -500.0) ] * 3) ]
+		eTier = LevelOfDetail.eTier
+		tiers = self.planner.plan(agents, 1, 3)
+		self.assertEqual({ 1: eTier.full, 2: eTier.chunks, 3: eTier.segments, 4: eTier.proxy }, tiers)
+		self.assertEqual([1, 1, 1, 1], LevelOfDetail.counts(tiers))
+		self.assertEqual(eTier.proxy, self.planner.plan(agents, 3, 3)[2])
+	
+	def testAnimatedCamera(self):
+		'''	A moving camera is measured from its position on each frame.'''
+		matrices = { 1: list(kIdentity), 2: list(kIdentity) }
+		matrices[2][12:15] = [ 0.0, 0.0, -290.0 ]
+		camera = Frustum.Camera(kIdentity, 54.0, 1.5, 0.1, 10000.0, matrices)
+		planner = LevelOfDetail.Planner(camera, [ 20.0, 60.0, 150.0 ])
+		agent = self._agent(1, [ (0.0, 0.0, -300.0) ] * 2)
+		self.assertAlmostEqual(10.0, planner.distance(agent, 1, 2))
+		self.assertEqual(LevelOfDetail.eTier.proxy, planner.plan([ agent ], 1, 1)[1])
+	
+	def testBadDistances(self):
+		self.assertRaises(Errors.BadArgumentError, LevelOfDetail.Planner, self.camera, [])
+		self.assertRaises(Errors.BadArgumentError, LevelOfDetail.Planner, self.camera, [ 60.0, 20.0 ])
+		self.assertRaises(Errors.BadArgumentError, LevelOfDetail.Planner, self.camera, [ 1.0, 2.0, 3.0, 4.0 ])
+		
+suite = unittest.TestLoader().loadTestsFromTestCase(TestLevelOfDetail)
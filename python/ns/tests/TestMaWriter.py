@@ -0,0 +1,116 @@
+# The MIT License
+#	
+# Copyright (c) 2008 James Piechota
+#	
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import sys
+import os
+import os.path
+import unittest
+from StringIO import StringIO
+
+import ns.bridge.data.Agent as Agent
+import ns.bridge.data.AgentSpec as AgentSpec
+import ns.bridge.data.SimData as SimData
+import ns.bridge.io.MaWriter as MaWriter
+
+kGoldenFile = os.path.join(os.path.dirname(os.path.abspath(__file__)), "TestMaWriter.ma")
+
+class TestMaWriter(unittest.TestCase):
+	'''Writing skeletons and baked animation to Maya ASCII without Maya.'''
+	def setUp(self):
+		self.agentSpec = AgentSpec.AgentSpec()
+		self.agentSpec.setCdlFile("/crowd/man.cdl")
+		self.agentSpec.agentType = "man"
+		self.agentSpec.scaleVar = "height"
+		self.agentSpec.cdlStructure = [ "object", "variable", "scale_var", "segment" ]
+		self.agentSpec.leftovers["options"] = 'option "walk"\n'
+		variable = AgentSpec.Variable()
+		variable.name = "height"
+		variable.min = 1.0
+		variable.max = 3.0
+		variable.default = 2.0
+		self.agentSpec.variables[variable.name] = variable
+		
+		pelvis = AgentSpec.Joint(self.agentSpec)
+		pelvis.name = "pelvis"
+		pelvis.translate = [ 0.0, 10.0, 0.0 ]
+		pelvis.order = [ AgentSpec.kTX, AgentSpec.kTY, AgentSpec.kTZ,
+						 AgentSpec.kRZ, AgentSpec.kRX, AgentSpec.kRY ]
+		spine = AgentSpec.Joint(self.agentSpec)
+		spine.name = "spine"
+		spine.parent = "pelvis"
+		spine.translate = [ 0.0, 2.0, 0.0 ]
+		spine.dof = [ False, False, False, True, False, True ]
+		# Rotated 90 degrees about z
+		spine.transform = [ 0.0, 1.0, 0.0, 0.0,
+							-1.0, 0.0, 0.0, 0.0,
+							0.0, 0.0, 1.0, 0.0,
+							0.5, 0.0, 0.0, 1.0 ]
+		spine.leftovers = "\tinertia 1 1 1\n"
+		for joint in [ pelvis, spine ]:
+			self.agentSpec.joints[joint.name] = joint
+			self.agentSpec.jointData.append(joint)
+	
+	def tearDown(self):
+		pass
+	
+	def _agent(self, id, height):
+		agent = Agent.Agent()
+		agent.name = "man_%d" % id
+		agent.id = id
+		agent.agentSpec = self.agentSpec
+		agent.setVariableValue("height", height)
+		agentSim = SimData.Agent(agent.name)
+		for frame in range(3):
+			agentSim.addSample("pelvis", frame, [ float(frame), 0.0, 0.0, 0.0, 0.0, 45.0 * frame ])
+			agentSim.addSample("spine", frame, [ -10.0 * frame, 0.0 ])
+		agent.setSimData(agentSim)
+		return agent
+	
+	def testGolden(self):
+		'''	Output matches the golden file.'''
+		fileHandle = StringIO()
+		MaWriter.write(fileHandle, [ self._agent(1, 1.0), self._agent(2, 2.0) ], name="crowd.ma")
+		golden = open(kGoldenFile, "r")
+		try:
+			self.assertEqual(golden.read(), fileHandle.getvalue())
+		finally:
+			golden.close()
+	
+	def testFrameStep(self):
+		'''	Curves are only keyed every frameStep frames.'''
+		fileHandle = StringIO()
+		MaWriter.write(fileHandle, [ self._agent(1, 1.0) ], frameStep=2)
+		self.failUnless('setAttr -s 2 ".ktv[0:1]"  0 0 2 2;' in fileHandle.getvalue())
+		self.failIf('".ktv[0:2]"' in fileHandle.getvalue())
+	
+	def testJointOrient(self):
+		'''	Rest transforms become joint orients.'''
+		transform = [ 0.0, 1.0, 0.0, 0.0,
+					  -1.0, 0.0, 0.0, 0.0,
+					  0.0, 0.0, 1.0, 0.0,
+					  0.0, 0.0, 0.0, 1.0 ]
+		orient = MaWriter.jointOrient(transform)
+		for (expected, actual) in zip([ 0.0, 0.0, 90.0 ], orient):
+			self.assertAlmostEqual(expected, actual)
+		self.assertEqual(2, MaWriter.rotateOrder(self.agentSpec.joints["pelvis"]))
+	
+suite = unittest.TestLoader().loadTestsFromTestCase(TestMaWriter)
@@ -0,0 +1,108 @@
+# The MIT License
+#	
+# Copyright (c) 2008 James Piechota
+#	
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import sys
+import os
+import os.path
+import shutil
+import tempfile
+import unittest
+
+import ns.py.Errors as Errors
+import ns.py.Manifest as Manifest
+import ns.py.Scheduler as Scheduler
+
+class TestManifest(unittest.TestCase):
+	'''Keeping track of the jobs of a batch on disk.'''
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.fileName = os.path.join(self.directory, "batch.manifest")
+	
+	def tearDown(self):
+		shutil.rmtree(self.directory)
+	
+	def _record(self, name):
+		record = Manifest.Record(name)
+		record.outputFile = os.path.join(self.directory, "%s.ma" % name)
+		record.logFile = os.path.join(self.directory, "%s.log" % name)
+		return record
+	
+	def testRoundTrip(self):
+		'''	Records read back as they were written.'''
+		manifest = Manifest.Manifest()
+		manifest.params["flags"] = ' -sd "/sims/shot 1" -st amc'
+		first = manifest.add(self._record("shot_0"))
+		first.params["ids"] = "1-4 9"
+		first.status = Manifest.kDone
+		first.attempts = 2
+		first.startTime = 1234.5
+		first.endTime = 1240.25
+		first.hash = "0123abcd"
+		manifest.add(self._record("shot_1"))
+		Manifest.write(self.fileName, manifest)
+		Manifest.write(self.fileName, manifest)
+		self.assertEqual([ os.path.basename(self.fileName) ], os.listdir(os.path.dirname(self.fileName)))
+		
+		other = Manifest.read(self.fileName)
+		self.assertEqual(manifest.params, other.params)
+		self.assertEqual([ "shot_0", "shot_1" ], [ record.name for record in other.records ])
+		for record in manifest.records:
+			self.assertEqual(record.__dict__, other.record(record.name).__dict__)
+		self.assertEqual(5.75, other.record("shot_0").elapsed())
+		self.assertRaises(KeyError, other.record, "shot_2")
+	
+	def testComplete(self):
+		'''	A job is complete only if its output is still what it wrote.'''
+		record = self._record("shot_0")
+		job = Scheduler.Job("shot_0", [ sys.executable, "-c", "open(%r, 'w').write('scene')" % record.outputFile ])
+		job.start()
+		while not job.poll():
+			pass
+		record.update(job)
+		self.assertEqual(Manifest.kDone, record.status)
+		self.assertEqual(1, record.attempts)
+		self.failUnless(record.complete())
+		
+		fileHandle = open(record.outputFile, "w")
+		fileHandle.write("changed")
+		fileHandle.close()
+		self.failIf(record.complete())
+		os.remove(record.outputFile)
+		self.failIf(record.complete())
+		
+		job = Scheduler.Job("shot_0", [ sys.executable, "-c", "import sys; sys.exit(1)" ])
+		job.start()
+		while not job.poll():
+			pass
+		record.update(job)
+		self.assertEqual(Manifest.kFailed, record.status)
+		self.assertEqual(2, record.attempts)
+		self.failIf(record.complete())
+	
+	def testBadFile(self):
+		'''	Unreadable values are reported with their line.'''
+		fileHandle = open(self.fileName, "w")
+		fileHandle.write("job shot_0\n\tattempts many\n")
+		fileHandle.close()
+		self.assertRaises(Errors.BadArgumentError, Manifest.read, self.fileName)
+	
+suite = unittest.TestLoader().loadTestsFromTestCase(TestManifest)
@@ -0,0 +1,175 @@
+# The MIT License
+#	
+# Copyright (c) 2008 James Piechota
+#	
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import sys
+import os
+import math
+import unittest
+
+import ns.py.Errors as Errors
+import ns.tests.TestUtil as TestUtil
+TestUtil.importMaya()
+
+import ns.maya.msv.MayaAnimCurves as MayaAnimCurves
+
+class _Time(object):
+	def __init__(self, value=0, unit=None):
+		self.value = value
+	
+	def uiUnit():
+		return None
+	uiUnit = staticmethod(uiUnit)
+
+class _Distance(object):
+	'''Stand-in for MDistance, 'scale' centimetres per UI unit.'''
+	scale = 1.0
+	
+	def uiToInternal(value):
+		return value * _Distance.scale
+	uiToInternal = staticmethod(uiToInternal)
+
+class _Plug(object):
+	def __init__(self):
+		self.name = ""
+
+class _SelectionList(object):
+	def __init__(self):
+		self.names = []
+	
+	def clear(self):
+		self.names = []
+	
+	def add(self, name):
+		self.names.append(name)
+	
+	def getPlug(self, index, plug):
+		plug.name = self.names[index]
+
+class _Modifier(object):
+	instances = []
+	
+	def __init__(self):
+		self.connections = []
+		self.done = 0
+		_Modifier.instances.append(self)
+	
+	def doIt(self):
+		self.done += 1
+
+class _AnimCurveFn(object):
+	'''Stand-in for MFnAnimCurve, keeps every curve created.'''
+	kTangentLinear = 2
+	curves = []
+	
+	def create(self, plug, modifier):
+		modifier.connections.append(plug.name)
+		self.plug = plug.name
+		self.keyCalls = 0
+		_AnimCurveFn.curves.append(self)
+	
+	def addKeys(self, times, values, inTangent, outTangent):
+		self.keyCalls += 1
+		self.times = times
+		self.values = list(values)
+		self.tangents = (inTangent, outTangent)
+	
+	def setName(self, name):
+		self.name = name
+		return name
+
+class _OpenMayaAnim(object):
+	MFnAnimCurve = _AnimCurveFn
+
+kStandIns = { "MTime": _Time,
+			  "MDistance": _Distance,
+			  "MTimeArray": TestUtil.ApiArray,
+			  "MDoubleArray": TestUtil.ApiArray,
+			  "MSelectionList": _SelectionList,
+			  "MPlug": _Plug,
+			  "MDGModifier": _Modifier,
+			  "OpenMayaAnim": _OpenMayaAnim }
+
+class TestMayaAnimCurves(unittest.TestCase):
+	'''Anim curves built from arrays against stand-ins for the Maya API.'''
+	def setUp(self):
+		self.previous = {}
+		for (name, standIn) in kStandIns.items():
+			self.previous[name] = getattr(MayaAnimCurves, name, None)
+			setattr(MayaAnimCurves, name, standIn)
+		_Modifier.instances = []
+		_AnimCurveFn.curves = []
+		_Distance.scale = 1.0
+	
+	def tearDown(self):
+		for (name, value) in self.previous.items():
+			setattr(MayaAnimCurves, name, value)
+	
+	def testAngular(self):
+		'''	Rotations are given in degrees and keyed in radians.'''
+		builder = MayaAnimCurves.CurveBuilder()
+		builder.add("|man|pelvis", "tx", [ 1, 2 ], [ 1.0, 2.0 ])
+		builder.add("|man|pelvis", "rx", [ 1, 2 ], [ 90.0, -180.0 ], angular=True)
+		self.assertEqual([ 1.0, 2.0 ], list(builder.channels[0][3]))
+		self.assertAlmostEqual(math.pi / 2.0, builder.channels[1][3][0])
+		self.assertAlmostEqual(-math.pi, builder.channels[1][3][1])
+	
+	def testLinear(self):
+		'''	Translations are given in UI units and keyed in centimetres.'''
+		_Distance.scale = 2.54
+		builder = MayaAnimCurves.CurveBuilder()
+		builder.add("|man|pelvis", "tx", [ 1, 2 ], [ 1.0, -2.0 ])
+		builder.add("|man|pelvis", "rx", [ 1, 2 ], [ 90.0, 0.0 ], angular=True)
+		self.assertAlmostEqual(2.54, builder.channels[0][3][0])
+		self.assertAlmostEqual(-5.08, builder.channels[0][3][1])
+		self.assertAlmostEqual(math.pi / 2.0, builder.channels[1][3][0])
+	
+	def testMismatch(self):
+		builder = MayaAnimCurves.CurveBuilder()
+		self.assertRaises(Errors.BadArgumentError, builder.add, "pelvis", "tx", [ 1, 2, 3 ], [ 0.0 ])
+	
+	def testBuild(self):
+		'''	Every channel of an agent is built with a single modifier.'''
+		builder = MayaAnimCurves.CurveBuilder()
+		times = range(1, 101, 2)
+		for joint in [ "|man|pelvis", "|man|pelvis|spine" ]:
+			for channel in [ "tx", "ty", "tz" ]:
+				builder.add(joint, channel, times, [ float(t) for t in times ])
+		self.assertEqual(6, len(builder))
+		
+		names = builder.build()
+		self.assertEqual(0, len(builder))
+		self.assertEqual(1, len(_Modifier.instances))
+		self.assertEqual(1, _Modifier.instances[0].done)
+		self.assertEqual(6, len(_Modifier.instances[0].connections))
+		self.assertEqual("spine_tz", names[-1])
+		
+		curves = _AnimCurveFn.curves
+		self.assertEqual(6, len(curves))
+		self.assertEqual("|man|pelvis.tx", curves[0].plug)
+		for curve in curves:
+			self.assertEqual(1, curve.keyCalls)
+			self.assertEqual(times, [ time.value for time in curve.times ])
+			self.assertEqual([ float(t) for t in times ], curve.values)
+			self.assertEqual((2, 2), curve.tangents)
+			# Curves on the same frames share their times
+			self.failUnless(curve.times is curves[0].times)
+		
+suite = unittest.TestLoader().loadTestsFromTestCase(TestMayaAnimCurves)
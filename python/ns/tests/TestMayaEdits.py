@@ -0,0 +1,103 @@
+# The MIT License
+#	
+# Copyright (c) 2008 James Piechota
+#	
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import sys
+import os
+import unittest
+
+import ns.tests.TestUtil as TestUtil
+TestUtil.importMaya()
+
+import ns.bridge.data.Agent as Agent
+import ns.bridge.data.AgentSpec as AgentSpec
+import ns.maya.msv.MayaAgent as MayaAgent
+import ns.maya.msv.MayaFactory as MayaFactory
+import ns.maya.msv.MayaUtil as MayaUtil
+
+kModules = [ MayaAgent, MayaFactory, MayaUtil ]
+
+class TestMayaEdits(unittest.TestCase):
+	'''Shading, set and display layer edits queued by the MayaFactory and
+	   made in bulk.'''
+	def setUp(self):
+		self.cmds = TestUtil.RecordedCmds()
+		self.previous = TestUtil.useCmds(kModules, self.cmds)
+		self.factory = MayaFactory.MayaFactory()
+		
+		self.agentSpec = AgentSpec.AgentSpec()
+		self.agentSpec.agentType = "man"
+		joint = AgentSpec.Joint(self.agentSpec)
+		joint.name = "root"
+		joint.parent = ""
+		joint.translate = [ 0.0, 1.0, 0.0 ]
+		self.agentSpec.joints[joint.name] = joint
+		self.agentSpec.jointData.append(joint)
+	
+	def tearDown(self):
+		TestUtil.restoreCmds(kModules, self.previous)
+	
+	def _build(self, id):
+		agent = Agent.Agent()
+		agent.name = "man_%d" % id
+		agent.id = id
+		agent.agentSpec = self.agentSpec
+		mayaAgent = MayaAgent.MayaAgent(agent, self.factory)
+		mayaAgent._buildSkeleton()
+		return mayaAgent
+	
+	def testLayers(self):
+		'''	One layer edit for all of the agents.'''
+		mayaAgents = [ self._build(id) for id in range(5) ]
+		self.cmds.reset()
+		for mayaAgent in mayaAgents:
+			mayaAgent.setupDisplayLayers()
+		self.assertEqual(0, self.cmds.count())
+		
+		self.factory.flushEdits()
+		self.assertEqual(1, self.cmds.count("editDisplayLayerMembers"))
+		[ ( command, args, kwargs ) ] = [ call for call in self.cmds.calls if "editDisplayLayerMembers" == call[0] ]
+		self.assertEqual([ mayaAgent.rootJoint.name for mayaAgent in mayaAgents ], args[1])
+		self.assertEqual(4, self.factory.editsSaved)
+	
+	def testShading(self):
+		'''	One assignment per shading group, in queued order.'''
+		self.factory.assignShadingGroup("|a", "skinSG")
+		self.factory.assignShadingGroup([ "|b", "|c" ], "clothSG")
+		self.factory.assignShadingGroup("|d", "skinSG")
+		self.factory.assignShadingGroup([], "hairSG")
+		self.factory.addToSet("|man_1", "massive_agents")
+		self.factory.addToSet("|man_2", "massive_agents")
+		self.factory.flushEdits()
+		
+		self.assertEqual([ ( "sets", ( [ "|a", "|d" ], ), { "edit": True, "forceElement": "skinSG" } ),
+						   ( "sets", ( [ "|b", "|c" ], ), { "edit": True, "forceElement": "clothSG" } ),
+						   ( "sets", ( [ "|man_1", "|man_2" ], ), { "add": "massive_agents" } ) ],
+						 self.cmds.calls)
+		self.assertEqual(2, self.factory.editsSaved)
+		
+		# Flushing again has nothing left to do
+		self.cmds.reset()
+		self.factory.flushEdits()
+		self.assertEqual(0, self.cmds.count())
+		self.assertEqual(2, self.factory.editsSaved)
+	
+suite = unittest.TestLoader().loadTestsFromTestCase(TestMayaEdits)
@@ -0,0 +1,131 @@
+# The MIT License
+#	
+# Copyright (c) 2008 James Piechota
+#	
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import sys
+import os
+import unittest
+
+import ns.tests.TestUtil as TestUtil
+TestUtil.importMaya()
+
+import ns.bridge.data.Agent as Agent
+import ns.bridge.data.AgentSpec as AgentSpec
+import ns.bridge.data.LevelOfDetail as LevelOfDetail
+import ns.maya.msv.MayaAgent as MayaAgent
+import ns.maya.msv.MayaSkin as MayaSkin
+import ns.maya.msv.MayaFactory as MayaFactory
+import ns.maya.msv.MayaUtil as MayaUtil
+
+kModules = [ MayaAgent, MayaFactory, MayaUtil ]
+
+class TestMayaSkeleton(unittest.TestCase):
+	'''Skeletons duplicated from a master per agent type, counted against
+	   a recorded stand-in for maya.cmds.'''
+	def setUp(self):
+		self.cmds = TestUtil.RecordedCmds()
+		self.previous = TestUtil.useCmds(kModules, self.cmds)
+		self.factory = MayaFactory.MayaFactory()
+		
+		# A chain of joints: root, joint1, joint2 ...
+		self.agentSpec = AgentSpec.AgentSpec()
+		self.agentSpec.agentType = "man"
+		parent = ""
+		for i in range(8):
+			joint = AgentSpec.Joint(self.agentSpec)
+			joint.name = "joint%d" % i
+			joint.parent = parent
+			joint.translate = [ 0.0, 1.0, 0.0 ]
+			self.agentSpec.joints[joint.name] = joint
+			self.agentSpec.jointData.append(joint)
+			parent = joint.name
+	
+	def tearDown(self):
+		TestUtil.restoreCmds(kModules, self.previous)
+	
+	def _build(self, id):
+		agent = Agent.Agent()
+		agent.name = "man_%d" % id
+		agent.id = id
+		agent.agentSpec = self.agentSpec
+		mayaAgent = MayaAgent.MayaAgent(agent, self.factory)
+		mayaAgent._buildSkeleton()
+		return mayaAgent
+	
+	def testCommandCount(self):
+		'''	Only the first agent of a type builds joint by joint.'''
+		self._build(1)
+		first = self.cmds.count()
+		self.failUnless(self.cmds.count("createNode") >= len(self.agentSpec.jointData))
+		
+		self.cmds.reset()
+		self._build(2)
+		self.assertEqual(0, self.cmds.count("createNode"))
+		self.assertEqual(0, self.cmds.count("makeIdentity"))
+		self.assertEqual(1, self.cmds.count("duplicate"))
+		duplicated = self.cmds.count()
+		self.failUnless(duplicated * 10 < first)
+		
+		# The cost per agent doesn't grow with the number of joints
+		self.cmds.reset()
+		self._build(3)
+		self.assertEqual(duplicated, self.cmds.count())
+	
+	def testJointPaths(self):
+		'''	Duplicated joints are found under their own agent.'''
+		first = self._build(1)
+		second = self._build(2)
+		self.assertEqual(len(first.mayaJoints), len(second.mayaJoints))
+		self.failUnless(second.rootJoint is second.mayaJoint("joint0"))
+		for (name, mayaJoint) in second.mayaJoints.items():
+			self.failUnless(mayaJoint.name.startswith(second.skelGroup + "|"))
+			self.assertEqual([ mayaJoint.name ], self.cmds.ls(mayaJoint.name, long=True))
+			if mayaJoint is not second.rootJoint:
+				self.assertEqual(name, mayaJoint.name.split("|")[-1])
+			self.assertEqual(first.mayaJoint(name).channelOffsets, mayaJoint.channelOffsets)
+			self.failIf(mayaJoint.channelOffsets is first.mayaJoint(name).channelOffsets)
+	
+	def testTypes(self):
+		'''	Each agent type gets its own master.'''
+		self._build(1)
+		self.agentSpec.agentType = "woman"
+		self.cmds.reset()
+		self._build(2)
+		self.failUnless(self.cmds.count("createNode") >= len(self.agentSpec.jointData))
+		self.assertEqual(2, len(self.factory.skeletonMasters))
+	
+	def testTierOptions(self):
+		'''	Level of detail tiers never turn on geometry that is off.'''
+		eTier = LevelOfDetail.eTier
+		options = MayaAgent.Options()
+		options.skinType = MayaSkin.eSkinType.duplicate
+		self.assertEqual(MayaSkin.eSkinType.duplicate, MayaAgent.tierOptions(options, eTier.full).skinType)
+		self.assertEqual(MayaSkin.eSkinType.instance, MayaAgent.tierOptions(options, eTier.chunks).skinType)
+		self.failUnless(MayaAgent.tierOptions(options, eTier.chunks).loadGeometry)
+		self.failUnless(MayaAgent.tierOptions(options, eTier.segments).loadPrimitives)
+		
+		options.loadGeometry = False
+		for tier in [ eTier.full, eTier.chunks, eTier.segments, eTier.proxy ]:
+			self.failIf(MayaAgent.tierOptions(options, tier).loadGeometry)
+		self.failIf(MayaAgent.tierOptions(options, eTier.segments).loadPrimitives)
+		self.failUnless(MayaAgent.tierOptions(options, eTier.proxy).proxy)
+		self.failIf(options.proxy)
+		
+suite = unittest.TestLoader().loadTestsFromTestCase(TestMayaSkeleton)
@@ -0,0 +1,118 @@
+# The MIT License
+#	
+# Copyright (c) 2008 James Piechota
+#	
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import sys
+import os
+import unittest
+
+import ns.tests.TestUtil as TestUtil
+TestUtil.importMaya()
+
+import ns.maya.msv.MayaSkin as MayaSkin
+import ns.maya.msv.MayaFactory as MayaFactory
+
+class _SkinClusterFn(object):
+	'''Stand-in for MFnSkinCluster that keeps the weights it is given.'''
+	def __init__(self):
+		self.calls = 0
+		self.weightList = {}
+	
+	def setWeights(self, shapePath, components, influences, values, normalize):
+		self.calls += 1
+		numVertices = components.completeData
+		numInfluences = influences.length()
+		assert numVertices * numInfluences == values.length()
+		for vertex in range(numVertices):
+			for i in range(numInfluences):
+				self.weightList[(vertex, influences[i])] = values[vertex * numInfluences + i]
+	
+	def weight(self, vertex, influence):
+		return self.weightList.get((vertex, influence), 0.0)
+
+class _Geometry(object):
+	def __init__(self, file, weights):
+		self._file = file
+		self._weights = weights
+	
+	def file(self):
+		return self._file
+	
+	def weights(self):
+		return self._weights
+
+class TestMayaSkin(unittest.TestCase):
+	'''Skin weights packed for a single MFnSkinCluster.setWeights() call.'''
+	def setUp(self):
+		# 4 deformers, deformer 2 doesn't influence any vertex
+		self.weights = [ [ 1.0, 0.0, 0.0, 0.0 ],
+						 [ 0.5, 0.5, 0.0, 0.0 ],
+						 [ 0.0, 0.25, 0.0, 0.75 ],
+						 [ 0.0, 0.0, 0.0, 1.0 ],
+						 [ 0.2, 0.3 ] ]
+	
+	def tearDown(self):
+		pass
+	
+	def testPack(self):
+		packed = MayaSkin.PackedWeights(self.weights)
+		self.assertEqual(5, packed.numVertices)
+		self.assertEqual([0, 1, 3], packed.influences)
+		self.assertEqual(15, len(packed.values))
+		self.assertEqual(0.75, packed.weight(2, 3))
+		self.assertEqual(0.0, packed.weight(2, 2))
+		self.assertEqual(0.0, packed.weight(4, 3))
+	
+	def testApply(self):
+		'''	Every weight lands on the cluster in one call.'''
+		packed = MayaSkin.PackedWeights(self.weights)
+		fnCluster = _SkinClusterFn()
+		packed.apply(fnCluster, "|man|bodyShape")
+		self.assertEqual(1, fnCluster.calls)
+		for vertex in range(len(self.weights)):
+			for deformer in range(4):
+				expected = 0.0
+				if deformer < len(self.weights[vertex]):
+					expected = self.weights[vertex][deformer]
+				self.assertEqual(expected, fnCluster.weight(vertex, deformer))
+		self.failIf((0, 2) in fnCluster.weightList)
+	
+	def testShared(self):
+		'''	Weights are packed once per file and reused by every cluster.'''
+		factory = MayaFactory.MayaFactory()
+		body = _Geometry("body.obj", self.weights)
+		packed = factory.packedWeights(body)
+		self.failUnless(packed is factory.packedWeights(_Geometry("body.obj", self.weights)))
+		self.failIf(packed is factory.packedWeights(_Geometry("head.obj", self.weights)))
+		
+		first = _SkinClusterFn()
+		second = _SkinClusterFn()
+		packed.apply(first, "|man1|bodyShape")
+		arrays = packed._valueArray
+		packed.apply(second, "|man2|bodyShape")
+		self.failUnless(arrays is packed._valueArray)
+		self.assertEqual(first.weightList, second.weightList)
+	
+	def testNoWeights(self):
+		fnCluster = _SkinClusterFn()
+		MayaSkin.PackedWeights([]).apply(fnCluster, "|man|bodyShape")
+		self.assertEqual(0, fnCluster.calls)
+		
+suite = unittest.TestLoader().loadTestsFromTestCase(TestMayaSkin)
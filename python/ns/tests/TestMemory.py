@@ -0,0 +1,126 @@
+# The MIT License
+#	
+# Copyright (c) 2008 James Piechota
+#	
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import sys
+import os
+import os.path
+import shutil
+import tempfile
+import unittest
+
+import ns.py.Memory as Memory
+import ns.py.Json as Json
+import ns.bridge.data.AgentSpec as AgentSpec
+import ns.bridge.data.SimData as SimData
+import ns.bridge.io.WReader as WReader
+
+class TestMemory(unittest.TestCase):
+	'''Sampling memory use and estimating the size of the data.'''
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		Memory.reset()
+	
+	def tearDown(self):
+		Memory.disable()
+		Memory.reset()
+		shutil.rmtree(self.directory)
+	
+	def _weights(self, contents):
+		path = os.path.join(self.directory, "mesh.w")
+		fileHandle = open(path, "w")
+		try:
+			fileHandle.write(contents)
+		finally:
+			fileHandle.close()
+		weights = WReader.WReader()
+		weights.read(path)
+		return weights
+	
+	def testSamples(self):
+		'''	Samples are only taken while enabled.'''
+		Memory.sample("ignored")
+		self.assertEqual([], Memory.samples())
+		Memory.enable()
+		Memory.sample("scene")
+		Memory.sample("sim")
+		samples = Memory.samples()
+		self.assertEqual([ "scene", "sim" ], [ phase for (phase, seconds, bytes) in samples ])
+		self.failUnless(samples[0][1] <= samples[1][1])
+		for (phase, seconds, bytes) in samples:
+			self.failUnless(bytes >= 0)
+		if sys.platform.startswith("linux"):
+			self.failUnless(Memory.rss() > 0)
+			self.failUnless(Memory.peakRss() >= Memory.rss())
+	
+	def testSimData(self):
+		'''	Sim data memory grows with the number of samples.'''
+		simData = SimData.SimData()
+		agent = simData.agent("soldier_1")
+		agent.addSample("root", 0, [ 0.0 ] * 6)
+		small = simData.memoryUsage()
+		for frame in range(1, 1001):
+			agent.addSample("root", frame, [ 1.0 ] * 6)
+		large = simData.memoryUsage()
+		self.failUnless(large - small >= 1000 * 6 * 8)
+		self.failUnless(large - small < 2 * 1000 * 6 * 8)
+		self.assertEqual(agent.memoryUsage() + Memory.sizeOf(simData._agents), large)
+	
+	def testWeights(self):
+		'''	Weights tables count their non-zero weights, and agent types
+			their weights tables.'''
+		weights = self._weights("deformer 0 root\ndeformer 1 spine\n0: 0 1.0\n1: 0 0.5 1 0.5\n2: 1 1.0\n")
+		self.assertEqual(3, len(weights.weights))
+		usage = weights.memoryUsage()
+		self.failUnless(usage >= 4 * Memory.sizeOf(0.0) + 3 * Memory.sizeOf([ 0, 0 ]))
+		
+		agentSpec = AgentSpec.AgentSpec()
+		base = agentSpec.memoryUsage()
+		geometry = AgentSpec.Geometry()
+		geometry.weightsData = weights
+		agentSpec.geoDB.addGeometry(geometry)
+		self.assertEqual(base + usage, agentSpec.memoryUsage())
+	
+	def testReport(self):
+		'''	The report is written as JSON.'''
+		self.assertEqual('{"a":[1,2.5,"x\\\\\\"y"],"b":{"c":null,"d":true}}',
+						 Json.toJson({ "b" : { "d" : True, "c" : None }, "a" : [ 1, 2.5, 'x\\"y' ] }))
+		# JSON has no infinity or NaN
+		infinity = 1e300 * 1e300
+		self.assertEqual("[null,null,-1.5]", Json.toJson([ infinity, infinity - infinity, -1.5 ]))
+		Memory.enable()
+		Memory.sample("scene")
+		fileName = os.path.join(self.directory, "memory.json")
+		Memory.write(fileName, { "simData" : { "agents" : 2 } })
+		fileHandle = open(fileName, "r")
+		try:
+			report = fileHandle.read()
+		finally:
+			fileHandle.close()
+		self.failUnless('"samples":[{"phase":"scene","rss":' in report)
+		self.failUnless('"structures":{"simData":{"agents":2}}' in report)
+		try:
+			import json
+		except ImportError:
+			return
+		self.assertEqual(2, json.loads(report)["structures"]["simData"]["agents"])
+	
+suite = unittest.TestLoader().loadTestsFromTestCase(TestMemory)
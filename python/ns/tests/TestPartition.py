@@ -0,0 +1,178 @@
+# The MIT License
+#	
+# Copyright (c) 2008 James Piechota
+#	
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import sys
+import os
+import os.path
+import shutil
+import tempfile
+import unittest
+
+import ns.bridge.data.AgentSpec as AgentSpec
+import ns.bridge.data.Partition as Partition
+
+class FakeWeights:
+	def __init__(self, numVertices, deformers):
+		self.weights = [ {} ] * numVertices
+		self.deformers = deformers
+
+class TestPartition(unittest.TestCase):
+	'''Dividing agents into shards of balanced import cost.'''
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		Partition._vertexCounts.clear()
+		
+	def tearDown(self):
+		shutil.rmtree(self.directory)
+		Partition._vertexCounts.clear()
+	
+	def _write(self, name, contents):
+		path = os.path.join(self.directory, name)
+		fileHandle = open(path, "w")
+		try:
+			fileHandle.write(contents)
+		finally:
+			fileHandle.close()
+		return path
+	
+	def _geometry(self, name, numVertices, weights=None):
+		geometry = AgentSpec.Geometry()
+		geometry.name = name
+		geometry.file = self._write("%s.obj" % name, "v 0 0 0\n" * numVertices + "f 1 2 3\n")
+		geometry.weightsData = weights
+		return geometry
+	
+	def testBalance(self):
+		'''	Expensive agents are spread out rather than grouped by id.'''
+		# Ids 1-10 are ten times the cost of ids 11-40
+		costs = [ (id, 10.0) for id in range(1, 11) ] + [ (id, 1.0) for id in range(11, 41) ]
+		shards = Partition.lpt(costs, 4)
+		self.assertEqual(4, len(shards))
+		ids = []
+		for (load, shardIds) in shards:
+			ids.extend(shardIds)
+			self.assertEqual(sorted(shardIds), shardIds)
+		ids.sort()
+		self.assertEqual(range(1, 41), ids)
+		# Equal ranges of 10 ids would put all of the expensive agents in
+		# one 100 second shard
+		self.assertEqual(33.0, max([ load for (load, shardIds) in shards ]))
+		self.assertEqual(32.0, min([ load for (load, shardIds) in shards ]))
+	
+	def testPlan(self):
+		'''	Shards are costed from the features of the agent types.'''
+		light = AgentSpec.AgentSpec()
+		light.jointData = [ "root" ]
+		heavy = AgentSpec.AgentSpec()
+		heavy.jointData = [ "root" ] * 50
+		entries = [ Partition.InventoryEntry(1, "heavy", 0),
+					Partition.InventoryEntry(2, "heavy", 0),
+					Partition.InventoryEntry(3, "light", 0),
+					Partition.InventoryEntry(4, "light", 0),
+					Partition.InventoryEntry(7, "unknown", 0) ]
+		model = Partition.CostModel({ "agents" : 1.0, "joints" : 1.0 })
+		shards = Partition.plan(entries, { "light" : light, "heavy" : heavy }, 2, model)
+		self.assertEqual(2, len(shards))
+		self.assertEqual([ [ 1, 7 ], [ 2, 3, 4 ] ], [ shard.ids for shard in shards ])
+		self.assertEqual("2-4", shards[1].ranges())
+		self.assertEqual(55.0, shards[1].cost)
+		self.assertEqual(52.0, shards[1].features["joints"])
+		self.assertEqual(1.0, shards[1].features["shards"])
+		# The unknown type costs as much as the average type
+		self.assertEqual(51.0 + 26.5, shards[0].cost)
+		
+		# Never more shards than agents
+		self.assertEqual(5, len(Partition.plan(entries, {}, 10, model)))
+		# and no shards at all when there are no agents
+		self.assertEqual([], Partition.plan([], {}, 4, model))
+	
+	def testTypeFeatures(self):
+		'''	Geometry, vertices and weights of an agent type.'''
+		agentSpec = AgentSpec.AgentSpec()
+		agentSpec.jointData = [ "root", "spine" ]
+		agentSpec.geoDB.addGeometry(self._geometry("body", 10, FakeWeights(10, [ "root", "spine" ])))
+		option = AgentSpec.Option()
+		option.name = "hat"
+		option.inputs = [ self._geometry("cap", 3), self._geometry("helmet", 5) ]
+		for input in option.inputs:
+			agentSpec.geoDB.addGeometry(input)
+		agentSpec.geoDB.addOption(option)
+		
+		features = Partition.typeFeatures(agentSpec)
+		self.assertEqual(2.0, features["joints"])
+		self.assertEqual(2.0, features["geometry"])
+		self.assertEqual(14.0, features["vertices"])
+		self.assertEqual(20.0, features["weights"])
+		self.assertEqual(0.0, features["chunkedVertices"])
+		
+		features = Partition.typeFeatures(agentSpec, "duplicate")
+		self.assertEqual(0.0, features["weights"])
+		self.assertEqual(10.0, features["chunkedVertices"])
+		
+		features = Partition.typeFeatures(agentSpec, loadGeometry=False)
+		self.assertEqual(0.0, features["geometry"])
+	
+	def testCalibrate(self):
+		'''	Calibration recovers the cost of each feature from timings.'''
+		truth = Partition.CostModel({ "agents" : 0.5, "joints" : 0.02, "vertices" : 0.001,
+									  "shards" : 3.0, "geometry" : 0.0, "weights" : 0.0,
+									  "chunkedVertices" : 0.0, "simBytes" : 0.0 })
+		observations = []
+		for i in range(1, 30):
+			features = dict.fromkeys(Partition.kFeatures, 0.0)
+			features["shards"] = 1.0
+			features["agents"] = 10.0 * i
+			features["joints"] = 400.0 * ((i * 7) % 11 + 1)
+			features["vertices"] = 5000.0 * ((i * 3) % 13 + 1)
+			observations.append((features, truth.cost(features)))
+		model = Partition.CostModel()
+		model.calibrate(observations, 0.0001)
+		for name in [ "agents", "joints", "vertices", "shards" ]:
+			self.assertAlmostEqual(1.0, model.coefficients[name] / truth.coefficients[name], 2)
+		
+		path = os.path.join(self.directory, "costs.txt")
+		model.write(path)
+		other = Partition.CostModel()
+		other.read(path)
+		self.assertEqual(model.coefficients, other.coefficients)
+	
+	def testInventory(self):
+		'''	Agents and their sim sizes are found from the .amc files.'''
+		simDir = os.path.join(self.directory, "sim")
+		os.mkdir(simDir)
+		self._write("sim/soldier.1.amc", "x" * 100)
+		self._write("sim/horse.3.amc", "x" * 300)
+		self._write("sim/horse.2.amc", "x" * 200)
+		self._write("sim/horse.amf", "x" * 10)
+		
+		entries = Partition.inventory(simDir, ".amc")
+		self.assertEqual([ 1, 2, 3 ], [ entry.id for entry in entries ])
+		self.assertEqual([ "soldier", "horse", "horse" ], [ entry.agentType for entry in entries ])
+		self.assertEqual([ 100, 200, 300 ], [ entry.simBytes for entry in entries ])
+		
+		entries = Partition.inventory(simDir, ".amc", selection=Partition.Selection.Selection([ "2-5" ]))
+		self.assertEqual([ 2, 3 ], [ entry.id for entry in entries ])
+		
+		entries = Partition.inventory("", ".apf", numAgents=4)
+		self.assertEqual([ 1, 2, 3, 4 ], [ entry.id for entry in entries ])
+		
+suite = unittest.TestLoader().loadTestsFromTestCase(TestPartition)
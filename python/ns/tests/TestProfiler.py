@@ -0,0 +1,145 @@
+# The MIT License
+#	
+# Copyright (c) 2008 James Piechota
+#	
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import sys
+import os
+import os.path
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+import ns.py.Errors as Errors
+import ns.py.Profiler as Profiler
+
+@Profiler.profiled("leaf")
+def leaf(seconds):
+	'''Sleeps.'''
+	time.sleep(seconds)
+
+@Profiler.profiled()
+def branch():
+	leaf(0.02)
+	leaf(0.02)
+	time.sleep(0.02)
+
+class TestProfiler(unittest.TestCase):
+	'''Timing nested scopes and merging and exporting the results.'''
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		Profiler.reset()
+		Profiler.enable()
+	
+	def tearDown(self):
+		Profiler.disable()
+		Profiler.reset()
+		shutil.rmtree(self.directory)
+	
+	def testNesting(self):
+		'''	Calls, inclusive and exclusive time are kept per path.'''
+		Profiler.push("root")
+		branch()
+		leaf(0.01)
+		Profiler.pop()
+		
+		stats = Profiler.stats()
+		self.assertEqual([ ("root",), ("root", "branch"), ("root", "branch", "leaf"), ("root", "leaf") ],
+						 sorted(stats.keys()))
+		self.assertEqual(2, stats[("root", "branch", "leaf")].count)
+		self.assertEqual(1, stats[("root", "leaf")].count)
+		root = stats[("root",)]
+		branchStat = stats[("root", "branch")]
+		self.failUnless(branchStat.inclusive >= 0.06)
+		self.failUnless(0.02 <= branchStat.exclusive < 0.05)
+		self.assertAlmostEqual(branchStat.inclusive - stats[("root", "branch", "leaf")].inclusive,
+							   branchStat.exclusive, 6)
+		self.failUnless(root.inclusive >= branchStat.inclusive + 0.01)
+		self.failUnless(root.exclusive < 0.01)
+		self.assertEqual("leaf", leaf.__name__)
+		self.assertEqual("Sleeps.", leaf.__doc__)
+	
+	def testDisabled(self):
+		'''	Nothing is recorded while the profiler is off.'''
+		Profiler.disable()
+		Profiler.push("root")
+		branch()
+		Profiler.pop()
+		self.assertEqual({}, Profiler.stats())
+	
+	def testThreads(self):
+		'''	Each thread nests its scopes separately.'''
+		def work():
+			Profiler.push("worker")
+			leaf(0.01)
+			Profiler.pop()
+		Profiler.push("main")
+		threads = [ threading.Thread(target=work) for i in range(3) ]
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+		Profiler.pop()
+		stats = Profiler.stats()
+		self.assertEqual(3, stats[("worker", "leaf")].count)
+		self.assertEqual(1, stats[("main",)].count)
+	
+	def testMerge(self):
+		'''	Saved profiles add to the current one.'''
+		branch()
+		fileName = os.path.join(self.directory, "worker.prof")
+		Profiler.save(fileName)
+		saved = Profiler.stats()[("branch", "leaf")]
+		Profiler.load(fileName)
+		merged = Profiler.stats()[("branch", "leaf")]
+		self.assertEqual(4, merged.count)
+		self.assertAlmostEqual(2 * saved.inclusive, merged.inclusive, 6)
+		
+		fileHandle = open(fileName, "a")
+		fileHandle.write("stat\tmany\t0.1\t0.1\tbranch\n")
+		fileHandle.close()
+		self.assertRaises(Errors.BadArgumentError, Profiler.load, fileName)
+	
+	def testExport(self):
+		'''	The report lists every scope and the trace every call.'''
+		branch()
+		Profiler.export(os.path.join(self.directory, "import"))
+		
+		fileHandle = open(os.path.join(self.directory, "import.txt"), "r")
+		try:
+			lines = fileHandle.read().split("\n")
+		finally:
+			fileHandle.close()
+		self.assertEqual([ "1", "branch" ], lines[1].split()[2:])
+		self.assertEqual([ "2", "leaf" ], lines[2].split()[2:])
+		
+		fileHandle = open(os.path.join(self.directory, "import.json"), "r")
+		try:
+			trace = fileHandle.read()
+		finally:
+			fileHandle.close()
+		self.failUnless(trace.startswith('{"traceEvents":['))
+		self.assertEqual(3, trace.count('"ph":"X"'))
+		self.assertEqual(2, trace.count('"name":"leaf"'))
+		self.failUnless(os.path.exists(os.path.join(self.directory, "import.prof")))
+	
+suite = unittest.TestLoader().loadTestsFromTestCase(TestProfiler)
@@ -0,0 +1,98 @@
+# The MIT License
+#	
+# Copyright (c) 2008 James Piechota
+#	
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import sys
+import os
+import os.path
+import shutil
+import tempfile
+import time
+import unittest
+
+import ns.py.Scheduler as Scheduler
+
+class TestScheduler(unittest.TestCase):
+	'''Running jobs concurrently on a fixed number of workers.'''
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+	
+	def tearDown(self):
+		shutil.rmtree(self.directory)
+	
+	def _job(self, name, code):
+		return Scheduler.Job(name,
+							 [ sys.executable, "-c", code ],
+							 os.path.join(self.directory, "%s.log" % name))
+	
+	def testConcurrent(self):
+		'''	Jobs overlap, but never more than numWorkers at a time.'''
+		scheduler = Scheduler.Scheduler(2)
+		for i in range(4):
+			scheduler.add(self._job("job%d" % i, "import time; time.sleep(0.3)"))
+		finished = []
+		self.assertEqual([], scheduler.run(finished.append, interval=0.01))
+		self.assertEqual(4, len(finished))
+		
+		jobs = scheduler.jobs
+		for job in jobs:
+			running = [ other for other in jobs if other.startTime <= job.startTime < other.endTime ]
+			self.failUnless(len(running) <= 2)
+		# The first two jobs ran side by side
+		self.failUnless(jobs[1].startTime < jobs[0].endTime)
+	
+	def testFailure(self):
+		'''	Failed jobs are returned and output goes to the job's log.'''
+		scheduler = Scheduler.Scheduler(2)
+		good = scheduler.add(self._job("good", "print 'shard written'"))
+		bad = scheduler.add(self._job("bad", "import sys; sys.exit(3)"))
+		missing = scheduler.add(Scheduler.Job("missing", [ os.path.join(self.directory, "noSuchProgram") ]))
+		failed = scheduler.run(interval=0.01)
+		self.assertEqual([ bad, missing ], failed)
+		self.assertEqual(3, bad.returnCode)
+		self.failUnless(good.succeeded())
+		log = open(good.logFile, "r")
+		try:
+			self.assertEqual("shard written", log.read().strip())
+		finally:
+			log.close()
+	
+	def testRetry(self):
+		'''	Failed jobs are retried after a growing delay.'''
+		marker = os.path.join(self.directory, "marker")
+		# Fails until it has run twice
+		code = "import os, sys; n = os.path.exists(%r) and 2 or 1; open(%r, 'w'); print 'attempt', n; sys.exit(n < 2)" % (marker, marker)
+		scheduler = Scheduler.Scheduler(1)
+		flaky = scheduler.add(self._job("flaky", code))
+		bad = scheduler.add(self._job("bad", "import sys; sys.exit(1)"))
+		finished = []
+		failed = scheduler.run(finished.append, interval=0.01, retries=2, backoff=0.05)
+		self.assertEqual([ bad ], failed)
+		self.assertEqual([ flaky, bad ], finished)
+		self.assertEqual(2, flaky.attempts)
+		self.assertEqual(3, bad.attempts)
+		log = open(flaky.logFile, "r")
+		try:
+			self.assertEqual([ "attempt 1", "### Attempt 2", "attempt 2" ], log.read().split("\n")[:3])
+		finally:
+			log.close()
+	
+suite = unittest.TestLoader().loadTestsFromTestCase(TestScheduler)
@@ -0,0 +1,84 @@
+# The MIT License
+#	
+# Copyright (c) 2008 James Piechota
+#	
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import sys
+import os
+import unittest
+
+import ns.bridge.data.Selection as Selection
+
+class TestSelection(unittest.TestCase):
+	'''Interval based selections.'''
+	def setUp(self):
+		pass
+	
+	def tearDown(self):
+		pass
+	
+	def testAddRanges(self):
+		'''	Ranges are merged when they overlap or touch.'''
+		selection = Selection.Selection()
+		selection.addRanges(["10-20", "5", "30-40", "21-25", "18-32", "7-6"])
+		self.assertEqual([(5, 5), (10, 40)], selection.intervals())
+		self.assertEqual(["5", "10-40"], selection.ranges())
+		self.assertEqual(32, len(selection))
+		selection.addRanges(["6-9"])
+		self.assertEqual([(5, 40)], selection.intervals())
+	
+	def testLargeRange(self):
+		selection = Selection.Selection(["1-2000000"])
+		self.assertEqual(2000000, len(selection))
+		self.failUnless(selection.contains(1))
+		self.failUnless(selection.contains(2000000))
+		self.failIf(selection.contains(0))
+		self.failIf(selection.contains(2000001))
+	
+	def testContains(self):
+		selection = Selection.Selection(["1-3", "7", "10-12"])
+		ids = [ id for id in range(15) if selection.contains(id) ]
+		self.assertEqual([1, 2, 3, 7, 10, 11, 12], ids)
+	
+	def testUnion(self):
+		a = Selection.Selection(["1-5", "20-30"])
+		b = Selection.Selection(["6-10", "25-40", "50"])
+		self.assertEqual(["1-10", "20-40", "50"], a.union(b).ranges())
+	
+	def testIntersection(self):
+		a = Selection.Selection(["1-5", "20-30"])
+		b = Selection.Selection(["4-22", "25", "29-40"])
+		self.assertEqual(["4-5", "20-22", "25", "29-30"], a.intersection(b).ranges())
+		self.assertEqual(0, len(a.intersection(Selection.Selection(["6-19"]))))
+	
+	def testSelectionGroup(self):
+		'''	A group contains the union of its selections.'''
+		group = Selection.SelectionGroup()
+		self.failUnless(group.contains(12345))
+		group.addSelection("a", Selection.Selection(["1-10"]))
+		group.addSelection("b", Selection.Selection(["100-200"]))
+		self.failUnless(group.contains(5))
+		self.failUnless(group.contains(150))
+		self.failIf(group.contains(50))
+		group.addAnonymousSelection(["50"])
+		self.failUnless(group.contains(50))
+		self.assertEqual(["1-10", "50", "100-200"], group.index().ranges())
+		
+suite = unittest.TestLoader().loadTestsFromTestCase(TestSelection)
@@ -0,0 +1,130 @@
+# The MIT License
+#	
+# Copyright (c) 2008 James Piechota
+#	
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import sys
+import os
+import unittest
+
+import ns.bridge.data.AgentRegistry as AgentRegistry
+import ns.bridge.data.AgentSpec as AgentSpec
+import ns.bridge.data.Agent as Agent
+import ns.bridge.data.Selection as Selection
+import ns.bridge.data.SimData as SimData
+
+class TestSimData(unittest.TestCase):
+	'''Agent registry and index keyed sim data.'''
+	def setUp(self):
+		pass
+	
+	def tearDown(self):
+		pass
+	
+	def testRegistry(self):
+		registry = AgentRegistry.AgentRegistry()
+		self.assertEqual(0, registry.register("man_12"))
+		self.assertEqual(1, registry.register("woman_3", agentType="lady"))
+		self.assertEqual(2, registry.register("prop"))
+		self.assertEqual(0, registry.register("man_12"))
+		self.assertEqual(3, len(registry))
+		self.assertEqual(0, registry.index("man_12"))
+		self.assertEqual(["man", "lady", "prop"], registry.types)
+		self.assertEqual([12, 3, -1], registry.ids.tolist())
+		self.failUnless("prop" in registry)
+		self.assertRaises(KeyError, registry.index, "dog_1")
+	
+	def testAgents(self):
+		'''	Sim data is keyed by registry index.'''
+		registry = AgentRegistry.AgentRegistry()
+		simData = SimData.SimData(registry=registry)
+		agentSim = simData.agent("man_5")
+		agentSim.addSample("pelvis", 1, [ 1.0, 2.0 ])
+		self.failUnless(agentSim is simData.agent("man_5"))
+		self.failUnless(agentSim is simData.agentByIndex(registry.index("man_5")))
+		self.assertEqual(registry.index("man_5"), agentSim.index())
+		self.assertEqual([ agentSim ], simData.agents())
+	
+	def testSelection(self):
+		'''	Agents outside the selection get no sim data.'''
+		selectionGroup = Selection.SelectionGroup()
+		selectionGroup.addAnonymousSelection(["1-10"])
+		simData = SimData.SimData(selectionGroup)
+		self.assertEqual(None, simData.agent("man_11"))
+		self.assertEqual(None, simData.agent("man_11"))
+		self.failUnless(simData.agent("man_10"))
+		self.assertEqual(["man_10"], [ a.name() for a in simData.agents() ])
+		self.assertEqual(2, len(simData.registry()))
+		
+	def testChannelLayout(self):
+		'''	Agents of a type share one channel layout.'''
+		agentSpec = AgentSpec.AgentSpec()
+		for (name, order, dof) in [ ("pelvis", [ AgentSpec.kRZ, AgentSpec.kRX, AgentSpec.kRY,
+												 AgentSpec.kTX, AgentSpec.kTY, AgentSpec.kTZ ],
+									 [ True ] * 6),
+									("thigh", [ AgentSpec.kTX, AgentSpec.kTY, AgentSpec.kTZ,
+												AgentSpec.kRX, AgentSpec.kRY, AgentSpec.kRZ ],
+									 [ False, False, False, True, False, True ]) ]:
+			joint = AgentSpec.Joint(agentSpec)
+			joint.name = name
+			joint.order = order
+			joint.dof = dof
+			agentSpec.joints[name] = joint
+		
+		layout = agentSpec.channelLayout()
+		self.failUnless(layout is agentSpec.channelLayout())
+		self.assertEqual(8, len(layout))
+		self.assertEqual({ "pelvis" : 0, "thigh" : 6 }, layout.offsets)
+		self.assertEqual(("thigh", AgentSpec.kRZ), layout.slots[7])
+		
+		agents = []
+		for id in range(2):
+			agentSim = SimData.Agent("man_%d" % id)
+			agentSim.addSample("pelvis", 1, [ 3.0, 1.0, 2.0, 4.0, 5.0, 6.0 ])
+			agentSim.addSample("thigh", 1, [ 7.0, 8.0 ])
+			agentSim.addSample("extra", 1, [ 9.0 ])
+			agent = Agent.Agent()
+			agent.agentSpec = agentSpec
+			agent.setSimData(agentSim)
+			agents.append(agent)
+		
+		(a, b) = [ agent.simData() for agent in agents ]
+		self.failUnless(layout is a.channelLayout())
+		self.failUnless(a.joint("thigh")._order is b.joint("thigh")._order)
+		self.assertEqual(["pelvis", "thigh"], sorted([ j.name() for j in a.joints() ]))
+		self.assertEqual(1.0, a.joint("pelvis").sample("rx", 1))
+		self.assertEqual(4.0, a.joint("pelvis").sample("tx", 1))
+		self.assertEqual(8.0, b.joint("thigh").sample("rz", 1))
+		self.assertEqual(0.0, b.joint("thigh").sample("tx", 1))
+	
+	def testEmptyChannelLayout(self):
+		'''	A layout with no free channels is still built only once.'''
+		agentSpec = AgentSpec.AgentSpec()
+		joint = AgentSpec.Joint(agentSpec)
+		joint.name = "pelvis"
+		joint.order = [ AgentSpec.kTX, AgentSpec.kTY, AgentSpec.kTZ ]
+		joint.dof = [ False ] * 3
+		agentSpec.joints[joint.name] = joint
+		
+		layout = agentSpec.channelLayout()
+		self.assertEqual(0, len(layout))
+		self.failUnless(layout is agentSpec.channelLayout())
+		
+suite = unittest.TestLoader().loadTestsFromTestCase(TestSimData)
@@ -0,0 +1,106 @@
+# The MIT License
+#	
+# Copyright (c) 2008 James Piechota
+#	
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import sys
+import os
+import random
+import unittest
+
+import ns.bridge.data.SkinChunks as SkinChunks
+
+def _dominant(faceCounts, faceVertices, weights, numDeformers):
+	'''The original per-deformer loop, kept as the reference.'''
+	dominant = []
+	position = 0
+	for count in faceCounts:
+		vertices = faceVertices[position:position + count]
+		position += count
+		maxWeight = 0
+		primeDeformer = 0
+		for i in range(numDeformers):
+			weight = 0
+			for vtx in vertices:
+				weight += weights[vtx][i]
+			if weight > maxWeight:
+				maxWeight = weight
+				primeDeformer = i
+		dominant.append(primeDeformer)
+	return dominant
+
+class TestSkinChunks(unittest.TestCase):
+	'''Assigning faces to their dominant deformer for chunk skinning.'''
+	def setUp(self):
+		pass
+	
+	def tearDown(self):
+		pass
+	
+	def testSparseWeights(self):
+		(offsets, influences, values) = SkinChunks.sparseWeights([ [ 0.0, 1.0, 0.0 ],
+																   [ 0.0, 0.0, 0.0 ],
+																   [ 0.5, 0.0, 0.5 ] ])
+		self.assertEqual([ 0, 1, 1, 3 ], list(offsets))
+		self.assertEqual([ 1, 0, 2 ], list(influences))
+		self.assertEqual([ 1.0, 0.5, 0.5 ], list(values))
+	
+	def testTies(self):
+		'''	Ties go to the lowest deformer, uninfluenced faces to deformer 0.'''
+		weights = [ [ 0.0, 0.5, 0.5 ],
+					[ 0.0, 0.5, 0.5 ],
+					[ 0.0, 0.0, 0.0 ],
+					[ 0.0, 0.0, 1.0 ] ]
+		faceCounts = [ 2, 1, 2 ]
+		faceVertices = [ 0, 1, 2, 2, 3 ]
+		dominant = SkinChunks.dominantDeformers(faceCounts, faceVertices,
+												SkinChunks.sparseWeights(weights))
+		self.assertEqual([ 1, 0, 2 ], list(dominant))
+		self.assertEqual(_dominant(faceCounts, faceVertices, weights, 3), list(dominant))
+	
+	def testRandomMeshes(self):
+		'''	Same assignment as the per-deformer loop.'''
+		rand = random.Random(3)
+		for trial in range(20):
+			numVertices = rand.randint(1, 60)
+			numDeformers = rand.randint(1, 12)
+			weights = []
+			for v in range(numVertices):
+				vertex = [ 0.0 ] * numDeformers
+				for k in range(rand.randint(0, 4)):
+					vertex[rand.randint(0, numDeformers - 1)] = rand.choice([ 0.25, 0.5, rand.random() ])
+				weights.append(vertex)
+			faceCounts = [ rand.randint(3, 5) for f in range(rand.randint(1, 80)) ]
+			faceVertices = [ rand.randint(0, numVertices - 1) for i in range(sum(faceCounts)) ]
+			dominant = SkinChunks.dominantDeformers(faceCounts, faceVertices,
+													SkinChunks.sparseWeights(weights))
+			self.assertEqual(_dominant(faceCounts, faceVertices, weights, numDeformers), list(dominant))
+	
+	def testFaceGroups(self):
+		groups = SkinChunks.faceGroups([ 2, 0, 2, 2, 0 ], 4)
+		self.assertEqual([ [ 1, 4 ], [], [ 0, 2, 3 ], [] ], groups)
+	
+	def testRanges(self):
+		self.assertEqual([ (0, 2), (5, 5), (7, 8) ], SkinChunks.ranges([ 0, 1, 2, 5, 7, 8 ]))
+		self.assertEqual([], SkinChunks.ranges([]))
+		self.assertEqual([ (3, 4), (6, 6), (9, 11) ], SkinChunks.gaps([ 0, 1, 2, 5, 7, 8 ], 12))
+		self.assertEqual([ (0, 0) ], SkinChunks.gaps([ 1, 2 ], 3))
+		self.assertEqual([], SkinChunks.gaps([ 0, 1, 2 ], 3))
+		
+suite = unittest.TestLoader().loadTestsFromTestCase(TestSkinChunks)
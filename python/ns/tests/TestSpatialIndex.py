@@ -0,0 +1,124 @@
+# The MIT License
+#	
+# Copyright (c) 2008 James Piechota
+#	
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import sys
+import os
+import random
+import unittest
+from StringIO import StringIO
+
+import ns.bridge.data.Agent as Agent
+import ns.bridge.data.AgentSpec as AgentSpec
+import ns.bridge.data.Selection as Selection
+import ns.bridge.data.SimData as SimData
+import ns.bridge.data.SpatialIndex as SpatialIndex
+import ns.bridge.io.CallsheetReader as CallsheetReader
+
+def _distance2(a, b):
+	return sum([ (a[i] - b[i]) ** 2 for i in range(3) ])
+
+class TestSpatialIndex(unittest.TestCase):
+	'''Range and nearest neighbour queries over agent positions.'''
+	def setUp(self):
+		rand = random.Random(7)
+		self.positions = {}
+		self.index = SpatialIndex.SpatialIndex(cellSize=5.0)
+		for id in range(1, 501):
+			position = (rand.uniform(-50, 50), rand.uniform(0, 2), rand.uniform(-50, 50))
+			self.positions[id] = position
+			self.index.add(id, position)
+	
+	def tearDown(self):
+		pass
+	
+	def testInBox(self):
+		low = (-10.0, -1.0, 5.0)
+		high = (12.0, 1.0, 30.0)
+		expected = [ id for (id, p) in self.positions.items()
+					 if low[0] <= p[0] <= high[0] and low[1] <= p[1] <= high[1] and low[2] <= p[2] <= high[2] ]
+		expected.sort()
+		self.assertEqual(expected, self.index.inBox(low, high))
+		self.assertEqual([], self.index.inBox((500, 0, 500), (600, 1, 600)))
+	
+	def testInRadius(self):
+		centre = (3.0, 0.0, -7.0)
+		expected = [ id for (id, p) in self.positions.items() if _distance2(centre, p) <= 15.0 ** 2 ]
+		expected.sort()
+		self.failUnless(expected)
+		self.assertEqual(expected, self.index.inRadius(centre, 15.0))
+	
+	def testNearest(self):
+		for point in [ (0.0, 0.0, 0.0), (49.0, 1.0, -49.0), (300.0, 0.0, 0.0) ]:
+			distances = [ (_distance2(point, p), id) for (id, p) in self.positions.items() ]
+			distances.sort()
+			expected = [ id for (d, id) in distances[:5] ]
+			self.assertEqual(expected, self.index.nearest(point, 5))
+		self.assertEqual(500, len(self.index.nearest((0.0, 0.0, 0.0), 1000)))
+	
+	def testBoxes(self):
+		'''	Boxes spanning several cells are found from any of them.'''
+		index = SpatialIndex.SpatialIndex(cellSize=1.0)
+		index.add(1, (0.0, 0.0, 0.0), (10.0, 1.0, 10.0))
+		index.add(2, (20.0, 0.0, 20.0))
+		self.assertEqual([1], index.inBox((9.5, 0.0, 9.5), (9.6, 0.0, 9.6)))
+		self.assertEqual([1], index.inRadius((12.0, 0.0, 5.0), 2.5))
+		self.assertEqual([1, 2], index.nearest((11.0, 0.0, 11.0), 2))
+	
+	def testCallsheet(self):
+		'''	Query callsheet placements and feed a SelectionGroup.'''
+		callsheet = StringIO('''1 man.1 1 0 0 0 0 1 0 0 0 0 1 0 0 0 0 1 cdl man.cdl
+2 man.2 1 0 0 0 0 1 0 0 0 0 1 0 10 0 0 1 cdl man.cdl
+3 man.3 1 0 0 0 0 1 0 0 0 0 1 0 100 0 0 1 cdl man.cdl
+''')
+		index = SpatialIndex.fromCallsheet(CallsheetReader.load(callsheet))
+		selectionGroup = Selection.SelectionGroup()
+		selectionGroup.addSelection("hero", SpatialIndex.selection(index.inRadius((5.0, 0.0, 0.0), 6.0)))
+		self.failUnless(selectionGroup.contains(1))
+		self.failUnless(selectionGroup.contains(2))
+		self.failIf(selectionGroup.contains(3))
+	
+	def testRootPosition(self):
+		'''	Root channels are used where there is sim data.'''
+		agentSpec = AgentSpec.AgentSpec()
+		root = AgentSpec.Joint(agentSpec)
+		root.name = "pelvis"
+		agentSpec.joints[root.name] = root
+		agentSpec.jointData.append(root)
+		agent = Agent.Agent()
+		agent.id = 4
+		agent.agentSpec = agentSpec
+		agent.placement[12:15] = [ 1.0, 2.0, 3.0 ]
+		agentSim = SimData.Agent("man_4")
+		for frame in range(10, 13):
+			agentSim.addSample("pelvis", frame, [ float(frame), 0.0, -float(frame), 0.0, 0.0, 0.0 ])
+		agent.setSimData(agentSim)
+		
+		self.assertEqual((11.0, 0.0, -11.0), SpatialIndex.rootPosition(agent, 11))
+		self.assertEqual((1.0, 2.0, 3.0), SpatialIndex.rootPosition(agent, 9))
+		self.assertEqual(((10.0, 0.0, -12.0), (12.0, 0.0, -10.0)),
+						 SpatialIndex.sweptBounds(agent, 10, 12))
+		index = SpatialIndex.fromSweptBounds([ agent ], 10, 12)
+		self.assertEqual([4], index.inBox((11.5, -1.0, -10.5), (11.6, 1.0, -10.4)))
+		index = SpatialIndex.fromAgents([ agent ], 12)
+		self.assertEqual([], index.inBox((11.5, -1.0, -10.5), (11.6, 1.0, -10.4)))
+		
+suite = unittest.TestLoader().loadTestsFromTestCase(TestSpatialIndex)
@@ -0,0 +1,126 @@
+# The MIT License
+#	
+# Copyright (c) 2008 James Piechota
+#	
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+
+import sys
+import os
+import os.path
+import shutil
+import tempfile
+import unittest
+
+import ns.bridge.io.CDLReader as CDLReader
+import ns.bridge.io.CallsheetReader as CallsheetReader
+import ns.bridge.data.Partition as Partition
+import ns.bridge.data.Scene as Scene
+import ns.bridge.data.Sim as Sim
+import ns.bench.Synthetic as Synthetic
+
+class TestSynthetic(unittest.TestCase):
+	'''Synthetic setups are complete and can be read back.'''
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+	
+	def tearDown(self):
+		shutil.rmtree(self.directory)
+	
+	def _load(self, setup):
+		scene = Scene.Scene()
+		scene.setMas(setup.masFile)
+		return (scene, Sim.Sim(scene, setup.simDir, setup.simType, setup.callsheet))
+	
+	def testAMC(self):
+		'''	Every agent of an AMC setup is loaded with its sim.'''
+		setup = Synthetic.generate(self.directory, simType=".amc", numAgents=7,
+								   numTypes=3, numJoints=5, numFrames=4,
+								   gridSize=3, numNodes=5)
+		(scene, sim) = self._load(setup)
+		self.assertEqual([ "type0", "type1", "type2" ], [ agentSpec.agentType for agentSpec in scene.agentSpecs() ])
+		self.assertEqual(7, scene.mas().numAgents)
+		self.assertEqual(3, len(scene.mas().locators))
+		self.failUnless(scene.mas().selectionGroup.selection("type1").contains(3))
+		
+		agents = sim.agents()
+		self.assertEqual(7, len(agents))
+		self.assertEqual("type2_7", agents[-1].name)
+		self.assertEqual("type2", agents[-1].agentSpec.agentType)
+		self.assertEqual((1, 4), sim.frameRange())
+		agentSim = agents[0].simData()
+		self.assertEqual(5, len(agentSim.joints()))
+		self.assertEqual(6, agentSim.joint("seg0").numChannels())
+		self.assertEqual(3, agentSim.joint("seg4").numChannels())
+		self.assertAlmostEqual(Synthetic.sample(1, 4, 2, 3)[1], agentSim.joint("seg4").sampleByIndex(1, 2), 4)
+	
+	def testAPF(self):
+		'''	An APF setup loads the same sim as the AMC one.'''
+		amc = Synthetic.generate("%s/amc" % self.directory, simType=".amc",
+								 numAgents=4, numJoints=3, numFrames=3)
+		apf = Synthetic.generate("%s/apf" % self.directory, simType=".apf",
+								 numAgents=4, numJoints=3, numFrames=3)
+		self.assertEqual(3, len(os.listdir(apf.simDir)))
+		
+		amcAgents = self._load(amc)[1].agents()
+		apfAgents = self._load(apf)[1].agents()
+		self.assertEqual([ agent.name for agent in amcAgents ], [ agent.name for agent in apfAgents ])
+		for i in range(len(amcAgents)):
+			for frame in range(1, 4):
+				self.assertEqual(amcAgents[i].simData().joint("seg1").sampleByIndex(2, frame),
+								 apfAgents[i].simData().joint("seg1").sampleByIndex(2, frame))
+	
+	def testGeometry(self):
+		'''	Meshes, weights, options and brains match the settings.'''
+		setup = Synthetic.generate(self.directory, simType="", numAgents=2,
+								   numTypes=1, numJoints=6, gridSize=4,
+								   numGeometry=3, influences=2, numNodes=9,
+								   numVariables=3)
+		(agentType, cdlFile) = setup.cdlFiles[0]
+		agentSpec = CDLReader.read(os.path.join(self.directory, cdlFile),
+								   CDLReader.kDefaultTokens + [ "fuzzy" ])
+		
+		self.assertEqual(6, len(agentSpec.joints))
+		self.assertEqual(5, len(agentSpec.variables))
+		self.assertEqual("height", agentSpec.scaleVar)
+		self.assertEqual(9, len([ node for node in agentSpec.brain._nodes if node ]))
+		geometries = agentSpec.geoDB.geometries()
+		self.assertEqual(3, len(geometries))
+		self.assertEqual(25, setup.numVertices)
+		self.assertEqual(25, Partition.vertexCount(geometries[0].file))
+		weights = geometries[0].weightsData
+		self.assertEqual(Synthetic.jointNames(6), weights.deformers)
+		self.assertEqual(25, len(weights.weights))
+		self.assertEqual(2, weights._maxInfluences)
+		for influences in weights.weights:
+			self.assertAlmostEqual(1.0, sum(influences), 5)
+	
+	def testReproducible(self):
+		'''	The same settings and seed write the same files.'''
+		first = Synthetic.generate("%s/first" % self.directory, numAgents=5, numFrames=2)
+		second = Synthetic.generate("%s/second" % self.directory, numAgents=5, numFrames=2)
+		third = Synthetic.generate("%s/third" % self.directory, numAgents=5, numFrames=2, seed=1)
+		self.assertEqual(open(first.callsheet).read(), open(second.callsheet).read())
+		self.assertNotEqual(open(first.callsheet).read(), open(third.callsheet).read())
+		
+		sheet = CallsheetReader.load(first.callsheet)
+		self.assertEqual([ 1, 2, 3, 4, 5 ], list(sheet.ids))
+		self.assertEqual([ "cdl/type0.cdl", "cdl/type1.cdl" ], sheet.cdlFiles)
+		self.assertEqual(sorted(Synthetic.variableNames(2)), sorted(sheet.variables.keys()))
+	
+suite = unittest.TestLoader().loadTestsFromTestCase(TestSynthetic)
@@ -24,6 +24,10 @@ import sys
 import os
 import random
 
+import ns.bridge.data.Agent as Agent
+import ns.bridge.data.AgentSpec as AgentSpec
+import ns.bridge.data.SimData as SimData
+
 class NotRandomValues(object):
 	
 	def __init__(self):
@@ -130,4 +134,253 @@ class NotRandom(object):
 		return self._getValues().randFloat()
 
 
+def _flatten(args):
+	names = []
+	for arg in args:
+		if isinstance(arg, (list, tuple)):
+			names.extend(arg)
+		else:
+			names.append(arg)
+	return names
+
+class RecordedCmds(object):
+	'''Stand-in for maya.cmds that records every command it is given in
+	   'calls' as (command, args, kwargs) tuples. It keeps just enough of a
+	   DAG (node paths, no attributes) to answer the naming queries the
+	   importer makes: createNode, group, parent, duplicate, ls, rename and
+	   listRelatives. getAttr answers from values given with setAttr, or
+	   from 'attrs', and anything else returns None. The answer to a
+	   command comes from the method named after it with a leading
+	   underscore.'''
+	def __init__(self):
+		self.calls = []
+		self.attrs = {}
+		self._paths = []
+	
+	def count(self, command=None):
+		'''Number of commands called, or of calls to 'command'.'''
+		if command is None:
+			return len(self.calls)
+		return len([ call for call in self.calls if call[0] == command ])
+	
+	def reset(self):
+		self.calls = []
+	
+	def __getattr__(self, command):
+		if command.startswith("_"):
+			raise AttributeError(command)
+		def call(*args, **kwargs):
+			self.calls.append((command, args, kwargs))
+			try:
+				reply = getattr(self, "_%s" % command)
+			except AttributeError:
+				return None
+			return reply(*args, **kwargs)
+		return call
+	
+	def _shortName(self, name):
+		return name.split("|")[-1]
+	
+	def _uniqueName(self, base):
+		shorts = [ self._shortName(path) for path in self._paths ]
+		name = base
+		i = 1
+		while name in shorts:
+			name = "%s%d" % (base, i)
+			i += 1
+		return name
+	
+	def _resolvePath(self, name):
+		if name.startswith("|"):
+			return name
+		matches = [ path for path in self._paths if (path + "|").endswith("|%s|" % name) ]
+		if 1 != len(matches):
+			raise KeyError("%s does not name exactly one node" % name)
+		return matches[0]
+	
+	def _pathName(self, path):
+		'''Shortest unique name of 'path', like Maya returns.'''
+		short = self._shortName(path)
+		if 1 == len([ p for p in self._paths if self._shortName(p) == short ]):
+			return short
+		return path
+	
+	def _replacePath(self, path, newPath):
+		'''Move the node at 'path', and everything below it, to 'newPath'.'''
+		for i in range(len(self._paths)):
+			if self._paths[i] == path or self._paths[i].startswith(path + "|"):
+				self._paths[i] = newPath + self._paths[i][len(path):]
+	
+	def _movePath(self, path, parent):
+		newPath = "%s|%s" % (parent, self._shortName(path))
+		self._replacePath(path, newPath)
+		return newPath
+	
+	def _createNode(self, type, name="", parent="", **kwargs):
+		path = "|%s" % self._uniqueName(name or type)
+		if parent:
+			path = self._resolvePath(parent) + path
+		self._paths.append(path)
+		return self._pathName(path)
+	
+	def _group(self, *args, **kwargs):
+		group = self._createNode("transform", kwargs.get("name", "group"), kwargs.get("parent", ""))
+		groupPath = self._resolvePath(group)
+		for name in _flatten(args):
+			self._movePath(self._resolvePath(name), groupPath)
+		return group
+	
+	def _spaceLocator(self, name="locator", **kwargs):
+		return [ self._createNode("locator", name) ]
+	
+	def _parent(self, *args, **kwargs):
+		names = _flatten(args)
+		if kwargs.get("world"):
+			parent = ""
+		else:
+			parent = self._resolvePath(names.pop())
+		return [ self._pathName(self._movePath(self._resolvePath(name), parent)) for name in names ]
+	
+	def _duplicate(self, *args, **kwargs):
+		copies = []
+		for name in _flatten(args):
+			path = self._resolvePath(name)
+			parent = path[:path.rindex("|")]
+			copy = "%s|%s" % (parent, self._uniqueName(self._shortName(path)))
+			for p in list(self._paths):
+				if p == path or p.startswith(path + "|"):
+					self._paths.append(copy + p[len(path):])
+			copies.append(self._pathName(copy))
+		return copies
+	
+	def _rename(self, name, newName, **kwargs):
+		path = self._resolvePath(name)
+		newPath = path[:path.rindex("|") + 1] + self._uniqueName(newName)
+		self._replacePath(path, newPath)
+		return self._pathName(newPath)
 	
+	def _ls(self, *args, **kwargs):
+		paths = []
+		for name in _flatten(args):
+			try:
+				path = self._resolvePath(name)
+			except KeyError:
+				continue
+			if kwargs.get("long"):
+				paths.append(path)
+			else:
+				paths.append(self._pathName(path))
+		return paths
+	
+	def _objExists(self, name):
+		return bool(self._ls(name))
+	
+	def _listRelatives(self, name, **kwargs):
+		path = self._resolvePath(name)
+		if kwargs.get("allDescendents"):
+			relatives = [ p for p in self._paths if p.startswith(path + "|") ]
+		else:
+			relatives = [ p for p in self._paths if p[:p.rindex("|")] == path ]
+		if not kwargs.get("fullPath"):
+			relatives = [ self._pathName(p) for p in relatives ]
+		return relatives or None
+	
+	def _setAttr(self, attr, *values, **kwargs):
+		if 1 == len(values):
+			self.attrs[attr] = values[0]
+		else:
+			self.attrs[attr] = values
+	
+	def _getAttr(self, attr, **kwargs):
+		if attr.endswith(".translate") or attr.endswith(".rotate"):
+			return [ self.attrs.get(attr, (0.0, 0.0, 0.0)) ]
+		return self.attrs.get(attr, 0)
+
+class ApiArray(list):
+	'''Stand-in for the OpenMaya array classes (MIntArray, MDoubleArray...)'''
+	def __init__(self, length=0, value=0):
+		list.__init__(self, [ value ] * length)
+	
+	def length(self):
+		return len(self)
+	
+	def set(self, value, index):
+		self[index] = value
+
+class ApiComponent(object):
+	'''Stand-in for MFnSingleIndexedComponent, create() returns the
+	   function set itself as the component.'''
+	def __init__(self):
+		self.type = None
+		self.completeData = 0
+	
+	def create(self, type):
+		self.type = type
+		return self
+	
+	def setCompleteData(self, count):
+		self.completeData = count
+
+class ApiFn(object):
+	kMeshVertComponent = 550
+
+def importMaya():
+	'''Make the maya modules importable outside of Maya so the importer's
+	   Maya layer can be tested against a RecordedCmds. Does nothing if
+	   Maya is available. Tests must still point the modules they exercise
+	   at their own RecordedCmds (see useCmds()).'''
+	try:
+		import maya.cmds
+	except ImportError:
+		import imp
+		maya = imp.new_module("maya")
+		maya.cmds = RecordedCmds()
+		maya.mel = imp.new_module("maya.mel")
+		maya.mel.eval = RecordedCmds().eval
+		maya.OpenMaya = imp.new_module("maya.OpenMaya")
+		maya.OpenMaya.MIntArray = ApiArray
+		maya.OpenMaya.MDoubleArray = ApiArray
+		maya.OpenMaya.MFnSingleIndexedComponent = ApiComponent
+		maya.OpenMaya.MFn = ApiFn
+		maya.OpenMayaAnim = imp.new_module("maya.OpenMayaAnim")
+		maya.OpenMayaMPx = imp.new_module("maya.OpenMayaMPx")
+		sys.modules["maya"] = maya
+		sys.modules["maya.cmds"] = maya.cmds
+		sys.modules["maya.mel"] = maya.mel
+		sys.modules["maya.OpenMaya"] = maya.OpenMaya
+		sys.modules["maya.OpenMayaAnim"] = maya.OpenMayaAnim
+		sys.modules["maya.OpenMayaMPx"] = maya.OpenMayaMPx
+
+def useCmds(modules, cmds):
+	'''Point the 'mc' of each module at 'cmds'. Returns what they used
+	   before, to hand back to restoreCmds().'''
+	previous = [ module.mc for module in modules ]
+	for module in modules:
+		module.mc = cmds
+	return previous
+
+def restoreCmds(modules, previous):
+	for i in range(len(modules)):
+		modules[i].mc = previous[i]
+
+def rootAgentSpec(rootName="pelvis"):
+	'''AgentSpec with a single root joint.'''
+	agentSpec = AgentSpec.AgentSpec()
+	root = AgentSpec.Joint(agentSpec)
+	root.name = rootName
+	agentSpec.joints[root.name] = root
+	agentSpec.jointData.append(root)
+	return agentSpec
+
+def rootPathAgent(agentSpec, id, path):
+	'''Agent of the single joint 'agentSpec' whose root is at path[i] on
+	   frame i + 1.'''
+	agent = Agent.Agent()
+	agent.id = id
+	agent.agentSpec = agentSpec
+	agentSim = SimData.Agent("man_%d" % id)
+	rootName = agentSpec.jointData[0].name
+	for i in range(len(path)):
+		agentSim.addSample(rootName, i + 1, list(path[i]) + [ 0.0, 0.0, 0.0 ])
+	agent.setSimData(agentSim)
+	return agent
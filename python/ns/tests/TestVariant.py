@@ -0,0 +1,109 @@
+# The MIT License
+#	
+# Copyright (c) 2008 James Piechota
+#	
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+import sys
+import os
+import unittest
+
+import ns.bridge.data.Agent as Agent
+import ns.bridge.data.AgentSpec as AgentSpec
+import ns.bridge.data.Variant as Variant
+
+def _geometry(name, id, material):
+	geometry = AgentSpec.Geometry()
+	geometry.name = name
+	geometry.id = id
+	geometry.file = "%s.obj" % name
+	geometry.material = material
+	return geometry
+
+class TestVariant(unittest.TestCase):
+	'''Variant signatures and clustering of agents that look the same.'''
+	def setUp(self):
+		self.agentSpec = AgentSpec.AgentSpec()
+		self.agentSpec.agentType = "man"
+		self.agentSpec.scaleVar = "height"
+		
+		# 'outfit' picks the shirt or the coat, the shirt texture varies
+		# with 'shirt'
+		shirtMaterial = AgentSpec.Material()
+		shirtMaterial.id = 1
+		shirtMaterial.rawColorMap = "maps/shirt_'shirt'.tif"
+		coatMaterial = AgentSpec.Material()
+		coatMaterial.id = 2
+		coatMaterial.rawColorMap = "maps/coat.tif"
+		self.agentSpec.materialData = [ None, shirtMaterial, coatMaterial ]
+		
+		geoDB = self.agentSpec.geoDB
+		geoDB.addGeometry(_geometry("body", 1, 2))
+		shirt = _geometry("shirt", 2, 1)
+		coat = _geometry("coat", 3, 2)
+		geoDB.addGeometry(shirt)
+		geoDB.addGeometry(coat)
+		option = AgentSpec.Option()
+		option.name = "outfit"
+		option.var = "outfit"
+		option.inputs = [ shirt, coat ]
+		geoDB.addOption(option)
+	
+	def tearDown(self):
+		pass
+	
+	def _agent(self, id, outfit, shirt, height=1.0):
+		agent = Agent.Agent()
+		agent.id = id
+		agent.agentSpec = self.agentSpec
+		agent.variableValues["outfit"] = outfit
+		agent.variableValues["shirt"] = shirt
+		agent.variableValues["height"] = height
+		return agent
+	
+	def testSignature(self):
+		signature = Variant.signature(self._agent(1, 0, 3))
+		self.assertEqual("man", signature[0])
+		geometry = list(signature[1])
+		geometry.sort()
+		self.assertEqual([ (1, 2, "maps/coat.tif"), (2, 1, "maps/shirt_3.tif") ], geometry)
+		self.assertEqual((1.0,), signature[3])
+	
+	def testIrrelevantVariables(self):
+		'''	Variables the chosen geometry doesn't use don't split variants.'''
+		self.assertEqual(Variant.signature(self._agent(1, 1, 3)),
+						 Variant.signature(self._agent(2, 1, 5)))
+		self.assertNotEqual(Variant.signature(self._agent(1, 0, 3)),
+							Variant.signature(self._agent(2, 0, 5)))
+		self.assertNotEqual(Variant.signature(self._agent(1, 1, 3, 1.0)),
+							Variant.signature(self._agent(2, 1, 3, 1.1)))
+	
+	def testCluster(self):
+		agents = [ self._agent(1, 0, 3),
+				   self._agent(2, 1, 3),
+				   self._agent(3, 1, 4),
+				   self._agent(4, 0, 3),
+				   self._agent(5, 1, 7),
+				   self._agent(6, 0, 2) ]
+		clusters = Variant.cluster(agents)
+		self.assertEqual([ [2, 3, 5], [1, 4], [6] ],
+						 [ [ agent.id for agent in variant.agents ] for variant in clusters ])
+		self.assertEqual("man", clusters[0].agentType())
+		self.assertEqual(3, len(clusters[0]))
+		
+suite = unittest.TestLoader().loadTestsFromTestCase(TestVariant)